@@ -1,9 +1,10 @@
 import os
 import sys
 import io
+import time
 import argparse
-from collections import defaultdict
 from datetime import datetime
+from itertools import accumulate
 
 from dotenv import load_dotenv
 
@@ -40,102 +41,50 @@ from src.data_loader import (
     resample_to_m15,
 )
 from src.pinescript_port import PineScriptStrategy
-
-
-def calculate_monthly_pnl(trades):
-    """
-    Tính PnL theo từng tháng từ danh sách trades.
-    
-    Returns:
-        dict: {(year, month): {'pnl': float, 'trades': int, 'wins': int, 'losses': int}}
-    """
-    monthly_stats = defaultdict(lambda: {'pnl': 0.0, 'trades': 0, 'wins': 0, 'losses': 0})
-    
-    for trade in trades:
-        if trade.exit_time is None:
-            continue
-        
-        # Group by exit time (khi trade đóng)
-        year = trade.exit_time.year
-        month = trade.exit_time.month
-        
-        key = (year, month)
-        monthly_stats[key]['pnl'] += trade.pnl
-        monthly_stats[key]['trades'] += 1
-        
-        if trade.pnl > 0:
-            monthly_stats[key]['wins'] += 1
-        elif trade.pnl < 0:
-            monthly_stats[key]['losses'] += 1
-    
-    return dict(monthly_stats)
+from src.memory_profile import MemoryProfiler
+from src.metrics import monthly_pnl, print_statistics
+from src.backtest_results import BacktestResult
+from src.result_cache import CachedRun, ResultCache, data_fingerprint
+from src.strategy_config import StrategyConfig, TRADE_SIDES
 
 
 def print_monthly_pnl(trades, initial_capital):
     """
-    In bảng thống kê PnL theo tháng.
+    In bảng thống kê PnL theo tháng (metrics.monthly_pnl).
     """
-    if not trades:
-        return
-    
-    monthly_stats = calculate_monthly_pnl(trades)
-    
-    if not monthly_stats:
+    table = monthly_pnl(trades, initial_capital)
+    if table.empty:
         return
     
     print("\n" + "="*90)
     print("THỐNG KÊ PNL THEO THÁNG")
     print("="*90)
     
-    # Sort by year, month
-    sorted_months = sorted(monthly_stats.keys())
-    
     # Header
     print(f"{'Tháng':<15} {'Trades':>8} {'Win':>6} {'Loss':>6} {'Win%':>7} {'PnL (USD)':>15} {'PnL %':>10}")
     print("-" * 90)
     
-    # Running equity để tính % theo equity cuối tháng trước
-    running_equity = initial_capital
-    total_pnl = 0.0
-    
-    for year, month in sorted_months:
-        stats = monthly_stats[(year, month)]
-        
-        pnl = stats['pnl']
-        trades_count = stats['trades']
-        wins = stats['wins']
-        losses = stats['losses']
-        win_rate = (wins / trades_count * 100) if trades_count > 0 else 0.0
-        
-        # % tính theo equity đầu tháng
-        pnl_pct = (pnl / running_equity * 100) if running_equity > 0 else 0.0
-        
-        # Month name
-        month_name = datetime(year, month, 1).strftime('%Y-%m')
-        
-        # Color coding
-        pnl_sign = '+' if pnl >= 0 else ''
-        
+    # pnl_pct tính theo equity đầu tháng
+    for month, row in table.iterrows():
+        pnl_sign = '+' if row['pnl'] >= 0 else ''
         print(
-            f"{month_name:<15} "
-            f"{trades_count:>8} "
-            f"{wins:>6} "
-            f"{losses:>6} "
-            f"{win_rate:>6.1f}% "
-            f"{pnl_sign}{pnl:>14,.0f} "
-            f"{pnl_sign}{pnl_pct:>9.2f}%"
+            f"{str(month):<15} "
+            f"{int(row['trades']):>8} "
+            f"{int(row['wins']):>6} "
+            f"{int(row['losses']):>6} "
+            f"{row['win_rate']:>6.1f}% "
+            f"{pnl_sign}{row['pnl']:>14,.0f} "
+            f"{pnl_sign}{row['pnl_pct']:>9.2f}%"
         )
-        
-        running_equity += pnl
-        total_pnl += pnl
     
     # Footer
     print("-" * 90)
     
     # Totals
-    total_trades = sum(s['trades'] for s in monthly_stats.values())
-    total_wins = sum(s['wins'] for s in monthly_stats.values())
-    total_losses = sum(s['losses'] for s in monthly_stats.values())
+    total_trades = int(table['trades'].sum())
+    total_wins = int(table['wins'].sum())
+    total_losses = int(table['losses'].sum())
+    total_pnl = float(table['pnl'].sum())
     overall_win_rate = (total_wins / total_trades * 100) if total_trades > 0 else 0.0
     total_pnl_pct = (total_pnl / initial_capital * 100) if initial_capital > 0 else 0.0
     
@@ -152,7 +101,7 @@ def print_monthly_pnl(trades, initial_capital):
     )
     
     print(f"\nVốn đầu:  ${initial_capital:>12,.0f}")
-    print(f"Vốn cuối: ${running_equity:>12,.0f}")
+    print(f"Vốn cuối: ${table['end_equity'].iloc[-1]:>12,.0f}")
     print("="*90)
 
 
@@ -212,7 +161,56 @@ Các năm có sẵn: {', '.join(map(str, AVAILABLE_YEARS))}
         help=f'Năm để backtest ({min(AVAILABLE_YEARS)}-{max(AVAILABLE_YEARS)}), không chỉ định = dùng file mặc định'
     )
     
-    return parser.parse_args(args)
+    parser.add_argument(
+        '--side',
+        default='both',
+        choices=TRADE_SIDES,
+        help='Chỉ chạy 1 side (long/short) để research nhanh hơn, mặc định both'
+    )
+    
+    parser.add_argument(
+        '--engine',
+        default='python',
+        choices=['python', 'numba'],
+        help='Engine backtest: python (bản tham chiếu) hoặc numba (kernel JIT, cần pip install numba)'
+    )
+    
+    parser.add_argument(
+        '--verify-parity',
+        action='store_true',
+        help='Chạy cả 2 engine trên cùng data và so sánh từng trade (dùng sau khi sửa logic strategy)'
+    )
+    
+    parser.add_argument(
+        '--hot-path-stats',
+        action='store_true',
+        help='Ghi time series kích thước state / số lần truy cập row (mỗi lần đóng M15) ra output/hot_path_*.csv'
+    )
+    
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='Đo memory (tracemalloc + RSS) theo từng phase và in report vào log'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        default=None,
+        help='Bật cache kết quả backtest trong thư mục này (key = data + config + source engine), vd .backtest_cache. '
+             'Cache hit không chạy lại strategy nên không có log từng lệnh lúc chạy; block thống kê được in lại '
+             'từ kết quả đã lưu (không có summary của engine)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Bỏ qua cache, luôn chạy lại backtest (tự bật khi dùng --hot-path-stats / --profile-memory)'
+    )
+    
+    parsed = parser.parse_args(args)
+    if parsed.hot_path_stats and parsed.engine != 'python':
+        parser.error('--hot-path-stats chỉ hỗ trợ --engine python')
+    return parsed
 
 
 if __name__ == "__main__":
@@ -241,9 +239,15 @@ if __name__ == "__main__":
     print(f"⏰ Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     if args.year:
         print(f"📅 Backtesting year: {args.year}")
+    if args.side != 'both':
+        print(f"↕️  Trade side: {args.side} only")
+    if args.engine != 'python':
+        print(f"⚙️  Engine: {args.engine}")
     print("=" * 90)
     print()
     
+    profiler = MemoryProfiler(enabled=args.profile_memory)
+    
     # ============================================================================
     # DUKASCOPY DATA CONFIGURATION
     # ============================================================================
@@ -262,6 +266,7 @@ if __name__ == "__main__":
     # Configure data source based on year argument
     DUKASCOPY_CSV = get_data_file_for_year(args.year)
     
+    profiler.begin("load")
     # Try Dukascopy first, fallback to legacy OANDA CSV if not found
     if os.path.exists(DUKASCOPY_CSV):
         print(f"Loading XAUUSD M1 data from Dukascopy CSV: {DUKASCOPY_CSV}")
@@ -284,13 +289,91 @@ if __name__ == "__main__":
 
     if m1_data.empty:
         raise SystemExit("No M1 data loaded. Check data source / file path / format.")
+    profiler.track_frame("m1_data (loaded)", m1_data)
 
+    profiler.begin("resample")
     print("Resampling M1 -> M15 ...")
     m15_data = resample_to_m15(m1_data)
+    profiler.track_frame("m15_data (resampled)", m15_data)
 
-    print("Running PineScript 1-1 port strategy backtest (M1/M15 CSV)...")
-    strat = PineScriptStrategy(m1_data=m1_data, m15_data=m15_data)
-    trades = strat.run()
+    config = StrategyConfig(trade_side=args.side)
+    
+    if args.verify_parity:
+        from src.numba_engine import compare_engines
+        print("Verifying parity: python engine vs numba engine ...")
+        report = compare_engines(m1_data, m15_data, config)
+        print(f"\n=== ENGINE PARITY ===")
+        print(f"Trades: python={report.reference_trades}, numba={report.compiled_trades}")
+        print(f"Final equity: python={report.final_equity_reference:,.2f}, numba={report.final_equity_compiled:,.2f}")
+        for i, diff in report.mismatches[:20]:
+            print(f"  Trade #{i + 1}: " + ", ".join(f"{k}: {a} != {b}" for k, (a, b) in diff.items()))
+        print("✅ Parity OK" if report.ok else "❌ Parity FAILED")
+        sys.stdout = tee.terminal
+        tee.close()
+        raise SystemExit(0 if report.ok else 1)
+    
+    # Cache: cùng data + config + source engine => dùng lại trades / equity đã lưu
+    use_cache = args.cache_dir is not None and not (args.no_cache or args.hot_path_stats or args.profile_memory)
+    cache = ResultCache(args.cache_dir) if use_cache else None
+    cache_key = cache.key(data_fingerprint(m1_data, m15_data), config, args.engine) if cache else None
+    cached = cache.get(cache_key) if cache else None
+    
+    if cached is not None:
+        print(f"♻️  Cache hit ({cache_key[:12]}), dùng lại kết quả đã lưu trong {args.cache_dir}")
+        strat = cached
+        trades = cached.trades
+        # Strategy không chạy nên in lại block thống kê từ kết quả đã lưu; entry từ batch engine không có
+        # equity_curve => dựng lại từ PnL các lệnh đóng
+        equity_curve = cached.equity_curve
+        if equity_curve is None:
+            closed_pnl = [t.pnl for t in trades if t.exit_time is not None]
+            equity_curve = list(accumulate(closed_pnl, initial=cached.initial_capital))
+        print_statistics(trades, equity_curve, cached.initial_capital, start=m1_data.index[0], end=m1_data.index[-1])
+    else:
+        profiler.begin("construct")
+        print("Running PineScript 1-1 port strategy backtest (M1/M15 CSV)...")
+        if args.engine == 'numba':
+            from src.numba_engine import CompiledStrategy
+            strat = CompiledStrategy(m1_data=m1_data, m15_data=m15_data, config=config)
+        else:
+            strat = PineScriptStrategy(
+                m1_data=m1_data,
+                m15_data=m15_data,
+                config=config,
+                collect_hot_path_stats=args.hot_path_stats,
+            )
+            profiler.track_frame("strategy.m1", strat.m1)
+            profiler.track_frame("strategy.m15", strat.m15)
+        
+        profiler.begin("run")
+        t0 = time.time()
+        trades = strat.run()
+        
+        if cache is not None:
+            result = BacktestResult.from_trades(
+                config=config,
+                trades=trades,
+                initial_capital=strat.initial_capital,
+                equity_curve=strat.equity_curve,
+                backtest_duration_seconds=time.time() - t0,
+            )
+            cache.put(
+                cache_key,
+                CachedRun(
+                    result=result,
+                    initial_capital=strat.initial_capital,
+                    equity_curve=strat.equity_curve,
+                    paper_state=strat.paper_state,
+                ),
+            )
+            cache.evict()
+    
+    profiler.begin("report")
+    
+    if args.hot_path_stats:
+        hot_path_path = f"output/hot_path_{timestamp}{year_suffix}.csv"
+        strat.hot_path_frame().to_csv(hot_path_path)
+        print(f"📊 Hot-path stats saved to: {hot_path_path}")
 
     # ============================================================================
     # MONTHLY PNL STATISTICS
@@ -349,6 +432,7 @@ if __name__ == "__main__":
     # ============================================================================
     # AUTO VISUALIZATION
     # ============================================================================
+    profiler.begin("visualize")
     if len(trades) > 0:
         print("\n" + "="*80)
         print("CREATING BACKTEST VISUALIZATION")
@@ -368,6 +452,8 @@ if __name__ == "__main__":
             print(f"⚠️  Lỗi khi tạo visualization: {e}")
     else:
         print("\n⚠️  Không có trade nào để visualize.")
+    profiler.end()
+    profiler.print_report()
     
     # ============================================================================
     # CLEANUP & FOOTER
@@ -1,59 +1,158 @@
+"""
+Chạy optimizer.
+
+    python optimize_strategy.py --spec sweeps/rr.toml              # sweep khai báo trong file (xem src/run_spec.py)
+    python optimize_strategy.py --spec sweeps/rr.toml --dry-run    # kiểm tra spec, số config / worker
+    python optimize_strategy.py                                    # không có --spec: cấu hình qua biến môi trường OPTIMIZER_*
+"""
+
+import argparse
 import os
-import time
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from src.data_loader import load_dukascopy_csv, resample_to_m15
-from src.optimizer import GridSearchOptimizer
-from src.results_analyzer import ResultsAnalyzer
+from src.run_spec import OptimizationSpec, load_spec, run_spec
 
 
-if __name__ == "__main__":
-    # Load data giống main.py
-    DUKASCOPY_CSV = os.environ.get("DUKASCOPY_CSV_PATH", "dukascopy_xauusd_m1.csv")
-
-    if not os.path.exists(DUKASCOPY_CSV):
-        raise SystemExit(
-            f"Dukascopy CSV not found at {DUKASCOPY_CSV}. "
-            "Set DUKASCOPY_CSV_PATH or download data first."
-        )
-
-    print(f"Loading XAUUSD M1 data from Dukascopy CSV: {DUKASCOPY_CSV}")
-    m1_data = load_dukascopy_csv(DUKASCOPY_CSV)
-    if m1_data.empty:
-        raise SystemExit("No M1 data loaded. Check data source / file path / format.")
-
-    print("Resampling M1 -> M15 ...")
-    m15_data = resample_to_m15(m1_data)
-
-    # Define parameter grid (ưu tiên R:R, trailing SL, ADX)
-    param_grid = {
-        "r_r_ratio_min": [1.5, 2.0],
-        "r_r_ratio_target": [2.0, 2.5],
-        # "trailing_sl_trigger": [1.5],
-        # "trailing_sl_level": [0.5],
-        # "adx_max_entry": [30.0],
-        # Các tham số khác có thể add thêm sau
-    }
-
-    print("Starting randomized grid search optimization (subset of configs)...")
-    optimizer = GridSearchOptimizer(m1_data=m1_data, m15_data=m15_data, param_grid=param_grid)
-
-    t0 = time.time()
-    # Dùng random subset để giảm thời gian: ví dụ tối đa 40 cấu hình, 2 core.
-    results = optimizer.run(n_jobs=1, max_configs=1, random_subset=True)
-    elapsed = time.time() - t0
-
-    print(f"Optimization finished in {elapsed:.1f} seconds. Total configs tested: {len(results)}")
-
-    analyzer = ResultsAnalyzer(results)
-    analyzer.print_top_configs(n=10)
-
-    # Optional: export để phân tích thêm
+# Search space mặc định khi chạy qua biến môi trường
+GRID_PARAMS = {
+    "r_r_ratio_min": [1.5, 2.0],
+    "r_r_ratio_target": [2.0, 2.5],
+    # "trailing_sl_trigger": [1.5],
+    # "trailing_sl_level": [0.5],
+    # "adx_max_entry": [30.0],
+    # Các tham số khác có thể add thêm sau
+}
+TPE_PARAMS = {
+    "r_r_ratio_min": {"low": 1.0, "high": 2.5},
+    "r_r_ratio_target": {"low": 1.5, "high": 3.5},
+}
+GENETIC_PARAMS = {
+    "r_r_ratio_target": {"low": 1.5, "high": 3.5},
+    "trailing_sl_trigger": {"low": 1.0, "high": 3.0},
+    "trading_sessions": {"subset": True},
+    "enable_base_breakdown_exit": [True, False],
+}
+ADAPTIVE_PARAMS = {"r_r_ratio_min": [1.0, 2.0, 3.0], "r_r_ratio_target": [1.5, 2.5, 3.5]}
+
+
+def spec_from_env() -> OptimizationSpec:
+    env = os.environ.get
+    # OPTIMIZER_ENGINE=numba để dùng kernel JIT (cần pip install numba)
+    # OPTIMIZER_ENGINE=batch để chạy nhiều config lockstep trong 1 lượt data / worker
+    # OPTIMIZER_ENGINE=fork: engine Python, config chạy chung đoạn đầu tới bar đầu tiên quyết định khác nhau
+    #     (lợi nhất khi sweep field chỉ dùng để so sánh: paper_*, adx_max_entry, timeout)
+    # OPTIMIZER_CACHE_DIR=<dir>: dùng lại kết quả của config đã chạy trên cùng data + cùng code
+    # OPTIMIZER_SEARCH=tpe: TPE search trên khoảng liên tục với OPTIMIZER_BUDGET config (mặc định 100)
+    # OPTIMIZER_SEARCH=genetic: genetic optimizer, OPTIMIZER_GENERATIONS (10) thế hệ x OPTIMIZER_POPULATION (24) cá thể
+    # OPTIMIZER_SEARCH=adaptive: grid thô rồi chia nhỏ quanh top config, OPTIMIZER_ROUNDS (3) round
+    # OPTIMIZER_SEARCH=halving: grid + successive halving (rung đầu OPTIMIZER_MIN_DAYS ngày, mặc định 90)
+    # OPTIMIZER_SEARCH=years: mỗi config chạy trên từng năm OPTIMIZER_YEARS (file download/ giống main.py --year),
+    #     xếp hạng theo OPTIMIZER_YEAR_OBJECTIVE (worst_year_profit_factor / median_return_pct / pnl_consistency)
+    # OPTIMIZER_SEARCH=walkforward: grid trên OPTIMIZER_TRAIN_DAYS (180) ngày, test OPTIMIZER_TEST_DAYS (30) ngày kế tiếp
+    search = env("OPTIMIZER_SEARCH", "grid")
+    # OPTIMIZER_STORE_PATH=<file.csv>: ghi từng kết quả ngay khi xong, chạy lại sẽ resume từ file
+    # Dừng sớm config hết hy vọng (kết quả dở dang, xếp cuối):
+    # OPTIMIZER_ABORT_MAX_DD=<% drawdown>, OPTIMIZER_ABORT_MAX_LOSSES=<lệnh thua liên tiếp>,
+    # OPTIMIZER_ABORT_MIN_PF=<profit factor sau 30 lệnh>, OPTIMIZER_ABORT_MIN_TRADES=<n>:<ngày>
+    abort = {}
+    if env("OPTIMIZER_ABORT_MAX_DD"):
+        abort["max_drawdown_pct"] = float(env("OPTIMIZER_ABORT_MAX_DD"))
+    if env("OPTIMIZER_ABORT_MAX_LOSSES"):
+        abort["max_consecutive_losses"] = int(env("OPTIMIZER_ABORT_MAX_LOSSES"))
+    if env("OPTIMIZER_ABORT_MIN_PF"):
+        abort["min_profit_factor"] = float(env("OPTIMIZER_ABORT_MIN_PF"))
+    if env("OPTIMIZER_ABORT_MIN_TRADES"):
+        trades, days = env("OPTIMIZER_ABORT_MIN_TRADES").split(":")
+        abort.update(min_trades=int(trades), min_trades_days=float(days))
+    # OPTIMIZER_OBJECTIVES=total_pnl,max_drawdown,total_trades,sharpe_ratio: xếp hạng theo Pareto front
+    #     ("-" trước tên = nhỏ hơn là tốt hơn) và export optimization_pareto_front.csv
+    objectives = [o for o in env("OPTIMIZER_OBJECTIVES", "").split(",") if o.strip()]
+    # OPTIMIZER_COORDINATOR_BIND=0.0.0.0:6000 (+ OPTIMIZER_AUTHKEY): grid chạy trên worker ở các máy khác
+    # (mỗi máy chạy optimizer_worker.py với cùng file data)
+    # OPTIMIZER_CLUSTER_LEASE_SECONDS (600) / OPTIMIZER_CLUSTER_MAX_ATTEMPTS (3): worker im lặng quá lâu
+    # (không heartbeat) => giao lại chunk, tối đa bấy nhiêu lần
+    cluster = None
+    if env("OPTIMIZER_COORDINATOR_BIND"):
+        cluster = {
+            "bind": env("OPTIMIZER_COORDINATOR_BIND"),
+            "authkey_env": "OPTIMIZER_AUTHKEY",
+            "workers": int(env("OPTIMIZER_CLUSTER_WORKERS", "4")),
+            "lease_seconds": float(env("OPTIMIZER_CLUSTER_LEASE_SECONDS", "600")),
+            "max_attempts": int(env("OPTIMIZER_CLUSTER_MAX_ATTEMPTS", "3")),
+        }
+
+    params, options, workers, max_configs = GRID_PARAMS, {}, -1, None
+    data = {"path": env("DUKASCOPY_CSV_PATH", "dukascopy_xauusd_m1.csv")}
+    if search == "tpe":
+        params, options = TPE_PARAMS, {"budget": int(env("OPTIMIZER_BUDGET", "100"))}
+    elif search == "genetic":
+        params = GENETIC_PARAMS
+        options = {
+            "generations": int(env("OPTIMIZER_GENERATIONS", "10")),
+            "population_size": int(env("OPTIMIZER_POPULATION", "24")),
+        }
+    elif search == "adaptive":
+        params, options = ADAPTIVE_PARAMS, {"rounds": int(env("OPTIMIZER_ROUNDS", "3"))}
+    elif search == "halving":
+        options = {"min_days": int(env("OPTIMIZER_MIN_DAYS", "90"))}
+    elif search == "walkforward":
+        options = {
+            "train_days": int(env("OPTIMIZER_TRAIN_DAYS", "180")),
+            "test_days": int(env("OPTIMIZER_TEST_DAYS", "30")),
+            "journal_dir": "walk_forward",
+        }
+    elif search == "years":
+        data = {"years": [int(y) for y in env("OPTIMIZER_YEARS", "2020,2021,2022,2023,2024,2025").split(",")]}
+        options = {"year_objective": env("OPTIMIZER_YEAR_OBJECTIVE", "worst_year_profit_factor")}
+    else:
+        # Dùng random subset để giảm thời gian: tối đa 1 cấu hình, 1 core.
+        # Worker chỉ trả summary; trade journal của top-K config ghi ra trade_journals/<config_key>.csv
+        workers, max_configs = 1, 1
+        options = {"journal_top_k": int(env("OPTIMIZER_JOURNAL_TOP_K", "0"))}
+    if search not in ("grid", "adaptive"):
+        cluster = None
+
+    return OptimizationSpec.from_dict(dict(
+        search=search,
+        params=params,
+        data=data,
+        engine=env("OPTIMIZER_ENGINE", "python"),
+        workers=workers,
+        objective=objectives or "profit_factor",
+        max_configs=max_configs,
+        store=env("OPTIMIZER_STORE_PATH"),
+        cache_dir=env("OPTIMIZER_CACHE_DIR"),
+        abort=abort,
+        cluster=cluster,
+        options=options,
+    ))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Optimize strategy parameters")
+    parser.add_argument("--spec", help="Sweep spec file (.json / .toml / .yaml)")
+    parser.add_argument("--workers", type=int, help="Override spec workers (-1 = all cores)")
+    parser.add_argument("--output-dir", help="Override spec output_dir")
+    parser.add_argument("--dry-run", action="store_true", help="Load data and print the run plan without backtesting")
+    args = parser.parse_args()
+
     try:
-        analyzer.export_to_csv("optimization_results.csv")
-    except Exception as e:
-        print(f"Could not export results to CSV: {e}")
+        spec = load_spec(args.spec) if args.spec else spec_from_env()
+    except (OSError, ValueError, ImportError) as e:
+        raise SystemExit(f"Invalid optimization spec: {e}")
+    if args.workers is not None:
+        spec.workers = args.workers
+    if args.output_dir is not None:
+        spec.output_dir = args.output_dir
 
+    try:
+        run_spec(spec, dry_run=args.dry_run)
+    except FileNotFoundError as e:
+        raise SystemExit(f"{e}. Set data.path / DUKASCOPY_CSV_PATH or download data first.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Worker cho optimizer nhiều máy (xem src/distributed.py).
+
+    OPTIMIZER_COORDINATOR=host:6000 OPTIMIZER_AUTHKEY=secret python optimizer_worker.py [n_processes]
+
+Data đọc từ DUKASCOPY_CSV_PATH, phải là cùng file với máy coordinator (worker tự kiểm tra fingerprint).
+"""
+
+import multiprocessing as mp
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.data_loader import load_dukascopy_csv, resample_to_m15
+from src.distributed import run_worker
+
+
+def _worker(address, authkey, m1_data, m15_data, cache_dir):
+    run_worker(address, authkey, m1_data, m15_data, cache_dir=cache_dir)
+
+
+if __name__ == "__main__":
+    host, port = os.environ.get("OPTIMIZER_COORDINATOR", "127.0.0.1:6000").rsplit(":", 1)
+    authkey = os.environ.get("OPTIMIZER_AUTHKEY", "").encode("utf-8")
+    if not authkey:
+        raise SystemExit("Set OPTIMIZER_AUTHKEY to the coordinator's authkey.")
+    n_processes = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+
+    DUKASCOPY_CSV = os.environ.get("DUKASCOPY_CSV_PATH", "dukascopy_xauusd_m1.csv")
+    if not os.path.exists(DUKASCOPY_CSV):
+        raise SystemExit(f"Dukascopy CSV not found at {DUKASCOPY_CSV}. Set DUKASCOPY_CSV_PATH.")
+    m1_data = load_dukascopy_csv(DUKASCOPY_CSV)
+    m15_data = resample_to_m15(m1_data)
+
+    args = ((host, int(port)), authkey, m1_data, m15_data, os.environ.get("OPTIMIZER_CACHE_DIR"))
+    processes = [mp.Process(target=_worker, args=args) for _ in range(n_processes)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
@@ -0,0 +1,74 @@
+"""
+Điều kiện dừng sớm 1 backtest đã hết hy vọng (dùng cho optimizer).
+
+Rule được check mỗi lần đóng 1 lệnh live (O(1) trên metrics.RunningStats, không duyệt lại trades)
+và 1 lần tại bar deadline của rule min_trades. Config bị dừng trả về kết quả dở dang với `pruned_reason` != None.
+Engine numba / batch encode cùng các rule vào config vector (xem numba_engine.config_vector) nên
+cả 3 engine dừng ở cùng 1 bar với cùng lý do.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import pandas as pd
+
+from .metrics import RunningStats
+
+
+# Lý do dừng; kernel numba lưu index + 1 (0 = chưa dừng)
+ABORT_REASONS = ("max_drawdown", "consecutive_losses", "profit_factor", "min_trades")
+
+
+@dataclass(frozen=True)
+class AbortRules:
+    """
+    Ví dụ (dừng khi drawdown 50% hoặc 30 lệnh thua liên tiếp, hoặc < 5 lệnh sau 60 ngày):
+        AbortRules(max_drawdown_pct=50, max_consecutive_losses=30, min_trades=5, min_trades_days=60)
+    """
+    max_drawdown_pct: Optional[float] = None       # % từ đỉnh equity
+    max_consecutive_losses: Optional[int] = None
+    min_profit_factor: Optional[float] = None      # profit factor tối thiểu ...
+    min_profit_factor_after: int = 30              # ... khi đã có ít nhất từng này lệnh
+    min_trades: Optional[int] = None               # số lệnh tối thiểu ...
+    min_trades_days: Optional[float] = None        # ... sau từng này ngày kể từ bar đầu tiên
+
+    def deadline_index(self, index: pd.DatetimeIndex) -> int:
+        """Bar check rule min_trades (bar đầu tiên từ mốc deadline), -1 nếu không dùng / ngoài data."""
+        if self.min_trades is None or self.min_trades_days is None or len(index) == 0:
+            return -1
+        idx = int(index.searchsorted(index[0] + pd.Timedelta(days=self.min_trades_days)))
+        return idx if idx < len(index) else -1
+
+    def key(self) -> str:
+        """Chuỗi ổn định để đưa vào cache key (kết quả đã bị cắt phụ thuộc rule)."""
+        return ",".join(f"{k}={v}" for k, v in sorted(asdict(self).items()))
+
+
+class AbortMonitor:
+    """Check rule cho 1 lần chạy (engine Python); số liệu đọc từ RunningStats của strategy."""
+
+    def __init__(self, rules: AbortRules) -> None:
+        self.rules = rules
+
+    def on_trade_closed(self, stats: RunningStats) -> Optional[str]:
+        """Gọi sau mỗi lệnh live (stats đã cập nhật). Trả về lý do dừng hoặc None."""
+        rules = self.rules
+        if rules.max_drawdown_pct is not None and stats.peak_equity > 0:
+            if stats.drawdown_pct >= rules.max_drawdown_pct:
+                return ABORT_REASONS[0]
+        if rules.max_consecutive_losses is not None and stats.consecutive_losses >= rules.max_consecutive_losses:
+            return ABORT_REASONS[1]
+        if (
+            rules.min_profit_factor is not None
+            and stats.n_trades >= rules.min_profit_factor_after
+            and stats.gross_loss < 0
+            and stats.profit_factor < rules.min_profit_factor
+        ):
+            return ABORT_REASONS[2]
+        return None
+
+    def at_deadline(self, n_trades: int) -> Optional[str]:
+        """Gọi ở bar deadline_index: đủ số lệnh tối thiểu chưa."""
+        if self.rules.min_trades is not None and n_trades < self.rules.min_trades:
+            return ABORT_REASONS[3]
+        return None
@@ -0,0 +1,225 @@
+"""
+Grid thô -> mịn: chạy grid thô, lấy top-k config theo objective rồi chia nhỏ khoảng tham số quanh
+chúng cho round sau.
+
+- Round 0: đúng param_grid (grid thô).
+- Mỗi round sau: bước của mọi param số (int / float có >= 2 giá trị trong grid) giảm 1/2; với mỗi
+  config trong top_k, sinh lưới {v - bước, v, v + bước} cho từng param số (kẹp trong [min, max] của
+  grid thô), param không phải số (bool, str, trading_sessions ...) giữ giá trị của config đó.
+- Điểm mới của mỗi round đi qua constraints + dedupe_configs như grid thô (bỏ config vô nghĩa, gộp
+  config trùng hành vi); `groups` giữ config_key chuẩn -> các điểm lưới gốc.
+- Điểm đã chạy (memo theo config_key, cả từ store) không chạy lại; mọi round dùng chung 1 session
+  (pool worker / shared memory / signal cache) như SuccessiveHalvingOptimizer.
+- Dừng khi hết `rounds`, mọi bước đã chạm min_steps, hoặc round không sinh thêm điểm mới.
+"""
+
+import itertools
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .abort_rules import AbortRules
+from .backtest_results import BacktestSummary
+from .distributed import ClusterConfig
+from .optimizer import GridSearchOptimizer, _BestSoFar, dedupe_configs
+from .result_store import ResultStore
+from .signal_cache import print_stage_report
+from .strategy_config import StrategyConfig, config_key
+
+
+@dataclass(frozen=True)
+class RefineRound:
+    """Thống kê 1 round."""
+    round: int
+    steps: Dict[str, float]     # bước hiện tại của từng param số
+    new_configs: int            # số backtest mới
+    reused: int                 # điểm của round đã có trong memo
+    best: float
+    best_config_key: str
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class AdaptiveGridOptimizer(GridSearchOptimizer):
+    """
+    Ví dụ:
+        grid = {"r_r_ratio_target": [1.5, 2.5, 3.5], "adx_max_entry": [20.0, 30.0, 40.0], "trade_side": ["both", "long"]}
+        opt = AdaptiveGridOptimizer(m1_data, m15_data, grid, rounds=3, top_k=3)
+        results = opt.run()          # r_r_ratio_target tới bước 0.125 quanh các vùng tốt
+        opt.rounds_report
+    """
+
+    def __init__(
+        self,
+        m1_data: pd.DataFrame,
+        m15_data: pd.DataFrame,
+        param_grid: Dict[str, Iterable],
+        engine: str = "python",
+        batch_size: int = 64,
+        cache_dir: Optional[str] = None,
+        share_signals: bool = True,
+        abort_rules: Optional[AbortRules] = None,
+        cluster: Optional[ClusterConfig] = None,
+        constraints: Sequence[Callable[[StrategyConfig], bool]] = (),
+        objective: str = "profit_factor",
+        maximize: bool = True,
+        rounds: int = 3,
+        top_k: int = 3,
+        min_steps: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """
+        Args:
+            objective: metric của BacktestSummary dùng để chọn vùng tốt
+            maximize: False => objective càng nhỏ càng tốt (vd max_drawdown); score được đổi dấu
+            rounds: số round chia nhỏ sau grid thô
+            top_k: số config tốt nhất được chia nhỏ xung quanh mỗi round
+            min_steps: bước nhỏ nhất của từng param (mặc định 1 cho int, không giới hạn cho float)
+        """
+        param_grid = {name: list(values) for name, values in param_grid.items()}
+        super().__init__(
+            m1_data, m15_data, param_grid, engine=engine, batch_size=batch_size,
+            cache_dir=cache_dir, share_signals=share_signals, abort_rules=abort_rules, cluster=cluster,
+            constraints=constraints,
+        )
+        if objective not in BacktestSummary.__dataclass_fields__:
+            raise ValueError(f"Unknown objective metric: {objective!r}")
+        self.objective = objective
+        self.maximize = maximize
+        self.rounds = rounds
+        self.top_k = top_k
+        self.min_steps = dict(min_steps or {})
+
+        # Param số chia nhỏ được: >= 2 giá trị, bước ban đầu = khoảng cách nhỏ nhất giữa 2 giá trị kề
+        self.bounds: Dict[str, Tuple[Any, Any]] = {}
+        self.initial_steps: Dict[str, float] = {}
+        for name, values in param_grid.items():
+            distinct = sorted(set(values)) if all(_is_number(v) for v in values) else []
+            if len(distinct) >= 2:
+                self.bounds[name] = (distinct[0], distinct[-1])
+                self.initial_steps[name] = min(b - a for a, b in zip(distinct, distinct[1:]))
+                if all(isinstance(v, int) for v in distinct):
+                    self.min_steps.setdefault(name, 1)
+
+        self.memo: Dict[str, BacktestSummary] = {}
+        # config_key chuẩn -> các điểm lưới gốc (mọi round), xem dedupe_configs
+        self.groups: Dict[str, List[StrategyConfig]] = {}
+        self.rounds_report: List[RefineRound] = []
+
+    def _rank_key(self, summary: BacktestSummary):
+        value = float(getattr(summary, self.objective))
+        if not self.maximize:
+            value = -value
+        return (not summary.pruned, -math.inf if math.isnan(value) else value, summary.total_pnl)
+
+    def _refine(
+        self, top: List[StrategyConfig], steps: Dict[str, float]
+    ) -> Tuple[List[StrategyConfig], Dict[str, List[StrategyConfig]]]:
+        """
+        Lưới {v - bước, v, v + bước} quanh từng config trong top, qua constraints + dedupe_configs
+        (giữ thứ tự). Trả về (config chuẩn, config_key chuẩn -> điểm lưới gốc).
+        """
+        points: List[StrategyConfig] = []
+        names = list(steps)
+        for config in top:
+            # Param không chia nhỏ (không phải số / bước đã chạm min_step) giữ giá trị của config
+            fixed = {name: getattr(config, name) for name in self.param_grid if name not in steps}
+            axes = []
+            for name in names:
+                low, high = self.bounds[name]
+                v, step = getattr(config, name), steps[name]
+                if isinstance(low, int) and isinstance(high, int):
+                    axis = {int(min(max(round(v + d * step), low), high)) for d in (-1, 0, 1)}
+                else:
+                    axis = {round(min(max(v + d * step, low), high), 10) for d in (-1, 0, 1)}
+                axes.append(sorted(axis))
+            for values in itertools.product(*axes):
+                cfg = StrategyConfig(**fixed, **dict(zip(names, values)))
+                if all(constraint(cfg) for constraint in self.constraints):
+                    points.append(cfg)
+        return dedupe_configs(points)
+
+    def _in_grid(self, config: StrategyConfig) -> bool:
+        """Config (vd lấy từ store) chỉ khác mặc định ở các field trong param_grid."""
+        return StrategyConfig(**{name: getattr(config, name) for name in self.param_grid}) == config
+
+    def run(self, n_jobs: int = -1, store_path: Optional[str] = None) -> List[BacktestSummary]:
+        """
+        Chạy grid thô + các round chia nhỏ, trả về summary của mọi điểm đã chạy (sort theo objective).
+        store_path: ResultStore CSV; điểm đã có trong store được dùng lại, điểm mới được ghi ngay.
+        """
+        configs, self.groups = dedupe_configs(self._generate_configs())
+        if self.share_signals and len(configs) > 1:
+            print_stage_report(configs, list(self.param_grid.keys()))
+
+        store = ResultStore(store_path) if store_path else None
+        if store is not None:
+            self.memo.update(
+                (s.config_key, s) for s in store.results() if s.config is not None and self._in_grid(s.config)
+            )
+        progress = _BestSoFar(total=len(configs), objective=(self.objective, self.maximize))
+        for summary in self.memo.values():
+            progress.offer(summary)
+
+        def on_result(summary: BacktestSummary) -> None:
+            if store is not None:
+                store.append(summary)
+            progress.update(summary)
+
+        steps = dict(self.initial_steps)
+        self.rounds_report = []
+        try:
+            with self._session(n_jobs, configs) as session:
+                for rnd in range(self.rounds + 1):
+                    keys = [config_key(c) for c in configs]
+                    pending = {k: c for k, c in zip(keys, configs) if k not in self.memo}
+                    progress.total = progress.done + len(pending)
+                    summaries = self._evaluate(
+                        list(pending.values()), [None] * len(pending), session, on_result
+                    )
+                    self.memo.update(zip(pending, summaries))
+                    self._record_round(rnd, steps, [self.memo[k] for k in keys], len(pending))
+
+                    # Round sau: giảm 1/2 bước các param chưa chạm min_step
+                    steps = {
+                        name: step / 2 for name, step in steps.items()
+                        if step / 2 >= self.min_steps.get(name, 0)
+                    }
+                    if rnd == self.rounds or not steps:
+                        break
+                    ranked = sorted(self.memo.values(), key=self._rank_key, reverse=True)
+                    top = [s.config for s in ranked[:self.top_k] if s.config is not None]
+                    configs, groups = self._refine(top, steps)
+                    for key, originals in groups.items():
+                        known = self.groups.setdefault(key, [])
+                        known.extend(o for o in originals if o not in known)
+                    if all(config_key(c) in self.memo for c in configs):
+                        print("[AdaptiveGrid] No new points to refine, stopping")
+                        break
+        finally:
+            if store is not None:
+                store.close()
+            if self.cache is not None:
+                self.cache.evict()
+
+        return sorted(self.memo.values(), key=self._rank_key, reverse=True)
+
+    def _record_round(self, rnd: int, steps: Dict[str, float], summaries: List[BacktestSummary], new: int) -> None:
+        best = max(summaries, key=self._rank_key)
+        report = RefineRound(
+            round=rnd,
+            steps=dict(steps),
+            new_configs=new,
+            reused=len(summaries) - new,
+            best=float(getattr(best, self.objective)),
+            best_config_key=best.config_key,
+        )
+        self.rounds_report.append(report)
+        step_text = ", ".join(f"{name}={step:g}" for name, step in steps.items()) or "-"
+        print(
+            f"[AdaptiveGrid] round {rnd}: steps {step_text} -> {report.new_configs} new, "
+            f"{report.reused} reused, round best {self.objective}={report.best:.4f} ({report.best_config_key})"
+        )
@@ -1,11 +1,67 @@
-from dataclasses import dataclass
-from typing import List
-import math
+from dataclasses import dataclass, field, fields, replace
+from typing import List, Optional
+import csv
+import os
 
-from .strategy_config import StrategyConfig
+import pandas as pd
+
+from .strategy_config import StrategyConfig, config_key
+from .metrics import PerformanceMetrics, compute_metrics
 from .pinescript_port import Trade
 
 
+@dataclass
+class BacktestSummary:
+    """
+    Bản rút gọn của BacktestResult (chỉ metrics + config key) mà worker optimizer trả về.
+    Không chứa trades nên pickle về parent chỉ ~200 bytes / config; config được parent
+    gắn lại từ list config của chính nó (cùng object, không tốn thêm RAM).
+    """
+
+    config_key: str
+
+    total_pnl: float
+    total_trades: int
+    winning_trades: int
+    losing_trades: int
+    win_rate: float
+    profit_factor: float
+    avg_win: float
+    avg_loss: float
+    max_drawdown: float
+    sharpe_ratio: float
+
+    backtest_duration_seconds: float
+
+    # Đường dẫn trade journal nếu worker đã ghi ra disk (chỉ cho config được yêu cầu)
+    journal_path: Optional[str] = None
+    config: Optional[StrategyConfig] = None
+
+    # Lý do bị dừng sớm (abort_rules.ABORT_REASONS); metrics chỉ tính tới lúc dừng
+    pruned_reason: Optional[str] = None
+
+    @property
+    def pruned(self) -> bool:
+        return self.pruned_reason is not None
+
+    def with_config(self, config: StrategyConfig) -> "BacktestSummary":
+        return replace(self, config=config)
+
+
+def write_trade_journal(trades: List[Trade], path: str) -> str:
+    """Ghi trade journal (1 dòng / trade, gồm cả paper trades) ra CSV."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    names = [f.name for f in fields(Trade)]
+    with open(path, "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(names)
+        for t in trades:
+            row = [getattr(t, n) for n in names]
+            row[names.index("direction")] = t.direction.name
+            writer.writerow(row)
+    return path
+
+
 @dataclass
 class BacktestResult:
     """
@@ -31,6 +87,12 @@ class BacktestResult:
     # Execution time
     backtest_duration_seconds: float
 
+    # Lý do bị dừng sớm theo abort rules (None = chạy hết data)
+    pruned_reason: Optional[str] = None
+
+    # Đủ bộ metrics (sortino, calmar, CAGR, exposure, thời gian giữ lệnh ...), xem metrics.py
+    metrics: Optional[PerformanceMetrics] = field(default=None, repr=False, compare=False)
+
     @classmethod
     def from_trades(
         cls,
@@ -39,66 +101,62 @@ class BacktestResult:
         initial_capital: float,
         equity_curve: List[float],
         backtest_duration_seconds: float,
+        pruned_reason: Optional[str] = None,
     ) -> "BacktestResult":
-        total_trades = len(trades)
-        wins = [t for t in trades if t.pnl > 0]
-        losses = [t for t in trades if t.pnl < 0]
-
-        total_profit = sum(t.pnl for t in wins)
-        total_loss = sum(t.pnl for t in losses)  # âm
-        total_pnl = total_profit + total_loss
-
-        winning_trades = len(wins)
-        losing_trades = len(losses)
-        win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0.0
-
-        avg_win = total_profit / winning_trades if winning_trades > 0 else 0.0
-        avg_loss = total_loss / losing_trades if losing_trades > 0 else 0.0
-
-        profit_factor = (
-            total_profit / abs(total_loss) if total_loss < 0 else math.inf if total_profit > 0 else 0.0
-        )
-
-        # Max drawdown từ equity_curve
-        max_drawdown = 0.0
-        peak = initial_capital
-        for eq in equity_curve:
-            if eq > peak:
-                peak = eq
-            drawdown = peak - eq
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
-
-        # Sharpe ratio đơn giản trên returns theo trade
-        returns = []
-        prev_eq = initial_capital
-        for eq in equity_curve:
-            if prev_eq > 0:
-                r = (eq - prev_eq) / prev_eq
-                returns.append(r)
-            prev_eq = eq
-
-        if len(returns) > 1:
-            mean_r = sum(returns) / len(returns)
-            var_r = sum((r - mean_r) ** 2 for r in returns) / (len(returns) - 1)
-            std_r = math.sqrt(var_r)
-            sharpe = (mean_r / std_r) * math.sqrt(len(returns)) if std_r > 0 else 0.0
-        else:
-            sharpe = 0.0
-
+        m = compute_metrics(trades, equity_curve, initial_capital)
         return cls(
             config=config,
             trades=trades,
-            total_pnl=total_pnl,
-            total_trades=total_trades,
-            winning_trades=winning_trades,
-            losing_trades=losing_trades,
-            win_rate=win_rate,
-            profit_factor=profit_factor,
-            avg_win=avg_win,
-            avg_loss=avg_loss,
-            max_drawdown=max_drawdown,
-            sharpe_ratio=sharpe,
+            total_pnl=m.total_pnl,
+            total_trades=m.total_trades,
+            winning_trades=m.winning_trades,
+            losing_trades=m.losing_trades,
+            win_rate=m.win_rate,
+            profit_factor=m.profit_factor,
+            avg_win=m.avg_win,
+            avg_loss=m.avg_loss,
+            max_drawdown=m.max_drawdown,
+            sharpe_ratio=m.sharpe_ratio,
             backtest_duration_seconds=backtest_duration_seconds,
+            pruned_reason=pruned_reason,
+            metrics=m,
+        )
+
+    def since(self, start: pd.Timestamp, initial_capital: float) -> "BacktestResult":
+        """
+        Chỉ giữ trade vào lệnh từ `start` (bỏ trade của đoạn warm-up); equity curve bắt đầu
+        từ equity tại thời điểm đó.
+        """
+        equity = initial_capital + sum(t.pnl for t in self.trades if t.entry_time < start)
+        kept = [t for t in self.trades if t.entry_time >= start]
+        curve = [equity]
+        for t in kept:
+            equity += t.pnl
+            curve.append(equity)
+        return BacktestResult.from_trades(
+            config=self.config,
+            trades=kept,
+            initial_capital=curve[0],
+            equity_curve=curve,
+            backtest_duration_seconds=self.backtest_duration_seconds,
+            pruned_reason=self.pruned_reason,
         )
 
+    def to_summary(self, journal_path: Optional[str] = None) -> BacktestSummary:
+        """Bỏ trades + config, chỉ giữ metrics và config key."""
+        return BacktestSummary(
+            config_key=config_key(self.config),
+            total_pnl=self.total_pnl,
+            total_trades=self.total_trades,
+            winning_trades=self.winning_trades,
+            losing_trades=self.losing_trades,
+            win_rate=self.win_rate,
+            profit_factor=self.profit_factor,
+            avg_win=self.avg_win,
+            avg_loss=self.avg_loss,
+            max_drawdown=self.max_drawdown,
+            sharpe_ratio=self.sharpe_ratio,
+            backtest_duration_seconds=self.backtest_duration_seconds,
+            journal_path=journal_path,
+            pruned_reason=self.pruned_reason,
+        )
@@ -0,0 +1,101 @@
+"""
+Lockstep multi-config backtest: chạy N StrategyConfig trong cùng 1 lượt qua data M1.
+
+GridSearchOptimizer mặc định chạy 1 PineScriptStrategy / config, nên mỗi config phải đọc lại toàn bộ
+OHLC và tính lại các phần không phụ thuộc config (pattern M15, nến đỏ/xanh, ADX).
+BatchBacktester tính các phần đó 1 lần (SharedBars) rồi advance state của cả batch bar-by-bar
+bằng kernel JIT trong numba_engine (state dạng struct-of-arrays, trục 0 = config).
+
+Hiệu quả nhất với grid chỉ khác nhau ở ngưỡng (adx_max_entry, r_r_ratio_target, trailing_sl_*...):
+mỗi adx_period / bộ trading_sessions khác nhau chỉ thêm 1 hàng vào bảng dùng chung.
+"""
+
+import time
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+from .abort_rules import AbortRules
+from .backtest_results import BacktestResult
+from .numba_engine import NUMBA_AVAILABLE, SharedBars, run_kernel
+from .strategy_config import StrategyConfig
+
+
+class BatchBacktester:
+    """
+    Chạy nhiều config lockstep trên cùng 1 bộ data.
+
+    Ví dụ:
+        backtester = BatchBacktester(m1_data, m15_data, batch_size=64)
+        results = backtester.run(configs)
+    """
+
+    def __init__(
+        self,
+        m1_data: pd.DataFrame,
+        m15_data: pd.DataFrame,
+        batch_size: int = 64,
+        capacity: int = 2048,
+        max_trades: int = 8192,
+        require_jit: bool = True,
+        shared: Optional[SharedBars] = None,
+        abort_rules: Optional[AbortRules] = None,
+    ) -> None:
+        """
+        Args:
+            batch_size: số config advance cùng lúc (giới hạn RAM state: ~capacity * 72 bytes / config
+                        cho zone/base/liquidity + max_trades * 96 bytes / config cho trades)
+            capacity: dung lượng mảng zone / base / liquidity mỗi side
+            max_trades: số trade tối đa mỗi config (gồm cả paper trades)
+            shared: SharedBars tính sẵn (signal cache); None => build trong run()
+            abort_rules: dừng sớm config hết hy vọng, config khác trong batch chạy tiếp
+        """
+        if require_jit and not NUMBA_AVAILABLE:
+            raise ImportError("Batch engine requires numba. Install it with: pip install numba")
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+
+        self.m1_data = m1_data
+        self.m15_data = m15_data
+        self.batch_size = batch_size
+        self.capacity = capacity
+        self.max_trades = max_trades
+        self.initial_capital = 1000
+        self.shared = shared
+        self.abort_rules = abort_rules
+
+    def run(self, configs: Sequence[StrategyConfig]) -> List[BacktestResult]:
+        """Chạy tất cả configs, trả về BacktestResult theo đúng thứ tự đầu vào."""
+        configs = list(configs)
+        if not configs:
+            return []
+
+        # Shared precompute 1 lần cho mọi batch (ADX mỗi adx_period, session mỗi bộ trading_sessions)
+        shared = self.shared
+        if shared is None or not all(shared.supports(c) for c in configs):
+            shared = SharedBars.build(self.m1_data, self.m15_data, configs)
+
+        results: List[BacktestResult] = []
+        for start in range(0, len(configs), self.batch_size):
+            batch = configs[start:start + self.batch_size]
+
+            t0 = time.time()
+            runs = run_kernel(
+                shared, batch, float(self.initial_capital), self.capacity, self.max_trades,
+                self.abort_rules,
+            )
+            # Thời gian chia đều cho các config trong batch
+            per_config = (time.time() - t0) / len(batch)
+
+            for run in runs:
+                results.append(
+                    BacktestResult.from_trades(
+                        config=run.config,
+                        trades=run.live_trades(shared.index),
+                        initial_capital=self.initial_capital,
+                        equity_curve=run.equity_curve,
+                        backtest_duration_seconds=per_config,
+                        pruned_reason=run.pruned_reason,
+                    )
+                )
+        return results
@@ -0,0 +1,298 @@
+"""
+Chạy optimizer trên nhiều máy: coordinator (process chạy optimizer) phát chunk config qua TCP,
+worker trên các máy khác backtest trên bản copy data local rồi gửi BacktestSummary về.
+
+- Giao thức: multiprocessing.connection (pickle + xác thực HMAC bằng authkey). Pickle chạy được code
+  tùy ý nên chỉ mở port trong mạng tin cậy.
+- Handshake: coordinator gửi fingerprint data (result_cache.data_fingerprint); worker có data khác
+  bị từ chối và dừng thay vì trả kết quả sai.
+- Mỗi kết nối giữ tối đa 1 task. Trong lúc chạy task, worker gửi heartbeat mỗi `heartbeat_seconds`
+  để gia hạn lease, nên chunk dài bao lâu cũng được. Worker mất kết nối hoặc quá `lease_seconds`
+  không có heartbeat / kết quả => task được giao lại cho worker khác (tối đa `max_attempts` lần).
+- ClusterExecutor có interface submit / shutdown giống ProcessPoolExecutor nên
+  BaseOptimizer._evaluate dùng nguyên (xem BaseOptimizer._session). Task là đúng hàm worker
+  của pool local (_run_config_chunk / _run_batch_backtest), worker gán data local vào các biến
+  _WORKER_* thay cho _init_worker.
+- Trade journal (journal_paths) được ghi trên đĩa của máy worker.
+
+Ví dụ, máy coordinator:
+    cluster = ClusterConfig(("0.0.0.0", 6000), authkey=b"secret")
+    results = GridSearchOptimizer(m1, m15, grid, engine="batch", cluster=cluster).run()
+Mỗi máy worker (cùng file data, có thể chạy nhiều process / máy):
+    run_worker(("coordinator-host", 6000), b"secret", m1, m15)
+"""
+
+import itertools
+import os
+import queue
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass
+from multiprocessing.connection import AuthenticationError, Client, Connection, Listener
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .result_cache import ResultCache, data_fingerprint
+
+
+@dataclass(frozen=True)
+class ClusterConfig:
+    address: Tuple[str, int]          # coordinator bind / worker connect
+    authkey: bytes
+    expected_workers: int = 4         # dùng để chia chunk (thay cho n_jobs)
+    lease_seconds: float = 600.0      # từng này giây không có heartbeat / kết quả => giao lại task
+    max_attempts: int = 3             # số lần giao lại tối đa trước khi báo lỗi
+    heartbeat_seconds: float = 30.0   # chu kỳ worker gửi heartbeat khi đang chạy task
+
+    def __post_init__(self) -> None:
+        if not self.authkey:
+            raise ValueError("ClusterConfig needs a non-empty authkey (workers run pickled tasks)")
+        if self.lease_seconds <= 2 * self.heartbeat_seconds:
+            raise ValueError(
+                f"lease_seconds ({self.lease_seconds}) must be more than twice "
+                f"heartbeat_seconds ({self.heartbeat_seconds})"
+            )
+        if self.max_attempts < 1:
+            raise ValueError(f"max_attempts must be >= 1, got {self.max_attempts}")
+
+
+@dataclass
+class _Task:
+    task_id: int
+    fn: Callable[[Any], Any]
+    args: Any
+    future: Future
+    attempts: int = 0
+
+
+def _resolve(future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Gán kết quả cho future; bỏ qua nếu future đã xong (kết quả trễ của task đã giao lại) hoặc bị cancel."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class ClusterExecutor:
+    """Phía coordinator: nhận kết nối worker, phát task theo thứ tự submit, giao lại task của worker chết."""
+
+    def __init__(self, cluster: ClusterConfig, hello: Dict[str, Any]) -> None:
+        """hello: thông tin gửi cho worker lúc handshake (data_fingerprint, cache_fingerprint, signal_configs)."""
+        self.cluster = cluster
+        self.hello = dict(hello, heartbeat_seconds=cluster.heartbeat_seconds)
+        self._tasks: "queue.Queue[_Task]" = queue.Queue()
+        self._ids = itertools.count()
+        self._closed = threading.Event()
+        self._handlers: List[threading.Thread] = []
+        self._listener = Listener(cluster.address, authkey=cluster.authkey)
+        self._acceptor = threading.Thread(target=self._accept_loop, daemon=True)
+        self._acceptor.start()
+        print(f"[Cluster] Waiting for workers on {self._listener.address[0]}:{self._listener.address[1]}")
+
+    def submit(self, fn: Callable[[Any], Any], args: Any) -> Future:
+        future: Future = Future()
+        self._tasks.put(_Task(next(self._ids), fn, args, future))
+        return future
+
+    def _accept_loop(self) -> None:
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except (AuthenticationError, OSError, EOFError) as exc:
+                if self._closed.is_set():
+                    return
+                if isinstance(exc, AuthenticationError):
+                    print("[Cluster] Rejected a connection with a wrong authkey")
+                continue
+            handler = threading.Thread(target=self._serve, args=(conn,), daemon=True)
+            handler.start()
+            self._handlers.append(handler)
+
+    def _serve(self, conn: Connection) -> None:
+        """1 thread / worker: handshake rồi lần lượt gửi task, chờ kết quả."""
+        name = "?"
+        task: Optional[_Task] = None
+        try:
+            conn.send(("hello", self.hello))
+            kind, name = conn.recv()
+            if kind != "ready":
+                print(f"[Cluster] Worker rejected the dataset: {name}")
+                return
+            print(f"[Cluster] Worker {name} joined")
+
+            while not self._closed.is_set():
+                try:
+                    task = self._tasks.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if task.future.done():
+                    task = None
+                    continue
+                conn.send(("task", task.task_id, task.fn, task.args))
+                while True:
+                    if not conn.poll(self.cluster.lease_seconds):
+                        raise TimeoutError(f"no heartbeat or result for {self.cluster.lease_seconds:.0f}s")
+                    kind, _, payload = conn.recv()
+                    if kind != "heartbeat":
+                        break
+                if kind == "error":
+                    _resolve(task.future, error=RuntimeError(f"Task failed on worker {name}:\n{payload}"))
+                else:
+                    _resolve(task.future, payload)
+                task = None
+            conn.send(("done",))
+        except (OSError, EOFError, TimeoutError) as exc:
+            if task is not None:
+                self._requeue(task, name, exc)
+        finally:
+            conn.close()
+
+    def _requeue(self, task: _Task, name: str, reason: BaseException) -> None:
+        task.attempts += 1
+        if task.attempts >= self.cluster.max_attempts:
+            _resolve(task.future, error=RuntimeError(f"Task {task.task_id} lost {task.attempts} times, giving up"))
+            return
+        print(
+            f"[Cluster] Worker {name} lost ({str(reason) or type(reason).__name__}), "
+            f"reassigning task {task.task_id}"
+        )
+        self._tasks.put(task)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """Đóng listener; worker đang rảnh nhận "done" và chuyển sang chờ session tiếp theo."""
+        self._closed.set()
+        if cancel_futures:
+            while True:
+                try:
+                    self._tasks.get_nowait().future.cancel()
+                except queue.Empty:
+                    break
+        # accept() đang block không thoát khi đóng socket từ thread khác: kết nối giả để đánh thức
+        host, port = self._listener.address
+        try:
+            socket.create_connection(("127.0.0.1" if host in ("0.0.0.0", "") else host, port), timeout=1.0).close()
+        except OSError:
+            pass
+        self._acceptor.join(timeout=5.0)
+        self._listener.close()
+        if wait:
+            for handler in self._handlers:
+                handler.join(timeout=5.0)
+
+    def __enter__(self) -> "ClusterExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
+
+
+def _serve_session(
+    conn: Connection,
+    m1_data: pd.DataFrame,
+    m15_data: pd.DataFrame,
+    fingerprint: str,
+    name: str,
+    cache_dir: Optional[str],
+) -> int:
+    """Phía worker: 1 session của coordinator (tới khi nhận "done"). Trả về số task đã chạy."""
+    from . import optimizer
+    from .numba_engine import SharedBars
+
+    _, hello = conn.recv()
+    if hello["data_fingerprint"] != fingerprint:
+        conn.send(("reject", f"{name} has data {fingerprint}, expected {hello['data_fingerprint']}"))
+        raise ValueError(
+            f"Local data does not match the coordinator's dataset "
+            f"({fingerprint} != {hello['data_fingerprint']})"
+        )
+
+    # Thay cho _init_worker: data local + signal cache cho các config của session
+    optimizer._WORKER_DATA.update(m1=m1_data, m15=m15_data)
+    optimizer._WORKER_SIGNALS.pop("shared", None)
+    if hello["signal_configs"]:
+        optimizer._WORKER_SIGNALS["shared"] = SharedBars.build(m1_data, m15_data, hello["signal_configs"])
+    optimizer._WORKER_CACHE["spec"] = (ResultCache(cache_dir), hello["cache_fingerprint"]) if cache_dir else None
+    conn.send(("ready", name))
+
+    heartbeat_seconds = hello.get("heartbeat_seconds", 30.0)
+    send_lock = threading.Lock()
+
+    def send(message: Tuple[Any, ...]) -> None:
+        with send_lock:
+            conn.send(message)
+
+    def heartbeat(task_id: int, finished: threading.Event) -> None:
+        # Thread Python vẫn chạy xen kẽ với backtest (engine Python nhả GIL định kỳ, kernel numba chạy
+        # nogil) => gia hạn lease của task
+        while not finished.wait(heartbeat_seconds):
+            try:
+                send(("heartbeat", task_id, None))
+            except (OSError, EOFError):
+                return
+
+    done = 0
+    while True:
+        message = conn.recv()
+        if message[0] == "done":
+            return done
+        _, task_id, fn, args = message
+        finished = threading.Event()
+        beater = threading.Thread(target=heartbeat, args=(task_id, finished), daemon=True)
+        beater.start()
+        try:
+            reply = ("result", task_id, fn(args))
+        except Exception:
+            reply = ("error", task_id, traceback.format_exc())
+        finally:
+            finished.set()
+            beater.join()
+        send(reply)
+        done += 1
+
+
+def run_worker(
+    address: Tuple[str, int],
+    authkey: bytes,
+    m1_data: pd.DataFrame,
+    m15_data: pd.DataFrame,
+    cache_dir: Optional[str] = None,
+    name: Optional[str] = None,
+    idle_timeout: float = 60.0,
+) -> int:
+    """
+    Kết nối tới coordinator và chạy task tới khi coordinator đóng session, sau đó thử kết nối lại
+    cho session tiếp theo; dừng khi không kết nối được trong idle_timeout giây.
+    Trả về tổng số task đã chạy.
+
+    Raises:
+        ValueError: data local khác data của coordinator
+    """
+    fingerprint = data_fingerprint(m1_data, m15_data)
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    print(f"[ClusterWorker] {name}: data {fingerprint}, connecting to {address[0]}:{address[1]}")
+
+    done = 0
+    last_seen = time.time()
+    while True:
+        try:
+            conn = Client(tuple(address), authkey=authkey)
+        except OSError:
+            if time.time() - last_seen > idle_timeout:
+                print(f"[ClusterWorker] {name}: no coordinator for {idle_timeout:.0f}s, exiting after {done} tasks")
+                return done
+            time.sleep(1.0)
+            continue
+        try:
+            done += _serve_session(conn, m1_data, m15_data, fingerprint, name, cache_dir)
+        except (OSError, EOFError):
+            print(f"[ClusterWorker] {name}: lost connection to coordinator")
+        finally:
+            conn.close()
+        last_seen = time.time()
@@ -0,0 +1,288 @@
+"""
+Genetic / evolutionary optimizer cho StrategyConfig.
+
+Mỗi cá thể là 1 bộ giá trị trên search space (search_space.py). Mỗi thế hệ:
+- giữ nguyên `elite` cá thể tốt nhất (elitism)
+- phần còn lại: chọn cha mẹ bằng tournament, lai ghép từng gen (uniform crossover; SubsetParam như
+  trading_sessions lai từng phần tử của tập con) rồi đột biến (Float / Int: nhiễu Gauss trên toạ độ
+  [0, 1], Choice / bool: đổi sang lựa chọn khác, Subset: thêm / bớt 1 phần tử)
+- cả thế hệ được đánh giá 1 lần qua pool worker (BaseOptimizer._evaluate); cá thể được đưa về dạng chuẩn
+  (canonical_config) trước khi tra memo nên cá thể trùng hành vi với cá thể đã chạy dùng lại kết quả cũ,
+  không backtest lại; cá thể vô nghĩa (invalid_reason) nhận score -inf và không được chạy.
+"""
+
+import math
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .abort_rules import AbortRules
+from .backtest_results import BacktestSummary
+from .optimizer import BaseOptimizer, EvalSession, _BestSoFar
+from .result_store import ResultStore
+from .search_space import (
+    ChoiceParam,
+    IntParam,
+    Param,
+    SearchSpace,
+    SubsetParam,
+    make_config,
+    sample_params,
+    signal_configs,
+    validate_space,
+)
+from .strategy_config import StrategyConfig, canonical_config, config_key, invalid_reason
+
+
+Individual = Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class GenerationReport:
+    """Thống kê 1 thế hệ."""
+    generation: int
+    evaluated: int          # số backtest mới
+    reused: int             # số cá thể lấy từ memo
+    invalid: int            # số cá thể vô nghĩa (invalid_reason), score -inf, không chạy
+    best: float             # objective tốt nhất trong thế hệ
+    mean: float             # trung bình objective (bỏ qua -inf)
+    best_config_key: str
+
+
+def _mutate_gene(param: Param, value: Any, rng: random.Random, scale: float) -> Any:
+    if isinstance(param, SubsetParam):
+        mask = list(param.to_mask(value))
+        i = rng.randrange(len(mask))
+        mask[i] = not mask[i]
+        if sum(mask) < param.min_size:
+            # Bớt phần tử làm tập con quá nhỏ => đổi sang thêm 1 phần tử khác
+            mask[i] = True
+            others = [k for k, keep in enumerate(mask) if not keep]
+            if others:
+                mask[i] = False
+                mask[rng.choice(others)] = True
+        return param.from_mask(mask)
+    if isinstance(param, ChoiceParam):
+        others = [c for c in param.choices if c != value]
+        return rng.choice(others) if others else value
+    mutated = param.from_unit(param.to_unit(value) + rng.gauss(0.0, scale))
+    if isinstance(param, IntParam) and mutated == value:
+        # Nhiễu nhỏ hơn 1 bước bị làm tròn về giá trị cũ: dịch hẳn 1 bước
+        step = param.step if rng.random() < 0.5 else -param.step
+        mutated = min(max(value + step, param.low), param.high)
+    return mutated
+
+
+def _cross_gene(param: Param, a: Any, b: Any, rng: random.Random) -> Any:
+    if isinstance(param, SubsetParam):
+        pairs = list(zip(param.to_mask(a), param.to_mask(b)))
+        mask = [x if rng.random() < 0.5 else y for x, y in pairs]
+        # Tập con quá nhỏ => bổ sung phần tử có ở cha hoặc mẹ
+        missing = [k for k, (x, y) in enumerate(pairs) if (x or y) and not mask[k]]
+        while sum(mask) < param.min_size and missing:
+            mask[missing.pop(rng.randrange(len(missing)))] = True
+        return param.from_mask(mask)
+    return a if rng.random() < 0.5 else b
+
+
+class GeneticOptimizer(BaseOptimizer):
+    """
+    Ví dụ:
+        space = {
+            "r_r_ratio_target": FloatParam(1.5, 4.0),
+            "trailing_sl_trigger": FloatParam(1.0, 3.0),
+            "trading_sessions": SubsetParam(tuple(StrategyConfig().trading_sessions)),
+            "enable_base_breakdown_exit": ChoiceParam((True, False)),
+        }
+        ga = GeneticOptimizer(m1_data, m15_data, space, population_size=32, seed=42)
+        results = ga.run(generations=15)
+        ga.history_frame()
+    """
+
+    def __init__(
+        self,
+        m1_data: pd.DataFrame,
+        m15_data: pd.DataFrame,
+        space: SearchSpace,
+        engine: str = "python",
+        batch_size: int = 64,
+        cache_dir: Optional[str] = None,
+        share_signals: bool = True,
+        abort_rules: Optional[AbortRules] = None,
+        base_config: Optional[StrategyConfig] = None,
+        objective: str = "profit_factor",
+        maximize: bool = True,
+        population_size: int = 32,
+        elite: int = 2,
+        tournament_size: int = 3,
+        crossover_rate: float = 0.9,
+        mutation_rate: Optional[float] = None,
+        mutation_scale: float = 0.15,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            space: field StrategyConfig -> FloatParam / IntParam / ChoiceParam / SubsetParam
+            base_config: giá trị cho các field không nằm trong space
+            objective: tên metric của BacktestSummary cần tối ưu
+            maximize: False => objective càng nhỏ càng tốt (vd max_drawdown); score được đổi dấu
+            elite: số cá thể tốt nhất giữ nguyên sang thế hệ sau
+            mutation_rate: xác suất đột biến mỗi gen (mặc định 1 / số gen)
+            mutation_scale: độ lệch chuẩn nhiễu Gauss (toạ độ [0, 1]) cho Float / Int
+        """
+        super().__init__(
+            m1_data, m15_data, engine=engine, batch_size=batch_size,
+            cache_dir=cache_dir, share_signals=share_signals, abort_rules=abort_rules,
+        )
+        validate_space(space)
+        if not space:
+            raise ValueError("GeneticOptimizer needs a non-empty search space")
+        if objective not in BacktestSummary.__dataclass_fields__:
+            raise ValueError(f"Unknown objective metric: {objective!r}")
+        if not 0 <= elite < population_size:
+            raise ValueError(f"elite must be in [0, population_size), got {elite}")
+        self.space = space
+        self.base_config = base_config or StrategyConfig()
+        self.objective = objective
+        self.maximize = maximize
+        self.population_size = population_size
+        self.elite = elite
+        self.tournament_size = tournament_size
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = mutation_rate if mutation_rate is not None else 1.0 / len(space)
+        self.mutation_scale = mutation_scale
+        self.rng = random.Random(seed)
+
+        self.history: List[GenerationReport] = []
+        # config_key chuẩn -> summary của mọi cá thể đã chạy (kể cả từ store), dùng chung giữa các thế hệ
+        self.memo: Dict[str, BacktestSummary] = {}
+
+    def _score(self, summary: BacktestSummary) -> float:
+        """Config bị dừng sớm (abort rules) coi như tệ nhất."""
+        value = float(getattr(summary, self.objective))
+        if math.isnan(value) or summary.pruned:
+            return -math.inf
+        return value if self.maximize else -value
+
+    def _params_of(self, config: StrategyConfig) -> Individual:
+        return {name: getattr(config, name) for name in self.space}
+
+    def _in_space(self, config: StrategyConfig) -> bool:
+        """Config (vd lấy từ store) có khớp base_config ở mọi field ngoài space không."""
+        return make_config(self.base_config, self._params_of(config)) == config
+
+    # ------------------------------------------------------------------
+    # Operators
+    # ------------------------------------------------------------------
+    def _tournament(self, ranked: List[Tuple[Individual, float]]) -> Individual:
+        contenders = self.rng.sample(ranked, k=min(self.tournament_size, len(ranked)))
+        return max(contenders, key=lambda t: t[1])[0]
+
+    def _crossover(self, a: Individual, b: Individual) -> Individual:
+        return {name: _cross_gene(param, a[name], b[name], self.rng) for name, param in self.space.items()}
+
+    def _mutate(self, individual: Individual) -> Individual:
+        return {
+            name: _mutate_gene(param, individual[name], self.rng, self.mutation_scale)
+            if self.rng.random() < self.mutation_rate else individual[name]
+            for name, param in self.space.items()
+        }
+
+    def _next_generation(self, scored: List[Tuple[Individual, float]]) -> List[Individual]:
+        ranked = sorted(scored, key=lambda t: t[1], reverse=True)
+        population = [individual for individual, _ in ranked[:self.elite]]
+        while len(population) < self.population_size:
+            parent = self._tournament(ranked)
+            if self.rng.random() < self.crossover_rate:
+                child = self._crossover(parent, self._tournament(ranked))
+            else:
+                child = dict(parent)
+            population.append(self._mutate(child))
+        return population
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+    def _evaluate_population(
+        self, population: List[Individual], session: EvalSession, on_result
+    ) -> Tuple[List[Tuple[Individual, float]], int, int]:
+        """
+        Chạy các cá thể chưa có trong memo (mỗi config chuẩn 1 lần), trả về (cá thể, score)
+        + số backtest mới + số cá thể vô nghĩa (score -inf, không chạy).
+        """
+        configs = [make_config(self.base_config, p) for p in population]
+        canonical = [None if invalid_reason(c) is not None else canonical_config(c) for c in configs]
+        keys = [None if c is None else config_key(c) for c in canonical]
+        pending: Dict[str, StrategyConfig] = {}
+        for key, config in zip(keys, canonical):
+            if key is not None and key not in self.memo and key not in pending:
+                pending[key] = config
+        summaries = self._evaluate(list(pending.values()), [None] * len(pending), session, on_result)
+        self.memo.update(zip(pending, summaries))
+        scored = [
+            (p, -math.inf if key is None else self._score(self.memo[key])) for p, key in zip(population, keys)
+        ]
+        return scored, len(pending), keys.count(None)
+
+    def run(self, generations: int, n_jobs: int = -1, store_path: Optional[str] = None) -> List[BacktestSummary]:
+        """
+        Chạy `generations` thế hệ, trả về summary của mọi cá thể đã chạy (sort theo objective giảm dần).
+
+        - store_path: ResultStore CSV; config đã có trong store (cùng base_config) vào memo từ đầu
+              và kết quả mới được ghi ngay khi về
+        """
+        store = ResultStore(store_path) if store_path else None
+        if store is not None:
+            warm = [s for s in store.results() if s.config is not None and self._in_space(s.config)]
+            self.memo.update((config_key(canonical_config(s.config)), s) for s in warm)
+            if warm:
+                print(f"[Genetic] Warm start: {len(warm)} configs from {store_path}")
+
+        progress = _BestSoFar(total=generations * self.population_size, done=0, objective=(self.objective, self.maximize))
+        for summary in self.memo.values():
+            progress.offer(summary)
+
+        def on_result(summary: BacktestSummary) -> None:
+            if store is not None:
+                store.append(summary)
+            progress.update(summary)
+
+        population = [sample_params(self.space, self.rng) for _ in range(self.population_size)]
+        try:
+            with self._session(n_jobs, signal_configs(self.space, self.base_config)) as session:
+                for generation in range(generations):
+                    scored, evaluated, invalid = self._evaluate_population(population, session, on_result)
+                    self._record_generation(scored, evaluated, invalid)
+                    if generation + 1 < generations:
+                        population = self._next_generation(scored)
+        finally:
+            if store is not None:
+                store.close()
+            if self.cache is not None:
+                self.cache.evict()
+
+        return sorted(self.memo.values(), key=self._score, reverse=True)
+
+    def _record_generation(self, scored: List[Tuple[Individual, float]], evaluated: int, invalid: int) -> None:
+        best_individual, best = max(scored, key=lambda t: t[1])
+        finite = [score for _, score in scored if math.isfinite(score)]
+        report = GenerationReport(
+            generation=len(self.history) + 1,
+            evaluated=evaluated,
+            reused=len(scored) - evaluated - invalid,
+            invalid=invalid,
+            best=best,
+            mean=sum(finite) / len(finite) if finite else -math.inf,
+            best_config_key=config_key(canonical_config(make_config(self.base_config, best_individual))),
+        )
+        self.history.append(report)
+        print(
+            f"[Genetic] generation {report.generation}: {report.evaluated} new backtests, "
+            f"{report.reused} reused, {report.invalid} invalid, best {self.objective}={report.best:.4f}, mean={report.mean:.4f}"
+        )
+
+    def history_frame(self) -> pd.DataFrame:
+        """Lịch sử từng thế hệ (1 dòng / thế hệ) để vẽ / export."""
+        return pd.DataFrame([vars(r) for r in self.history])
@@ -0,0 +1,171 @@
+"""
+Successive halving cho grid search: lọc config tệ trên đoạn data ngắn trước khi chạy cả năm.
+
+Rung 0 chạy toàn bộ grid trên `min_days` ngày đầu, giữ lại top 1/eta theo objective, rung sau chạy
+các config còn lại trên đoạn dài gấp eta lần, ... cho tới rung cuối luôn là toàn bộ data.
+Tổng CPU ~ n_configs * min_days thay vì n_configs * cả năm.
+
+Mỗi rung là prefix của data (data trước mốc `end`), dùng chung 1 pool worker / shared memory /
+signal cache cho mọi rung (xem BaseOptimizer._session).
+"""
+
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from .abort_rules import AbortRules
+from .backtest_results import BacktestSummary
+from .optimizer import DataWindow, GridSearchOptimizer
+from .signal_cache import print_stage_report
+from .strategy_config import StrategyConfig
+
+
+@dataclass(frozen=True)
+class RungReport:
+    """Thống kê 1 rung."""
+    rung: int
+    end: Optional[pd.Timestamp]   # None = toàn bộ data
+    configs: int
+    kept: int
+    cpu_seconds: float            # tổng backtest_duration_seconds của rung
+    wall_seconds: float
+
+
+class SuccessiveHalvingOptimizer(GridSearchOptimizer):
+    """
+    Ví dụ:
+        sh = SuccessiveHalvingOptimizer(m1_data, m15_data, param_grid, min_days=90, eta=3)
+        results = sh.run()          # summary trên toàn bộ data của các config sống tới rung cuối
+        sh.rungs                    # RungReport từng rung
+    """
+
+    def __init__(
+        self,
+        m1_data: pd.DataFrame,
+        m15_data: pd.DataFrame,
+        param_grid: Dict[str, Iterable],
+        engine: str = "python",
+        batch_size: int = 64,
+        cache_dir: Optional[str] = None,
+        share_signals: bool = True,
+        abort_rules: Optional[AbortRules] = None,
+        constraints: Sequence[Callable[[StrategyConfig], bool]] = (),
+        min_days: int = 90,
+        eta: int = 3,
+        objective: str = "profit_factor",
+        maximize: bool = True,
+    ) -> None:
+        """
+        Args:
+            min_days: độ dài (ngày) data của rung đầu tiên
+            eta: mỗi rung giữ lại 1/eta config và nhân độ dài data lên eta lần
+            objective: metric của BacktestSummary dùng để xếp hạng
+            maximize: False => objective càng nhỏ càng tốt (vd max_drawdown); score được đổi dấu
+        """
+        super().__init__(
+            m1_data, m15_data, param_grid, engine=engine, batch_size=batch_size,
+            cache_dir=cache_dir, share_signals=share_signals, abort_rules=abort_rules, constraints=constraints,
+        )
+        if eta < 2:
+            raise ValueError(f"eta must be >= 2, got {eta}")
+        if objective not in BacktestSummary.__dataclass_fields__:
+            raise ValueError(f"Unknown objective metric: {objective!r}")
+        self.min_days = min_days
+        self.eta = eta
+        self.objective = objective
+        self.maximize = maximize
+        self.rungs: List[RungReport] = []
+        self.rung_results: List[List[BacktestSummary]] = []
+
+    def rung_ends(self) -> List[Optional[pd.Timestamp]]:
+        """Mốc cuối data của từng rung (cắt ở đầu ngày), rung cuối = None (toàn bộ data)."""
+        start, last = self.m1_data.index[0], self.m1_data.index[-1]
+        ends: List[Optional[pd.Timestamp]] = []
+        days = self.min_days
+        while True:
+            end = (start + pd.Timedelta(days=days)).normalize()
+            if end > last:
+                break
+            ends.append(end)
+            days *= self.eta
+        return ends + [None]
+
+    def _rank_key(self, summary: BacktestSummary):
+        value = float(getattr(summary, self.objective))
+        if not self.maximize:
+            value = -value
+        return (not summary.pruned, -math.inf if math.isnan(value) else value, summary.total_pnl)
+
+    def run(self, n_jobs: int = -1, max_configs: Optional[int] = None) -> List[BacktestSummary]:
+        """
+        Chạy successive halving, trả về summary trên toàn bộ data của các config tới được rung cuối
+        (sort theo objective giảm dần). Kết quả các rung trước nằm trong self.rung_results.
+
+        - n_jobs = -1 => dùng tất cả CPU cores, 1 => tuần tự
+        - max_configs: giới hạn số config của rung đầu (lấy ngẫu nhiên)
+        """
+        configs: List[StrategyConfig] = self._generate_configs(dedupe=True)
+        if max_configs is not None and max_configs < len(configs):
+            configs = random.sample(configs, k=max_configs)
+
+        if self.share_signals and len(configs) > 1:
+            print_stage_report(configs, list(self.param_grid.keys()))
+
+        self.rungs, self.rung_results = [], []
+        ends = self.rung_ends()
+        survivors = configs
+        try:
+            with self._session(n_jobs, configs) as session:
+                for rung, end in enumerate(ends):
+                    if len(survivors) == 1 and end is not None:
+                        end = None  # chỉ còn 1 config: chạy thẳng toàn bộ data
+                    is_last = end is None
+                    t0 = time.time()
+                    summaries = self._evaluate(
+                        survivors, [None] * len(survivors), session, window=DataWindow(end=end)
+                    )
+                    summaries.sort(key=self._rank_key, reverse=True)
+                    kept = len(summaries) if is_last else max(1, math.ceil(len(summaries) / self.eta))
+
+                    report = RungReport(
+                        rung=rung,
+                        end=end,
+                        configs=len(summaries),
+                        kept=kept,
+                        cpu_seconds=sum(s.backtest_duration_seconds for s in summaries),
+                        wall_seconds=time.time() - t0,
+                    )
+                    self.rungs.append(report)
+                    self.rung_results.append(summaries)
+                    until = end.date() if end is not None else "end of data"
+                    print(
+                        f"[Halving] rung {rung}: {report.configs} configs on data until {until}, "
+                        f"kept {kept}, CPU {report.cpu_seconds:.1f}s, wall {report.wall_seconds:.1f}s"
+                    )
+                    survivors = [s.config for s in summaries[:kept]]
+                    if is_last:
+                        break
+        finally:
+            if self.cache is not None:
+                self.cache.evict()
+
+        self._print_savings(len(configs))
+        return self.rung_results[-1]
+
+    def _print_savings(self, n_configs: int) -> None:
+        """So sánh CPU đã dùng với ước lượng chạy cả grid trên toàn bộ data."""
+        final = self.rung_results[-1]
+        if not final:
+            return
+        per_config = sum(s.backtest_duration_seconds for s in final) / len(final)
+        full_grid = per_config * n_configs
+        used = sum(r.cpu_seconds for r in self.rungs)
+        if used > 0:
+            print(
+                f"[Halving] CPU used {used:.1f}s vs ~{full_grid:.1f}s for the full grid on all data "
+                f"({full_grid / used:.1f}x less)"
+            )
@@ -0,0 +1,198 @@
+"""
+Memory profiling theo từng phase của 1 lần chạy backtest (load, resample, construct, run, ...).
+Dùng tracemalloc (heap Python) + RSS của process để ước lượng RAM cần cho mỗi worker optimizer.
+"""
+
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class PhaseMemory:
+    """Kết quả đo memory của 1 phase."""
+    name: str
+    traced_start_bytes: int        # tracemalloc current lúc bắt đầu phase
+    traced_end_bytes: int          # tracemalloc current lúc kết thúc phase
+    traced_peak_bytes: int         # tracemalloc peak trong phase
+    rss_end_bytes: Optional[int]   # RSS hiện tại lúc kết thúc phase (None nếu không đo được)
+    rss_peak_bytes: Optional[int]  # Peak RSS của process tính đến cuối phase (None nếu không đo được)
+    top_allocations: List[Tuple[str, int, int]] = field(default_factory=list)  # (site, size_diff, count_diff)
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """RSS hiện tại. Ưu tiên psutil (nếu cài), fallback /proc/self/statm trên Linux."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    """
+    Peak RSS. Module resource chỉ có trên Unix (ru_maxrss: KB trên Linux, bytes trên macOS);
+    Windows dùng psutil peak_wset nếu cài, không thì None.
+    """
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return getattr(psutil.Process(os.getpid()).memory_info(), "peak_wset", None)
+        except ImportError:
+            return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    """Snapshot heap, bỏ qua allocation của chính tracemalloc."""
+    return tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """Dung lượng thực của DataFrame (tính cả index)."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _fmt_mb(nbytes: Optional[int]) -> str:
+    if nbytes is None:
+        return "n/a"
+    return f"{nbytes / (1024 * 1024):,.1f} MB"
+
+
+class MemoryProfiler:
+    """
+    Đo memory theo phase. Khi enabled=False mọi method là no-op để caller không cần rẽ nhánh.
+
+    Ví dụ:
+        profiler = MemoryProfiler(enabled=True)
+        profiler.begin("load")
+        m1 = load_dukascopy_csv(path)
+        profiler.end()
+        profiler.print_report()
+    """
+
+    def __init__(self, enabled: bool = False, top_n: int = 10) -> None:
+        self.enabled = enabled
+        self.top_n = top_n
+        self.phases: List[PhaseMemory] = []
+        self.objects: List[Tuple[str, int]] = []
+
+        self._current_name: Optional[str] = None
+        self._start_bytes = 0
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self, name: str) -> None:
+        """Bắt đầu phase mới (tự kết thúc phase đang chạy nếu có)."""
+        if not self.enabled:
+            return
+        if self._current_name is not None:
+            self.end()
+
+        self._current_name = name
+        self._start_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self._start_snapshot = _take_snapshot()
+
+    def end(self) -> None:
+        """Kết thúc phase hiện tại và ghi lại số đo."""
+        if not self.enabled or self._current_name is None:
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = _take_snapshot()
+        stats = snapshot.compare_to(self._start_snapshot, "lineno")
+        top = [
+            (str(stat.traceback[0]), stat.size_diff, stat.count_diff)
+            for stat in stats[: self.top_n]
+            if stat.size_diff != 0
+        ]
+
+        self.phases.append(
+            PhaseMemory(
+                name=self._current_name,
+                traced_start_bytes=self._start_bytes,
+                traced_end_bytes=current,
+                traced_peak_bytes=peak,
+                rss_end_bytes=_current_rss_bytes(),
+                rss_peak_bytes=_peak_rss_bytes(),
+                top_allocations=top,
+            )
+        )
+        self._current_name = None
+        self._start_snapshot = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Context manager tương đương begin()/end()."""
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def track_frame(self, label: str, df: pd.DataFrame) -> None:
+        """Ghi lại dung lượng 1 DataFrame đang được giữ (raw CSV, M15, bản copy trong strategy...)."""
+        if not self.enabled:
+            return
+        self.objects.append((label, frame_nbytes(df)))
+
+    def print_report(self) -> None:
+        """In report ra stdout (main.py tee vào file log)."""
+        if not self.enabled:
+            return
+        if self._current_name is not None:
+            self.end()
+
+        print("\n" + "=" * 90)
+        print("MEMORY PROFILE")
+        print("=" * 90)
+        print(
+            f"{'Phase':<12} {'Traced start':>14} {'Traced end':>14} {'Traced peak':>14} "
+            f"{'RSS end':>14} {'RSS peak':>14}"
+        )
+        print("-" * 90)
+        for p in self.phases:
+            print(
+                f"{p.name:<12} {_fmt_mb(p.traced_start_bytes):>14} {_fmt_mb(p.traced_end_bytes):>14} "
+                f"{_fmt_mb(p.traced_peak_bytes):>14} {_fmt_mb(p.rss_end_bytes):>14} "
+                f"{_fmt_mb(p.rss_peak_bytes):>14}"
+            )
+
+        if self.phases:
+            overall_peak = max((p.rss_peak_bytes for p in self.phases if p.rss_peak_bytes is not None), default=None)
+            print("-" * 90)
+            print(f"Process peak RSS: {_fmt_mb(overall_peak)}")
+
+        if self.objects:
+            print("\n[Tracked objects]")
+            for label, nbytes in self.objects:
+                print(f"  {label:<40} {_fmt_mb(nbytes):>14}")
+
+        for p in self.phases:
+            if not p.top_allocations:
+                continue
+            print(f"\n[Top allocation sites: {p.name}]")
+            for site, size_diff, count_diff in p.top_allocations:
+                print(f"  {size_diff / 1024:+12,.1f} KB  {count_diff:+9,d} blocks  {site}")
+        print("=" * 90)
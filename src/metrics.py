@@ -0,0 +1,390 @@
+"""
+Metrics của 1 backtest, tính 1 lần trên mảng NumPy (pnl + thời gian vào / ra của từng lệnh, equity curve).
+
+Dùng chung cho BacktestResult.from_trades, print_statistics (PineScriptStrategy, main.py khi cache hit),
+main.py (PnL theo tháng)
+và visualize_backtest.py nên mọi chỗ cùng 1 định nghĩa:
+- equity curve: vốn ban đầu + equity sau mỗi lệnh đóng (PineScriptStrategy.equity_curve)
+- drawdown: so với đỉnh equity tính từ vốn ban đầu; max_drawdown (USD) và max_drawdown_pct (% lớn nhất
+  so với đỉnh tại thời điểm đó) là 2 cực đại độc lập
+- returns: % thay đổi giữa 2 điểm liên tiếp của equity curve (điểm đầu so với vốn ban đầu, bỏ điểm có
+  equity trước <= 0); sharpe / sortino = mean / std (downside deviation) x sqrt(số returns), không annualize
+- cagr_pct theo thời gian [start, end] (mặc định lệnh vào đầu tiên -> lệnh đóng cuối cùng);
+  calmar_ratio = cagr_pct / max_drawdown_pct
+- exposure_pct: % thời gian [start, end] có ít nhất 1 lệnh đang mở
+
+RunningStats: phần metrics cập nhật được O(1) trong lúc backtest (mỗi lần đóng lệnh).
+"""
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+_NS_PER_MINUTE = 60 * 10**9
+_DAYS_PER_YEAR = 365.25
+
+
+@dataclass(frozen=True)
+class TradeArrays:
+    """Các cột cần cho metrics của 1 list Trade (thời gian = ns epoch; lệnh chưa đóng: exit = entry)."""
+    pnl: np.ndarray
+    entry_ns: np.ndarray
+    exit_ns: np.ndarray
+
+    @classmethod
+    def from_trades(cls, trades: Sequence[Any]) -> "TradeArrays":
+        pnl = np.fromiter((t.pnl for t in trades), dtype=np.float64, count=len(trades))
+        entry = pd.DatetimeIndex([t.entry_time for t in trades])
+        exit_ = pd.DatetimeIndex([t.exit_time if t.exit_time is not None else t.entry_time for t in trades])
+        return cls(pnl, entry.as_unit("ns").asi8, exit_.as_unit("ns").asi8)
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+
+@dataclass(frozen=True)
+class PerformanceMetrics:
+    total_trades: int
+    winning_trades: int
+    losing_trades: int
+    breakeven_trades: int
+    win_rate: float                 # %
+    total_pnl: float
+    gross_profit: float
+    gross_loss: float               # âm
+    profit_factor: float
+    avg_win: float
+    avg_loss: float                 # âm
+    avg_trade: float
+    largest_win: float
+    largest_loss: float
+    initial_capital: float
+    final_equity: float
+    peak_equity: float
+    total_return_pct: float
+    max_drawdown: float             # USD
+    max_drawdown_pct: float
+    sharpe_ratio: float
+    sortino_ratio: float
+    cagr_pct: float
+    calmar_ratio: float
+    exposure_pct: float
+    avg_trade_minutes: float
+    median_trade_minutes: float
+    max_trade_minutes: float
+
+
+def drawdown(equity: np.ndarray, initial_capital: float) -> Tuple[np.ndarray, np.ndarray]:
+    """(drawdown USD, drawdown %) tại từng điểm của equity curve (>= 0)."""
+    equity = np.asarray(equity, dtype=np.float64)
+    peak = np.maximum(np.maximum.accumulate(equity), initial_capital) if len(equity) else equity
+    dd = peak - equity
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd_pct = np.where(peak > 0, dd / peak * 100.0, 0.0)
+    return dd, dd_pct
+
+
+def equity_returns(equity: np.ndarray, initial_capital: float) -> np.ndarray:
+    """% thay đổi (dạng tỉ lệ) giữa các điểm liên tiếp của equity curve, bỏ điểm có equity trước <= 0."""
+    equity = np.asarray(equity, dtype=np.float64)
+    prev = np.concatenate(([initial_capital], equity[:-1]))
+    valid = prev > 0
+    return (equity[valid] - prev[valid]) / prev[valid]
+
+
+def exposure_ns(entry_ns: np.ndarray, exit_ns: np.ndarray) -> int:
+    """Tổng thời gian (ns) có ít nhất 1 lệnh mở = độ dài hợp các khoảng [entry, exit]."""
+    if len(entry_ns) == 0:
+        return 0
+    order = np.argsort(entry_ns, kind="stable")
+    entry, exit_ = entry_ns[order], exit_ns[order]
+    covered_until = np.maximum.accumulate(exit_)
+    prev = np.concatenate(([entry[0]], covered_until[:-1]))
+    return int(np.clip(exit_ - np.maximum(entry, prev), 0, None).sum())
+
+
+def _ratio(mean: float, deviation: float, n: int) -> float:
+    return mean / deviation * math.sqrt(n) if deviation > 0 else 0.0
+
+
+def compute_metrics(
+    trades: Sequence[Any],
+    equity_curve: Sequence[float],
+    initial_capital: float,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> PerformanceMetrics:
+    """
+    Metrics của trades + equity curve. start / end: khoảng thời gian của data (cho CAGR, exposure);
+    mặc định lệnh vào đầu tiên -> lệnh đóng cuối cùng.
+    """
+    arrays = trades if isinstance(trades, TradeArrays) else TradeArrays.from_trades(trades)
+    pnl = arrays.pnl
+    equity = np.asarray(equity_curve, dtype=np.float64)
+    if len(equity) == 0:
+        equity = np.array([initial_capital], dtype=np.float64)
+
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    n = len(pnl)
+    gross_profit = float(wins.sum())
+    gross_loss = float(losses.sum())
+    profit_factor = (
+        gross_profit / abs(gross_loss) if gross_loss < 0 else math.inf if gross_profit > 0 else 0.0
+    )
+
+    dd, dd_pct = drawdown(equity, initial_capital)
+    returns = equity_returns(equity, initial_capital)
+    if len(returns) > 1:
+        mean_r = float(returns.mean())
+        sharpe = _ratio(mean_r, float(returns.std(ddof=1)), len(returns))
+        downside = float(np.sqrt(np.sum(np.minimum(returns, 0.0) ** 2) / (len(returns) - 1)))
+        sortino = _ratio(mean_r, downside, len(returns))
+    else:
+        sharpe = sortino = 0.0
+
+    final_equity = float(equity[-1])
+    max_dd_pct = float(dd_pct.max())
+    start_ns = pd.Timestamp(start).value if start is not None else (int(arrays.entry_ns.min()) if n else 0)
+    end_ns = pd.Timestamp(end).value if end is not None else (int(arrays.exit_ns.max()) if n else 0)
+    span_ns = max(end_ns - start_ns, 0)
+    years = span_ns / _NS_PER_MINUTE / (60 * 24 * _DAYS_PER_YEAR)
+    if years > 0 and initial_capital > 0 and final_equity > 0:
+        # log để không overflow khi khoảng thời gian rất ngắn
+        growth = math.log(final_equity / initial_capital) / years
+        cagr = (math.exp(growth) - 1.0) * 100.0 if growth < 700 else math.inf
+    elif years > 0 and initial_capital > 0:
+        cagr = -100.0
+    else:
+        cagr = 0.0
+    calmar = cagr / max_dd_pct if max_dd_pct > 0 else math.inf if cagr > 0 else 0.0
+    durations = (arrays.exit_ns - arrays.entry_ns) / _NS_PER_MINUTE
+
+    return PerformanceMetrics(
+        total_trades=n,
+        winning_trades=len(wins),
+        losing_trades=len(losses),
+        breakeven_trades=n - len(wins) - len(losses),
+        win_rate=len(wins) / n * 100 if n else 0.0,
+        total_pnl=gross_profit + gross_loss,
+        gross_profit=gross_profit,
+        gross_loss=gross_loss,
+        profit_factor=profit_factor,
+        avg_win=gross_profit / len(wins) if len(wins) else 0.0,
+        avg_loss=gross_loss / len(losses) if len(losses) else 0.0,
+        avg_trade=(gross_profit + gross_loss) / n if n else 0.0,
+        largest_win=float(wins.max()) if len(wins) else 0.0,
+        largest_loss=float(losses.min()) if len(losses) else 0.0,
+        initial_capital=float(initial_capital),
+        final_equity=final_equity,
+        peak_equity=float(max(equity.max(), initial_capital)),
+        total_return_pct=(final_equity - initial_capital) / initial_capital * 100 if initial_capital else 0.0,
+        max_drawdown=float(dd.max()),
+        max_drawdown_pct=max_dd_pct,
+        sharpe_ratio=sharpe,
+        sortino_ratio=sortino,
+        cagr_pct=cagr,
+        calmar_ratio=calmar,
+        exposure_pct=exposure_ns(arrays.entry_ns, arrays.exit_ns) / span_ns * 100 if span_ns else 0.0,
+        avg_trade_minutes=float(durations.mean()) if n else 0.0,
+        median_trade_minutes=float(np.median(durations)) if n else 0.0,
+        max_trade_minutes=float(durations.max()) if n else 0.0,
+    )
+
+
+def print_statistics(
+    trades: Sequence[Any],
+    equity_curve: Sequence[float],
+    initial_capital: float,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> None:
+    """In block thống kê backtest (PineScriptStrategy sau khi chạy, main.py khi cache hit)."""
+    if len(trades) == 0:
+        print("\n=== THONG KE (STATISTICS) ===")
+        print("Khong co giao dich nao duoc thuc hien.")
+        return
+
+    m = compute_metrics(trades, equity_curve, initial_capital, start=start, end=end)
+
+    print("\n" + "="*60)
+    print("=== BACKTEST STATISTICS ===")
+    print("="*60)
+
+    print(f"\n[OVERVIEW]")
+    print(f"  Initial Capital:          {m.initial_capital:,.0f} USD")
+    print(f"  Final Equity:             {m.final_equity:,.0f} USD")
+    print(f"  Total P/L:                {m.total_pnl:+,.0f} USD ({m.total_return_pct:+.2f}%)")
+    print(f"  CAGR:                     {m.cagr_pct:+.2f}%")
+
+    print(f"\n[TRADES]")
+    print(f"  Total Trades:             {m.total_trades}")
+    print(f"  - Winning Trades:         {m.winning_trades}")
+    print(f"  - Losing Trades:          {m.losing_trades}")
+    print(f"  - Breakeven Trades:       {m.breakeven_trades}")
+    print(f"  Win Rate:                 {m.win_rate:.2f}%")
+    print(f"  Exposure:                 {m.exposure_pct:.2f}% of time")
+    print(f"  Trade Duration:           avg {m.avg_trade_minutes:,.0f} / median {m.median_trade_minutes:,.0f} / max {m.max_trade_minutes:,.0f} min")
+
+    print(f"\n[PROFIT/LOSS]")
+    print(f"  Total Profit:             {m.gross_profit:+,.0f} USD")
+    print(f"  Total Loss:               {m.gross_loss:+,.0f} USD")
+    print(f"  Profit Factor:            {m.profit_factor:.2f}")
+    print(f"  Average Trade:            {m.avg_trade:+,.0f} USD")
+    print(f"  - Avg Winning Trade:      {m.avg_win:+,.0f} USD")
+    print(f"  - Avg Losing Trade:       {m.avg_loss:+,.0f} USD")
+
+    print(f"\n[RISK METRICS]")
+    print(f"  Max Drawdown:             {m.max_drawdown:,.0f} USD ({m.max_drawdown_pct:.2f}%)")
+    print(f"  Peak Equity:              {m.peak_equity:,.0f} USD")
+    print(f"  Sharpe / Sortino:         {m.sharpe_ratio:.2f} / {m.sortino_ratio:.2f}")
+    print(f"  Calmar:                   {m.calmar_ratio:.2f}")
+
+    # Largest win/loss
+    if m.winning_trades:
+        print(f"  Largest Win:              {m.largest_win:+,.0f} USD")
+
+    if m.losing_trades:
+        print(f"  Largest Loss:             {m.largest_loss:+,.0f} USD")
+
+    print("\n" + "="*60)
+
+
+def monthly_pnl(trades: Sequence[Any], initial_capital: float) -> pd.DataFrame:
+    """
+    PnL theo tháng đóng lệnh (bỏ lệnh chưa đóng): index = Period tháng, cột trades / wins / losses /
+    pnl / win_rate (%) / pnl_pct (% so với equity đầu tháng) / end_equity.
+    """
+    closed = [t for t in trades if t.exit_time is not None]
+    columns = ["trades", "wins", "losses", "pnl", "win_rate", "pnl_pct", "end_equity"]
+    if not closed:
+        return pd.DataFrame(columns=columns)
+    pnl = np.fromiter((t.pnl for t in closed), dtype=np.float64, count=len(closed))
+    month = pd.DatetimeIndex([t.exit_time for t in closed]).to_period("M")
+    frame = pd.DataFrame({"pnl": pnl, "win": pnl > 0, "loss": pnl < 0}, index=month)
+    table = frame.groupby(level=0).agg(
+        trades=("pnl", "size"), wins=("win", "sum"), losses=("loss", "sum"), pnl=("pnl", "sum"),
+    )
+    table["win_rate"] = table["wins"] / table["trades"] * 100
+    table["end_equity"] = initial_capital + table["pnl"].cumsum()
+    start_equity = table["end_equity"] - table["pnl"]
+    table["pnl_pct"] = np.where(start_equity > 0, table["pnl"] / start_equity * 100, 0.0)
+    return table[columns]
+
+
+class RunningStats:
+    """
+    Metrics cập nhật O(1) mỗi lần đóng 1 lệnh live (engine Python gọi update), đọc được ở bất kỳ bar nào:
+    abort rules, trigger paper mode và log / monitor đều đọc từ đây thay vì tự đếm hoặc duyệt lại trades.
+    Cùng định nghĩa với compute_metrics trên equity curve tương ứng (returns tính cả điểm vốn ban đầu,
+    mean / variance theo Welford).
+    """
+
+    def __init__(self, initial_capital: float, window: int = 10) -> None:
+        self.initial_capital = float(initial_capital)
+        self.equity = float(initial_capital)
+        self.peak_equity = float(initial_capital)
+        self.n_trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0                       # âm
+        self.consecutive_losses = 0                 # lệnh không thắng (pnl <= 0) liên tiếp
+        self.max_drawdown = 0.0
+        self.max_drawdown_pct = 0.0
+        # N lệnh gần nhất (win rate theo cửa sổ của paper mode)
+        self.window: Deque[float] = deque(maxlen=window)
+        self.window_wins = 0
+        # Welford trên returns của equity curve
+        self.n_returns = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._push_return(self.equity, self.equity)
+
+    def _push_return(self, prev_equity: float, equity: float) -> None:
+        if prev_equity <= 0:
+            return
+        r = (equity - prev_equity) / prev_equity
+        self.n_returns += 1
+        delta = r - self._mean
+        self._mean += delta / self.n_returns
+        self._m2 += delta * (r - self._mean)
+
+    def update(self, pnl: float) -> None:
+        """Ghi nhận 1 lệnh live vừa đóng."""
+        prev_equity = self.equity
+        self.equity = prev_equity + pnl
+        self.n_trades += 1
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+            self.consecutive_losses = 0
+        else:
+            if pnl < 0:
+                self.losses += 1
+                self.gross_loss += pnl
+            self.consecutive_losses += 1
+
+        if self.window.maxlen:
+            if len(self.window) == self.window.maxlen and self.window[0] > 0:
+                self.window_wins -= 1
+            self.window.append(pnl)
+            self.window_wins += pnl > 0
+
+        if self.equity > self.peak_equity:
+            self.peak_equity = self.equity
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+        self.max_drawdown_pct = max(self.max_drawdown_pct, self.drawdown_pct)
+        self._push_return(prev_equity, self.equity)
+
+    def consecutive_losses_since(self, n_trades: int) -> int:
+        """Số lệnh thua liên tiếp tính từ lệnh thứ n_trades (vd từ lúc thoát paper mode)."""
+        return min(self.consecutive_losses, self.n_trades - n_trades)
+
+    @property
+    def total_pnl(self) -> float:
+        return self.gross_profit + self.gross_loss
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.n_trades * 100 if self.n_trades else 0.0
+
+    @property
+    def window_full(self) -> bool:
+        return len(self.window) == self.window.maxlen
+
+    @property
+    def window_win_rate(self) -> float:
+        """Tỉ lệ thắng (0..1) của các lệnh trong cửa sổ."""
+        return self.window_wins / len(self.window) if self.window else 0.0
+
+    @property
+    def profit_factor(self) -> float:
+        if self.gross_loss < 0:
+            return self.gross_profit / -self.gross_loss
+        return math.inf if self.gross_profit > 0 else 0.0
+
+    @property
+    def drawdown(self) -> float:
+        return self.peak_equity - self.equity
+
+    @property
+    def drawdown_pct(self) -> float:
+        return self.drawdown / self.peak_equity * 100 if self.peak_equity > 0 else 0.0
+
+    @property
+    def return_mean(self) -> float:
+        return self._mean
+
+    @property
+    def return_std(self) -> float:
+        return math.sqrt(self._m2 / (self.n_returns - 1)) if self.n_returns > 1 else 0.0
+
+    @property
+    def sharpe_ratio(self) -> float:
+        return _ratio(self._mean, self.return_std, self.n_returns) if self.n_returns > 1 else 0.0
@@ -0,0 +1,2199 @@
+"""
+Engine biên dịch (Numba JIT) cho PineScriptStrategy.
+
+Toàn bộ state machine của `PineScriptStrategy` (M15 zones/liquidity, nến đỏ/xanh, Buy/Sell Base,
+ADX, entry cases, quản lý position, Paper Mode) được port sang các hàm thuần số trên mảng NumPy:
+- zone / base / liquidity nằm trong mảng dung lượng cố định (side 0 = Long, side 1 = Short)
+- state scalar nằm trong 2 vector `fs` (float) và `ist` (int), truy cập qua hằng số index
+- config được encode thành 1 vector số (`config_vector`)
+- phần không phụ thuộc config (pattern M15, nến đỏ/xanh, ADX mỗi period, session mask) được
+  tính 1 lần trong `SharedBars`; kernel advance N config lockstep (trục 0 của state = config),
+  xem `batch_engine.BatchBacktester`
+
+Engine Python (`pinescript_port.py`) vẫn là bản tham chiếu; mọi thay đổi logic phải làm ở đó
+trước rồi port sang đây, và kiểm tra lại bằng `compare_engines`.
+
+Các hàm được gọi từ Python (`backtest_kernel`, `_m15_events`, `_candle_masks`, `_adx_series`) chạy với
+nogil=True: kernel chạy lâu không giữ GIL, thread khác trong process (vd heartbeat của worker
+distributed) vẫn chạy được.
+
+Numba là optional: nếu chưa cài, kernel vẫn chạy được dưới dạng Python thuần (rất chậm,
+chỉ dùng để kiểm tra parity).
+"""
+
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .abort_rules import ABORT_REASONS, AbortRules
+from .models import TradeDirection
+from .pinescript_port import PaperModeState, Trade
+from .strategy_config import StrategyConfig
+
+try:
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Fallback khi không có numba: trả về hàm gốc (chạy Python thuần)."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+# =============================================================================
+# LAYOUT
+# =============================================================================
+
+# Side index cho các mảng zones / bases / liq / swing
+LONG = 0
+SHORT = 1
+
+# Config vector
+C_R_R_TARGET = 0
+C_TRAIL_TRIGGER = 1
+C_TRAIL_LEVEL = 2
+C_ADX_MAX = 3
+C_ADX_PERIOD = 4
+C_RISK = 5
+C_MAX_TIMEOUT = 6
+C_BUFFER = 7
+C_PAPER_ENABLED = 8
+C_PAPER_LOSSES = 9
+C_PAPER_WINDOW = 10
+C_PAPER_WR = 11
+C_PAPER_MIN_WINS = 12
+C_PAPER_REQ_POS = 13
+C_PAPER_MAX_MINUTES = 14
+C_RUN_LONG = 15
+C_RUN_SHORT = 16
+C_INITIAL_CAPITAL = 17
+C_ADX_SLOT = 18      # hàng trong SharedBars.adx (1 hàng / adx_period)
+C_SESSION_SLOT = 19  # hàng trong SharedBars.session (1 hàng / bộ trading_sessions)
+# Abort rules (abort_rules.AbortRules), -1 = tắt
+C_ABORT_MAX_DD = 20
+C_ABORT_MAX_LOSSES = 21
+C_ABORT_MIN_PF = 22
+C_ABORT_PF_AFTER = 23
+C_ABORT_MIN_TRADES = 24
+C_ABORT_DEADLINE = 25    # bar index check min_trades
+N_CONFIG = 26
+
+# Float state
+F_EQUITY = 0
+F_PEAK = 1
+F_L_REMOVE_PRICE = 2
+F_L_REMOVE_PRICE_DEMAND = 3
+F_L_REMOVE_CANDLE_OPEN = 4
+F_L_ENTRY = 5
+F_L_SL = 6
+F_L_TP = 7
+F_L_LOT = 8
+F_S_REMOVE_PRICE_SUPPLY = 9
+F_S_REMOVE_CANDLE_OPEN = 10
+F_S_ENTRY = 11
+F_S_SL = 12
+F_S_TP = 13
+F_S_LOT = 14
+F_P_PNL = 15
+F_P_TOTAL_MINUTES = 16
+F_A_GROSS_WIN = 17
+F_A_GROSS_LOSS = 18
+N_FLOAT_STATE = 19
+
+# Int state (bool lưu 0/1)
+I_M15_IDX = 0
+I_N_DEM = 1          # số zone side LONG (demand); I_N_DEM + SHORT = supply
+I_N_SUP = 2
+I_N_BBASE = 3        # số base side LONG (buy base); I_N_BBASE + SHORT = sell base
+I_N_SBASE = 4
+I_N_BLIQ = 5         # số liquidity side LONG; I_N_BLIQ + SHORT = sell liquidity
+I_N_SLIQ = 6
+I_N_RED = 7          # nến đỏ (high) cho Buy Base; I_N_RED + SHORT = nến xanh (low)
+I_N_GREEN = 8
+I_L_MAKE_COLOR_TANG = 9
+I_L_DEMAND_FINDING = 10
+I_L_LIQUID_FINDING = 11
+I_L_KEEP_DEMAND = 12
+I_L_HAI_DEMAND = 13
+I_L_KEEP_LIQ = 14
+I_L_HAI_LIQ = 15
+I_L_MAKING_BASE = 16
+I_L_DO_2LAN = 17
+I_L_FINDING_ENTRY = 18
+I_L_TIMEOUT = 19
+I_L_TEN_MIN = 20
+I_L_MUOI_BAY = 21
+I_L_INDEX_HIGH = 22
+I_L_IN_POS = 23
+I_L_ENTRY_IDX = 24
+I_L_DOI_SL = 25
+I_S_MAKE_COLOR_GIAM = 26
+I_S_SUPPLY_FINDING = 27
+I_S_LIQUID_FINDING = 28
+I_S_KEEP_SUPPLY = 29
+I_S_HAI_SUPPLY = 30
+I_S_KEEP_LIQ = 31
+I_S_HAI_LIQ = 32
+I_S_MAKING_BASE = 33
+I_S_DO_2LAN = 34
+I_S_FINDING_ENTRY = 35
+I_S_TIMEOUT = 36
+I_S_TEN_MIN = 37
+I_S_INDEX_LOW = 38
+I_S_IN_POS = 39
+I_S_ENTRY_IDX = 40
+I_S_DOI_SL = 41
+I_P_ACTIVE = 42
+I_P_HAS_ACT = 43
+I_P_ACT_NS = 44
+I_P_CONSEC_WINS = 45
+I_P_CONSEC_LOSSES = 46
+I_P_ACT_COUNT = 47
+I_P_N_RECENT = 48
+I_P_RECENT_HEAD = 49
+I_N_TRADES = 50
+I_N_EQUITY = 51
+I_STATUS = 52
+I_A_LOSSES = 53      # lệnh live thua liên tiếp (abort rules)
+I_A_N_LIVE = 54      # số lệnh live
+I_A_REASON = 55      # 0 = chưa dừng, i + 1 = ABORT_REASONS[i]
+N_INT_STATE = 56
+
+# Zone columns (demand / supply)
+Z_TOP = 0
+Z_BOTTOM = 1
+Z_CHAM = 2
+Z_STATUS = 3
+
+# Base columns (buy / sell base)
+B_TOP = 0
+B_BOTTOM = 1
+B_CHAM = 2
+
+# M15 event columns (1 hàng / nến M15, tính từ 3 nến M15 gần nhất - không phụ thuộc config)
+E_DEM = 0            # có Demand Zone (case 2/4/5)
+E_DEM_CASE4 = 1
+E_DEM_TOP = 2
+E_DEM_BOTTOM = 3
+E_SUP = 4            # có Supply Zone (case 2/4/5)
+E_SUP_CASE4 = 5
+E_SUP_TOP = 6
+E_SUP_BOTTOM = 7
+E_BLIQ = 8           # swing low (chưa xét điều kiện close > open - buffer)
+E_SLIQ = 9           # swing high
+E_L2 = 10
+E_H2 = 11
+E_O1 = 12
+E_C3 = 13
+N_EVENT_COLS = 14
+
+# Trade columns
+T_ENTRY_IDX = 0
+T_EXIT_IDX = 1
+T_DIRECTION = 2      # 0 = BUY, 1 = SELL
+T_ENTRY = 3
+T_EXIT = 4
+T_SL = 5
+T_TP = 6
+T_LOT = 7
+T_PNL = 8
+T_IS_PAPER = 9
+T_PAPER_SESSION = 10
+N_TRADE_COLS = 11
+
+# Status
+STATUS_OK = 0
+STATUS_CAPACITY = 1
+STATUS_TRADES = 2
+STATUS_PRUNED = 3     # dừng sớm theo abort rules (kết quả dở dang hợp lệ)
+
+SWING_CAPACITY = 16   # nến đỏ/xanh: Pine giữ tối đa 9
+
+
+# =============================================================================
+# STATE
+# =============================================================================
+
+def config_vector(
+    config: StrategyConfig,
+    initial_capital: float = 1000.0,
+    adx_slot: int = 0,
+    session_slot: int = 0,
+    abort_rules: Optional[AbortRules] = None,
+    abort_deadline: int = -1,
+) -> np.ndarray:
+    """
+    Encode các field số của StrategyConfig thành vector float64 cho kernel.
+    adx_slot / session_slot: hàng tương ứng trong SharedBars (xem SharedBars.build).
+    abort_rules / abort_deadline: rule dừng sớm + bar check min_trades (AbortRules.deadline_index).
+    """
+    cfg = np.zeros(N_CONFIG, dtype=np.float64)
+    cfg[C_R_R_TARGET] = config.r_r_ratio_target
+    cfg[C_TRAIL_TRIGGER] = config.trailing_sl_trigger
+    cfg[C_TRAIL_LEVEL] = config.trailing_sl_level
+    cfg[C_ADX_MAX] = config.adx_max_entry
+    cfg[C_ADX_PERIOD] = config.adx_period
+    cfg[C_RISK] = config.risk_per_trade
+    cfg[C_MAX_TIMEOUT] = config.max_entry_timeout_minutes
+    cfg[C_BUFFER] = config.zone_touch_buffer
+    cfg[C_PAPER_ENABLED] = 1.0 if config.enable_paper_mode else 0.0
+    cfg[C_PAPER_LOSSES] = config.paper_trigger_consecutive_losses
+    cfg[C_PAPER_WINDOW] = config.paper_trigger_win_rate_window
+    cfg[C_PAPER_WR] = config.paper_trigger_win_rate_threshold
+    cfg[C_PAPER_MIN_WINS] = config.paper_recovery_min_wins
+    cfg[C_PAPER_REQ_POS] = 1.0 if config.paper_recovery_require_positive_pnl else 0.0
+    cfg[C_PAPER_MAX_MINUTES] = config.paper_max_duration_minutes
+    cfg[C_RUN_LONG] = 0.0 if config.trade_side == "short" else 1.0
+    cfg[C_RUN_SHORT] = 0.0 if config.trade_side == "long" else 1.0
+    cfg[C_INITIAL_CAPITAL] = initial_capital
+    cfg[C_ADX_SLOT] = adx_slot
+    cfg[C_SESSION_SLOT] = session_slot
+
+    rules = abort_rules or AbortRules()
+    off = lambda v: -1.0 if v is None else float(v)
+    cfg[C_ABORT_MAX_DD] = off(rules.max_drawdown_pct)
+    cfg[C_ABORT_MAX_LOSSES] = off(rules.max_consecutive_losses)
+    cfg[C_ABORT_MIN_PF] = off(rules.min_profit_factor)
+    cfg[C_ABORT_PF_AFTER] = rules.min_profit_factor_after
+    cfg[C_ABORT_MIN_TRADES] = off(rules.min_trades)
+    cfg[C_ABORT_DEADLINE] = abort_deadline
+    return cfg
+
+
+def session_key(config: StrategyConfig) -> Tuple:
+    """Key nhận diện session mask: các config cùng key dùng chung 1 hàng SharedBars.session."""
+    if not config.enable_timerange_filter:
+        return (False,)
+    return (True,) + tuple(tuple(s) for s in config.trading_sessions)
+
+
+def session_mask(index: pd.DatetimeIndex, config: StrategyConfig) -> np.ndarray:
+    """
+    Vector hoá `_is_within_timerange`: True nếu bar nằm trong trading_sessions (giờ UTC+7).
+    Asia/Bangkok không có DST nên cộng cố định 7h.
+    """
+    if not config.enable_timerange_filter:
+        return np.ones(len(index), dtype=np.bool_)
+
+    minutes = (np.asarray(index.hour) * 60 + np.asarray(index.minute) + 7 * 60) % (24 * 60)
+    mask = np.zeros(len(index), dtype=np.bool_)
+    for start_min, end_min in config.trading_sessions:
+        mask |= (minutes >= start_min) & (minutes < end_min)
+    return mask
+
+
+def _index_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    return np.asarray(index.values.astype("datetime64[ns]").astype(np.int64))
+
+
+@dataclass
+class EngineState:
+    """
+    State của N config dạng struct-of-arrays: trục 0 luôn là config.
+    Kernel nhận từng mảng riêng (numba không nhận dataclass), `arrays()` trả về đúng thứ tự tham số.
+    """
+    fs: np.ndarray       # (N, N_FLOAT_STATE)
+    ist: np.ndarray      # (N, N_INT_STATE)
+    zones: np.ndarray    # (N, 2, capacity, 4)
+    bases: np.ndarray    # (N, 2, capacity, 3)
+    liq: np.ndarray      # (N, 2, capacity)
+    swing: np.ndarray    # (N, 2, SWING_CAPACITY)
+    recent: np.ndarray   # (N, max paper window)
+    trades: np.ndarray   # (N, max_trades, N_TRADE_COLS)
+    equity: np.ndarray   # (N, max_trades + 1)
+
+    @classmethod
+    def allocate(cls, cfgs: np.ndarray, capacity: int, max_trades: int) -> "EngineState":
+        """Cấp phát state ban đầu (giá trị mặc định giống LongState / ShortState / PineScriptStrategy)."""
+        n = cfgs.shape[0]
+        fs = np.zeros((n, N_FLOAT_STATE), dtype=np.float64)
+        ist = np.zeros((n, N_INT_STATE), dtype=np.int64)
+
+        fs[:, F_EQUITY] = cfgs[:, C_INITIAL_CAPITAL]
+        fs[:, F_PEAK] = cfgs[:, C_INITIAL_CAPITAL]
+        fs[:, F_S_REMOVE_PRICE_SUPPLY] = 10000.0
+        fs[:, F_S_REMOVE_CANDLE_OPEN] = 100000.0
+        ist[:, I_L_INDEX_HIGH] = 1
+        ist[:, I_S_INDEX_LOW] = 1
+        ist[:, I_N_EQUITY] = 1
+
+        window = max(1, int(cfgs[:, C_PAPER_WINDOW].max())) if n else 1
+        equity = np.zeros((n, max_trades + 1), dtype=np.float64)
+        equity[:, 0] = cfgs[:, C_INITIAL_CAPITAL]
+
+        return cls(
+            fs=fs,
+            ist=ist,
+            zones=np.zeros((n, 2, capacity, 4), dtype=np.float64),
+            bases=np.zeros((n, 2, capacity, 3), dtype=np.float64),
+            liq=np.zeros((n, 2, capacity), dtype=np.float64),
+            swing=np.zeros((n, 2, SWING_CAPACITY), dtype=np.float64),
+            recent=np.zeros((n, window), dtype=np.float64),
+            trades=np.zeros((n, max_trades, N_TRADE_COLS), dtype=np.float64),
+            equity=equity,
+        )
+
+    def arrays(self) -> Tuple[np.ndarray, ...]:
+        return (
+            self.fs, self.ist, self.zones, self.bases, self.liq,
+            self.swing, self.recent, self.trades, self.equity,
+        )
+
+
+# =============================================================================
+# ARRAY HELPERS
+# =============================================================================
+
+@njit(cache=True)
+def _pop_row(arr, n, i):
+    """list.pop(i) trên mảng 2D có n phần tử; trả về n mới."""
+    for r in range(i, n - 1):
+        for col in range(arr.shape[1]):
+            arr[r, col] = arr[r + 1, col]
+    return n - 1
+
+
+@njit(cache=True)
+def _pop_item(arr, n, i):
+    """list.pop(i) trên mảng 1D có n phần tử; trả về n mới."""
+    for r in range(i, n - 1):
+        arr[r] = arr[r + 1]
+    return n - 1
+
+
+# =============================================================================
+# PAPER MODE + TRADE COMPLETION
+# =============================================================================
+
+@njit(cache=True)
+def _paper_trigger(cfg, ist, recent):
+    """_check_paper_mode_trigger."""
+    if cfg[C_PAPER_ENABLED] == 0.0:
+        return False
+    if ist[I_P_ACTIVE] == 1:
+        return False
+    if ist[I_P_CONSEC_LOSSES] >= cfg[C_PAPER_LOSSES]:
+        return True
+    n = ist[I_P_N_RECENT]
+    if n >= cfg[C_PAPER_WINDOW]:
+        wins = 0
+        for r in range(n):
+            if recent[r] > 0:
+                wins += 1
+        win_rate = wins / n
+        if win_rate < cfg[C_PAPER_WR]:
+            return True
+    return False
+
+
+@njit(cache=True)
+def _paper_recovery(idx, ts_ns, cfg, fs, ist):
+    """_check_paper_mode_recovery."""
+    if ist[I_P_ACTIVE] == 0:
+        return False
+    if ist[I_P_HAS_ACT] == 1:
+        duration_minutes = (ts_ns[idx] - ist[I_P_ACT_NS]) / 1e9 / 60
+        if duration_minutes >= cfg[C_PAPER_MAX_MINUTES]:
+            return True
+    pnl_ok = cfg[C_PAPER_REQ_POS] == 0.0 or fs[F_P_PNL] > 0
+    wins_ok = ist[I_P_CONSEC_WINS] >= cfg[C_PAPER_MIN_WINS]
+    return pnl_ok and wins_ok
+
+
+@njit(cache=True)
+def _on_trade_closed(idx, pnl, is_paper, ts_ns, cfg, fs, ist, recent):
+    """_on_trade_closed: cập nhật tracking, check trigger / recovery Paper Mode."""
+    is_win = pnl > 0
+    if is_paper:
+        fs[F_P_PNL] += pnl
+        if is_win:
+            ist[I_P_CONSEC_WINS] += 1
+        else:
+            ist[I_P_CONSEC_WINS] = 0
+        if _paper_recovery(idx, ts_ns, cfg, fs, ist):
+            # _deactivate_paper_mode
+            if ist[I_P_HAS_ACT] == 1:
+                fs[F_P_TOTAL_MINUTES] += (ts_ns[idx] - ist[I_P_ACT_NS]) / 1e9 / 60
+            ist[I_P_CONSEC_LOSSES] = 0
+            ist[I_P_ACTIVE] = 0
+            ist[I_P_HAS_ACT] = 0
+    else:
+        # recent_results: deque(maxlen=paper_trigger_win_rate_window) → ring buffer
+        window = int(cfg[C_PAPER_WINDOW])
+        if window > 0:
+            if ist[I_P_N_RECENT] < window:
+                recent[(ist[I_P_RECENT_HEAD] + ist[I_P_N_RECENT]) % window] = pnl
+                ist[I_P_N_RECENT] += 1
+            else:
+                recent[ist[I_P_RECENT_HEAD]] = pnl
+                ist[I_P_RECENT_HEAD] = (ist[I_P_RECENT_HEAD] + 1) % window
+        if is_win:
+            ist[I_P_CONSEC_LOSSES] = 0
+        else:
+            ist[I_P_CONSEC_LOSSES] += 1
+        if _paper_trigger(cfg, ist, recent):
+            # _activate_paper_mode
+            ist[I_P_ACTIVE] = 1
+            ist[I_P_HAS_ACT] = 1
+            ist[I_P_ACT_NS] = ts_ns[idx]
+            fs[F_P_PNL] = 0.0
+            ist[I_P_CONSEC_WINS] = 0
+            ist[I_P_ACT_COUNT] += 1
+
+
+@njit(cache=True)
+def _check_abort(pnl, cfg, fs, ist):
+    """AbortMonitor.on_trade_closed (abort_rules.py): cập nhật counter, dừng config nếu vi phạm rule."""
+    ist[I_A_N_LIVE] += 1
+    if pnl > 0:
+        fs[F_A_GROSS_WIN] += pnl
+        ist[I_A_LOSSES] = 0
+    else:
+        fs[F_A_GROSS_LOSS] -= pnl
+        ist[I_A_LOSSES] += 1
+    if ist[I_A_REASON] != 0:
+        return
+
+    reason = 0
+    if cfg[C_ABORT_MAX_DD] >= 0 and fs[F_PEAK] > 0:
+        if (fs[F_PEAK] - fs[F_EQUITY]) / fs[F_PEAK] * 100 >= cfg[C_ABORT_MAX_DD]:
+            reason = 1
+    if reason == 0 and cfg[C_ABORT_MAX_LOSSES] >= 0 and ist[I_A_LOSSES] >= cfg[C_ABORT_MAX_LOSSES]:
+        reason = 2
+    if (
+        reason == 0
+        and cfg[C_ABORT_MIN_PF] >= 0
+        and ist[I_A_N_LIVE] >= cfg[C_ABORT_PF_AFTER]
+        and fs[F_A_GROSS_LOSS] > 0
+        and fs[F_A_GROSS_WIN] / fs[F_A_GROSS_LOSS] < cfg[C_ABORT_MIN_PF]
+    ):
+        reason = 3
+    if reason != 0:
+        ist[I_A_REASON] = reason
+        ist[I_STATUS] = STATUS_PRUNED
+
+
+@njit(cache=True)
+def _complete_trade(side, idx, exit_price, ts_ns, cfg, fs, ist, recent, trades, equity):
+    """_complete_long_trade / _complete_short_trade."""
+    if side == LONG:
+        if ist[I_L_IN_POS] == 0:
+            return
+        entry = fs[F_L_ENTRY]
+        pnl = (exit_price - entry) * fs[F_L_LOT] * 0.1
+        entry_idx = ist[I_L_ENTRY_IDX]
+        sl = fs[F_L_SL]
+        tp = fs[F_L_TP]
+        lot = fs[F_L_LOT]
+    else:
+        if ist[I_S_IN_POS] == 0:
+            return
+        entry = fs[F_S_ENTRY]
+        pnl = (entry - exit_price) * fs[F_S_LOT] * 0.1
+        entry_idx = ist[I_S_ENTRY_IDX]
+        sl = fs[F_S_SL]
+        tp = fs[F_S_TP]
+        lot = fs[F_S_LOT]
+
+    is_paper = cfg[C_PAPER_ENABLED] != 0.0 and ist[I_P_ACTIVE] == 1
+
+    n = ist[I_N_TRADES]
+    if n >= trades.shape[0]:
+        ist[I_STATUS] = STATUS_TRADES
+    else:
+        trades[n, T_ENTRY_IDX] = entry_idx
+        trades[n, T_EXIT_IDX] = idx
+        trades[n, T_DIRECTION] = side
+        trades[n, T_ENTRY] = entry
+        trades[n, T_EXIT] = exit_price
+        trades[n, T_SL] = sl
+        trades[n, T_TP] = tp
+        trades[n, T_LOT] = lot
+        trades[n, T_PNL] = pnl
+        trades[n, T_IS_PAPER] = 1.0 if is_paper else 0.0
+        trades[n, T_PAPER_SESSION] = ist[I_P_ACT_COUNT]
+        ist[I_N_TRADES] = n + 1
+
+    if not is_paper:
+        fs[F_EQUITY] += pnl
+        equity[ist[I_N_EQUITY]] = fs[F_EQUITY]
+        ist[I_N_EQUITY] += 1
+        if fs[F_EQUITY] > fs[F_PEAK]:
+            fs[F_PEAK] = fs[F_EQUITY]
+        _check_abort(pnl, cfg, fs, ist)
+
+    if side == LONG:
+        ist[I_L_IN_POS] = 0
+        ist[I_L_DOI_SL] = 0
+    else:
+        # Python engine reset nhầm `doi_sl_05R` (không phải doi_sl_05R_sell) → giữ nguyên cờ
+        ist[I_S_IN_POS] = 0
+
+    _on_trade_closed(idx, pnl, is_paper, ts_ns, cfg, fs, ist, recent)
+
+
+# =============================================================================
+# M15 STRUCTURE (Case 2/4/5 + Liquidity)
+# =============================================================================
+
+@njit(cache=True)
+def _push_zone(zones, side, ist, top, bottom):
+    n = ist[I_N_DEM + side]
+    if n >= zones.shape[1]:
+        ist[I_STATUS] = STATUS_CAPACITY
+        return
+    zones[side, n, Z_TOP] = top
+    zones[side, n, Z_BOTTOM] = bottom
+    zones[side, n, Z_CHAM] = 0.0
+    zones[side, n, Z_STATUS] = 0.0
+    ist[I_N_DEM + side] = n + 1
+
+
+@njit(cache=True)
+def _push_liquidity(liq, side, ist, price):
+    n = ist[I_N_BLIQ + side]
+    if n >= liq.shape[1]:
+        ist[I_STATUS] = STATUS_CAPACITY
+        return
+    liq[side, n] = price
+    ist[I_N_BLIQ + side] = n + 1
+
+
+@njit(cache=True, nogil=True)
+def _m15_events(m15_o, m15_h, m15_l, m15_c):
+    """
+    Pattern M15 (Case 2/4/5 Demand/Supply + swing của Liquidity) cho từng nến M15 - không phụ thuộc config.
+    Hàng k dùng 3 nến k-2, k-1, k (3 nến cuối của buffer M15 khi nến k vừa đóng).
+    Mapping _detect_demand_zones_m15 (line 474-532), _detect_supply_zones_m15 (line 1530-1586),
+    _detect_buy_liquidity_m15 (line 328-348), _detect_sell_liquidity_m15 (line 1403-1423).
+    """
+    n = m15_o.shape[0]
+    events = np.zeros((n, N_EVENT_COLS), dtype=np.float64)
+    for k in range(2, n):
+        o1 = m15_o[k - 2]
+        o2 = m15_o[k - 1]
+        o3 = m15_o[k]
+        c1 = m15_c[k - 2]
+        c2 = m15_c[k - 1]
+        c3 = m15_c[k]
+        h1 = m15_h[k - 2]
+        h2 = m15_h[k - 1]
+        h3 = m15_h[k]
+        l1 = m15_l[k - 2]
+        l2 = m15_l[k - 1]
+        l3 = m15_l[k]
+
+        # Demand
+        case2 = (
+            o2 > c2 and o3 < c3
+            and abs(l2 - c2) > abs(c2 - o2)
+            and o2 - c2 <= 0.5 * (c3 - o3)
+            and c3 > h2
+            and l2 < l3
+            and (h2 - o2) < (o2 - c2)
+            and (h3 - c3) < 0.25 * (c3 - o3)
+        )
+        case4 = (
+            c1 < o1 and o2 < c2 and o3 < c3
+            and (l3 - l2) > 1
+            and (h3 - c3) < (c3 - o3)
+            and c3 > o1
+            and (c1 - l1) < (o1 - c1)
+        )
+        case5 = (
+            o2 > c2 and o3 < c3
+            and l3 < l2
+            and c3 > h2
+            and (o3 - l3) >= 0.5 * (c3 - o3)
+            and (h3 - c3) >= 0.5 * (c3 - o3)
+            and (l3 - l2) > 0.5
+        )
+        if case2 or case4 or case5:
+            events[k, E_DEM] = 1.0
+            events[k, E_DEM_CASE4] = 1.0 if case4 else 0.0
+            if case2 or case4:
+                events[k, E_DEM_BOTTOM] = min(l2, l3)
+                events[k, E_DEM_TOP] = max(l2, l3)
+            else:
+                events[k, E_DEM_BOTTOM] = l3
+                events[k, E_DEM_TOP] = l2
+
+        # Supply
+        case2 = (
+            o2 < c2 and o3 > c3
+            and (c2 - o2) <= 0.5 * (o3 - c3)
+            and c3 < l2
+            and h2 > h3
+            and abs(h2 - c2) > abs(o2 - c2)
+            and (o2 - l2) < (c2 - o2)
+            and (c3 - l3) <= 0.25 * (o3 - c3)
+        )
+        case4 = (
+            o1 < c1 and o2 > c2 and o3 > c3
+            and (h2 - h3) > 1
+            and (c3 - l3) < (o3 - c3)
+            and c3 < o1
+            and (h1 - c1) < (c1 - o1)
+        )
+        case5 = (
+            o2 < c2 and o3 > c3
+            and h3 > h2
+            and c3 < l2
+            and (c3 - l3) >= 0.5 * (o3 - c3)
+            and (h3 - o3) >= 0.5 * (o3 - c3)
+            and (h3 - h2) > 0.5
+        )
+        if case2 or case4 or case5:
+            events[k, E_SUP] = 1.0
+            events[k, E_SUP_CASE4] = 1.0 if case4 else 0.0
+            if case2 or case4:
+                events[k, E_SUP_TOP] = max(h2, h3)
+                events[k, E_SUP_BOTTOM] = min(h2, h3)
+            else:
+                events[k, E_SUP_TOP] = h3
+                events[k, E_SUP_BOTTOM] = h2
+
+        # Liquidity: điều kiện close/open so với buffer xét trong _apply_m15_event (phụ thuộc config)
+        events[k, E_BLIQ] = 1.0 if (l2 < l1 and l2 < l3) else 0.0
+        events[k, E_SLIQ] = 1.0 if (h2 > h1 and h2 > h3) else 0.0
+        events[k, E_L2] = l2
+        events[k, E_H2] = h2
+        events[k, E_O1] = o1
+        events[k, E_C3] = c3
+    return events
+
+
+@njit(cache=True)
+def _apply_m15_event(ev, cfg, ist, zones, liq):
+    """Áp 1 event M15 vào zone/liquidity của 1 config (đúng thứ tự demand → supply → buy liq → sell liq)."""
+    if ev[E_DEM] != 0.0:
+        ist[I_L_MAKE_COLOR_TANG] = 1
+        top = ev[E_DEM_TOP]
+        bottom = ev[E_DEM_BOTTOM]
+        n = ist[I_N_DEM]
+        # Case 4 đặc biệt: xoá zone cũ nếu zone mới bao toàn bộ
+        if ev[E_DEM_CASE4] != 0.0 and n > 0:
+            if top > zones[LONG, n - 1, Z_TOP] and bottom < zones[LONG, n - 1, Z_BOTTOM]:
+                ist[I_N_DEM] = n - 1
+        _push_zone(zones, LONG, ist, top, bottom)
+
+    if ev[E_SUP] != 0.0:
+        ist[I_S_MAKE_COLOR_GIAM] = 1
+        top = ev[E_SUP_TOP]
+        bottom = ev[E_SUP_BOTTOM]
+        n = ist[I_N_SUP]
+        if ev[E_SUP_CASE4] != 0.0 and n > 0:
+            if top > zones[SHORT, n - 1, Z_TOP] and bottom < zones[SHORT, n - 1, Z_BOTTOM]:
+                ist[I_N_SUP] = n - 1
+        _push_zone(zones, SHORT, ist, top, bottom)
+
+    diff = cfg[C_BUFFER]
+
+    if ev[E_BLIQ] != 0.0 and ev[E_C3] > ev[E_O1] - diff:
+        l2 = ev[E_L2]
+        n = ist[I_N_DEM]
+        if n > 0:
+            if not (l2 < zones[LONG, n - 1, Z_TOP]):
+                _push_liquidity(liq, LONG, ist, l2)
+        else:
+            _push_liquidity(liq, LONG, ist, l2)
+
+    if ev[E_SLIQ] != 0.0 and ev[E_C3] < ev[E_O1] - diff:
+        h2 = ev[E_H2]
+        n = ist[I_N_SUP]
+        if n > 0:
+            if not (h2 > zones[SHORT, n - 1, Z_BOTTOM]):
+                _push_liquidity(liq, SHORT, ist, h2)
+        else:
+            _push_liquidity(liq, SHORT, ist, h2)
+
+
+@njit(cache=True)
+def _update_m15(idx, m15_avail, events, cfg, ist, zones, liq):
+    """_update_m15_buffer: áp mọi nến M15 có timestamp <= bar M1 hiện tại."""
+    while ist[I_M15_IDX] < m15_avail[idx]:
+        _apply_m15_event(events[ist[I_M15_IDX]], cfg, ist, zones, liq)
+        ist[I_M15_IDX] += 1
+
+
+# =============================================================================
+# M1 CANDLES + ADX
+# =============================================================================
+
+@njit(cache=True)
+def _push_swing(swing, side, ist, price):
+    """arrayHighGiaNenGiam / arrayLowGiaNenTang: append, giữ tối đa 9 phần tử."""
+    n = ist[I_N_RED + side]
+    swing[side, n] = price
+    n += 1
+    if n > 9:
+        n = _pop_item(swing[side], n, 0)
+    ist[I_N_RED + side] = n
+
+
+@njit(cache=True, nogil=True)
+def _candle_masks(op, hi, lo, cl):
+    """
+    Nến đỏ (line 850-855) / nến xanh cho Sell Base tại mỗi bar - không phụ thuộc config.
+    red[idx] → push high[idx-1] vào arrayHighGiaNenGiam, green[idx] → push low[idx-1] vào arrayLowGiaNenTang.
+    """
+    n = op.shape[0]
+    red = np.zeros(n, dtype=np.bool_)
+    green = np.zeros(n, dtype=np.bool_)
+    for idx in range(1, n):
+        o = op[idx]
+        h = hi[idx]
+        l = lo[idx]
+        o1 = op[idx - 1]
+        h1 = hi[idx - 1]
+        l1 = lo[idx - 1]
+        c1 = cl[idx - 1]
+
+        cond1 = o1 > c1 and (c1 - l1) < (o1 - c1) + 0.1 and (h - o) < 0.33 * (h1 - c1)
+        cond2 = (
+            c1 > o1 and (h1 - c1) > (c1 - o1)
+            and (o1 - l1) < (c1 - o1) + 0.1
+            and (h - o) <= 0.33 * (h1 - o1)
+        )
+        red[idx] = cond1 or cond2
+
+        cond1 = c1 > o1 and (h1 - c1) < (c1 - o1) + 0.1 and (o - l) < 0.33 * (c1 - l1)
+        cond2 = (
+            o1 > c1 and (c1 - l1) > (o1 - c1)
+            and (h1 - o1) < (o1 - c1) + 0.1
+            and (o - l) <= 0.33 * (o1 - l1)
+        )
+        green[idx] = cond1 or cond2
+    return red, green
+
+
+@njit(cache=True, nogil=True)
+def _adx_series(hi, lo, cl, adx_len):
+    """
+    ADX (line 121-142) sau mỗi bar cho 1 adx_period - chỉ phụ thuộc period nên tính 1 lần / period.
+    DX_buffer là ring buffer maxlen = adx_len, cộng theo thứ tự cũ → mới để khớp sum(deque).
+    """
+    n = hi.shape[0]
+    n_len = int(adx_len)
+    out = np.zeros(n, dtype=np.float64)
+    dxbuf = np.zeros(max(n_len, 1), dtype=np.float64)
+    n_dx = 0
+    head = 0
+    smoothed_tr = 0.0
+    smoothed_dmp = 0.0
+    smoothed_dmm = 0.0
+    adx = 0.0
+
+    for idx in range(1, n):
+        h = hi[idx]
+        l = lo[idx]
+        c1 = cl[idx - 1]
+        h1 = hi[idx - 1]
+        l1 = lo[idx - 1]
+
+        true_range = max(h - l, abs(h - c1), abs(l - c1))
+        dm_plus = max(h - h1, 0.0) if (h - h1) > (l1 - l) else 0.0
+        dm_minus = max(l1 - l, 0.0) if (l1 - l) > (h - h1) else 0.0
+
+        smoothed_tr = smoothed_tr - (smoothed_tr / adx_len) + true_range
+        smoothed_dmp = smoothed_dmp - (smoothed_dmp / adx_len) + dm_plus
+        smoothed_dmm = smoothed_dmm - (smoothed_dmm / adx_len) + dm_minus
+
+        if smoothed_tr > 0:
+            di_plus = smoothed_dmp / smoothed_tr * 100
+            di_minus = smoothed_dmm / smoothed_tr * 100
+            if (di_plus + di_minus) > 0:
+                dx = abs(di_plus - di_minus) / (di_plus + di_minus) * 100
+                if n_dx < n_len:
+                    dxbuf[(head + n_dx) % n_len] = dx
+                    n_dx += 1
+                else:
+                    dxbuf[head] = dx
+                    head = (head + 1) % n_len
+
+        if n_dx >= n_len and n_dx > 0:
+            total = 0.0
+            for r in range(n_dx):
+                total += dxbuf[(head + r) % n_len]
+            adx = total / n_dx
+        out[idx] = adx
+    return out
+
+
+# =============================================================================
+# FLOW CANCELLATION HELPERS
+# =============================================================================
+
+@njit(cache=True)
+def _cancel_sell_flow(idx, cl, ts_ns, cfg, fs, ist, recent, trades, equity):
+    """Xoá toàn bộ Sell Base + đóng SHORT (Pine line 413-423, 672-682). Gọi khi đã có sell base."""
+    ist[I_N_SBASE] = 0
+    ist[I_S_FINDING_ENTRY] = 0
+    ist[I_S_TEN_MIN] = 0
+    ist[I_S_TIMEOUT] = 0
+    if ist[I_S_IN_POS] == 1:
+        _complete_trade(SHORT, idx, cl[idx], ts_ns, cfg, fs, ist, recent, trades, equity)
+
+
+@njit(cache=True)
+def _cancel_buy_flow(idx, cl, ts_ns, cfg, fs, ist, recent, trades, equity):
+    """Xoá toàn bộ Buy Base + đóng LONG (Pine line 1466-1478). Gọi khi đã có buy base."""
+    ist[I_N_BBASE] = 0
+    ist[I_L_FINDING_ENTRY] = 0
+    ist[I_L_TEN_MIN] = 0
+    ist[I_L_TIMEOUT] = 0
+    ist[I_L_DEMAND_FINDING] = 0
+    ist[I_L_LIQUID_FINDING] = 0
+    if ist[I_L_IN_POS] == 1:
+        _complete_trade(LONG, idx, cl[idx], ts_ns, cfg, fs, ist, recent, trades, equity)
+
+
+# =============================================================================
+# LONG SIDE
+# =============================================================================
+
+@njit(cache=True)
+def _manage_demand_zones(idx, op, lo, cl, ts_ns, cfg, fs, ist, zones, recent, trades, equity):
+    """_manage_demand_zones (line 352-380, 572-620)."""
+    l = lo[idx]
+    c = cl[idx]
+
+    n = ist[I_N_DEM]
+    for i in range(n - 1, -1, -1):
+        if zones[LONG, i, Z_CHAM] > 1:
+            fs[F_L_REMOVE_PRICE_DEMAND] = zones[LONG, i, Z_TOP]
+            n = _pop_row(zones[LONG], n, i)
+    ist[I_N_DEM] = n
+
+    if n > 0 and ist[I_L_MAKE_COLOR_TANG] == 0:
+        for i in range(n - 1, -1, -1):
+            so_lan = zones[LONG, i, Z_CHAM]
+            status_touched = zones[LONG, i, Z_STATUS]
+            bottom = zones[LONG, i, Z_BOTTOM]
+            top = zones[LONG, i, Z_TOP]
+            if (l < top and l > bottom) or (c < top):
+                if (so_lan == 1 and status_touched == 0) or (so_lan == 0 and ist[I_L_MAKE_COLOR_TANG] == 0):
+                    if ist[I_N_SBASE] > 0:
+                        _cancel_sell_flow(idx, cl, ts_ns, cfg, fs, ist, recent, trades, equity)
+                    if ist[I_N_BBASE] > 0:
+                        ist[I_N_BBASE] -= 1
+                        ist[I_L_FINDING_ENTRY] = 0
+                        ist[I_L_TEN_MIN] = 0
+                        ist[I_L_TIMEOUT] = 0
+                    if idx >= 2:
+                        fs[F_L_REMOVE_CANDLE_OPEN] = op[idx - 2]
+                    ist[I_L_LIQUID_FINDING] = 0
+                    ist[I_L_DEMAND_FINDING] = 1
+                    ist[I_L_TIMEOUT] = 0
+                    zones[LONG, i, Z_CHAM] = so_lan + 1
+                    zones[LONG, i, Z_STATUS] = 1
+
+
+@njit(cache=True)
+def _check_buy_liquidity_crossed(idx, op, lo, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity):
+    """_check_buy_liquidity_crossed (line 381-472)."""
+    n = ist[I_N_BLIQ]
+    if n == 0:
+        return
+    o = op[idx]
+    l = lo[idx]
+
+    for i in range(n - 1, -1, -1):
+        buy_liquidity = liq[LONG, i]
+        if l < buy_liquidity:
+            if ist[I_N_SBASE] > 0:
+                _cancel_sell_flow(idx, cl, ts_ns, cfg, fs, ist, recent, trades, equity)
+            nd = ist[I_N_DEM]
+            if nd > 0:
+                if l < zones[LONG, nd - 1, Z_BOTTOM] and ist[I_L_MUOI_BAY] > 0:
+                    ist[I_L_MUOI_BAY] = 0
+                    ist[I_L_DEMAND_FINDING] = 0
+                    ist[I_N_DEM] = nd - 1
+            if ist[I_N_BBASE] > 0:
+                ist[I_N_BBASE] -= 1
+                ist[I_L_FINDING_ENTRY] = 0
+                ist[I_L_TIMEOUT] = 0
+                ist[I_L_TEN_MIN] = 0
+            ist[I_N_BLIQ] = _pop_item(liq[LONG], n, i)
+            fs[F_L_REMOVE_PRICE] = buy_liquidity
+            fs[F_L_REMOVE_CANDLE_OPEN] = o
+            ist[I_L_LIQUID_FINDING] = 1
+            ist[I_L_DEMAND_FINDING] = 0
+            ist[I_L_DO_2LAN] = 0
+            break
+
+    if l < fs[F_L_REMOVE_PRICE] - 5:
+        ist[I_L_LIQUID_FINDING] = 0
+        ist[I_L_DEMAND_FINDING] = 0
+        fs[F_L_REMOVE_PRICE] = 0.0
+        ist[I_L_FINDING_ENTRY] = 0
+        ist[I_L_TEN_MIN] = 0
+        ist[I_L_TIMEOUT] = 0
+        ist[I_L_DO_2LAN] = 0
+        if ist[I_N_BBASE] > 0:
+            ist[I_N_BBASE] -= 1
+
+
+@njit(cache=True)
+def _find_buy_base(idx, op, hi, lo, cl, fs, ist, zones, from_liquidity):
+    """_find_buy_base_in_window (line 890-936 / 967-1023). Trả về (found, top, bottom)."""
+    for j in range(6):
+        if idx < j + 3:
+            continue
+        if op[idx - j] == fs[F_L_REMOVE_CANDLE_OPEN]:
+            break
+
+        a = idx - j
+        a1 = idx - j - 1
+        a2 = idx - j - 2
+        o_j = op[a]
+        l_j = lo[a]
+        o_j1 = op[a1]
+        h_j1 = hi[a1]
+        l_j1 = lo[a1]
+        c_j1 = cl[a1]
+        o_j2 = op[a2]
+        h_j2 = hi[a2]
+        l_j2 = lo[a2]
+        c_j2 = cl[a2]
+
+        cond1 = c_j1 > o_j1 and (h_j1 - c_j1) < (c_j1 - o_j1) + 0.1 and (o_j - l_j) < 0.33 * (c_j1 - l_j1)
+        cond2 = (
+            o_j1 > c_j1 and (c_j1 - l_j1) > (o_j1 - c_j1)
+            and (h_j1 - o_j1) < (o_j1 - c_j1) + 0.1
+            and (o_j - l_j) <= 0.33 * (o_j1 - l_j1)
+        )
+        cond_neg1 = c_j2 > o_j2 and (h_j2 - c_j2) < (c_j2 - o_j2) + 0.1 and (o_j1 - l_j1) < 0.33 * (c_j2 - l_j2)
+        cond_neg2 = (
+            o_j2 > c_j2 and (c_j2 - l_j2) > (o_j2 - c_j2)
+            and (h_j2 - o_j2) < (o_j2 - c_j2) + 0.1
+            and (o_j1 - l_j1) <= 0.33 * (o_j2 - l_j2)
+        )
+
+        if (cond1 or cond2) and not (cond_neg1 or cond_neg2):
+            x = l_j1 if l_j1 < l_j2 else l_j2
+            k = j + 2
+            y = 0.0
+
+            # idx - k >= 0 luôn đúng vì idx >= j + 3
+            k2 = idx - k + 2
+            k1 = idx - k + 1
+            k0 = idx - k
+            if (lo[k2] - hi[k0]) > 0.05 and op[k1] < cl[k1]:
+                y = lo[k2]
+            if k >= 3:
+                k3 = idx - k + 3
+                if (lo[k3] - hi[k1]) > 0.05 and op[k2] < cl[k2]:
+                    y = lo[k3]
+            if k >= 4:
+                k3 = idx - k + 3
+                k4 = idx - k + 4
+                if y == lo[k3] and (lo[k4] - hi[k2]) > 0.05 and op[k3] < cl[k3]:
+                    y = lo[k4]
+
+            if not from_liquidity and x > 0 and y > 0:
+                canh_tren = 100000.0
+                nd = ist[I_N_DEM]
+                if nd > 0:
+                    canh_tren = zones[LONG, nd - 1, Z_TOP]
+                    current_low = lo[idx]
+                    if current_low - canh_tren > current_low - fs[F_L_REMOVE_PRICE_DEMAND]:
+                        canh_tren = fs[F_L_REMOVE_PRICE_DEMAND]
+                else:
+                    if fs[F_L_REMOVE_PRICE_DEMAND] != 0:
+                        canh_tren = fs[F_L_REMOVE_PRICE_DEMAND]
+                if not (x < canh_tren + 0.5):
+                    return False, 0.0, 0.0
+
+            if x > 0 and y > 0:
+                return True, y, x
+
+    return False, 0.0, 0.0
+
+
+@njit(cache=True)
+def _push_base(bases, side, ist, top, bottom):
+    n = ist[I_N_BBASE + side]
+    if n >= bases.shape[1]:
+        ist[I_STATUS] = STATUS_CAPACITY
+        return
+    bases[side, n, B_TOP] = top
+    bases[side, n, B_BOTTOM] = bottom
+    bases[side, n, B_CHAM] = 0.0
+    ist[I_N_BBASE + side] = n + 1
+
+
+@njit(cache=True)
+def _create_buy_base(idx, op, hi, lo, cl, fs, ist, zones, bases, swing, from_liquidity):
+    """_create_buy_base_from_liquidity (line 856-937) / _create_buy_base_from_demand (line 943-1032)."""
+    if from_liquidity:
+        finding = I_L_LIQUID_FINDING
+        keep = I_L_KEEP_LIQ
+        hai = I_L_HAI_LIQ
+    else:
+        finding = I_L_DEMAND_FINDING
+        keep = I_L_KEEP_DEMAND
+        hai = I_L_HAI_DEMAND
+
+    if ist[finding] == 0 or ist[I_N_RED] == 0:
+        return
+    h = hi[idx]
+    high_giam = swing[LONG, ist[I_N_RED] - 1]
+
+    if h > high_giam or ist[keep] == 1:
+        if ist[keep] == 0:
+            ist[I_L_INDEX_HIGH] = 1
+            for j in range(1, min(idx, 20)):
+                if hi[idx - j] == high_giam:
+                    ist[I_L_INDEX_HIGH] = j
+                    break
+        ist[hai] += 1
+        ist[keep] = 1
+
+        if ist[hai] > 2:
+            if not from_liquidity:
+                ist[I_N_RED] -= 1
+            ist[hai] = 0
+            ist[keep] = 0
+            while ist[I_N_RED] > 0:
+                if h > swing[LONG, ist[I_N_RED] - 1]:
+                    ist[I_N_RED] -= 1
+                else:
+                    break
+
+            found, top, bottom = _find_buy_base(idx, op, hi, lo, cl, fs, ist, zones, from_liquidity)
+            if found:
+                _push_base(bases, LONG, ist, top, bottom)
+                ist[finding] = 0
+                ist[I_L_MAKING_BASE] = 1
+                ist[I_L_TIMEOUT] = ist[I_L_INDEX_HIGH] + 2
+                ist[I_L_DO_2LAN] += 1
+
+
+@njit(cache=True)
+def _manage_base_timeout(side, ist):
+    """_manage_buy_base_timeout (line 1033-1071) / _manage_sell_base_timeout."""
+    if side == LONG:
+        timeout = I_L_TIMEOUT
+        finding_entry = I_L_FINDING_ENTRY
+        ten_min = I_L_TEN_MIN
+        zone_finding = I_L_DEMAND_FINDING
+        liquid_finding = I_L_LIQUID_FINDING
+    else:
+        timeout = I_S_TIMEOUT
+        finding_entry = I_S_FINDING_ENTRY
+        ten_min = I_S_TEN_MIN
+        zone_finding = I_S_SUPPLY_FINDING
+        liquid_finding = I_S_LIQUID_FINDING
+    n_base = I_N_BBASE + side
+
+    if ist[timeout] > 0:
+        ist[timeout] += 1
+
+    if ist[timeout] > 60 and ist[n_base] > 0 and ist[finding_entry] == 1:
+        ist[n_base] = 0
+        ist[ten_min] = 0
+        ist[finding_entry] = 0
+        ist[timeout] = 0
+        ist[zone_finding] = 0
+        ist[liquid_finding] = 0
+
+    if ist[timeout] > 80 and ist[finding_entry] == 0:
+        if ist[n_base] > 0:
+            ist[n_base] -= 1
+        ist[ten_min] = 0
+        ist[finding_entry] = 0
+        ist[zone_finding] = 0
+        ist[liquid_finding] = 0
+        ist[timeout] = 0
+
+
+@njit(cache=True)
+def _check_buy_base_touched(idx, lo, cl, ist, bases):
+    """_check_buy_base_touched (line 1074-1099)."""
+    n = ist[I_N_BBASE]
+    if n == 0:
+        return
+    l = lo[idx]
+    c = cl[idx]
+    top = bases[LONG, n - 1, B_TOP]
+    bottom = bases[LONG, n - 1, B_BOTTOM]
+    if (
+        ((c < top and c > bottom) or (l < top and l > bottom))
+        and ist[I_L_FINDING_ENTRY] == 0
+        and ist[I_L_MAKING_BASE] == 0
+        and bases[LONG, n - 1, B_CHAM] == 0
+    ):
+        bases[LONG, n - 1, B_CHAM] += 1
+        ist[I_L_FINDING_ENTRY] = 1
+    if l < bottom - 0.5 and ist[I_L_TEN_MIN] == 0:
+        ist[I_L_TEN_MIN] += 1
+
+
+@njit(cache=True)
+def _check_buy_base_invalidation(idx, lo, cl, ts_ns, cfg, fs, ist, bases, recent, trades, equity):
+    """_check_buy_base_invalidation (Pine line 1322-1368)."""
+    n = ist[I_N_BBASE]
+    if n == 0:
+        return
+    l = lo[idx]
+    c = cl[idx]
+    top = bases[LONG, n - 1, B_TOP]
+    bottom = bases[LONG, n - 1, B_BOTTOM]
+
+    if ist[I_L_TEN_MIN] > 0:
+        ist[I_L_TEN_MIN] += 1
+
+    if ist[I_L_TEN_MIN] > 10:
+        if l < bottom - 0.5:
+            ist[I_N_BBASE] = n - 1
+            ist[I_L_FINDING_ENTRY] = 0
+            ist[I_L_TIMEOUT] = 0
+            ist[I_L_TEN_MIN] = 0
+            if ist[I_L_IN_POS] == 1:
+                _complete_trade(LONG, idx, c, ts_ns, cfg, fs, ist, recent, trades, equity)
+            if ist[I_L_DO_2LAN] == 1:
+                ist[I_L_DO_2LAN] += 1
+                ist[I_L_LIQUID_FINDING] = 1
+            return
+
+    base_height = top - bottom
+    if l <= bottom - base_height:
+        ist[I_N_BBASE] = n - 1
+        ist[I_L_FINDING_ENTRY] = 0
+        ist[I_L_TIMEOUT] = 0
+        ist[I_L_TEN_MIN] = 0
+        if ist[I_L_IN_POS] == 1:
+            _complete_trade(LONG, idx, c, ts_ns, cfg, fs, ist, recent, trades, equity)
+        if ist[I_L_DO_2LAN] == 1:
+            ist[I_L_DO_2LAN] += 1
+            ist[I_L_LIQUID_FINDING] = 0
+            ist[I_L_DEMAND_FINDING] = 1
+
+
+@njit(cache=True)
+def _execute_entry_long(idx, entry_price, sl_anchor, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity):
+    """_execute_entry_long / _execute_entry_long_with_sl_buy: SL = sl_anchor - buffer."""
+    if ist[I_S_IN_POS] == 1:
+        _complete_trade(SHORT, idx, cl[idx], ts_ns, cfg, fs, ist, recent, trades, equity)
+
+    sell_liquidity = 200000.0
+    supply_bottom = 200000.0
+    if ist[I_N_SUP] > 0:
+        supply_bottom = zones[SHORT, ist[I_N_SUP] - 1, Z_BOTTOM]
+    if ist[I_N_SLIQ] > 0:
+        sell_liquidity = liq[SHORT, ist[I_N_SLIQ] - 1]
+    closest_tp = min(supply_bottom, sell_liquidity)
+
+    buffer = cfg[C_BUFFER]
+    one_r = entry_price - (sl_anchor - buffer)
+    if entry_price + one_r < closest_tp:
+        tp_2r = entry_price + cfg[C_R_R_TARGET] * one_r
+        closest_tp = min(tp_2r, closest_tp)
+    else:
+        return
+
+    stop_loss = sl_anchor - buffer
+    risk_amount = (cfg[C_RISK] / 100) * fs[F_EQUITY]
+    sl_distance = abs(entry_price - stop_loss)
+    lot_size = risk_amount / (sl_distance * 0.1) if sl_distance > 0 else 0.0
+
+    ist[I_L_IN_POS] = 1
+    fs[F_L_ENTRY] = entry_price
+    fs[F_L_SL] = stop_loss
+    fs[F_L_TP] = closest_tp
+    fs[F_L_LOT] = lot_size
+    ist[I_L_ENTRY_IDX] = idx
+    ist[I_L_FINDING_ENTRY] = 0
+    ist[I_L_DOI_SL] = 1
+
+
+@njit(cache=True)
+def _entry_long(idx, op, hi, lo, cl, in_session, adx, ts_ns, cfg, fs, ist, zones, bases, liq, recent, trades, equity):
+    """_entry_long (line 1103-1275)."""
+    if ist[I_L_FINDING_ENTRY] == 0:
+        return
+    if not in_session[idx]:
+        return
+    n = ist[I_N_BBASE]
+    if n == 0:
+        return
+    if idx < 2:
+        return
+    top = bases[LONG, n - 1, B_TOP]
+    bottom = bases[LONG, n - 1, B_BOTTOM]
+
+    o = op[idx]
+    h = hi[idx]
+    l = lo[idx]
+    c = cl[idx]
+    o1 = op[idx - 1]
+    c1 = cl[idx - 1]
+    o2 = op[idx - 2]
+    c2 = cl[idx - 2]
+    l1 = lo[idx - 1]
+    l2 = lo[idx - 2]
+
+    if not (o < c and min(l, l1, l2) < top + 0.5):
+        return
+
+    if ist[I_L_TEN_MIN] <= 0:
+        sl_anchor = bottom
+    else:
+        # sl_buy = ta.lowest(10) (line 295)
+        sl_anchor = lo[max(0, idx - 9)]
+        for r in range(max(0, idx - 9) + 1, idx + 1):
+            if lo[r] < sl_anchor:
+                sl_anchor = lo[r]
+
+    filters_ok = (
+        (h - c) < (c - o)
+        and adx[idx] < cfg[C_ADX_MAX]
+        and ist[I_L_TIMEOUT] <= cfg[C_MAX_TIMEOUT]
+    )
+    if o2 > c2:
+        if (c >= o2) and filters_ok:
+            _execute_entry_long(idx, c, sl_anchor, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity)
+    elif o1 > c1 and o2 < c2:
+        if (c >= c2) and filters_ok:
+            _execute_entry_long(idx, c, sl_anchor, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity)
+
+
+@njit(cache=True)
+def _manage_long_position(idx, hi, lo, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity):
+    """_manage_long_position (Pine line 1277-1320)."""
+    h = hi[idx]
+    l = lo[idx]
+    c = cl[idx]
+    entry_price = fs[F_L_ENTRY]
+    sl = fs[F_L_SL]
+    tp = fs[F_L_TP]
+
+    if ist[I_N_SUP] > 0:
+        supply_bottom = zones[SHORT, ist[I_N_SUP] - 1, Z_BOTTOM]
+        if abs(supply_bottom - entry_price) < abs(entry_price - sl):
+            _complete_trade(LONG, idx, c, ts_ns, cfg, fs, ist, recent, trades, equity)
+            return
+    if ist[I_N_SLIQ] > 0:
+        sell_liquidity = liq[SHORT, ist[I_N_SLIQ] - 1]
+        if abs(sell_liquidity - entry_price) < abs(entry_price - sl):
+            _complete_trade(LONG, idx, c, ts_ns, cfg, fs, ist, recent, trades, equity)
+            return
+
+    risk = entry_price - sl
+    if h > entry_price + risk * cfg[C_TRAIL_TRIGGER] and ist[I_L_DOI_SL] == 1:
+        fs[F_L_SL] = entry_price + risk * cfg[C_TRAIL_LEVEL]
+        ist[I_L_DOI_SL] = 0
+
+    if l <= fs[F_L_SL]:
+        _complete_trade(LONG, idx, fs[F_L_SL], ts_ns, cfg, fs, ist, recent, trades, equity)
+        return
+    if h >= fs[F_L_TP]:
+        _complete_trade(LONG, idx, tp, ts_ns, cfg, fs, ist, recent, trades, equity)
+        return
+
+
+# =============================================================================
+# SHORT SIDE
+# =============================================================================
+
+@njit(cache=True)
+def _manage_supply_zones(idx, op, hi, cl, ts_ns, cfg, fs, ist, zones, recent, trades, equity):
+    """_manage_supply_zones (line 1620-1757)."""
+    h = hi[idx]
+    c = cl[idx]
+
+    n = ist[I_N_SUP]
+    for i in range(n - 1, -1, -1):
+        if zones[SHORT, i, Z_CHAM] > 1:
+            n = _pop_row(zones[SHORT], n, i)
+    ist[I_N_SUP] = n
+
+    if n > 0 and ist[I_S_MAKE_COLOR_GIAM] == 0:
+        for i in range(n - 1, -1, -1):
+            so_lan = zones[SHORT, i, Z_CHAM]
+            status_touched = zones[SHORT, i, Z_STATUS]
+            bottom = zones[SHORT, i, Z_BOTTOM]
+            top = zones[SHORT, i, Z_TOP]
+            if (h < top and h > bottom) or (c < top and c > bottom):
+                second_touch = so_lan == 1 and status_touched == 0
+                if second_touch or (so_lan == 0 and ist[I_S_MAKE_COLOR_GIAM] == 0):
+                    if ist[I_N_BBASE] > 0:
+                        _cancel_buy_flow(idx, cl, ts_ns, cfg, fs, ist, recent, trades, equity)
+                    if ist[I_N_SBASE] > 0:
+                        ist[I_N_SBASE] -= 1
+                        ist[I_S_FINDING_ENTRY] = 0
+                        ist[I_S_TEN_MIN] = 0
+                        ist[I_S_TIMEOUT] = 0
+                    if idx >= 2:
+                        fs[F_S_REMOVE_CANDLE_OPEN] = op[idx - 2]
+                    ist[I_S_LIQUID_FINDING] = 0
+                    ist[I_S_SUPPLY_FINDING] = 1
+                    if second_touch:
+                        ist[I_L_DEMAND_FINDING] = 0
+                        ist[I_L_LIQUID_FINDING] = 0
+                    zones[SHORT, i, Z_CHAM] = so_lan + 1
+                    zones[SHORT, i, Z_STATUS] = 1
+                    ist[I_S_TIMEOUT] = 0
+
+
+@njit(cache=True)
+def _check_sell_liquidity_crossed(idx, op, hi, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity):
+    """_check_sell_liquidity_crossed (line 1430-1527)."""
+    n = ist[I_N_SLIQ]
+    if n == 0:
+        return
+    o = op[idx]
+    h = hi[idx]
+
+    for i in range(n - 1, -1, -1):
+        sell_liquidity = liq[SHORT, i]
+        if h > sell_liquidity:
+            if ist[I_N_BBASE] > 0:
+                _cancel_buy_flow(idx, cl, ts_ns, cfg, fs, ist, recent, trades, equity)
+            ns = ist[I_N_SUP]
+            if ns > 0:
+                if h > zones[SHORT, ns - 1, Z_TOP]:
+                    ist[I_N_SUP] = ns - 1
+            if ist[I_N_SBASE] > 0:
+                ist[I_N_SBASE] -= 1
+                ist[I_S_FINDING_ENTRY] = 0
+                ist[I_S_TIMEOUT] = 0
+                ist[I_S_TEN_MIN] = 0
+            ist[I_N_SLIQ] = _pop_item(liq[SHORT], n, i)
+            fs[F_S_REMOVE_PRICE_SUPPLY] = sell_liquidity
+            fs[F_S_REMOVE_CANDLE_OPEN] = o
+            ist[I_S_LIQUID_FINDING] = 1
+            ist[I_S_SUPPLY_FINDING] = 0
+            ist[I_S_DO_2LAN] = 0
+            break
+
+    if h > fs[F_S_REMOVE_PRICE_SUPPLY] + 5:
+        ist[I_S_LIQUID_FINDING] = 0
+        ist[I_S_SUPPLY_FINDING] = 0
+        fs[F_S_REMOVE_PRICE_SUPPLY] = 10000.0
+        ist[I_S_FINDING_ENTRY] = 0
+        ist[I_S_TEN_MIN] = 0
+        ist[I_S_TIMEOUT] = 0
+        ist[I_S_DO_2LAN] = 0
+        if ist[I_N_SBASE] > 0:
+            ist[I_N_SBASE] -= 1
+
+
+@njit(cache=True)
+def _find_sell_base(idx, op, hi, lo, cl, fs):
+    """_find_sell_base_in_window. Trả về (found, top, bottom)."""
+    for j in range(6):
+        if idx < j + 3:
+            continue
+        if op[idx - j] == fs[F_S_REMOVE_CANDLE_OPEN]:
+            break
+
+        a = idx - j
+        a1 = idx - j - 1
+        a2 = idx - j - 2
+        o_j = op[a]
+        h_j = hi[a]
+        o_j1 = op[a1]
+        h_j1 = hi[a1]
+        l_j1 = lo[a1]
+        c_j1 = cl[a1]
+        o_j2 = op[a2]
+        h_j2 = hi[a2]
+        l_j2 = lo[a2]
+        c_j2 = cl[a2]
+
+        cond1 = o_j1 > c_j1 and (c_j1 - l_j1) < (o_j1 - c_j1) + 0.1 and (h_j - o_j) < 0.33 * (h_j1 - l_j1)
+        cond2 = (
+            c_j1 > o_j1 and (h_j1 - c_j1) > (c_j1 - o_j1)
+            and (c_j1 - l_j1) < (c_j1 - o_j1) + 0.1
+            and (h_j - o_j) <= 0.33 * (h_j1 - l_j1)
+        )
+        cond_neg1 = o_j2 > c_j2 and (c_j2 - l_j2) < (o_j2 - c_j2) + 0.1 and (h_j1 - o_j1) < 0.33 * (h_j2 - l_j2)
+        cond_neg2 = (
+            c_j2 > o_j2 and (h_j2 - c_j2) > (c_j2 - o_j2)
+            and (c_j2 - l_j2) < (c_j2 - o_j2) + 0.1
+            and (h_j1 - o_j1) <= 0.33 * (h_j2 - l_j2)
+        )
+
+        if (cond1 or cond2) and not (cond_neg1 or cond_neg2):
+            x = h_j1 if h_j1 > h_j2 else h_j2
+            k = j + 2
+            y = 10000.0
+
+            k2 = idx - k + 2
+            k1 = idx - k + 1
+            k0 = idx - k
+            if (lo[k0] - hi[k2]) > 0.05 and op[k1] > cl[k1]:
+                y = hi[k2]
+            if k >= 3:
+                k3 = idx - k + 3
+                if (lo[k1] - hi[k3]) > 0.05 and op[k2] > cl[k2]:
+                    y = hi[k3]
+            if k >= 4:
+                k3 = idx - k + 3
+                k4 = idx - k + 4
+                if y == hi[k3] and (lo[k2] - hi[k4]) > 0.05 and op[k3] > cl[k3]:
+                    y = hi[k4]
+
+            if x > 0 and y < 10000 and x > y:
+                return True, x, y
+
+    return False, 0.0, 0.0
+
+
+@njit(cache=True)
+def _create_sell_base(idx, op, hi, lo, cl, fs, ist, bases, swing, from_liquidity):
+    """_create_sell_base_from_liquidity / _create_sell_base_from_supply."""
+    if from_liquidity:
+        finding = I_S_LIQUID_FINDING
+        keep = I_S_KEEP_LIQ
+        hai = I_S_HAI_LIQ
+    else:
+        finding = I_S_SUPPLY_FINDING
+        keep = I_S_KEEP_SUPPLY
+        hai = I_S_HAI_SUPPLY
+
+    if ist[finding] == 0 or ist[I_N_GREEN] == 0:
+        return
+    l = lo[idx]
+    low_tang = swing[SHORT, ist[I_N_GREEN] - 1]
+
+    if l < low_tang or ist[keep] == 1:
+        if ist[keep] == 0:
+            ist[I_S_INDEX_LOW] = 1
+            for j in range(1, min(idx, 20)):
+                if lo[idx - j] == low_tang:
+                    ist[I_S_INDEX_LOW] = j
+                    break
+        ist[hai] += 1
+        ist[keep] = 1
+
+        if ist[hai] > 2:
+            if not from_liquidity:
+                ist[I_N_GREEN] -= 1
+            ist[hai] = 0
+            ist[keep] = 0
+            while ist[I_N_GREEN] > 0:
+                if l < swing[SHORT, ist[I_N_GREEN] - 1]:
+                    ist[I_N_GREEN] -= 1
+                else:
+                    break
+
+            found, top, bottom = _find_sell_base(idx, op, hi, lo, cl, fs)
+            if found:
+                _push_base(bases, SHORT, ist, top, bottom)
+                ist[finding] = 0
+                ist[I_S_MAKING_BASE] = 1
+                ist[I_S_TIMEOUT] = ist[I_S_INDEX_LOW] + 2
+                ist[I_S_DO_2LAN] += 1
+
+
+@njit(cache=True)
+def _check_sell_base_touched(idx, hi, cl, ist, bases):
+    """_check_sell_base_touched."""
+    n = ist[I_N_SBASE]
+    if n == 0:
+        return
+    h = hi[idx]
+    c = cl[idx]
+    top = bases[SHORT, n - 1, B_TOP]
+    bottom = bases[SHORT, n - 1, B_BOTTOM]
+    if (
+        ((c < top and c > bottom) or (h < top and h > bottom))
+        and ist[I_S_FINDING_ENTRY] == 0
+        and ist[I_S_MAKING_BASE] == 0
+        and bases[SHORT, n - 1, B_CHAM] == 0
+    ):
+        bases[SHORT, n - 1, B_CHAM] += 1
+        ist[I_S_FINDING_ENTRY] = 1
+    if h > top + 0.5 and ist[I_S_TEN_MIN] == 0:
+        ist[I_S_TEN_MIN] += 1
+
+
+@njit(cache=True)
+def _check_sell_base_invalidation(idx, hi, cl, ts_ns, cfg, fs, ist, bases, recent, trades, equity):
+    """_check_sell_base_invalidation (Pine line 2274-2323)."""
+    n = ist[I_N_SBASE]
+    if n == 0:
+        return
+    h = hi[idx]
+    c = cl[idx]
+    top = bases[SHORT, n - 1, B_TOP]
+    bottom = bases[SHORT, n - 1, B_BOTTOM]
+
+    if ist[I_S_TEN_MIN] > 0:
+        ist[I_S_TEN_MIN] += 1
+
+    if ist[I_S_TEN_MIN] > 10:
+        if h > top + 0.5:
+            ist[I_N_SBASE] = n - 1
+            ist[I_S_FINDING_ENTRY] = 0
+            ist[I_S_TIMEOUT] = 0
+            ist[I_S_TEN_MIN] = 0
+            if ist[I_S_IN_POS] == 1:
+                _complete_trade(SHORT, idx, c, ts_ns, cfg, fs, ist, recent, trades, equity)
+            if ist[I_S_DO_2LAN] == 1:
+                ist[I_S_DO_2LAN] += 1
+                ist[I_S_LIQUID_FINDING] = 1
+                ist[I_S_SUPPLY_FINDING] = 0
+            return
+
+    base_height = top - bottom
+    if h >= top + base_height:
+        ist[I_N_SBASE] = n - 1
+        ist[I_S_FINDING_ENTRY] = 0
+        ist[I_S_TIMEOUT] = 0
+        ist[I_S_TEN_MIN] = 0
+        if ist[I_S_IN_POS] == 1:
+            _complete_trade(SHORT, idx, c, ts_ns, cfg, fs, ist, recent, trades, equity)
+        if ist[I_S_DO_2LAN] == 1:
+            ist[I_S_DO_2LAN] += 1
+            ist[I_S_LIQUID_FINDING] = 1
+
+
+@njit(cache=True)
+def _execute_entry_short(idx, entry_price, sl_anchor, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity):
+    """_execute_entry_short / _execute_entry_short_with_sl_sell: SL = sl_anchor + buffer."""
+    if ist[I_L_IN_POS] == 1:
+        _complete_trade(LONG, idx, cl[idx], ts_ns, cfg, fs, ist, recent, trades, equity)
+
+    buy_liquidity = 0.0
+    demand_top = 0.0
+    if ist[I_N_DEM] > 0:
+        demand_top = zones[LONG, ist[I_N_DEM] - 1, Z_TOP]
+    if ist[I_N_BLIQ] > 0:
+        buy_liquidity = liq[LONG, ist[I_N_BLIQ] - 1]
+    closest_tp = max(demand_top, buy_liquidity)
+
+    buffer = cfg[C_BUFFER]
+    one_r = (sl_anchor + buffer) - entry_price
+    if entry_price - one_r > closest_tp:
+        tp_2r = entry_price - cfg[C_R_R_TARGET] * one_r
+        closest_tp = max(tp_2r, closest_tp)
+    else:
+        return
+
+    stop_loss = sl_anchor + buffer
+    risk_amount = (cfg[C_RISK] / 100) * fs[F_EQUITY]
+    sl_distance = abs(entry_price - stop_loss)
+    lot_size = risk_amount / (sl_distance * 0.1) if sl_distance > 0 else 0.0
+
+    ist[I_S_IN_POS] = 1
+    fs[F_S_ENTRY] = entry_price
+    fs[F_S_SL] = stop_loss
+    fs[F_S_TP] = closest_tp
+    fs[F_S_LOT] = lot_size
+    ist[I_S_ENTRY_IDX] = idx
+    ist[I_S_FINDING_ENTRY] = 0
+    ist[I_S_DOI_SL] = 1
+
+
+@njit(cache=True)
+def _entry_short(idx, op, hi, lo, cl, in_session, adx, ts_ns, cfg, fs, ist, zones, bases, liq, recent, trades, equity):
+    """_entry_short (line 2069-2228)."""
+    if ist[I_S_FINDING_ENTRY] == 0:
+        return
+    if not in_session[idx]:
+        return
+    n = ist[I_N_SBASE]
+    if n == 0:
+        return
+    if idx < 3:
+        return
+    top = bases[SHORT, n - 1, B_TOP]
+    bottom = bases[SHORT, n - 1, B_BOTTOM]
+
+    o = op[idx]
+    h = hi[idx]
+    l = lo[idx]
+    c = cl[idx]
+    o1 = op[idx - 1]
+    c1 = cl[idx - 1]
+    o2 = op[idx - 2]
+    c2 = cl[idx - 2]
+    h1 = hi[idx - 1]
+    h3 = hi[idx - 3]
+
+    if not (o > c and max(h, h1, h3) > bottom):
+        return
+
+    if ist[I_S_TEN_MIN] > 0:
+        # sl_sell = ta.highest(10) (line 296)
+        sl_anchor = hi[max(0, idx - 9)]
+        for r in range(max(0, idx - 9) + 1, idx + 1):
+            if hi[r] > sl_anchor:
+                sl_anchor = hi[r]
+    else:
+        sl_anchor = top
+
+    filters_ok = (
+        (c - l) < (o - c)
+        and adx[idx] < cfg[C_ADX_MAX]
+        and ist[I_S_TIMEOUT] <= cfg[C_MAX_TIMEOUT]
+    )
+    if o2 < c2:
+        if (c <= o2) and filters_ok:
+            _execute_entry_short(idx, c, sl_anchor, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity)
+    elif o1 < c1 and o2 > c2:
+        if (c <= c2) and filters_ok:
+            _execute_entry_short(idx, c, sl_anchor, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity)
+
+
+@njit(cache=True)
+def _manage_short_position(idx, hi, lo, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity):
+    """_manage_short_position (Pine line 2229-2271)."""
+    h = hi[idx]
+    l = lo[idx]
+    c = cl[idx]
+    entry_price = fs[F_S_ENTRY]
+    sl = fs[F_S_SL]
+    tp = fs[F_S_TP]
+
+    if ist[I_N_DEM] > 0:
+        demand_top = zones[LONG, ist[I_N_DEM] - 1, Z_TOP]
+        if abs(demand_top - entry_price) < abs(entry_price - sl):
+            _complete_trade(SHORT, idx, c, ts_ns, cfg, fs, ist, recent, trades, equity)
+            return
+    if ist[I_N_BLIQ] > 0:
+        buy_liquidity = liq[LONG, ist[I_N_BLIQ] - 1]
+        if abs(buy_liquidity - entry_price) < abs(entry_price - sl):
+            _complete_trade(SHORT, idx, c, ts_ns, cfg, fs, ist, recent, trades, equity)
+            return
+
+    risk = sl - entry_price
+    if l < entry_price - risk * cfg[C_TRAIL_TRIGGER] and ist[I_S_DOI_SL] == 1:
+        fs[F_S_SL] = entry_price - risk * cfg[C_TRAIL_LEVEL]
+        ist[I_S_DOI_SL] = 0
+
+    if h >= fs[F_S_SL]:
+        _complete_trade(SHORT, idx, fs[F_S_SL], ts_ns, cfg, fs, ist, recent, trades, equity)
+        return
+    if l <= fs[F_S_TP]:
+        _complete_trade(SHORT, idx, tp, ts_ns, cfg, fs, ist, recent, trades, equity)
+        return
+
+
+# =============================================================================
+# BAR STEP + KERNEL
+# =============================================================================
+
+@njit(cache=True)
+def _step_bar(
+    idx, op, hi, lo, cl, ts_ns, m15_avail, events, red, green, in_session, adx,
+    cfg, fs, ist, zones, bases, liq, swing, recent, trades, equity,
+):
+    """1 bar M1 của 1 config — đúng thứ tự các bước trong PineScriptStrategy.run."""
+    run_long = cfg[C_RUN_LONG] != 0.0
+    run_short = cfg[C_RUN_SHORT] != 0.0
+
+    _update_m15(idx, m15_avail, events, cfg, ist, zones, liq)
+
+    # Reset flags mỗi bar (line 1372-1373)
+    ist[I_L_MAKING_BASE] = 0
+    ist[I_L_MAKE_COLOR_TANG] = 0
+    ist[I_S_MAKING_BASE] = 0
+    ist[I_S_MAKE_COLOR_GIAM] = 0
+
+    if run_long and red[idx]:
+        _push_swing(swing, LONG, ist, hi[idx - 1])
+    if run_short and green[idx]:
+        _push_swing(swing, SHORT, ist, lo[idx - 1])
+
+    _manage_demand_zones(idx, op, lo, cl, ts_ns, cfg, fs, ist, zones, recent, trades, equity)
+    _check_buy_liquidity_crossed(idx, op, lo, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity)
+
+    if run_long:
+        _create_buy_base(idx, op, hi, lo, cl, fs, ist, zones, bases, swing, True)
+        _create_buy_base(idx, op, hi, lo, cl, fs, ist, zones, bases, swing, False)
+        _manage_base_timeout(LONG, ist)
+        _check_buy_base_touched(idx, lo, cl, ist, bases)
+        _check_buy_base_invalidation(idx, lo, cl, ts_ns, cfg, fs, ist, bases, recent, trades, equity)
+
+    # ADX đã tính sẵn (SharedBars.adx)
+
+    if run_long:
+        _entry_long(
+            idx, op, hi, lo, cl, in_session, adx, ts_ns, cfg, fs, ist, zones, bases, liq, recent, trades, equity
+        )
+
+    _manage_supply_zones(idx, op, hi, cl, ts_ns, cfg, fs, ist, zones, recent, trades, equity)
+    _check_sell_liquidity_crossed(idx, op, hi, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity)
+
+    if run_short:
+        _create_sell_base(idx, op, hi, lo, cl, fs, ist, bases, swing, True)
+        _create_sell_base(idx, op, hi, lo, cl, fs, ist, bases, swing, False)
+        _manage_base_timeout(SHORT, ist)
+        _check_sell_base_touched(idx, hi, cl, ist, bases)
+        _check_sell_base_invalidation(idx, hi, cl, ts_ns, cfg, fs, ist, bases, recent, trades, equity)
+        _entry_short(
+            idx, op, hi, lo, cl, in_session, adx, ts_ns, cfg, fs, ist, zones, bases, liq, recent, trades, equity
+        )
+
+    if ist[I_L_IN_POS] == 1:
+        _manage_long_position(idx, hi, lo, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity)
+    if ist[I_S_IN_POS] == 1:
+        _manage_short_position(idx, hi, lo, cl, ts_ns, cfg, fs, ist, zones, liq, recent, trades, equity)
+
+
+@njit(cache=True, nogil=True)
+def backtest_kernel(
+    op, hi, lo, cl, ts_ns, m15_avail, events, red, green, session_table, adx_table,
+    cfgs, fs, ist, zones, bases, liq, swing, recent, trades, equity,
+):
+    """
+    Chạy N config lockstep trên cùng mảng OHLC M1: với mỗi bar, lần lượt advance state của từng config
+    (trục 0 của cfgs / state). Dữ liệu dùng chung (events M15, nến đỏ/xanh, ADX, session) đã tính sẵn 1 lần.
+
+    State được cập nhật in-place. Config nào vượt dung lượng mảng hoặc vi phạm abort rules
+    (ist[k, I_STATUS] != STATUS_OK) sẽ dừng lại, các config khác chạy tiếp.
+    """
+    n_cfg = cfgs.shape[0]
+    for idx in range(op.shape[0]):
+        for k in range(n_cfg):
+            if ist[k, I_STATUS] != STATUS_OK:
+                continue
+            cfg = cfgs[k]
+            _step_bar(
+                idx, op, hi, lo, cl, ts_ns, m15_avail, events, red, green,
+                session_table[int(cfg[C_SESSION_SLOT])], adx_table[int(cfg[C_ADX_SLOT])],
+                cfg, fs[k], ist[k], zones[k], bases[k], liq[k], swing[k], recent[k], trades[k], equity[k],
+            )
+            # Rule min_trades: check 1 lần ở bar deadline (giống PineScriptStrategy.run)
+            if idx == cfg[C_ABORT_DEADLINE] and ist[k, I_A_REASON] == 0:
+                if ist[k, I_A_N_LIVE] < cfg[C_ABORT_MIN_TRADES]:
+                    ist[k, I_A_REASON] = 4
+                    ist[k, I_STATUS] = STATUS_PRUNED
+
+
+# =============================================================================
+# PYTHON WRAPPER
+# =============================================================================
+
+@dataclass
+class TradeArrays:
+    """Kết quả kernel dạng typed arrays (1 phần tử / trade, gồm cả paper trades)."""
+    entry_idx: np.ndarray
+    exit_idx: np.ndarray
+    direction: np.ndarray      # 0 = BUY, 1 = SELL
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    stop_loss: np.ndarray
+    take_profit: np.ndarray
+    lot_size: np.ndarray
+    pnl: np.ndarray
+    is_paper: np.ndarray
+    paper_session: np.ndarray
+
+    @classmethod
+    def from_matrix(cls, rows: np.ndarray) -> "TradeArrays":
+        return cls(
+            entry_idx=rows[:, T_ENTRY_IDX].astype(np.int64),
+            exit_idx=rows[:, T_EXIT_IDX].astype(np.int64),
+            direction=rows[:, T_DIRECTION].astype(np.int8),
+            entry_price=rows[:, T_ENTRY].copy(),
+            exit_price=rows[:, T_EXIT].copy(),
+            stop_loss=rows[:, T_SL].copy(),
+            take_profit=rows[:, T_TP].copy(),
+            lot_size=rows[:, T_LOT].copy(),
+            pnl=rows[:, T_PNL].copy(),
+            is_paper=rows[:, T_IS_PAPER].astype(np.bool_),
+            paper_session=rows[:, T_PAPER_SESSION].astype(np.int64),
+        )
+
+    def to_trades(self, index: pd.DatetimeIndex) -> List[Trade]:
+        """Chuyển sang List[Trade] (cùng format với engine Python)."""
+        trades = []
+        for i in range(len(self.pnl)):
+            trades.append(
+                Trade(
+                    entry_time=index[self.entry_idx[i]],
+                    exit_time=index[self.exit_idx[i]],
+                    direction=TradeDirection.BUY if self.direction[i] == LONG else TradeDirection.SELL,
+                    entry_price=float(self.entry_price[i]),
+                    exit_price=float(self.exit_price[i]),
+                    stop_loss=float(self.stop_loss[i]),
+                    take_profit=float(self.take_profit[i]),
+                    lot_size=float(self.lot_size[i]),
+                    pnl=float(self.pnl[i]),
+                    is_paper=bool(self.is_paper[i]),
+                )
+            )
+        return trades
+
+
+def m15_availability(m1_index: pd.DatetimeIndex, m15_index: pd.DatetimeIndex) -> np.ndarray:
+    """Số nến M15 có timestamp <= từng bar M1 (điều kiện `m15_ts <= current_ts` của engine Python)."""
+    return np.searchsorted(_index_ns(m15_index), _index_ns(m1_index), side="right").astype(np.int64)
+
+
+@dataclass
+class SharedBars:
+    """
+    Dữ liệu dùng chung cho mọi config trên cùng 1 bộ data: OHLC M1 dạng mảng, event M15,
+    nến đỏ/xanh, và ADX / session mask cho từng giá trị adx_period / trading_sessions khác nhau.
+    Tính 1 lần rồi dùng cho cả batch config (mỗi config chỉ lưu slot của mình trong config vector).
+    """
+    index: pd.DatetimeIndex
+    op: np.ndarray
+    hi: np.ndarray
+    lo: np.ndarray
+    cl: np.ndarray
+    ts_ns: np.ndarray
+    m15_avail: np.ndarray
+    events: np.ndarray
+    red: np.ndarray
+    green: np.ndarray
+    adx_periods: List[int]
+    adx_table: np.ndarray        # (len(adx_periods), n_bars)
+    session_keys: List[Tuple]
+    session_table: np.ndarray    # (len(session_keys), n_bars)
+
+    @classmethod
+    def build(
+        cls,
+        m1_data: pd.DataFrame,
+        m15_data: pd.DataFrame,
+        configs: Sequence[StrategyConfig],
+    ) -> "SharedBars":
+        op = np.ascontiguousarray(m1_data["open"].to_numpy(dtype=np.float64))
+        hi = np.ascontiguousarray(m1_data["high"].to_numpy(dtype=np.float64))
+        lo = np.ascontiguousarray(m1_data["low"].to_numpy(dtype=np.float64))
+        cl = np.ascontiguousarray(m1_data["close"].to_numpy(dtype=np.float64))
+        events = _m15_events(
+            np.ascontiguousarray(m15_data["open"].to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(m15_data["high"].to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(m15_data["low"].to_numpy(dtype=np.float64)),
+            np.ascontiguousarray(m15_data["close"].to_numpy(dtype=np.float64)),
+        )
+        red, green = _candle_masks(op, hi, lo, cl)
+
+        adx_periods: List[int] = []
+        session_keys: List[Tuple] = []
+        session_rows: List[np.ndarray] = []
+        for config in configs:
+            if config.adx_period not in adx_periods:
+                adx_periods.append(config.adx_period)
+            key = session_key(config)
+            if key not in session_keys:
+                session_keys.append(key)
+                session_rows.append(session_mask(m1_data.index, config))
+
+        n = len(op)
+        adx_table = np.zeros((len(adx_periods), n), dtype=np.float64)
+        for row, period in enumerate(adx_periods):
+            adx_table[row] = _adx_series(hi, lo, cl, float(period))
+        session_table = (
+            np.vstack(session_rows) if session_rows else np.ones((0, n), dtype=np.bool_)
+        )
+
+        return cls(
+            index=m1_data.index,
+            op=op,
+            hi=hi,
+            lo=lo,
+            cl=cl,
+            ts_ns=_index_ns(m1_data.index),
+            m15_avail=m15_availability(m1_data.index, m15_data.index),
+            events=events,
+            red=red,
+            green=green,
+            adx_periods=adx_periods,
+            adx_table=adx_table,
+            session_keys=session_keys,
+            session_table=session_table,
+        )
+
+    def supports(self, config: StrategyConfig) -> bool:
+        """True nếu bảng ADX / session đã có slot cho config này."""
+        return config.adx_period in self.adx_periods and session_key(config) in self.session_keys
+
+    def head(self, n_bars: int, n_m15: int) -> "SharedBars":
+        """
+        View (không copy) trên n_bars M1 / n_m15 M15 đầu tiên. Mọi stage đều chỉ nhìn về quá khứ
+        nên kết quả giống hệt build() trên data đã cắt.
+        """
+        return replace(
+            self,
+            index=self.index[:n_bars],
+            op=self.op[:n_bars],
+            hi=self.hi[:n_bars],
+            lo=self.lo[:n_bars],
+            cl=self.cl[:n_bars],
+            ts_ns=self.ts_ns[:n_bars],
+            m15_avail=np.minimum(self.m15_avail[:n_bars], n_m15),
+            events=self.events[:n_m15],
+            red=self.red[:n_bars],
+            green=self.green[:n_bars],
+            adx_table=self.adx_table[:, :n_bars],
+            session_table=self.session_table[:, :n_bars],
+        )
+
+    def adx_for(self, adx_period: int) -> np.ndarray:
+        """Series ADX của 1 adx_period (giá trị sau khi cập nhật ở mỗi bar M1)."""
+        return self.adx_table[self.adx_periods.index(adx_period)]
+
+    def config_matrix(
+        self,
+        configs: Sequence[StrategyConfig],
+        initial_capital: float,
+        abort_rules: Optional[AbortRules] = None,
+    ) -> np.ndarray:
+        """Config vector (N, N_CONFIG) với slot ADX / session trỏ vào bảng dùng chung."""
+        deadline = abort_rules.deadline_index(self.index) if abort_rules is not None else -1
+        cfgs = np.zeros((len(configs), N_CONFIG), dtype=np.float64)
+        for k, config in enumerate(configs):
+            cfgs[k] = config_vector(
+                config,
+                initial_capital,
+                adx_slot=self.adx_periods.index(config.adx_period),
+                session_slot=self.session_keys.index(session_key(config)),
+                abort_rules=abort_rules,
+                abort_deadline=deadline,
+            )
+        return cfgs
+
+
+@dataclass
+class ConfigRun:
+    """Kết quả kernel của 1 config (trade typed arrays + state cuối)."""
+    config: StrategyConfig
+    trade_arrays: TradeArrays
+    equity_curve: List[float]
+    final_equity: float
+    peak_equity: float
+    fs: np.ndarray
+    ist: np.ndarray
+
+    @property
+    def pruned_reason(self) -> Optional[str]:
+        """Lý do dừng sớm theo abort rules (None = chạy hết data)."""
+        reason = int(self.ist[I_A_REASON])
+        return ABORT_REASONS[reason - 1] if reason else None
+
+    def live_trades(self, index: pd.DatetimeIndex) -> List[Trade]:
+        return [t for t in self.trade_arrays.to_trades(index) if not t.is_paper]
+
+    def paper_state(self, index: pd.DatetimeIndex) -> PaperModeState:
+        """Dựng lại PaperModeState giống engine Python (paper_trades chỉ gồm phiên paper cuối)."""
+        all_trades = self.trade_arrays.to_trades(index)
+        last_session = int(self.ist[I_P_ACT_COUNT])
+        state = PaperModeState(
+            is_active=bool(self.ist[I_P_ACTIVE]),
+            paper_trades=[
+                t for t, s in zip(all_trades, self.trade_arrays.paper_session)
+                if t.is_paper and s == last_session
+            ],
+            paper_pnl=float(self.fs[F_P_PNL]),
+            paper_consecutive_wins=int(self.ist[I_P_CONSEC_WINS]),
+            consecutive_losses=int(self.ist[I_P_CONSEC_LOSSES]),
+            activation_count=last_session,
+            total_time_in_paper_minutes=float(self.fs[F_P_TOTAL_MINUTES]),
+        )
+        if self.ist[I_P_HAS_ACT] == 1:
+            state.activated_at = pd.Timestamp(int(self.ist[I_P_ACT_NS]))
+        return state
+
+
+def run_kernel(
+    shared: SharedBars,
+    configs: Sequence[StrategyConfig],
+    initial_capital: float = 1000.0,
+    capacity: int = 8192,
+    max_trades: int = 65536,
+    abort_rules: Optional[AbortRules] = None,
+) -> List[ConfigRun]:
+    """
+    Chạy lockstep `configs` trên `shared` (các config phải nằm trong danh sách đã dùng để build shared).
+    abort_rules: config vi phạm rule dừng sớm, kết quả dở dang (ConfigRun.pruned_reason).
+
+    Raises:
+        RuntimeError: nếu có config vượt dung lượng zone/base/liquidity hoặc số trade
+    """
+    cfgs = shared.config_matrix(configs, initial_capital, abort_rules)
+    state = EngineState.allocate(cfgs, capacity, max_trades)
+    backtest_kernel(
+        shared.op, shared.hi, shared.lo, shared.cl, shared.ts_ns, shared.m15_avail, shared.events,
+        shared.red, shared.green, shared.session_table, shared.adx_table,
+        cfgs, *state.arrays(),
+    )
+
+    status = state.ist[:, I_STATUS]
+    if (status == STATUS_CAPACITY).any():
+        raise RuntimeError(
+            f"Compiled engine zone/base/liquidity capacity ({capacity}) exceeded for "
+            f"{int((status == STATUS_CAPACITY).sum())} config(s); increase `capacity`"
+        )
+    if (status == STATUS_TRADES).any():
+        raise RuntimeError(
+            f"Compiled engine trade capacity ({max_trades}) exceeded for "
+            f"{int((status == STATUS_TRADES).sum())} config(s); increase `max_trades`"
+        )
+
+    runs = []
+    for k, config in enumerate(configs):
+        ist = state.ist[k].copy()
+        fs = state.fs[k].copy()
+        runs.append(
+            ConfigRun(
+                config=config,
+                trade_arrays=TradeArrays.from_matrix(state.trades[k, : ist[I_N_TRADES]]),
+                equity_curve=[float(e) for e in state.equity[k, : ist[I_N_EQUITY]]],
+                final_equity=float(fs[F_EQUITY]),
+                peak_equity=float(fs[F_PEAK]),
+                fs=fs,
+                ist=ist,
+            )
+        )
+    return runs
+
+
+class CompiledStrategy:
+    """
+    Engine thay thế PineScriptStrategy, chạy kernel JIT cho 1 config.
+    Giữ cùng interface mà main.py / optimizer dùng: run(), trades, equity_curve,
+    initial_capital, current_equity, peak_equity, config, paper_state.
+    """
+
+    def __init__(
+        self,
+        m1_data: pd.DataFrame,
+        m15_data: pd.DataFrame,
+        config: Optional[StrategyConfig] = None,
+        capacity: int = 8192,
+        max_trades: int = 65536,
+        require_jit: bool = True,
+        shared: Optional["SharedBars"] = None,
+        abort_rules: Optional[AbortRules] = None,
+    ):
+        """
+        shared: SharedBars đã tính sẵn cho cùng data (vd signal cache của optimizer);
+                None => tự build cho riêng config này.
+        abort_rules: dừng sớm config hết hy vọng (giống PineScriptStrategy)
+        """
+        if require_jit and not NUMBA_AVAILABLE:
+            raise ImportError("Compiled engine requires numba. Install it with: pip install numba")
+
+        self.config: StrategyConfig = config or StrategyConfig()
+        self.capacity = capacity
+        self.max_trades = max_trades
+        self.initial_capital = 1000
+        if shared is not None and not shared.supports(self.config):
+            raise ValueError("Shared signals do not cover this config's adx_period / trading sessions")
+        self.shared = shared if shared is not None else SharedBars.build(m1_data, m15_data, [self.config])
+        self.abort_rules = abort_rules
+        self.pruned_reason: Optional[str] = None
+
+        self.trades: List[Trade] = []
+        self.trade_arrays: Optional[TradeArrays] = None
+        self.equity_curve: List[float] = [self.initial_capital]
+        self.current_equity = self.initial_capital
+        self.peak_equity = self.initial_capital
+        self.paper_state = PaperModeState()
+
+    def run(self) -> List[Trade]:
+        """Chạy kernel, dựng lại trades / equity_curve / paper_state giống engine Python."""
+        start = time.time()
+        (result,) = run_kernel(
+            self.shared, [self.config], float(self.initial_capital), self.capacity, self.max_trades,
+            self.abort_rules,
+        )
+        duration = time.time() - start
+
+        self.trade_arrays = result.trade_arrays
+        self.trades = result.live_trades(self.shared.index)
+        self.equity_curve = result.equity_curve
+        self.current_equity = result.final_equity
+        self.peak_equity = result.peak_equity
+        self.paper_state = result.paper_state(self.shared.index)
+        self.pruned_reason = result.pruned_reason
+
+        print(
+            f"[CompiledStrategy] {len(self.shared.op):,} bars in {duration:.2f}s "
+            f"({'numba' if NUMBA_AVAILABLE else 'python fallback'}), "
+            f"trades={len(self.trades)}, paper trades={int(self.trade_arrays.is_paper.sum())}"
+            + (f", pruned: {self.pruned_reason}" if self.pruned_reason else "")
+        )
+        return self.trades
+
+
+# =============================================================================
+# PARITY
+# =============================================================================
+
+@dataclass
+class ParityReport:
+    """So sánh trades giữa engine Python (tham chiếu) và engine compiled."""
+    reference_trades: int
+    compiled_trades: int
+    mismatches: List[Tuple[int, Dict[str, Tuple[object, object]]]]
+    final_equity_reference: float
+    final_equity_compiled: float
+
+    @property
+    def ok(self) -> bool:
+        return (
+            not self.mismatches
+            and self.reference_trades == self.compiled_trades
+            and abs(self.final_equity_reference - self.final_equity_compiled) <= 1e-9
+        )
+
+
+_PARITY_FIELDS = (
+    "entry_time", "exit_time", "direction", "entry_price", "exit_price",
+    "stop_loss", "take_profit", "lot_size", "pnl",
+)
+
+
+def compare_engines(
+    m1_data: pd.DataFrame,
+    m15_data: pd.DataFrame,
+    config: Optional[StrategyConfig] = None,
+    tolerance: float = 1e-9,
+    require_jit: bool = True,
+) -> ParityReport:
+    """
+    Chạy cả 2 engine trên cùng data/config và so từng trade (live).
+
+    Args:
+        tolerance: sai số tuyệt đối cho các field giá / PnL
+    """
+    from .pinescript_port import PineScriptStrategy
+
+    reference = PineScriptStrategy(m1_data=m1_data, m15_data=m15_data, config=config)
+    ref_trades = reference.run()
+    compiled = CompiledStrategy(m1_data=m1_data, m15_data=m15_data, config=config, require_jit=require_jit)
+    cmp_trades = compiled.run()
+
+    mismatches = []
+    for i, (a, b) in enumerate(zip(ref_trades, cmp_trades)):
+        diff = {}
+        for name in _PARITY_FIELDS:
+            va = getattr(a, name)
+            vb = getattr(b, name)
+            if isinstance(va, float):
+                if abs(va - vb) > tolerance:
+                    diff[name] = (va, vb)
+            elif va != vb:
+                diff[name] = (va, vb)
+        if diff:
+            mismatches.append((i, diff))
+
+    return ParityReport(
+        reference_trades=len(ref_trades),
+        compiled_trades=len(cmp_trades),
+        mismatches=mismatches,
+        final_equity_reference=float(reference.current_equity),
+        final_equity_compiled=float(compiled.current_equity),
+    )
@@ -1,53 +1,630 @@
 import itertools
+import math
+import os
 import random
 import time
+from dataclasses import dataclass, replace
 from concurrent.futures import ProcessPoolExecutor
-from typing import Dict, Iterable, List, Any, Optional
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Sequence, Tuple
 
 import pandas as pd
 
-from .strategy_config import StrategyConfig
+from .abort_rules import AbortRules
+from .strategy_config import StrategyConfig, canonical_config, config_key, invalid_reason
 from .pinescript_port import PineScriptStrategy
-from .backtest_results import BacktestResult
+from .backtest_results import BacktestResult, BacktestSummary, write_trade_journal
+from .distributed import ClusterConfig, ClusterExecutor
+from .result_cache import CachedRun, ResultCache, data_fingerprint
+from .result_store import ResultStore
+from .scheduler import CostModel, ScheduleStats, dispatch, guided_chunks
+from .shared_data import SharedDataset, SharedFrameHandle, attach_dataset
+from .numba_engine import SharedBars
+from .pareto import parse_objectives, pareto_sort
+from .signal_cache import SignalCache, print_stage_report
 
 
-def _run_single_backtest(args: Any) -> BacktestResult:
+ENGINES = ("python", "numba", "batch", "fork")
+
+
+def _make_strategy(
+    engine: str,
+    m1_data: pd.DataFrame,
+    m15_data: pd.DataFrame,
+    config: StrategyConfig,
+    signals: Optional[Any] = None,
+    abort_rules: Optional[AbortRules] = None,
+):
     """
-    Hàm worker top-level để ProcessPoolExecutor có thể pickle được.
-    Nhận (m1_data, m15_data, config) và trả về BacktestResult.
+    Tạo strategy theo engine (numba import lazy vì là optional dependency).
+    signals: SharedBars tính sẵn (signal cache) – numba dùng toàn bộ, Python chỉ dùng series ADX.
+    abort_rules: dừng sớm config hết hy vọng (kết quả dở dang, pruned_reason != None).
     """
-    m1_data, m15_data, config = args
+    if signals is not None and not signals.supports(config):
+        signals = None  # config ngoài phạm vi signal cache (vd adx_period mới) => tự tính
+    if engine == "numba":
+        from .numba_engine import CompiledStrategy
+        return CompiledStrategy(
+            m1_data=m1_data, m15_data=m15_data, config=config, shared=signals, abort_rules=abort_rules
+        )
+    adx_series = signals.adx_for(config.adx_period) if signals is not None else None
+    return PineScriptStrategy(
+        m1_data=m1_data, m15_data=m15_data, config=config, adx_series=adx_series, abort_rules=abort_rules
+    )
+
+
+# Data của worker process, gán 1 lần trong pool initializer (xem _init_worker)
+_WORKER_DATA: Dict[str, pd.DataFrame] = {}
+_WORKER_SEGMENTS: List[Any] = []
+_WORKER_CACHE: Dict[str, Any] = {}
+_WORKER_SIGNALS: Dict[str, Any] = {}
+
+# (ResultCache, data fingerprint) hoặc None nếu không dùng cache
+CacheSpec = Optional[Tuple[ResultCache, str]]
+
+
+def _init_worker(
+    handles: Dict[str, SharedFrameHandle],
+    cache_spec: CacheSpec = None,
+    signal_handles: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Pool initializer: attach M1/M15 (+ signal cache) read-only từ shared memory, giữ segment sống tới hết process."""
+    frames, segments = attach_dataset(handles)
+    _WORKER_DATA.update(frames)
+    _WORKER_SEGMENTS.extend(segments)
+    _WORKER_CACHE["spec"] = cache_spec
+    if signal_handles is not None:
+        from .signal_cache import attach_signals
+        shared, segments = attach_signals(signal_handles, frames["m1"].index)
+        _WORKER_SIGNALS["shared"] = shared
+        _WORKER_SEGMENTS.extend(segments)
+
+
+@dataclass(frozen=True)
+class DataWindow:
+    """
+    Đoạn data cho 1 lần _evaluate: backtest chạy trên [data_start, end) nhưng chỉ tính trade vào lệnh
+    từ `start` trở đi ([data_start, start) là warm-up cho indicator / zone). None = đầu / cuối data.
+    """
+    end: Optional[pd.Timestamp] = None
+    start: Optional[pd.Timestamp] = None
+    data_start: Optional[pd.Timestamp] = None
+
+
+def _slice_window(
+    m1_data: pd.DataFrame,
+    m15_data: pd.DataFrame,
+    signals: Optional[SharedBars],
+    cache_spec: CacheSpec,
+    window: Optional[DataWindow],
+) -> Tuple[pd.DataFrame, pd.DataFrame, Optional[SharedBars], CacheSpec]:
+    """
+    Data [window.data_start, window.end) (view, không copy).
+    - signal cache chỉ dùng lại được khi đoạn data bắt đầu từ bar đầu tiên (prefix); đoạn giữa
+      thì engine tự tính lại trên data đã cắt để kết quả không phụ thuộc share_signals
+    - fingerprint cache gắn thêm 2 mốc để kết quả trên data cắt không trùng key với data đầy đủ
+    """
+    if window is None or (window.end is None and window.data_start is None):
+        return m1_data, m15_data, signals, cache_spec
+    first_bar = m1_data.index.searchsorted(window.data_start) if window.data_start is not None else 0
+    first_m15 = m15_data.index.searchsorted(window.data_start) if window.data_start is not None else 0
+    n_bars = m1_data.index.searchsorted(window.end) if window.end is not None else len(m1_data)
+    n_m15 = m15_data.index.searchsorted(window.end) if window.end is not None else len(m15_data)
+    if signals is not None:
+        signals = signals.head(int(n_bars), int(n_m15)) if first_bar == 0 else None
+    if cache_spec is not None:
+        bounds = "" if window.data_start is None else pd.Timestamp(window.data_start).isoformat()
+        bounds += ":" + ("" if window.end is None else pd.Timestamp(window.end).isoformat())
+        cache_spec = (cache_spec[0], f"{cache_spec[1]}[{bounds})")
+    return (
+        m1_data.iloc[int(first_bar):int(n_bars)],
+        m15_data.iloc[int(first_m15):int(n_m15)],
+        signals,
+        cache_spec,
+    )
+
+
+def _cache_lookup(cache_spec: CacheSpec, config: StrategyConfig, engine: str) -> Tuple[Optional[str], Optional[CachedRun]]:
+    if cache_spec is None:
+        return None, None
+    cache, fingerprint = cache_spec
+    key = cache.key(fingerprint, config, engine)
+    return key, cache.get(key)
+
+
+def _backtest(
+    m1_data: pd.DataFrame,
+    m15_data: pd.DataFrame,
+    config: StrategyConfig,
+    engine: str,
+    cache_spec: CacheSpec = None,
+    signals: Optional[Any] = None,
+    trades_from: Optional[pd.Timestamp] = None,
+    abort_rules: Optional[AbortRules] = None,
+) -> BacktestResult:
+    """trades_from: bỏ trade vào lệnh trước mốc này (warm-up); cache luôn lưu kết quả chưa cắt."""
+    key, hit = _cache_lookup(cache_spec, config, engine)
+    if hit is not None:
+        return hit.result if trades_from is None else hit.result.since(trades_from, hit.initial_capital)
 
     start = time.time()
-    strat = PineScriptStrategy(m1_data=m1_data, m15_data=m15_data, config=config)
+    strat = _make_strategy(engine, m1_data, m15_data, config, signals, abort_rules)
     trades = strat.run()
     duration = time.time() - start
 
-    return BacktestResult.from_trades(
+    result = BacktestResult.from_trades(
         config=config,
         trades=trades,
         initial_capital=strat.initial_capital,
         equity_curve=strat.equity_curve,
         backtest_duration_seconds=duration,
+        pruned_reason=strat.pruned_reason,
     )
+    if key is not None:
+        cache_spec[0].put(
+            key,
+            CachedRun(
+                result=result,
+                initial_capital=strat.initial_capital,
+                equity_curve=strat.equity_curve,
+                paper_state=strat.paper_state,
+            ),
+        )
+    return result if trades_from is None else result.since(trades_from, strat.initial_capital)
 
 
-class GridSearchOptimizer:
+def _summarize(result: BacktestResult, journal_path: Optional[str]) -> BacktestSummary:
+    """Ghi trade journal ra disk (nếu được yêu cầu) rồi bỏ trades, chỉ trả summary về parent."""
+    if journal_path is not None:
+        write_trade_journal(result.trades, journal_path)
+    return result.to_summary(journal_path)
+
+
+def _run_config_chunk(args: Any) -> List[BacktestSummary]:
     """
-    Chạy grid search trên không gian parameters của StrategyConfig.
+    Hàm worker top-level để ProcessPoolExecutor có thể pickle được.
+    Nhận (configs, engine, journal_paths, window, abort_rules); M1/M15 lấy từ shared memory đã attach
+    trong _init_worker.
+    """
+    configs, engine, journal_paths, window, abort_rules = args
+    m1_data, m15_data, signals, cache_spec = _slice_window(
+        _WORKER_DATA["m1"], _WORKER_DATA["m15"], _WORKER_SIGNALS.get("shared"), _WORKER_CACHE.get("spec"), window
+    )
+    start = window.start if window is not None else None
+    if engine == "fork":
+        return _fork_backtest(m1_data, m15_data, configs, journal_paths, cache_spec, signals, start, abort_rules)
+    return [
+        _summarize(_backtest(m1_data, m15_data, cfg, engine, cache_spec, signals, start, abort_rules), path)
+        for cfg, path in zip(configs, journal_paths)
+    ]
+
+
+def _batch_backtest(
+    m1_data: pd.DataFrame,
+    m15_data: pd.DataFrame,
+    configs: List[StrategyConfig],
+    batch_size: int,
+    journal_paths: Sequence[Optional[str]],
+    cache_spec: CacheSpec = None,
+    signals: Optional[Any] = None,
+    start: Optional[pd.Timestamp] = None,
+    abort_rules: Optional[AbortRules] = None,
+) -> List[BacktestSummary]:
+    from .batch_engine import BatchBacktester
+
+    runs: List[Optional[CachedRun]] = []
+    misses: List[Tuple[int, Optional[str]]] = []
+    for i, cfg in enumerate(configs):
+        key, hit = _cache_lookup(cache_spec, cfg, "batch")
+        runs.append(hit)
+        if hit is None:
+            misses.append((i, key))
+
+    if misses:
+        backtester = BatchBacktester(
+            m1_data, m15_data, batch_size=batch_size, shared=signals, abort_rules=abort_rules
+        )
+        fresh = backtester.run([configs[i] for i, _ in misses])
+        for (i, key), result in zip(misses, fresh):
+            runs[i] = CachedRun(result=result, initial_capital=backtester.initial_capital)
+            if key is not None:
+                cache_spec[0].put(key, runs[i])
+
+    results = [
+        run.result if start is None else run.result.since(start, run.initial_capital) for run in runs
+    ]
+    return [_summarize(r, path) for r, path in zip(results, journal_paths)]
+
+
+def _fork_backtest(
+    m1_data: pd.DataFrame,
+    m15_data: pd.DataFrame,
+    configs: List[StrategyConfig],
+    journal_paths: Sequence[Optional[str]],
+    cache_spec: CacheSpec = None,
+    signals: Optional[Any] = None,
+    start: Optional[pd.Timestamp] = None,
+    abort_rules: Optional[AbortRules] = None,
+) -> List[BacktestSummary]:
+    """
+    Engine "fork": engine Python, config chạy chung đoạn đầu tới bar đầu tiên quyết định khác nhau rồi fork
+    state (xem state_fork.py). Cache key riêng ("fork") vì kết quả còn phụ thuộc source state_fork.py.
+    """
+    from .state_fork import ForkRunner
+
+    runs: List[Optional[CachedRun]] = []
+    misses: List[Tuple[int, Optional[str]]] = []
+    for i, cfg in enumerate(configs):
+        key, hit = _cache_lookup(cache_spec, cfg, "fork")
+        runs.append(hit)
+        if hit is None:
+            misses.append((i, key))
+
+    if misses:
+        runner = ForkRunner(lambda cfg: _make_strategy("python", m1_data, m15_data, cfg, signals, abort_rules))
+        forked = runner.run([configs[i] for i, _ in misses])
+        for (i, key), run in zip(misses, forked):
+            strat = run.strategy
+            result = BacktestResult.from_trades(
+                config=configs[i],
+                trades=strat.trades,
+                initial_capital=strat.initial_capital,
+                equity_curve=strat.equity_curve,
+                backtest_duration_seconds=run.duration_seconds,
+                pruned_reason=strat.pruned_reason,
+            )
+            runs[i] = CachedRun(
+                result=result,
+                initial_capital=strat.initial_capital,
+                equity_curve=strat.equity_curve,
+                paper_state=strat.paper_state,
+            )
+            if key is not None:
+                cache_spec[0].put(key, runs[i])
+
+    results = [
+        run.result if start is None else run.result.since(start, run.initial_capital) for run in runs
+    ]
+    return [_summarize(r, path) for r, path in zip(results, journal_paths)]
+
+
+def _run_batch_backtest(args: Any) -> List[BacktestSummary]:
+    """
+    Worker cho engine "batch": chạy 1 chunk config lockstep trong 1 process.
+    Nhận (configs, batch_size, journal_paths, window, abort_rules) và trả về list BacktestSummary cùng thứ tự.
+    """
+    configs, batch_size, journal_paths, window, abort_rules = args
+    m1_data, m15_data, signals, cache_spec = _slice_window(
+        _WORKER_DATA["m1"], _WORKER_DATA["m15"], _WORKER_SIGNALS.get("shared"), _WORKER_CACHE.get("spec"), window
+    )
+    start = window.start if window is not None else None
+    return _batch_backtest(
+        m1_data, m15_data, configs, batch_size, journal_paths, cache_spec, signals, start, abort_rules
+    )
+
+
+def dedupe_configs(
+    configs: Sequence[StrategyConfig],
+) -> Tuple[List[StrategyConfig], Dict[str, List[StrategyConfig]]]:
+    """
+    Bỏ config vô nghĩa (invalid_reason), đưa config về dạng chuẩn (canonical_config) và gộp các config
+    trùng hành vi. Trả về (config chuẩn duy nhất theo thứ tự xuất hiện, config_key chuẩn -> config gốc)
+    và in số lần backtest tiết kiệm được.
+    """
+    unique: List[StrategyConfig] = []
+    groups: Dict[str, List[StrategyConfig]] = {}
+    invalid = 0
+    for cfg in configs:
+        if invalid_reason(cfg) is not None:
+            invalid += 1
+            continue
+        canonical = canonical_config(cfg)
+        key = config_key(canonical)
+        if key not in groups:
+            groups[key] = []
+            unique.append(canonical)
+        groups[key].append(cfg)
+
+    saved = len(configs) - len(unique)
+    if saved:
+        print(
+            f"[Optimizer] {len(configs)} configs -> {len(unique)} distinct to run "
+            f"({invalid} invalid dropped, {saved - invalid} behavioural duplicates): {saved} evaluations saved"
+        )
+    return unique, groups
+
+
+class _BestSoFar:
+    """
+    In tiến độ + config tốt nhất (bỏ qua config bị dừng sớm) mỗi khi có kết quả tốt hơn.
+    objective: (metric, maximize) dùng để so sánh; với objectives nhiều mục tiêu là objective đầu tiên.
+    """
+
+    def __init__(
+        self, total: int, done: int = 0, objective: Tuple[str, bool] = ("profit_factor", True)
+    ) -> None:
+        self.total = total
+        self.done = done
+        self.objective = objective
+        self.best: Optional[BacktestSummary] = None
+
+    def update(self, summary: BacktestSummary) -> None:
+        self.done += 1
+        if self.offer(summary):
+            name = self.objective[0]
+            primary = "" if name == "profit_factor" else f"{name}={float(getattr(summary, name)):,.4g}, "
+            print(
+                f"[Optimizer] {self.done}/{self.total} done | best so far: {primary}"
+                f"PF={summary.profit_factor:.2f}, WR={summary.win_rate:.1f}%, "
+                f"trades={summary.total_trades}, PnL={summary.total_pnl:,.0f} ({summary.config_key})"
+            )
+
+    def _score(self, summary: BacktestSummary) -> float:
+        name, maximize = self.objective
+        value = float(getattr(summary, name))
+        if math.isnan(value):
+            return -math.inf
+        return value if maximize else -value
+
+    def offer(self, summary: BacktestSummary) -> bool:
+        """Cập nhật best nếu summary tốt hơn (không in), trả về True nếu best thay đổi."""
+        if summary.pruned:
+            return False
+        if self.best is None or self._score(summary) > self._score(self.best):
+            self.best = summary
+            return True
+        return False
+
+
+@dataclass
+class EvalSession:
+    """
+    Tài nguyên dùng chung cho nhiều lần _evaluate: pool worker (n_jobs != 1), worker nhiều máy
+    (ClusterExecutor) hoặc signal cache in-process.
+    """
+    n_workers: int
+    executor: Optional[Any] = None
+    signals: Optional[SharedBars] = None
+    stats: Optional[ScheduleStats] = None
+
+
+class BaseOptimizer:
+    """
+    Phần dùng chung của các optimizer: engine, worker pool + shared memory, result cache, signal cache.
+    Lớp con chỉ cần quyết định chạy config nào (grid, TPE, ...).
     """
 
     def __init__(
         self,
         m1_data: pd.DataFrame,
         m15_data: pd.DataFrame,
-        param_grid: Dict[str, Iterable],
+        engine: str = "python",
+        batch_size: int = 64,
+        cache_dir: Optional[str] = None,
+        share_signals: bool = True,
+        abort_rules: Optional[AbortRules] = None,
+        cluster: Optional[ClusterConfig] = None,
     ) -> None:
+        """
+        abort_rules: dừng sớm config hết hy vọng; config bị dừng luôn xếp sau config chạy hết data.
+        cluster: chạy config trên worker ở các máy khác (xem distributed.py) thay vì pool local.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
         self.m1_data = m1_data
         self.m15_data = m15_data
+        self.engine = engine
+        self.batch_size = batch_size
+        # Cache kết quả theo (data, config, source engine); fingerprint data tính lazy 1 lần
+        self.cache = ResultCache(cache_dir) if cache_dir else None
+        self._fingerprint: Optional[str] = None
+        # Build phần không phụ thuộc config (M15 events, nến đỏ/xanh, ADX, session) 1 lần / lần chạy
+        self.share_signals = share_signals
+        self.abort_rules = abort_rules
+        self.cluster = cluster
+        # Thời gian chạy đã ghi nhận => chia task dài trước (scheduler.py); stats của session gần nhất
+        self.cost_model = CostModel()
+        self.schedule_stats: Optional[ScheduleStats] = None
+
+    def _data_fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = data_fingerprint(self.m1_data, self.m15_data)
+        return self._fingerprint
+
+    def _cache_fingerprint(self) -> str:
+        fingerprint = self._data_fingerprint()
+        if self.abort_rules is not None:
+            # Kết quả bị cắt phụ thuộc rule => không dùng chung key với lần chạy không có rule
+            fingerprint += f"|abort={self.abort_rules.key()}"
+        return fingerprint
+
+    def _cache_spec(self) -> CacheSpec:
+        if self.cache is None:
+            return None
+        return self.cache, self._cache_fingerprint()
+
+    @staticmethod
+    def _journal_path(journal_dir: str, key: str) -> str:
+        return os.path.join(journal_dir, f"{key}.csv")
+
+    def _window_bars(self, window: Optional[DataWindow]) -> int:
+        """Số bar M1 backtest thực sự chạy trên window (dùng để quy đổi chi phí giữa các window)."""
+        index = self.m1_data.index
+        if window is None:
+            return len(index)
+        first = index.searchsorted(window.data_start) if window.data_start is not None else 0
+        stop = index.searchsorted(window.end) if window.end is not None else len(index)
+        return int(stop - first)
+
+    @contextmanager
+    def _scheduled(self, session: EvalSession) -> Iterator[EvalSession]:
+        """Gắn ScheduleStats vào session, in utilisation của pool khi session kết thúc bình thường."""
+        session.stats = ScheduleStats(n_workers=session.n_workers)
+        yield session
+        self.schedule_stats = session.stats
+        if session.stats.chunks:
+            print(session.stats.report())
+
+    @contextmanager
+    def _session(self, n_jobs: int, signal_configs: List[StrategyConfig]) -> Iterator[EvalSession]:
+        """
+        Mở 1 session đánh giá: n_jobs == 1 => chạy in-process, ngược lại publish M1/M15 (+ signal cache
+        cho signal_configs) vào shared memory 1 lần và mở pool worker attach sẵn, giữ tới hết session.
+        Có self.cluster => bỏ qua n_jobs, task được gửi cho worker ở các máy khác.
+        """
+        if self.cluster is not None:
+            hello = {
+                "data_fingerprint": self._data_fingerprint(),
+                "cache_fingerprint": self._cache_fingerprint(),
+                "signal_configs": signal_configs if self.share_signals else [],
+            }
+            with ClusterExecutor(self.cluster, hello) as executor:
+                try:
+                    with self._scheduled(EvalSession(self.cluster.expected_workers, executor)) as session:
+                        yield session
+                except BaseException:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+            return
+
+        if n_jobs == 1:
+            signals = None
+            if self.share_signals and signal_configs:
+                signals = SharedBars.build(self.m1_data, self.m15_data, signal_configs)
+            yield EvalSession(n_workers=1, signals=signals)
+            return
+
+        n_workers = (os.cpu_count() or 1) if n_jobs < 0 else n_jobs
+        with ExitStack() as stack:
+            dataset = stack.enter_context(SharedDataset(m1=self.m1_data, m15=self.m15_data))
+            signal_handles = None
+            if self.share_signals and signal_configs:
+                signals = stack.enter_context(SignalCache.build(self.m1_data, self.m15_data, signal_configs))
+                signal_handles = signals.handles
+            executor = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=n_workers,
+                    initializer=_init_worker,
+                    initargs=(dataset.handles, self._cache_spec(), signal_handles),
+                )
+            )
+            try:
+                with self._scheduled(EvalSession(n_workers=n_workers, executor=executor)) as session:
+                    yield session
+            except BaseException:
+                # Ctrl-C / lỗi: bỏ các chunk chưa chạy thay vì đợi hết sweep
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    def _evaluate(
+        self,
+        configs: List[StrategyConfig],
+        journal_paths: List[Optional[str]],
+        session: EvalSession,
+        on_result: Optional[Callable[[BacktestSummary], None]] = None,
+        window: Optional[DataWindow] = None,
+    ) -> List[BacktestSummary]:
+        """
+        Chạy configs, gọi on_result ngay khi từng kết quả về,
+        trả về list theo đúng thứ tự configs với config object của parent gắn lại.
+        window: chỉ backtest trên 1 đoạn data (None = toàn bộ data), xem DataWindow.
+        Với pool / cluster: config có chi phí ước lượng lớn (self.cost_model) được giao trước, xem scheduler.py.
+        """
+        out: List[Optional[BacktestSummary]] = [None] * len(configs)
+        n_bars = self._window_bars(window)
+
+        def collect(indices: Sequence[int], summaries: List[BacktestSummary]) -> None:
+            for i, summary in zip(indices, summaries):
+                summary = summary.with_config(configs[i])
+                out[i] = summary
+                self.cost_model.observe(summary.config, summary.backtest_duration_seconds, n_bars)
+                if on_result is not None:
+                    on_result(summary)
+
+        if not configs:
+            return []
+
+        if session.executor is None:
+            m1_data, m15_data, signals, cache_spec = _slice_window(
+                self.m1_data, self.m15_data, session.signals, self._cache_spec(), window
+            )
+            start = window.start if window is not None else None
+            step = self.batch_size if self.engine in ("batch", "fork") else 1
+            for i in range(0, len(configs), step):
+                cfgs, paths = configs[i:i + step], journal_paths[i:i + step]
+                if self.engine == "batch":
+                    summaries = _batch_backtest(
+                        m1_data, m15_data, cfgs, self.batch_size, paths, cache_spec, signals, start,
+                        self.abort_rules,
+                    )
+                elif self.engine == "fork":
+                    summaries = _fork_backtest(
+                        m1_data, m15_data, cfgs, paths, cache_spec, signals, start, self.abort_rules,
+                    )
+                else:
+                    result = _backtest(
+                        m1_data, m15_data, cfgs[0], self.engine, cache_spec, signals, start, self.abort_rules,
+                    )
+                    summaries = [_summarize(result, paths[0])]
+                collect(range(i, i + len(cfgs)), summaries)
+            return out
+
+        n_workers = session.n_workers
+        stats = session.stats or ScheduleStats(n_workers=n_workers)
+        costs = [self.cost_model.estimate(cfg, n_bars) for cfg in configs]
+        if self.cost_model.observations:
+            stats.add(predicted_seconds=sum(costs))
+        if self.engine == "fork":
+            # Giữ thứ tự grid: config kề nhau thường chỉ khác 1 field => chunk lớn chia sẻ được nhiều hơn
+            chunk = min(self.batch_size, math.ceil(len(configs) / n_workers))
+            chunks = iter([list(range(i, min(i + chunk, len(configs)))) for i in range(0, len(configs), chunk)])
+        else:
+            # Dài trước, chunk nhỏ dần; batch: chunk lớn hơn thì kernel lockstep hiệu quả hơn
+            order = sorted(range(len(configs)), key=lambda i: -costs[i])
+            max_size = math.ceil(len(configs) / n_workers)
+            if self.engine == "batch":
+                max_size = min(self.batch_size, max_size)
+            chunks = guided_chunks(order, costs, n_workers, max(1, max_size))
+
+        if self.engine == "batch":
+            worker, engine_arg = _run_batch_backtest, self.batch_size
+        else:
+            worker, engine_arg = _run_config_chunk, self.engine
+        make_args = lambda chunk: (
+            [configs[i] for i in chunk], engine_arg, [journal_paths[i] for i in chunk], window, self.abort_rules,
+        )
+        dispatch(session.executor, worker, chunks, make_args, collect, stats)
+        return out
+
+
+class GridSearchOptimizer(BaseOptimizer):
+    """
+    Chạy grid search trên không gian parameters của StrategyConfig.
+    """
+
+    def __init__(
+        self,
+        m1_data: pd.DataFrame,
+        m15_data: pd.DataFrame,
+        param_grid: Dict[str, Iterable],
+        engine: str = "python",
+        batch_size: int = 64,
+        cache_dir: Optional[str] = None,
+        share_signals: bool = True,
+        abort_rules: Optional[AbortRules] = None,
+        cluster: Optional[ClusterConfig] = None,
+        constraints: Sequence[Callable[[StrategyConfig], bool]] = (),
+    ) -> None:
+        """constraints: config nào có constraint trả về False bị bỏ khỏi grid (vd r_r_ratio_target > r_r_ratio_min)."""
+        super().__init__(
+            m1_data, m15_data, engine=engine, batch_size=batch_size,
+            cache_dir=cache_dir, share_signals=share_signals, abort_rules=abort_rules, cluster=cluster,
+        )
         self.param_grid = param_grid
+        self.constraints = list(constraints)
 
-    def _generate_configs(self) -> List[StrategyConfig]:
+    def _generate_configs(self, dedupe: bool = False) -> List[StrategyConfig]:
+        """Tích Descartes của param_grid; dedupe=True => chỉ giữ config hợp lệ, khác nhau về hành vi."""
         keys = list(self.param_grid.keys())
         values_product = itertools.product(*(self.param_grid[k] for k in keys))
 
@@ -55,23 +632,40 @@ class GridSearchOptimizer:
         for values in values_product:
             kwargs = dict(zip(keys, values))
             cfg = StrategyConfig(**kwargs)
-            configs.append(cfg)
-        return configs
+            if all(constraint(cfg) for constraint in self.constraints):
+                configs.append(cfg)
+        return dedupe_configs(configs)[0] if dedupe else configs
 
     def run(
         self,
         n_jobs: int = -1,
         max_configs: Optional[int] = None,
         random_subset: bool = False,
-    ) -> List[BacktestResult]:
+        journal_keys: Optional[Iterable[str]] = None,
+        journal_top_k: int = 0,
+        journal_dir: str = "trade_journals",
+        store_path: Optional[str] = None,
+        dedupe: bool = True,
+        objectives: Optional[Sequence[str]] = None,
+    ) -> List[BacktestSummary]:
         """
-        Chạy grid search.
+        Chạy grid search, trả về BacktestSummary (metrics + config key, không có trades).
 
         - n_jobs = -1      => dùng tất cả CPU cores
         - n_jobs = 1       => chạy tuần tự (debug)
         - max_configs != None và random_subset=True:
               chỉ chạy ngẫu nhiên max_configs cấu hình
+        - journal_keys: config_key cần ghi trade journal (worker ghi thẳng ra journal_dir/<key>.csv)
+        - journal_top_k: sau khi sweep xong, chạy lại top-K config (theo thứ tự sort) để ghi journal
+        - store_path: CSV append-only (ResultStore); mỗi kết quả được ghi ngay khi về, chạy lại
+              cùng sweep sẽ bỏ qua config đã có trong file
+        - dedupe: bỏ config vô nghĩa, chạy mỗi config khác nhau về hành vi 1 lần rồi trả kết quả
+              cho mọi config trùng (xem dedupe_configs); config vô nghĩa không có trong kết quả
+        - objectives: nhiều mục tiêu (vd ["total_pnl", "max_drawdown", "sharpe_ratio"], xem pareto.py) =>
+              sort theo Pareto front thay vì profit_factor
         """
+        if objectives is not None:
+            parse_objectives(objectives)
         configs = self._generate_configs()
 
         if max_configs is not None and max_configs < len(configs):
@@ -80,17 +674,85 @@ class GridSearchOptimizer:
             else:
                 configs = configs[:max_configs]
 
-        # Chuẩn bị args cho worker
-        args_list = [(self.m1_data, self.m15_data, cfg) for cfg in configs]
+        if dedupe:
+            configs, groups = dedupe_configs(configs)
+        else:
+            groups = {config_key(c): [c] for c in configs}
 
-        if n_jobs == 1:
-            results = [_run_single_backtest(args) for args in args_list]
+        if self.share_signals and len(configs) > 1:
+            print_stage_report(configs, list(self.param_grid.keys()))
+
+        store = ResultStore(store_path) if store_path else None
+        try:
+            # Journal được yêu cầu cho 1 config gốc => ghi khi chạy config chuẩn của nó (tên file theo key gốc)
+            wanted = set(journal_keys or ())
+            journal_for: Dict[str, str] = {}
+            for key, originals in groups.items():
+                requested = [config_key(o) for o in originals if config_key(o) in wanted]
+                if requested:
+                    journal_for[key] = self._journal_path(journal_dir, requested[0])
+
+            results: List[BacktestSummary] = []
+            pending: List[StrategyConfig] = []
+            journal_paths: List[Optional[str]] = []
+            for cfg, key in zip(configs, map(config_key, configs)):
+                stored = store.get(key) if store is not None else None
+                if stored is not None:
+                    results.append(stored.with_config(cfg))
+                    continue
+                pending.append(cfg)
+                journal_paths.append(journal_for.get(key))
+            # Thời gian chạy của kết quả cũ => ước lượng chi phí config mới
+            self.cost_model.observe_summaries(results, len(self.m1_data))
+
+            if results:
+                print(f"[Optimizer] Resuming: {len(results)}/{len(configs)} configs already in {store_path}")
+
+            progress = _BestSoFar(
+                total=len(configs),
+                done=len(results),
+                objective=parse_objectives(objectives)[0] if objectives is not None else ("profit_factor", True),
+            )
+            for r in results:
+                progress.offer(r)
+
+            def on_result(summary: BacktestSummary) -> None:
+                if store is not None:
+                    store.append(summary)
+                progress.update(summary)
+
+            with self._session(n_jobs, pending) as session:
+                results.extend(self._evaluate(pending, journal_paths, session, on_result))
+        finally:
+            if store is not None:
+                store.close()
+            if self.cache is not None:
+                self.cache.evict()
+
+        # Sắp xếp theo profit_factor giảm dần (hoặc theo Pareto front), config bị dừng sớm xếp cuối
+        if objectives is not None:
+            results = pareto_sort(results, objectives)
         else:
-            max_workers = None if n_jobs < 0 else n_jobs
-            with ProcessPoolExecutor(max_workers=max_workers) as executor:
-                results = list(executor.map(_run_single_backtest, args_list))
+            results.sort(key=lambda r: (not r.pruned, r.profit_factor), reverse=True)
 
-        # Sắp xếp theo profit_factor giảm dần
-        results.sort(key=lambda r: r.profit_factor, reverse=True)
-        return results
+        if journal_top_k > 0:
+            top = [r for r in results[:journal_top_k] if r.journal_path is None]
+            if top:
+                top_configs = [r.config for r in top]
+                with self._session(n_jobs, top_configs) as session:
+                    rerun = self._evaluate(
+                        top_configs,
+                        [self._journal_path(journal_dir, r.config_key) for r in top],
+                        session,
+                    )
+                by_key = {r.config_key: r.journal_path for r in rerun}
+                results = [
+                    replace(r, journal_path=by_key.get(r.config_key, r.journal_path)) for r in results
+                ]
 
+        # Trả kết quả của config chuẩn cho mọi config gốc trùng hành vi với nó
+        return [
+            replace(r, config_key=config_key(original), config=original)
+            for r in results
+            for original in groups.get(r.config_key, [r.config])
+        ]
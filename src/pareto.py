@@ -0,0 +1,121 @@
+"""
+Tối ưu nhiều mục tiêu: non-dominated sorting (Pareto front) trên bảng kết quả.
+
+Objective là tên metric của BacktestSummary; tiền tố "-" = càng nhỏ càng tốt, "+" = càng lớn càng tốt,
+không có tiền tố thì theo chiều mặc định của metric (max_drawdown / backtest_duration_seconds: nhỏ hơn
+là tốt hơn, còn lại lớn hơn là tốt hơn). Ví dụ: ["total_pnl", "max_drawdown", "total_trades", "sharpe_ratio"].
+
+Config A dominate B khi A không tệ hơn B ở mọi objective và tốt hơn ở ít nhất 1 objective.
+Front 0 (pareto_rank = 0) là các config không bị config nào dominate; front k là front 0 của phần còn
+lại sau khi bỏ front 0..k-1. Config bị dừng sớm (pruned) luôn xếp sau mọi config chạy hết data.
+"""
+
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backtest_results import BacktestSummary
+
+
+# Metric mà giá trị nhỏ hơn là tốt hơn (khi objective không có tiền tố)
+MINIMIZE = ("max_drawdown", "backtest_duration_seconds")
+
+# Metric số của BacktestSummary dùng được làm objective
+METRICS = (
+    "total_pnl", "total_trades", "winning_trades", "losing_trades", "win_rate", "profit_factor",
+    "avg_win", "avg_loss", "max_drawdown", "sharpe_ratio", "backtest_duration_seconds",
+)
+
+
+def parse_objectives(objectives: Sequence[str]) -> List[Tuple[str, bool]]:
+    """["total_pnl", "-total_trades"] -> [("total_pnl", True), ("total_trades", False)] (True = maximize)."""
+    parsed: List[Tuple[str, bool]] = []
+    for objective in objectives:
+        name = objective.strip().lstrip("+-")
+        if name not in METRICS:
+            raise ValueError(f"Unknown objective metric: {objective!r} (expected one of {', '.join(METRICS)})")
+        if objective.strip().startswith("-"):
+            maximize = False
+        elif objective.strip().startswith("+"):
+            maximize = True
+        else:
+            maximize = name not in MINIMIZE
+        parsed.append((name, maximize))
+    if not parsed:
+        raise ValueError("Need at least one objective")
+    return parsed
+
+
+def objective_matrix(columns: Sequence[Sequence[float]], maximize: Sequence[bool]) -> np.ndarray:
+    """
+    Ma trận (n_config, n_objective) đã đổi chiều để mọi objective đều "lớn hơn = tốt hơn".
+    NaN (vd metric không tính được) coi như tệ nhất.
+    """
+    values = np.column_stack([np.asarray(c, dtype=np.float64) for c in columns])
+    values = np.where(np.asarray(maximize, dtype=bool), values, -values)
+    return np.where(np.isnan(values), -np.inf, values)
+
+
+def _dominated_counts(dominators: np.ndarray, targets: np.ndarray, block: int) -> np.ndarray:
+    """Số dòng trong `dominators` dominate từng dòng của `targets`, tính theo block `block` dòng."""
+    counts = np.zeros(len(targets), dtype=np.int64)
+    b = targets[None, :, :]
+    for start in range(0, len(dominators), block):
+        a = dominators[start:start + block, None, :]
+        counts += ((a >= b).all(axis=2) & (a > b).any(axis=2)).sum(axis=0)
+    return counts
+
+
+def pareto_ranks(values: np.ndarray, valid: Optional[np.ndarray] = None, block: int = 1024) -> np.ndarray:
+    """
+    Số thứ tự front (0 = Pareto front) của từng dòng trong `values` (maximize mọi cột).
+
+    Không dựng ma trận dominate n x n: số lần bị dominate được đếm theo block `block` dòng, mỗi front
+    bóc ra thì trừ số lần nó dominate các dòng chưa xếp hạng (cũng theo block). Mỗi dòng là dominator
+    đúng 1 lần nên tổng vẫn O(n^2) phép so sánh, bộ nhớ tạm ~ block * n * n_objective bool.
+    Dòng có valid = False (config bị dừng sớm) được xếp hạng riêng, sau mọi dòng valid.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if valid is not None and not np.all(valid):
+        valid = np.asarray(valid, dtype=bool)
+        ranks = np.empty(n, dtype=np.int64)
+        ranks[valid] = pareto_ranks(values[valid], block=block)
+        offset = ranks[valid].max() + 1 if valid.any() else 0
+        ranks[~valid] = pareto_ranks(values[~valid], block=block) + offset
+        return ranks
+
+    ranks = np.full(n, -1, dtype=np.int64)
+    dominated_count = _dominated_counts(values, values, block)
+    front = np.flatnonzero(dominated_count == 0)
+    rank = 0
+    while front.size:
+        ranks[front] = rank
+        rest = np.flatnonzero(ranks < 0)
+        dominated_count[rest] -= _dominated_counts(values[front], values[rest], block)
+        front = rest[dominated_count[rest] == 0]
+        rank += 1
+    return ranks
+
+
+def rank_results(results: Sequence[Any], objectives: Sequence[str]) -> np.ndarray:
+    """pareto_rank của từng BacktestSummary / BacktestResult (config bị dừng sớm xếp sau)."""
+    parsed = parse_objectives(objectives)
+    if not results:
+        return np.empty(0, dtype=np.int64)
+    values = objective_matrix(
+        [[getattr(r, name) for r in results] for name, _ in parsed], [maximize for _, maximize in parsed]
+    )
+    valid = np.array([r.pruned_reason is None for r in results], dtype=bool)
+    return pareto_ranks(values, valid)
+
+
+def pareto_sort(results: Sequence[BacktestSummary], objectives: Sequence[str]) -> List[BacktestSummary]:
+    """Sort theo front (front 0 trước), trong cùng front theo objective đầu tiên (tốt trước)."""
+    if not results:
+        return list(results)
+    ranks = rank_results(results, objectives)
+    name, maximize = parse_objectives(objectives)[0]
+    primary = objective_matrix([[getattr(r, name) for r in results]], [maximize])[:, 0]
+    order = np.lexsort((-primary, ranks))
+    return [results[i] for i in order]
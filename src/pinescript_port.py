@@ -3,12 +3,15 @@ Port 1-1 của PineScript strategy sang Python.
 Chạy bar-by-bar với state giống hệt Pine.
 """
 
-from dataclasses import dataclass, field
-from typing import List, Optional, Deque
+import copy
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Deque
 from collections import deque
 import pandas as pd
 import numpy as np
 
+from .abort_rules import AbortMonitor, AbortRules
+from .metrics import RunningStats, print_statistics
 from .models import Box, BuySellBase, DemandSupplyZone, LiquidityPoint, TradeDirection, ZoneType
 from .strategy_config import StrategyConfig
 
@@ -40,15 +43,64 @@ class PaperModeState:
     paper_pnl: float = 0.0                               # Tổng PnL paper mode
     paper_consecutive_wins: int = 0                      # Chuỗi thắng liên tiếp trong paper
     
-    # Tracking cho trigger conditions (dùng cho cả live và paper)
+    # Tracking cho trigger conditions (engine Python: đọc từ RunningStats của strategy)
     recent_results: Deque[float] = field(default_factory=lambda: deque(maxlen=10))
-    consecutive_losses: int = 0
+    consecutive_losses: int = 0                          # Chuỗi thua tính từ lần thoát paper mode gần nhất
+    streak_start: int = 0                                # Số lệnh live tại lần thoát paper mode gần nhất
     
     # Stats
     activation_count: int = 0                            # Số lần kích hoạt paper mode
     total_time_in_paper_minutes: float = 0.0             # Tổng thời gian trong paper mode
 
 
+@dataclass(frozen=True)
+class HotPathSample:
+    """
+    Snapshot kích thước state của engine tại 1 lần đóng nến M15.
+    Dùng để phát hiện các mảng tăng trưởng không giới hạn và đo số lần truy cập DataFrame.
+    """
+    timestamp: pd.Timestamp
+    m1_idx: int
+
+    # Kích thước các mảng state
+    demand_zones: int
+    supply_zones: int
+    buy_bases: int
+    sell_bases: int
+    buy_liquidity: int
+    sell_liquidity: int
+    red_candle_highs: int
+    green_candle_lows: int
+
+    # Số cờ tìm kiếm (finding/keep_finding) đang bật trên cả 2 side
+    active_search_flags: int
+
+    # Số lần truy cập row (cộng dồn từ đầu backtest)
+    m1_row_lookups: int
+    m15_row_lookups: int
+
+
+@dataclass
+class RunCounters:
+    """Bộ đếm sự kiện in ở cuối run()."""
+    demand_zones_created: int = 0
+    supply_zones_created: int = 0
+    buy_bases_created: int = 0
+    sell_bases_created: int = 0
+    finding_entry_count: int = 0
+    finding_entry_sell_count: int = 0
+
+
+@dataclass(frozen=True)
+class StrategySnapshot:
+    """
+    State của PineScriptStrategy ở đầu bar `next_bar` (xem PineScriptStrategy.snapshot).
+    Không chứa data / config: restore được vào strategy có config khác để chạy tiếp (fork).
+    """
+    next_bar: int
+    state: Dict[str, Any]
+
+
 @dataclass
 class LongState:
     """State cho Long side (Buy), mapping trực tiếp từ Pine var."""
@@ -190,9 +242,13 @@ class PineScriptStrategy:
         m1_data: pd.DataFrame,
         m15_data: pd.DataFrame,
         config: Optional[StrategyConfig] = None,
+        collect_hot_path_stats: bool = False,
+        adx_series: Optional[np.ndarray] = None,
+        abort_rules: Optional[AbortRules] = None,
     ):
-        self.m1 = m1_data.copy()
-        self.m15 = m15_data.copy()
+        # Không copy: strategy chỉ đọc data, và optimizer truyền frame read-only từ shared memory
+        self.m1 = m1_data
+        self.m15 = m15_data
 
         # Config (tập trung tất cả tham số tối ưu được)
         self.config: StrategyConfig = config or StrategyConfig()
@@ -217,6 +273,8 @@ class PineScriptStrategy:
         # Equity curve tracking for drawdown calculation
         self.equity_curve: List[float] = [self.initial_capital]
         self.peak_equity = self.initial_capital
+        # Metrics live cập nhật mỗi lần đóng lệnh live (paper mode trigger, abort rules, log đọc từ đây)
+        self.stats = RunningStats(self.initial_capital, window=self.config.paper_trigger_win_rate_window)
         
         # ADX state
         self.adx_len = self.config.adx_period
@@ -225,12 +283,117 @@ class PineScriptStrategy:
         self.SmoothedDirectionalMovementMinus = 0.0
         self.ADX = 0.0
         self.DX_buffer = deque(maxlen=self.adx_len)
+        # ADX tính sẵn cho adx_period này (signal cache của optimizer), None => tính bar-by-bar
+        self.adx_series = adx_series
         
         # Paper Trade Mode state (Circuit Breaker)
-        self.paper_state = PaperModeState(
-            recent_results=deque(maxlen=self.config.paper_trigger_win_rate_window)
+        # recent_results là chính cửa sổ của self.stats (không cập nhật 2 lần)
+        self.paper_state = PaperModeState(recent_results=self.stats.window)
+        
+        # Dừng sớm (optimizer): check mỗi lần đóng lệnh live + 1 lần ở bar deadline của min_trades
+        self._abort = AbortMonitor(abort_rules) if abort_rules is not None else None
+        self._abort_deadline_idx = abort_rules.deadline_index(m1_data.index) if abort_rules is not None else -1
+        self.pruned_reason: Optional[str] = None
+        
+        # Hot-path instrumentation: đếm số lần truy cập row, sample state mỗi lần đóng M15
+        self.collect_hot_path_stats = collect_hot_path_stats
+        self.m1_row_lookups = 0
+        self.m15_row_lookups = 0
+        self.hot_path_samples: List[HotPathSample] = []
+        
+        # Bar M1 tiếp theo sẽ chạy (advance chạy tiếp từ đây, xem snapshot / restore)
+        self.next_bar = 0
+        self.counters = RunCounters()
+    
+    # Attribute thay đổi trong lúc chạy; phần còn lại (data, config, giá trị suy ra từ config) cố định
+    _STATE_ATTRS = (
+        "long_state", "short_state", "trades", "m15_idx", "current_equity", "equity_curve", "peak_equity", "stats",
+        "SmoothedTrueRange", "SmoothedDirectionalMovementPlus", "SmoothedDirectionalMovementMinus", "ADX",
+        "DX_buffer", "paper_state", "_abort", "pruned_reason", "m1_row_lookups", "m15_row_lookups",
+        "hot_path_samples", "next_bar", "counters",
+    )
+    
+    def snapshot(self) -> StrategySnapshot:
+        """Deep copy state hiện tại (đầu bar next_bar)."""
+        return StrategySnapshot(
+            next_bar=self.next_bar,
+            state=copy.deepcopy({name: getattr(self, name) for name in self._STATE_ATTRS}),
+        )
+    
+    def restore(self, snapshot: StrategySnapshot) -> None:
+        """
+        Gán lại state từ snapshot (copy, snapshot dùng lại được nhiều lần). Strategy có thể có config
+        khác strategy tạo snapshot: kết quả chỉ đúng khi 2 config chạy giống hệt nhau tới next_bar
+        (xem state_fork.py).
+        """
+        for name, value in copy.deepcopy(snapshot.state).items():
+            setattr(self, name, value)
+    
+    def _m1_row(self, i: int) -> pd.Series:
+        """Lấy 1 row M1 theo vị trí (mọi truy cập row M1 đều đi qua đây để đếm)."""
+        self.m1_row_lookups += 1
+        return self.m1.iloc[i]
+    
+    def _m1_window(self, start: int, stop: int) -> pd.DataFrame:
+        """Lấy slice M1 [start, stop) theo vị trí, đếm như 1 lần truy cập."""
+        self.m1_row_lookups += 1
+        return self.m1.iloc[start:stop]
+    
+    def _m15_row(self, i: int) -> pd.Series:
+        """Lấy 1 row M15 theo vị trí."""
+        self.m15_row_lookups += 1
+        return self.m15.iloc[i]
+    
+    def _count_active_search_flags(self) -> int:
+        """Đếm số cờ tìm base / tìm entry đang bật trên cả Long và Short."""
+        ls = self.long_state
+        ss = self.short_state
+        flags = (
+            ls.demand_finding_buy_base,
+            ls.liquid_finding_buy_base,
+            ls.keep_finding_demand,
+            ls.keep_finding_liquid_buy,
+            ls.finding_entry_buy,
+            ss.supply_finding_sell_base,
+            ss.liquid_finding_sell_base,
+            ss.keep_finding_supply,
+            ss.keep_finding_liquid_sell,
+            ss.finding_entry_sell,
+        )
+        return sum(1 for f in flags if f)
+    
+    def _sample_hot_path(self, idx: int, ts: pd.Timestamp) -> None:
+        """Ghi lại 1 HotPathSample (gọi mỗi khi có nến M15 mới đóng)."""
+        self.hot_path_samples.append(
+            HotPathSample(
+                timestamp=ts,
+                m1_idx=idx,
+                demand_zones=len(self.long_state.arrayBoxDem),
+                supply_zones=len(self.short_state.arrayBoxSup),
+                buy_bases=len(self.long_state.arrayBoxBuyBase),
+                sell_bases=len(self.short_state.arrayBoxSellBase),
+                buy_liquidity=len(self.long_state.arrayBuyLiquidity),
+                sell_liquidity=len(self.short_state.arraySellLiquidity),
+                red_candle_highs=len(self.long_state.arrayHighGiaNenGiam),
+                green_candle_lows=len(self.short_state.arrayLowGiaNenTang),
+                active_search_flags=self._count_active_search_flags(),
+                m1_row_lookups=self.m1_row_lookups,
+                m15_row_lookups=self.m15_row_lookups,
+            )
         )
     
+    def hot_path_frame(self) -> pd.DataFrame:
+        """
+        Export các HotPathSample thành time series (index = timestamp nến M1 khi M15 đóng).
+        
+        Returns:
+            DataFrame rỗng nếu không bật collect_hot_path_stats.
+        """
+        if not self.hot_path_samples:
+            return pd.DataFrame()
+        df = pd.DataFrame([asdict(sample) for sample in self.hot_path_samples])
+        return df.set_index('timestamp')
+    
     def _calculate_pnl(self, entry_price: float, exit_price: float, lot_size: float, direction: TradeDirection) -> float:
         """
         Tính PnL với lot_size là position value (cash amount).
@@ -264,16 +427,45 @@ class PineScriptStrategy:
         """Chạy backtest bar-by-bar trên M1."""
         print("[PineScriptStrategy] Starting backtest...")
         
-        demand_zones_created = 0
-        buy_bases_created = 0
-        finding_entry_count = 0
+        self.advance(len(self.m1))
         
-        supply_zones_created = 0
-        sell_bases_created = 0
-        finding_entry_sell_count = 0
+        counters = self.counters
+        print(f"\n[PineScriptStrategy] Summary:")
+        print(f"  - Demand Zones created: {counters.demand_zones_created}")
+        print(f"  - Supply Zones created: {counters.supply_zones_created}")
+        print(f"  - Buy Bases created: {counters.buy_bases_created}")
+        print(f"  - Sell Bases created: {counters.sell_bases_created}")
+        print(f"  - Finding entry (Long) triggered: {counters.finding_entry_count}")
+        print(f"  - Finding entry (Short) triggered: {counters.finding_entry_sell_count}")
+        print(f"  - Total trades: {len(self.trades)}")
+        print(f"  - Row lookups: M1={self.m1_row_lookups:,}, M15={self.m15_row_lookups:,}")
         
-        for idx in range(len(self.m1)):
-            row_m1 = self.m1.iloc[idx]
+        # Calculate final statistics
+        self._print_statistics()
+        
+        return self.trades
+    
+    def advance(self, stop: int) -> bool:
+        """
+        Chạy các bar [next_bar, stop). Trả về False nếu backtest đã dừng sớm (abort rules).
+        run() = advance(len(m1)) + in thống kê; chia thành nhiều lần advance liên tiếp cho cùng kết quả.
+        """
+        if self.pruned_reason is not None:
+            return False
+        counters = self.counters
+        
+        # Single-side mode: bỏ qua base-search + entry của side bị tắt.
+        # Zone/liquidity của side đó vẫn được detect & quản lý (M15, touch, crossed) vì side còn lại
+        # cần chúng: TP / early exit (_execute_entry_long, _manage_long_position đọc arrayBoxSup,
+        # arraySellLiquidity) và reset base-search khi chạm zone (_manage_supply_zones). Phần này chỉ
+        # ~2% thời gian; phần lớn là việc chung mỗi bar (đọc row, M15, ADX) nên 1 side chỉ nhanh hơn
+        # ~17-30% so với "both", không phải ~50%.
+        run_long = self.config.trade_side != "short"
+        run_short = self.config.trade_side != "long"
+        
+        for idx in range(self.next_bar, min(stop, len(self.m1))):
+            self.next_bar = idx + 1
+            row_m1 = self._m1_row(idx)
             ts = self.m1.index[idx]
             
             # Lấy M1 bar hiện tại
@@ -285,12 +477,15 @@ class PineScriptStrategy:
             # Cập nhật M15 buffer nếu có M15 mới close
             prev_demand_count = len(self.long_state.arrayBoxDem)
             prev_supply_count = len(self.short_state.arrayBoxSup)
+            prev_m15_idx = self.m15_idx
             self._update_m15_buffer(ts)
+            if self.collect_hot_path_stats and self.m15_idx != prev_m15_idx:
+                self._sample_hot_path(idx, ts)
             if len(self.long_state.arrayBoxDem) > prev_demand_count:
-                demand_zones_created += 1
+                counters.demand_zones_created += 1
                 print(f"[{ts}] Demand Zone created! Total: {len(self.long_state.arrayBoxDem)}")
             if len(self.short_state.arrayBoxSup) > prev_supply_count:
-                supply_zones_created += 1
+                counters.supply_zones_created += 1
                 print(f"[{ts}] Supply Zone created! Total: {len(self.short_state.arrayBoxSup)}")
             
             # Reset flags mỗi bar (line 1372-1373)
@@ -303,8 +498,10 @@ class PineScriptStrategy:
             self.short_state.make_color_tang = False
             
             # 1. Phát hiện nến đỏ (line 850) và nến xanh (cho Sell Base)
-            self._detect_red_candle(idx, o, h, l, c)
-            self._detect_green_candle(idx, o, h, l, c)
+            if run_long:
+                self._detect_red_candle(idx, o, h, l, c)
+            if run_short:
+                self._detect_green_candle(idx, o, h, l, c)
             
             # 2. Quản lý Demand Zone (touch, remove khi phá đáy / chạm 2 lần)
             # DEBUG: Log Demand Zone state quanh target time
@@ -323,54 +520,56 @@ class PineScriptStrategy:
             
             self._check_buy_liquidity_crossed(idx, ts, o, h, l, c)
             
-            # 4. Tạo Buy Base từ Liquidity (line 856-937)
-            prev_base_count = len(self.long_state.arrayBoxBuyBase)
-            self._create_buy_base_from_liquidity(idx, ts, o, h, l, c)
-            if len(self.long_state.arrayBoxBuyBase) > prev_base_count:
-                buy_bases_created += 1
-                base = self.long_state.arrayBoxBuyBase[-1]
-                print(f"[{ts}] Buy Base created from Liquidity! Top={base.price_top:.2f}, Bottom={base.price_bottom:.2f}")
-            
-            # 5. Tạo Buy Base từ Demand (line 943-1032)
-            prev_base_count = len(self.long_state.arrayBoxBuyBase)
-            self._create_buy_base_from_demand(idx, ts, o, h, l, c)
-            if len(self.long_state.arrayBoxBuyBase) > prev_base_count:
-                buy_bases_created += 1
-                print(f"[{ts}] Buy Base created from Demand! Total: {len(self.long_state.arrayBoxBuyBase)}")
-            
-            # 6. Timeout cho Buy Base (line 1033-1071)
-            self._manage_buy_base_timeout(idx, ts, h, l)
-            
-            # 7. Touch Buy Base → finding_entry_buy (line 1074-1099)
-            was_finding = self.long_state.finding_entry_buy
-            
-            # DEBUG: Log Buy Base state quanh 00:00
-            if ts >= pd.Timestamp('2026-02-01 23:50:00') and ts <= pd.Timestamp('2026-02-02 00:10:00') and len(self.long_state.arrayBoxBuyBase) > 0:
-                base = self.long_state.arrayBoxBuyBase[-1]
-                print(f"[DEBUG-Base] {ts} | Buy Base exists: Top={base.price_top:.2f}, Bottom={base.price_bottom:.2f}, close={c:.2f}, low={l:.2f}, touched={was_finding}")
-            
-            self._check_buy_base_touched(idx, ts, o, h, l, c)
-            if not was_finding and self.long_state.finding_entry_buy:
-                finding_entry_count += 1
-                print(f"[{ts}] Buy Base touched! finding_entry_buy = True")
-            
-            # 7b. Check Buy Base invalidation (phá base hoặc chạm cản)
-            self._check_buy_base_invalidation(idx, ts, o, h, l, c)
+            if run_long:
+                # 4. Tạo Buy Base từ Liquidity (line 856-937)
+                prev_base_count = len(self.long_state.arrayBoxBuyBase)
+                self._create_buy_base_from_liquidity(idx, ts, o, h, l, c)
+                if len(self.long_state.arrayBoxBuyBase) > prev_base_count:
+                    counters.buy_bases_created += 1
+                    base = self.long_state.arrayBoxBuyBase[-1]
+                    print(f"[{ts}] Buy Base created from Liquidity! Top={base.price_top:.2f}, Bottom={base.price_bottom:.2f}")
+            
+                # 5. Tạo Buy Base từ Demand (line 943-1032)
+                prev_base_count = len(self.long_state.arrayBoxBuyBase)
+                self._create_buy_base_from_demand(idx, ts, o, h, l, c)
+                if len(self.long_state.arrayBoxBuyBase) > prev_base_count:
+                    counters.buy_bases_created += 1
+                    print(f"[{ts}] Buy Base created from Demand! Total: {len(self.long_state.arrayBoxBuyBase)}")
+            
+                # 6. Timeout cho Buy Base (line 1033-1071)
+                self._manage_buy_base_timeout(idx, ts, h, l)
+            
+                # 7. Touch Buy Base → finding_entry_buy (line 1074-1099)
+                was_finding = self.long_state.finding_entry_buy
+            
+                # DEBUG: Log Buy Base state quanh 00:00
+                if ts >= pd.Timestamp('2026-02-01 23:50:00') and ts <= pd.Timestamp('2026-02-02 00:10:00') and len(self.long_state.arrayBoxBuyBase) > 0:
+                    base = self.long_state.arrayBoxBuyBase[-1]
+                    print(f"[DEBUG-Base] {ts} | Buy Base exists: Top={base.price_top:.2f}, Bottom={base.price_bottom:.2f}, close={c:.2f}, low={l:.2f}, touched={was_finding}")
+            
+                self._check_buy_base_touched(idx, ts, o, h, l, c)
+                if not was_finding and self.long_state.finding_entry_buy:
+                    counters.finding_entry_count += 1
+                    print(f"[{ts}] Buy Base touched! finding_entry_buy = True")
+            
+                # 7b. Check Buy Base invalidation (phá base hoặc chạm cản)
+                self._check_buy_base_invalidation(idx, ts, o, h, l, c)
             
             # 8. Tính ADX
             self._calculate_adx(idx, o, h, l, c)
             
-            # 9. Entry Long (line 1100-1277)
-            was_in_position = self.long_state.in_position
+            if run_long:
+                # 9. Entry Long (line 1100-1277)
+                was_in_position = self.long_state.in_position
             
-            # DEBUG: Log khi finding_entry_buy = True quanh 00:00
-            if self.long_state.finding_entry_buy and ts >= pd.Timestamp('2026-02-01 23:55:00') and ts <= pd.Timestamp('2026-02-02 00:10:00'):
-                print(f"[DEBUG-Entry] {ts} | finding_entry_buy=True, in_timerange={self._is_within_timerange(ts)}, ADX={self.ADX:.2f}, close={c:.2f}")
+                # DEBUG: Log khi finding_entry_buy = True quanh 00:00
+                if self.long_state.finding_entry_buy and ts >= pd.Timestamp('2026-02-01 23:55:00') and ts <= pd.Timestamp('2026-02-02 00:10:00'):
+                    print(f"[DEBUG-Entry] {ts} | finding_entry_buy=True, in_timerange={self._is_within_timerange(ts)}, ADX={self.ADX:.2f}, close={c:.2f}")
             
-            self._entry_long(idx, ts, o, h, l, c)
-            if not was_in_position and self.long_state.in_position:
-                mode_prefix = "📝 [PAPER] " if self._is_paper_mode() else ""
-                print(f"{mode_prefix}[{self._log_timestamp(ts)}] ENTRY LONG @ {self.long_state.entry_price:.2f}, SL={self.long_state.stop_loss:.2f}, TP={self.long_state.take_profit:.2f}")
+                self._entry_long(idx, ts, o, h, l, c)
+                if not was_in_position and self.long_state.in_position:
+                    mode_prefix = "📝 [PAPER] " if self._is_paper_mode() else ""
+                    print(f"{mode_prefix}[{self._log_timestamp(ts)}] ENTRY LONG @ {self.long_state.entry_price:.2f}, SL={self.long_state.stop_loss:.2f}, TP={self.long_state.take_profit:.2f}")
             
             # 10. SHORT SIDE LOGIC
             # 10.1. Quản lý Supply Zone (touch, remove khi phá trần / chạm 2 lần)
@@ -379,57 +578,56 @@ class PineScriptStrategy:
             # 10.2. Sell Liquidity crossed
             self._check_sell_liquidity_crossed(idx, ts, o, h, l, c)
             
-            # 10.3. Tạo Sell Base từ Liquidity
-            prev_sell_base_count = len(self.short_state.arrayBoxSellBase)
-            self._create_sell_base_from_liquidity(idx, ts, o, h, l, c)
-            if len(self.short_state.arrayBoxSellBase) > prev_sell_base_count:
-                sell_bases_created += 1
-                base = self.short_state.arrayBoxSellBase[-1]
-                print(f"[{ts}] Sell Base created from Liquidity! Top={base.price_top:.2f}, Bottom={base.price_bottom:.2f}")
-            
-            # 10.4. Tạo Sell Base từ Supply
-            prev_sell_base_count = len(self.short_state.arrayBoxSellBase)
-            self._create_sell_base_from_supply(idx, ts, o, h, l, c)
-            if len(self.short_state.arrayBoxSellBase) > prev_sell_base_count:
-                sell_bases_created += 1
-                print(f"[{ts}] Sell Base created from Supply! Total: {len(self.short_state.arrayBoxSellBase)}")
-            
-            # 10.5. Timeout cho Sell Base
-            self._manage_sell_base_timeout(idx, ts, h, l)
-            
-            # 10.6. Touch Sell Base → finding_entry_sell
-            was_finding_sell = self.short_state.finding_entry_sell
-            self._check_sell_base_touched(idx, ts, o, h, l, c)
-            if not was_finding_sell and self.short_state.finding_entry_sell:
-                finding_entry_sell_count += 1
-                print(f"[{ts}] Sell Base touched! finding_entry_sell = True")
-            
-            # 10.6b. Check Sell Base invalidation (phá base hoặc chạm cản)
-            self._check_sell_base_invalidation(idx, ts, o, h, l, c)
-            
-            # 10.7. Entry Short
-            was_in_position_short = self.short_state.in_position
-            self._entry_short(idx, ts, o, h, l, c)
-            if not was_in_position_short and self.short_state.in_position:
-                mode_prefix = "📝 [PAPER] " if self._is_paper_mode() else ""
-                print(f"{mode_prefix}[{self._log_timestamp(ts)}] ENTRY SHORT @ {self.short_state.entry_price:.2f}, SL={self.short_state.stop_loss:.2f}, TP={self.short_state.take_profit:.2f}")
+            if run_short:
+                # 10.3. Tạo Sell Base từ Liquidity
+                prev_sell_base_count = len(self.short_state.arrayBoxSellBase)
+                self._create_sell_base_from_liquidity(idx, ts, o, h, l, c)
+                if len(self.short_state.arrayBoxSellBase) > prev_sell_base_count:
+                    counters.sell_bases_created += 1
+                    base = self.short_state.arrayBoxSellBase[-1]
+                    print(f"[{ts}] Sell Base created from Liquidity! Top={base.price_top:.2f}, Bottom={base.price_bottom:.2f}")
+            
+                # 10.4. Tạo Sell Base từ Supply
+                prev_sell_base_count = len(self.short_state.arrayBoxSellBase)
+                self._create_sell_base_from_supply(idx, ts, o, h, l, c)
+                if len(self.short_state.arrayBoxSellBase) > prev_sell_base_count:
+                    counters.sell_bases_created += 1
+                    print(f"[{ts}] Sell Base created from Supply! Total: {len(self.short_state.arrayBoxSellBase)}")
+            
+                # 10.5. Timeout cho Sell Base
+                self._manage_sell_base_timeout(idx, ts, h, l)
+            
+                # 10.6. Touch Sell Base → finding_entry_sell
+                was_finding_sell = self.short_state.finding_entry_sell
+                self._check_sell_base_touched(idx, ts, o, h, l, c)
+                if not was_finding_sell and self.short_state.finding_entry_sell:
+                    counters.finding_entry_sell_count += 1
+                    print(f"[{ts}] Sell Base touched! finding_entry_sell = True")
+            
+                # 10.6b. Check Sell Base invalidation (phá base hoặc chạm cản)
+                self._check_sell_base_invalidation(idx, ts, o, h, l, c)
+            
+                # 10.7. Entry Short
+                was_in_position_short = self.short_state.in_position
+                self._entry_short(idx, ts, o, h, l, c)
+                if not was_in_position_short and self.short_state.in_position:
+                    mode_prefix = "📝 [PAPER] " if self._is_paper_mode() else ""
+                    print(f"{mode_prefix}[{self._log_timestamp(ts)}] ENTRY SHORT @ {self.short_state.entry_price:.2f}, SL={self.short_state.stop_loss:.2f}, TP={self.short_state.take_profit:.2f}")
             
             # 11. Quản lý position hiện tại (TP/SL) - cả Long & Short
             self._manage_position(idx, ts, o, h, l, c)
-        
-        print(f"\n[PineScriptStrategy] Summary:")
-        print(f"  - Demand Zones created: {demand_zones_created}")
-        print(f"  - Supply Zones created: {supply_zones_created}")
-        print(f"  - Buy Bases created: {buy_bases_created}")
-        print(f"  - Sell Bases created: {sell_bases_created}")
-        print(f"  - Finding entry (Long) triggered: {finding_entry_count}")
-        print(f"  - Finding entry (Short) triggered: {finding_entry_sell_count}")
-        print(f"  - Total trades: {len(self.trades)}")
-        
-        # Calculate final statistics
-        self._print_statistics()
-        
-        return self.trades
+            
+            # 12. Abort rules (optimizer): dừng sớm config hết hy vọng
+            if idx == self._abort_deadline_idx and self.pruned_reason is None:
+                self.pruned_reason = self._abort.at_deadline(len(self.trades))
+            if self.pruned_reason is not None:
+                print(
+                    f"[PineScriptStrategy] Pruned at {ts}: {self.pruned_reason} "
+                    f"({self.stats.n_trades} trades, PF={self.stats.profit_factor:.2f}, "
+                    f"DD={self.stats.drawdown_pct:.1f}%)"
+                )
+                return False
+        return True
     
     def _update_m15_buffer(self, current_ts: pd.Timestamp):
         """
@@ -439,7 +637,7 @@ class PineScriptStrategy:
         """
         # Kiểm tra xem có M15 bar mới chưa
         while self.m15_idx < len(self.m15):
-            m15_bar = self.m15.iloc[self.m15_idx]
+            m15_bar = self._m15_row(self.m15_idx)
             m15_ts = self.m15.index[self.m15_idx]
             
             # Nếu thời điểm M15 đã qua (tức đã close), thì thêm vào buffer
@@ -743,7 +941,7 @@ class PineScriptStrategy:
         if idx < 1:
             return
         
-        prev = self.m1.iloc[idx - 1]
+        prev = self._m1_row(idx - 1)
         o1, h1, l1, c1 = prev['open'], prev['high'], prev['low'], prev['close']
         
         # Điều kiện nến đỏ (line 850)
@@ -778,7 +976,7 @@ class PineScriptStrategy:
         if idx < 1:
             return
         
-        prev = self.m1.iloc[idx - 1]
+        prev = self._m1_row(idx - 1)
         o1, h1, l1, c1 = prev['open'], prev['high'], prev['low'], prev['close']
         
         # Điều kiện nến xanh (ngược với nến đỏ)
@@ -861,7 +1059,7 @@ class PineScriptStrategy:
                             self.long_state.finding_entry_buy_time_out = 0
                         
                         if idx >= 2:
-                            self.long_state.removeCandle_OpenPrice = self.m1.iloc[idx - 2]['open']
+                            self.long_state.removeCandle_OpenPrice = self._m1_row(idx - 2)['open']
                         
                         self.long_state.liquid_finding_buy_base = False
                         self.long_state.demand_finding_buy_base = True
@@ -899,7 +1097,7 @@ class PineScriptStrategy:
                             self.long_state.finding_entry_buy_time_out = 0
                         
                         if idx >= 2:
-                            self.long_state.removeCandle_OpenPrice = self.m1.iloc[idx - 2]['open']
+                            self.long_state.removeCandle_OpenPrice = self._m1_row(idx - 2)['open']
                         
                         so_lan += 1
                         self.long_state.liquid_finding_buy_base = False
@@ -994,7 +1192,7 @@ class PineScriptStrategy:
                 # Tìm index của high gần nhất
                 self.long_state.index_of_high_nearest = 1
                 for j in range(1, min(idx, 20)):
-                    if self.m1.iloc[idx - j]['high'] == high_giam:
+                    if self._m1_row(idx - j)['high'] == high_giam:
                         self.long_state.index_of_high_nearest = j
                         break
             
@@ -1035,7 +1233,7 @@ class PineScriptStrategy:
             if not self.long_state.keep_finding_demand:
                 self.long_state.index_of_high_nearest = 1
                 for j in range(1, min(idx, 20)):
-                    if self.m1.iloc[idx - j]['high'] == high_giam:
+                    if self._m1_row(idx - j)['high'] == high_giam:
                         self.long_state.index_of_high_nearest = j
                         break
             
@@ -1072,7 +1270,7 @@ class PineScriptStrategy:
                 continue
             
             # Kiểm tra removeCandle_OpenPrice
-            if self.m1.iloc[idx - j]['open'] == self.long_state.removeCandle_OpenPrice:
+            if self._m1_row(idx - j)['open'] == self.long_state.removeCandle_OpenPrice:
                 break
             
             # Pattern nến (line 905 hoặc 978)
@@ -1083,9 +1281,9 @@ class PineScriptStrategy:
             if idx_j1 < 0 or idx_j2 < 0:
                 continue
             
-            r_j = self.m1.iloc[idx_j]
-            r_j1 = self.m1.iloc[idx_j1]
-            r_j2 = self.m1.iloc[idx_j2]
+            r_j = self._m1_row(idx_j)
+            r_j1 = self._m1_row(idx_j1)
+            r_j2 = self._m1_row(idx_j2)
             
             o_j, h_j, l_j, c_j = r_j['open'], r_j['high'], r_j['low'], r_j['close']
             o_j1, h_j1, l_j1, c_j1 = r_j1['open'], r_j1['high'], r_j1['low'], r_j1['close']
@@ -1133,9 +1331,9 @@ class PineScriptStrategy:
                     idx_k_minus_1 = idx - k + 1
                     
                     if idx_k >= 0 and idx_k_minus_1 >= 0:
-                        r_k = self.m1.iloc[idx_k]
-                        r_k_minus_1 = self.m1.iloc[idx_k_minus_1]
-                        r_k_minus_2 = self.m1.iloc[idx_k_minus_2]
+                        r_k = self._m1_row(idx_k)
+                        r_k_minus_1 = self._m1_row(idx_k_minus_1)
+                        r_k_minus_2 = self._m1_row(idx_k_minus_2)
                         
                         if (r_k_minus_2['low'] - r_k['high']) > 0.05 and r_k_minus_1['open'] < r_k_minus_1['close']:
                             y = r_k_minus_2['low']
@@ -1146,9 +1344,9 @@ class PineScriptStrategy:
                     idx_k_minus_2 = idx - k + 2
                     
                     if idx_k_minus_1 >= 0 and idx_k_minus_2 >= 0 and idx_k_minus_3 >= 0:
-                        r_k_minus_1 = self.m1.iloc[idx_k_minus_1]
-                        r_k_minus_2 = self.m1.iloc[idx_k_minus_2]
-                        r_k_minus_3 = self.m1.iloc[idx_k_minus_3]
+                        r_k_minus_1 = self._m1_row(idx_k_minus_1)
+                        r_k_minus_2 = self._m1_row(idx_k_minus_2)
+                        r_k_minus_3 = self._m1_row(idx_k_minus_3)
                         
                         if (r_k_minus_3['low'] - r_k_minus_1['high']) > 0.05 and r_k_minus_2['open'] < r_k_minus_2['close']:
                             y = r_k_minus_3['low']
@@ -1159,9 +1357,9 @@ class PineScriptStrategy:
                     idx_k_minus_2 = idx - k + 2
                     
                     if idx_k_minus_2 >= 0 and idx_k_minus_3 >= 0 and idx_k_minus_4 >= 0:
-                        r_k_minus_2 = self.m1.iloc[idx_k_minus_2]
-                        r_k_minus_3 = self.m1.iloc[idx_k_minus_3]
-                        r_k_minus_4 = self.m1.iloc[idx_k_minus_4]
+                        r_k_minus_2 = self._m1_row(idx_k_minus_2)
+                        r_k_minus_3 = self._m1_row(idx_k_minus_3)
+                        r_k_minus_4 = self._m1_row(idx_k_minus_4)
                         
                         if y == r_k_minus_3['low'] and (r_k_minus_4['low'] - r_k_minus_2['high']) > 0.05 and r_k_minus_3['open'] < r_k_minus_3['close']:
                             y = r_k_minus_4['low']
@@ -1172,7 +1370,7 @@ class PineScriptStrategy:
                     if len(self.long_state.arrayBoxDem) > 0:
                         lastBoxBull = self.long_state.arrayBoxDem[-1]
                         canhTrenLastBoxBull = lastBoxBull.price_top
-                        current_low = self.m1.iloc[idx]['low']
+                        current_low = self._m1_row(idx)['low']
                         if current_low - canhTrenLastBoxBull > current_low - self.long_state.removePriceDemand:
                             canhTrenLastBoxBull = self.long_state.removePriceDemand
                     else:
@@ -1318,10 +1516,14 @@ class PineScriptStrategy:
         """
         Tính ADX (line 121-142).
         """
+        if self.adx_series is not None:
+            self.ADX = float(self.adx_series[idx])
+            return
+        
         if idx < 1:
             return
         
-        prev = self.m1.iloc[idx - 1]
+        prev = self._m1_row(idx - 1)
         c1 = prev['close']
         h1 = prev['high']
         l1 = prev['low']
@@ -1412,11 +1614,8 @@ class PineScriptStrategy:
             return True
         
         # Condition 2: Win rate (last N trades) < threshold
-        if len(self.paper_state.recent_results) >= self.config.paper_trigger_win_rate_window:
-            wins = sum(1 for r in self.paper_state.recent_results if r > 0)
-            win_rate = wins / len(self.paper_state.recent_results)
-            if win_rate < self.config.paper_trigger_win_rate_threshold:
-                return True
+        if self.stats.window_full and self.stats.window_win_rate < self.config.paper_trigger_win_rate_threshold:
+            return True
         
         return False
     
@@ -1465,6 +1664,7 @@ class PineScriptStrategy:
         
         # Reset consecutive losses when exiting paper mode successfully
         self.paper_state.consecutive_losses = 0
+        self.paper_state.streak_start = self.stats.n_trades
         self.paper_state.is_active = False
         self.paper_state.activated_at = None
         
@@ -1506,28 +1706,34 @@ class PineScriptStrategy:
                         reason = f"Max duration ({self.config.paper_max_duration_minutes}min) reached"
                 self._deactivate_paper_mode(ts, reason)
         else:
-            # Live trade handling
-            self.paper_state.recent_results.append(pnl)
-            
-            if is_win:
-                self.paper_state.consecutive_losses = 0
-            else:
-                self.paper_state.consecutive_losses += 1
+            # Live trade handling: self.stats (cửa sổ win rate, chuỗi thua) đã cập nhật khi đóng lệnh
+            self.paper_state.consecutive_losses = self.stats.consecutive_losses_since(self.paper_state.streak_start)
             
             # Check trigger
             if self._check_paper_mode_trigger():
                 if self.paper_state.consecutive_losses >= self.config.paper_trigger_consecutive_losses:
                     reason = f"{self.paper_state.consecutive_losses} consecutive losses"
                 else:
-                    wins = sum(1 for r in self.paper_state.recent_results if r > 0)
-                    win_rate = wins / len(self.paper_state.recent_results) * 100
-                    reason = f"Win rate {win_rate:.1f}% ({wins}/{len(self.paper_state.recent_results)}) below threshold"
+                    reason = (f"Win rate {self.stats.window_win_rate * 100:.1f}% "
+                              f"({self.stats.window_wins}/{len(self.stats.window)}) below threshold")
                 self._activate_paper_mode(ts, reason)
     
     def _is_paper_mode(self) -> bool:
         """Check if currently in paper mode."""
         return self.config.enable_paper_mode and self.paper_state.is_active
     
+    def _record_live_trade(self, trade: "Trade"):
+        """Cập nhật equity, equity curve, self.stats và abort rules sau 1 lệnh live."""
+        self.stats.update(trade.pnl)
+        self.current_equity = self.stats.equity
+        self.peak_equity = self.stats.peak_equity
+        self.trades.append(trade)
+        self.equity_curve.append(self.current_equity)
+        if self._abort is not None:
+            reason = self._abort.on_trade_closed(self.stats)
+            if self.pruned_reason is None:
+                self.pruned_reason = reason
+    
     def _complete_long_trade(self, ts: pd.Timestamp, exit_price: float, exit_reason: str):
         """
         Complete a long trade: calculate PnL, update equity, track paper mode.
@@ -1558,11 +1764,7 @@ class PineScriptStrategy:
         
         if not is_paper:
             # Live trade: update equity
-            self.current_equity += pnl
-            self.trades.append(trade)
-            self.equity_curve.append(self.current_equity)
-            if self.current_equity > self.peak_equity:
-                self.peak_equity = self.current_equity
+            self._record_live_trade(trade)
             
             mode_prefix = ""
         else:
@@ -1609,11 +1811,7 @@ class PineScriptStrategy:
         
         if not is_paper:
             # Live trade: update equity
-            self.current_equity += pnl
-            self.trades.append(trade)
-            self.equity_curve.append(self.current_equity)
-            if self.current_equity > self.peak_equity:
-                self.peak_equity = self.current_equity
+            self._record_live_trade(trade)
             
             mode_prefix = ""
         else:
@@ -1654,8 +1852,8 @@ class PineScriptStrategy:
             if idx < 2:
                 return
             
-            prev1 = self.m1.iloc[idx - 1]
-            prev2 = self.m1.iloc[idx - 2]
+            prev1 = self._m1_row(idx - 1)
+            prev2 = self._m1_row(idx - 2)
             
             o1, c1 = prev1['open'], prev1['close']
             o2, c2 = prev2['open'], prev2['close']
@@ -1688,8 +1886,8 @@ class PineScriptStrategy:
             if idx < 2:
                 return
             
-            prev1 = self.m1.iloc[idx - 1]
-            prev2 = self.m1.iloc[idx - 2]
+            prev1 = self._m1_row(idx - 1)
+            prev2 = self._m1_row(idx - 2)
             
             o1, c1 = prev1['open'], prev1['close']
             o2, c2 = prev2['open'], prev2['close']
@@ -1699,7 +1897,7 @@ class PineScriptStrategy:
                 return
             
             # Tính sl_buy = ta.lowest(10) (line 295)
-            sl_buy = min(self.m1.iloc[max(0, idx-9):idx+1]['low'])
+            sl_buy = min(self._m1_window(max(0, idx-9), idx+1)['low'])
             
             if o2 > c2:
                 if (
@@ -1841,7 +2039,7 @@ class PineScriptStrategy:
         if not self.long_state.in_position:
             return
         
-        exit_price = self.m1.iloc[idx]['close']
+        exit_price = self._m1_row(idx)['close']
         self._complete_long_trade(ts, exit_price, f"FORCE: {reason}")
     
     def _force_exit_short(self, idx: int, ts: pd.Timestamp, reason: str):
@@ -1852,7 +2050,7 @@ class PineScriptStrategy:
         if not self.short_state.in_position:
             return
         
-        exit_price = self.m1.iloc[idx]['close']
+        exit_price = self._m1_row(idx)['close']
         self._complete_short_trade(ts, exit_price, f"FORCE: {reason}")
     
     def _manage_position(self, idx: int, ts: pd.Timestamp, o: float, h: float, l: float, c: float):
@@ -1973,7 +2171,7 @@ class PineScriptStrategy:
                             self.short_state.finding_entry_sell_time_out = 0
                         
                         if idx >= 2:
-                            self.short_state.removeCandle_OpenPrice_Sell = self.m1.iloc[idx - 2]['open']
+                            self.short_state.removeCandle_OpenPrice_Sell = self._m1_row(idx - 2)['open']
                         
                         self.short_state.liquid_finding_sell_base = False
                         self.short_state.supply_finding_sell_base = True
@@ -2013,7 +2211,7 @@ class PineScriptStrategy:
                             self.short_state.finding_entry_sell_time_out = 0
                         
                         if idx >= 2:
-                            self.short_state.removeCandle_OpenPrice_Sell = self.m1.iloc[idx - 2]['open']
+                            self.short_state.removeCandle_OpenPrice_Sell = self._m1_row(idx - 2)['open']
                         
                         so_lan += 1
                         self.short_state.liquid_finding_sell_base = False
@@ -2156,7 +2354,7 @@ class PineScriptStrategy:
             if not self.short_state.keep_finding_liquid_sell:
                 self.short_state.index_of_low_nearest = 1
                 for j in range(1, min(idx, 20)):
-                    if self.m1.iloc[idx - j]['low'] == low_tang:
+                    if self._m1_row(idx - j)['low'] == low_tang:
                         self.short_state.index_of_low_nearest = j
                         break
             
@@ -2195,7 +2393,7 @@ class PineScriptStrategy:
             if not self.short_state.keep_finding_supply:
                 self.short_state.index_of_low_nearest = 1
                 for j in range(1, min(idx, 20)):
-                    if self.m1.iloc[idx - j]['low'] == low_tang:
+                    if self._m1_row(idx - j)['low'] == low_tang:
                         self.short_state.index_of_low_nearest = j
                         break
             
@@ -2231,7 +2429,7 @@ class PineScriptStrategy:
             if idx < j + 3:
                 continue
             
-            if self.m1.iloc[idx - j]['open'] == self.short_state.removeCandle_OpenPrice_Sell:
+            if self._m1_row(idx - j)['open'] == self.short_state.removeCandle_OpenPrice_Sell:
                 break
             
             idx_j = idx - j
@@ -2241,9 +2439,9 @@ class PineScriptStrategy:
             if idx_j1 < 0 or idx_j2 < 0:
                 continue
             
-            r_j = self.m1.iloc[idx_j]
-            r_j1 = self.m1.iloc[idx_j1]
-            r_j2 = self.m1.iloc[idx_j2]
+            r_j = self._m1_row(idx_j)
+            r_j1 = self._m1_row(idx_j1)
+            r_j2 = self._m1_row(idx_j2)
             
             o_j, h_j, l_j, c_j = r_j['open'], r_j['high'], r_j['low'], r_j['close']
             o_j1, h_j1, l_j1, c_j1 = r_j1['open'], r_j1['high'], r_j1['low'], r_j1['close']
@@ -2292,9 +2490,9 @@ class PineScriptStrategy:
                     idx_k_minus_1 = idx - k + 1
                     
                     if idx_k >= 0 and idx_k_minus_1 >= 0:
-                        r_k = self.m1.iloc[idx_k]
-                        r_k_minus_1 = self.m1.iloc[idx_k_minus_1]
-                        r_k_minus_2 = self.m1.iloc[idx_k_minus_2]
+                        r_k = self._m1_row(idx_k)
+                        r_k_minus_1 = self._m1_row(idx_k_minus_1)
+                        r_k_minus_2 = self._m1_row(idx_k_minus_2)
                         
                         if (r_k['low'] - r_k_minus_2['high']) > 0.05 and r_k_minus_1['open'] > r_k_minus_1['close']:
                             y = r_k_minus_2['high']
@@ -2305,9 +2503,9 @@ class PineScriptStrategy:
                     idx_k_minus_2 = idx - k + 2
                     
                     if idx_k_minus_1 >= 0 and idx_k_minus_2 >= 0 and idx_k_minus_3 >= 0:
-                        r_k_minus_1 = self.m1.iloc[idx_k_minus_1]
-                        r_k_minus_2 = self.m1.iloc[idx_k_minus_2]
-                        r_k_minus_3 = self.m1.iloc[idx_k_minus_3]
+                        r_k_minus_1 = self._m1_row(idx_k_minus_1)
+                        r_k_minus_2 = self._m1_row(idx_k_minus_2)
+                        r_k_minus_3 = self._m1_row(idx_k_minus_3)
                         
                         if (r_k_minus_1['low'] - r_k_minus_3['high']) > 0.05 and r_k_minus_2['open'] > r_k_minus_2['close']:
                             y = r_k_minus_3['high']
@@ -2318,9 +2516,9 @@ class PineScriptStrategy:
                     idx_k_minus_2 = idx - k + 2
                     
                     if idx_k_minus_2 >= 0 and idx_k_minus_3 >= 0 and idx_k_minus_4 >= 0:
-                        r_k_minus_2 = self.m1.iloc[idx_k_minus_2]
-                        r_k_minus_3 = self.m1.iloc[idx_k_minus_3]
-                        r_k_minus_4 = self.m1.iloc[idx_k_minus_4]
+                        r_k_minus_2 = self._m1_row(idx_k_minus_2)
+                        r_k_minus_3 = self._m1_row(idx_k_minus_3)
+                        r_k_minus_4 = self._m1_row(idx_k_minus_4)
                         
                         if y == r_k_minus_3['high'] and (r_k_minus_2['low'] - r_k_minus_4['high']) > 0.05 and r_k_minus_3['open'] > r_k_minus_3['close']:
                             y = r_k_minus_4['high']
@@ -2480,9 +2678,9 @@ class PineScriptStrategy:
             if idx < 3:
                 return
             
-            prev1 = self.m1.iloc[idx - 1]
-            prev2 = self.m1.iloc[idx - 2]
-            prev3 = self.m1.iloc[idx - 3]
+            prev1 = self._m1_row(idx - 1)
+            prev2 = self._m1_row(idx - 2)
+            prev3 = self._m1_row(idx - 3)
             
             o1, c1 = prev1['open'], prev1['close']
             o2, c2 = prev2['open'], prev2['close']
@@ -2493,7 +2691,7 @@ class PineScriptStrategy:
                 return
             
             # Tính sl_sell = ta.highest(10) (line 296)
-            sl_sell = max(self.m1.iloc[max(0, idx-9):idx+1]['high'])
+            sl_sell = max(self._m1_window(max(0, idx-9), idx+1)['high'])
             
             # Case 1: open[2] < close[2] (line 2071)
             if o2 < c2:
@@ -2519,9 +2717,9 @@ class PineScriptStrategy:
             if idx < 3:
                 return
             
-            prev1 = self.m1.iloc[idx - 1]
-            prev2 = self.m1.iloc[idx - 2]
-            prev3 = self.m1.iloc[idx - 3]
+            prev1 = self._m1_row(idx - 1)
+            prev2 = self._m1_row(idx - 2)
+            prev3 = self._m1_row(idx - 3)
             
             o1, c1 = prev1['open'], prev1['close']
             o2, c2 = prev2['open'], prev2['close']
@@ -2664,89 +2862,8 @@ class PineScriptStrategy:
         self.short_state.doi_sl_05R_sell = True
 
     def _print_statistics(self):
-        """Tinh toan va in thong ke backtest."""
-        if len(self.trades) == 0:
-            print("\n=== THONG KE (STATISTICS) ===")
-            print("Khong co giao dich nao duoc thuc hien.")
-            return
-        
-        # Tinh toan cac chi so
-        total_trades = len(self.trades)
-        winning_trades = [t for t in self.trades if t.pnl > 0]
-        losing_trades = [t for t in self.trades if t.pnl < 0]
-        breakeven_trades = [t for t in self.trades if t.pnl == 0]
-        
-        win_count = len(winning_trades)
-        loss_count = len(losing_trades)
-        breakeven_count = len(breakeven_trades)
-        
-        win_rate = (win_count / total_trades * 100) if total_trades > 0 else 0
-        
-        # Tong lai/lo
-        total_pnl = sum(t.pnl for t in self.trades)
-        total_profit = sum(t.pnl for t in winning_trades)
-        total_loss = sum(t.pnl for t in losing_trades)
-        
-        # Profit factor
-        profit_factor = abs(total_profit / total_loss) if total_loss != 0 else float('inf')
-        
-        # Average trade
-        avg_win = (total_profit / win_count) if win_count > 0 else 0
-        avg_loss = (total_loss / loss_count) if loss_count > 0 else 0
-        avg_trade = total_pnl / total_trades
-        
-        # Max drawdown
-        max_dd = 0
-        max_dd_pct = 0
-        peak = self.initial_capital
-        
-        for equity in self.equity_curve:
-            if equity > peak:
-                peak = equity
-            dd = peak - equity
-            if dd > max_dd:
-                max_dd = dd
-                max_dd_pct = (dd / peak * 100) if peak > 0 else 0
-        
-        # Return
-        total_return = ((self.current_equity - self.initial_capital) / self.initial_capital * 100)
-        
-        # In ket qua
-        print("\n" + "="*60)
-        print("=== BACKTEST STATISTICS ===")
-        print("="*60)
-        
-        print(f"\n[OVERVIEW]")
-        print(f"  Initial Capital:          {self.initial_capital:,.0f} USD")
-        print(f"  Final Equity:             {self.current_equity:,.0f} USD")
-        print(f"  Total P/L:                {total_pnl:+,.0f} USD ({total_return:+.2f}%)")
-        
-        print(f"\n[TRADES]")
-        print(f"  Total Trades:             {total_trades}")
-        print(f"  - Winning Trades:         {win_count}")
-        print(f"  - Losing Trades:          {loss_count}")
-        print(f"  - Breakeven Trades:       {breakeven_count}")
-        print(f"  Win Rate:                 {win_rate:.2f}%")
-        
-        print(f"\n[PROFIT/LOSS]")
-        print(f"  Total Profit:             {total_profit:+,.0f} USD")
-        print(f"  Total Loss:               {total_loss:+,.0f} USD")
-        print(f"  Profit Factor:            {profit_factor:.2f}")
-        print(f"  Average Trade:            {avg_trade:+,.0f} USD")
-        print(f"  - Avg Winning Trade:      {avg_win:+,.0f} USD")
-        print(f"  - Avg Losing Trade:       {avg_loss:+,.0f} USD")
-        
-        print(f"\n[RISK METRICS]")
-        print(f"  Max Drawdown:             {max_dd:,.0f} USD ({max_dd_pct:.2f}%)")
-        print(f"  Peak Equity:              {self.peak_equity:,.0f} USD")
-        
-        # Largest win/loss
-        if winning_trades:
-            largest_win = max(t.pnl for t in winning_trades)
-            print(f"  Largest Win:              {largest_win:+,.0f} USD")
-        
-        if losing_trades:
-            largest_loss = min(t.pnl for t in losing_trades)
-            print(f"  Largest Loss:             {largest_loss:+,.0f} USD")
-        
-        print("\n" + "="*60)
+        """Tinh toan va in thong ke backtest (metrics.print_statistics)."""
+        print_statistics(
+            self.trades, self.equity_curve, self.initial_capital,
+            start=self.m1.index[0], end=self.m1.index[-1],
+        )
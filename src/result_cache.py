@@ -0,0 +1,213 @@
+"""
+Cache kết quả backtest trên disk, content-addressed.
+
+Key = hash(data fingerprint, các field của StrategyConfig, engine + hash source code của engine).
+Cùng data + cùng config + code không đổi => trả lại trades / metrics đã lưu ngay lập tức
+(main.py chạy lại cùng năm, optimizer chạy grid chồng lên grid cũ). Sửa logic strategy làm đổi
+hash source nên entry cũ tự động không còn được dùng (và bị evict dần theo LRU).
+
+Mỗi entry là 1 file pickle `<key>.pkl`; LRU dựa trên mtime (được touch mỗi lần hit),
+evict theo tổng dung lượng và số entry.
+"""
+
+import ast
+import hashlib
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .backtest_results import BacktestResult
+from .pinescript_port import PaperModeState, Trade
+from .strategy_config import StrategyConfig, config_key
+
+
+# Module gốc của từng engine; key hash source của module gốc + mọi module trong src/ mà nó import
+# (trực tiếp hoặc gián tiếp), nên thêm import mới không cần sửa bảng này
+_ENGINE_ENTRY_MODULES: Dict[str, Tuple[str, ...]] = {
+    "python": ("pinescript_port.py", "backtest_results.py", "signal_cache.py"),
+    "numba": ("numba_engine.py", "backtest_results.py", "signal_cache.py"),
+    "batch": ("batch_engine.py", "signal_cache.py"),
+    "fork": ("state_fork.py", "backtest_results.py", "signal_cache.py"),
+}
+
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+_source_hashes: Dict[str, str] = {}
+
+
+def _local_imports(name: str) -> List[str]:
+    """File .py trong src/ mà module `name` import bằng relative import (kể cả import trong function)."""
+    with open(os.path.join(_SRC_DIR, name), "rb") as fh:
+        tree = ast.parse(fh.read(), filename=name)
+    found = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ImportFrom) or node.level != 1:
+            continue
+        if node.module:
+            candidates = [node.module.split(".")[0]]
+        else:  # from . import x
+            candidates = [alias.name for alias in node.names]
+        found.extend(f"{mod}.py" for mod in candidates if os.path.exists(os.path.join(_SRC_DIR, f"{mod}.py")))
+    return found
+
+
+def engine_modules(engine: str) -> List[str]:
+    """Toàn bộ module src/ mà kết quả của engine phụ thuộc vào (đổi source => đổi key), đã sort."""
+    seen = set()
+    stack = list(_ENGINE_ENTRY_MODULES[engine])
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        stack.extend(_local_imports(name))
+    return sorted(seen)
+
+
+def engine_version(engine: str) -> str:
+    """Hash source code các module của engine (cache trong process)."""
+    if engine not in _source_hashes:
+        h = hashlib.sha1(engine.encode("utf-8"))
+        for name in engine_modules(engine):
+            h.update(name.encode("utf-8"))
+            with open(os.path.join(_SRC_DIR, name), "rb") as fh:
+                h.update(fh.read())
+        _source_hashes[engine] = h.hexdigest()[:16]
+    return _source_hashes[engine]
+
+
+def data_fingerprint(*frames: pd.DataFrame) -> str:
+    """Hash nội dung (DatetimeIndex + tên cột + giá trị) của các DataFrame input."""
+    h = hashlib.sha1()
+    for df in frames:
+        h.update(str(len(df)).encode("utf-8"))
+        h.update(",".join(map(str, df.columns)).encode("utf-8"))
+        h.update(df.index.asi8.tobytes())
+        for col in df.columns:
+            h.update(df[col].to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+@dataclass
+class CachedRun:
+    """
+    1 entry cache. Có cùng các attribute main.py dùng để in report
+    (trades, equity_curve, initial_capital, paper_state, config).
+    """
+    result: BacktestResult
+    initial_capital: float = 1000
+    equity_curve: Optional[List[float]] = None     # None với entry từ batch engine
+    paper_state: Optional[PaperModeState] = None   # None với entry từ batch engine
+
+    @property
+    def config(self) -> StrategyConfig:
+        return self.result.config
+
+    @property
+    def trades(self) -> List[Trade]:
+        return self.result.trades
+
+
+class ResultCache:
+    """
+    Ví dụ:
+        cache = ResultCache(".backtest_cache")
+        key = cache.key(data_fingerprint(m1, m15), config, "python")
+        hit = cache.get(key)
+        if hit is None:
+            ...chạy backtest...
+            cache.put(key, CachedRun(...))
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = ".backtest_cache",
+        max_bytes: int = 2 * 1024 ** 3,
+        max_entries: Optional[int] = None,
+        evict_every: int = 32,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(fingerprint: str, config: StrategyConfig, engine: str) -> str:
+        payload = f"{fingerprint}|{config_key(config)}|{engine}|{engine_version(engine)}"
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[CachedRun]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                entry = pickle.load(fh)
+            os.utime(path)  # LRU: đánh dấu vừa dùng
+        except Exception:
+            # File hỏng / ghi dở, hoặc pickle tham chiếu class / module đã đổi tên hay đổi signature
+            # (ModuleNotFoundError, ImportError, TypeError, ...): coi như miss, lần put sau ghi đè
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CachedRun) -> None:
+        """Ghi atomic (file tạm + rename) để nhiều worker ghi cùng lúc không làm hỏng entry."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                pickle.dump(entry, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._puts += 1
+        if self._puts % self.evict_every == 0:
+            self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Xoá entry ít dùng gần đây nhất cho tới khi dưới max_bytes / max_entries. Trả về số entry đã xoá."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        removed = 0
+        for _, size, path in entries:
+            over_size = total > self.max_bytes
+            over_count = self.max_entries is not None and count > self.max_entries
+            if not (over_size or over_count):
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            count -= 1
+            removed += 1
+        return removed
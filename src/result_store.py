@@ -0,0 +1,122 @@
+"""
+Append-only store cho kết quả optimizer (CSV, 1 dòng / config, key = config_key).
+
+Mỗi summary được ghi + flush ngay khi worker trả về, nên sweep bị crash / Ctrl-C vẫn giữ được
+phần đã chạy; chạy lại cùng sweep với cùng file sẽ bỏ qua các config đã có trong store.
+"""
+
+import csv
+import json
+import os
+from dataclasses import asdict, fields
+from typing import Dict, List, Optional
+
+from .backtest_results import BacktestSummary
+from .strategy_config import StrategyConfig
+
+
+_SUMMARY_FIELDS = [f.name for f in fields(BacktestSummary) if f.name not in ("config", "pruned_reason")]
+# pruned_reason đứng sau config_json: file cũ (chưa có cột này) vẫn append / đọc được
+_COLUMNS = _SUMMARY_FIELDS + ["config_json", "pruned_reason"]
+_INT_FIELDS = {"total_trades", "winning_trades", "losing_trades"}
+
+
+def _config_from_json(payload: str) -> StrategyConfig:
+    data = json.loads(payload)
+    if "trading_sessions" in data:
+        data["trading_sessions"] = [tuple(s) for s in data["trading_sessions"]]
+    return StrategyConfig(**data)
+
+
+def _parse_row(row: Dict[str, str]) -> BacktestSummary:
+    values = {}
+    for name in _SUMMARY_FIELDS:
+        raw = row[name]
+        if name == "config_key":
+            values[name] = raw
+        elif name == "journal_path":
+            values[name] = raw or None
+        elif name in _INT_FIELDS:
+            values[name] = int(raw)
+        else:
+            values[name] = float(raw)
+    values["config"] = _config_from_json(row["config_json"])
+    values["pruned_reason"] = row.get("pruned_reason") or None
+    return BacktestSummary(**values)
+
+
+class ResultStore:
+    """
+    Ví dụ:
+        store = ResultStore("optimization_results.csv")
+        done = store.completed_keys()
+        store.append(summary)
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._results: Dict[str, BacktestSummary] = {}
+        self._load()
+        self._fh = None
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        # Dòng cuối có thể bị ghi dở khi process bị kill: cắt về newline cuối cùng
+        with open(self.path, "rb+") as fh:
+            data = fh.read()
+            if data and not data.endswith(b"\n"):
+                fh.truncate(data.rfind(b"\n") + 1)
+
+        with open(self.path, newline="") as fh:
+            for row in csv.DictReader(fh):
+                try:
+                    summary = _parse_row(row)
+                except (KeyError, ValueError, TypeError):
+                    continue
+                self._results[summary.config_key] = summary
+
+        if self._results:
+            print(f"[ResultStore] Loaded {len(self._results)} completed configs from {self.path}")
+
+    def completed_keys(self) -> set:
+        return set(self._results)
+
+    def results(self) -> List[BacktestSummary]:
+        """Tất cả summary trong store (config dựng lại từ JSON)."""
+        return list(self._results.values())
+
+    def get(self, key: str) -> Optional[BacktestSummary]:
+        return self._results.get(key)
+
+    def append(self, summary: BacktestSummary) -> None:
+        """Ghi 1 summary (flush ngay). Config đã có trong store thì bỏ qua."""
+        if summary.config_key in self._results:
+            return
+        if self._fh is None:
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fh = open(self.path, "a", newline="")
+            self._writer = csv.writer(self._fh)
+            if new_file:
+                self._writer.writerow(_COLUMNS)
+
+        row = [getattr(summary, name) for name in _SUMMARY_FIELDS]
+        row[_SUMMARY_FIELDS.index("journal_path")] = summary.journal_path or ""
+        row.append(json.dumps(asdict(summary.config), sort_keys=True) if summary.config else "{}")
+        row.append(summary.pruned_reason or "")
+        self._writer.writerow(row)
+        self._fh.flush()
+        self._results[summary.config_key] = summary
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,6 +1,8 @@
-from typing import List
+from typing import List, Optional, Sequence, Union
 
-from .backtest_results import BacktestResult
+from .backtest_results import BacktestResult, BacktestSummary
+from .pareto import objective_matrix, parse_objectives, pareto_ranks
+from .strategy_config import config_key
 
 
 class ResultsAnalyzer:
@@ -8,7 +10,7 @@ class ResultsAnalyzer:
     Công cụ tiện ích để xem, lọc và export kết quả tối ưu.
     """
 
-    def __init__(self, results: List[BacktestResult]) -> None:
+    def __init__(self, results: List[Union[BacktestResult, BacktestSummary]]) -> None:
         self.results = results
 
     def print_top_configs(self, n: int = 10) -> None:
@@ -19,6 +21,7 @@ class ResultsAnalyzer:
                 f"Win Rate={r.win_rate:.2f}%, "
                 f"Trades={r.total_trades}, "
                 f"TotalPnL={r.total_pnl:,.0f}"
+                + (f" [pruned: {r.pruned_reason}]" if r.pruned_reason else "")
             )
             cfg = r.config
             print(
@@ -29,15 +32,9 @@ class ResultsAnalyzer:
                 f"adx_max_entry={cfg.adx_max_entry}"
             )
 
-    def export_to_csv(self, path: str) -> None:
-        """
-        Export kết quả ra CSV để phân tích thêm (pandas optional).
-        """
-        try:
-            import pandas as pd
-        except ImportError:
-            print("pandas not installed, cannot export to CSV.")
-            return
+    def to_frame(self):
+        """Bảng kết quả (1 dòng / config: metrics + các field config chính)."""
+        import pandas as pd
 
         rows = []
         for r in self.results:
@@ -55,6 +52,8 @@ class ResultsAnalyzer:
                     "max_drawdown": r.max_drawdown,
                     "sharpe_ratio": r.sharpe_ratio,
                     "backtest_duration_seconds": r.backtest_duration_seconds,
+                    "pruned_reason": r.pruned_reason or "",
+                    "config_key": config_key(cfg),
                     # Config fields
                     "r_r_ratio_min": cfg.r_r_ratio_min,
                     "r_r_ratio_target": cfg.r_r_ratio_target,
@@ -65,10 +64,62 @@ class ResultsAnalyzer:
                     "max_entry_timeout_minutes": cfg.max_entry_timeout_minutes,
                     "zone_touch_buffer": cfg.zone_touch_buffer,
                     "enable_timerange_filter": cfg.enable_timerange_filter,
+                    "trade_side": cfg.trade_side,
                 }
             )
 
-        df = pd.DataFrame(rows)
+        return pd.DataFrame(rows)
+
+    def export_to_csv(self, path: str) -> None:
+        """
+        Export kết quả ra CSV để phân tích thêm (pandas optional).
+        """
+        try:
+            df = self.to_frame()
+        except ImportError:
+            print("pandas not installed, cannot export to CSV.")
+            return
         df.to_csv(path, index=False)
         print(f"Exported optimization results to {path}")
 
+    # ------------------------------------------------------------------
+    # Nhiều mục tiêu (xem pareto.py)
+    # ------------------------------------------------------------------
+    def pareto_frame(self, objectives: Sequence[str], max_rank: Optional[int] = 0):
+        """
+        Bảng kết quả + cột pareto_rank (0 = Pareto front), sort theo front rồi objective đầu tiên.
+        max_rank: chỉ giữ các front <= max_rank (None = giữ tất cả).
+        """
+        parsed = parse_objectives(objectives)
+        df = self.to_frame()
+        if df.empty:
+            return df.assign(pareto_rank=[])
+        values = objective_matrix([df[name].to_numpy() for name, _ in parsed], [m for _, m in parsed])
+        df["pareto_rank"] = pareto_ranks(values, valid=(df["pruned_reason"] == "").to_numpy())
+        df["_primary"] = values[:, 0]
+        df = df.sort_values(["pareto_rank", "_primary"], ascending=[True, False], kind="stable")
+        df = df.drop(columns="_primary").reset_index(drop=True)
+        if max_rank is not None:
+            df = df[df["pareto_rank"] <= max_rank].reset_index(drop=True)
+        return df
+
+    def print_pareto_front(self, objectives: Sequence[str], n: int = 20) -> None:
+        front = self.pareto_frame(objectives)
+        names = [name for name, _ in parse_objectives(objectives)]
+        print(f"\n=== PARETO FRONT ({len(front)} configs; {', '.join(objectives)}) ===")
+        for i, row in enumerate(front.head(n).itertuples(index=False), 1):
+            metrics = ", ".join(f"{name}={getattr(row, name):,.2f}" for name in names)
+            print(f"{i}: {metrics} ({row.config_key})")
+        if len(front) > n:
+            print(f"... {len(front) - n} more")
+
+    def export_pareto_front(self, path: str, objectives: Sequence[str], max_rank: Optional[int] = 0) -> None:
+        """Export các front <= max_rank (mặc định chỉ Pareto front) ra CSV, có cột pareto_rank."""
+        try:
+            df = self.pareto_frame(objectives, max_rank=max_rank)
+        except ImportError:
+            print("pandas not installed, cannot export to CSV.")
+            return
+        df.to_csv(path, index=False)
+        print(f"Exported Pareto front ({len(df)} configs) to {path}")
+
@@ -0,0 +1,505 @@
+"""
+Chạy optimizer từ 1 file spec (JSON / TOML / YAML) thay vì sửa optimize_strategy.py cho mỗi sweep.
+
+Ví dụ sweeps/rr.toml:
+
+    search = "grid"                 # grid | tpe | genetic | adaptive | halving | walkforward | years
+    engine = "batch"
+    workers = -1                    # -1 = mọi core (giới hạn thêm bởi memory_budget_mb)
+    memory_budget_mb = 16000
+    seed = 42
+    objective = ["total_pnl", "max_drawdown", "sharpe_ratio"]   # hoặc 1 metric, vd "profit_factor"
+    store = "sweeps/rr/store.csv"   # chạy lại cùng spec => resume
+    output_dir = "sweeps/rr"
+    constraints = ["r_r_ratio_target > r_r_ratio_min"]
+
+    [data]
+    path = "dukascopy_xauusd_m1.csv"    # hoặc years = [2021, 2022] (+ pattern = ".../{year}...csv")
+    start = "2021-01-01"                # tùy chọn: cắt data
+    end = "2024-01-01"
+
+    [params]                            # grid: list / {low, high, step}; tpe / genetic: {low, high} => khoảng liên tục
+    r_r_ratio_min = [1.5, 2.0]
+    r_r_ratio_target = { low = 2.0, high = 3.5, step = 0.5 }
+    trading_sessions = { subset = true }    # tpe / genetic: mọi tập con của trading_sessions mặc định
+
+    [base]                              # field cố định cho mọi config
+    trade_side = "long"
+
+    [abort]                             # AbortRules
+    max_drawdown_pct = 50
+
+    [cluster]                           # tùy chọn: worker ở máy khác (grid / adaptive, xem distributed.py)
+    bind = "0.0.0.0:6000"
+    authkey_env = "OPTIMIZER_AUTHKEY"   # tên biến môi trường chứa authkey
+    workers = 8
+    lease_seconds = 600                 # không có heartbeat / kết quả trong từng này giây => giao lại chunk
+    max_attempts = 3
+    heartbeat_seconds = 30
+
+    [options]                           # tham số riêng của search, vd budget (tpe), generations (genetic), rounds (adaptive)
+
+Mỗi lần chạy ghi output_dir/run_manifest.json (spec đã resolve, fingerprint data, git revision, số worker)
+để chạy lại đúng sweep đó.
+"""
+
+import json
+import operator
+import os
+import platform
+import random
+import re
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .abort_rules import AbortRules
+from .backtest_results import BacktestSummary
+from .data_loader import load_dukascopy_csv, resample_to_m15
+from .distributed import ClusterConfig
+from .memory_profile import frame_nbytes
+from .optimizer import ENGINES
+from .pareto import parse_objectives
+from .result_cache import data_fingerprint
+from .search_space import ChoiceParam, FloatParam, IntParam, Param, SubsetParam
+from .strategy_config import StrategyConfig
+from .year_matrix import CROSS_YEAR_OBJECTIVES
+
+
+SEARCHES = ("grid", "tpe", "genetic", "adaptive", "halving", "walkforward", "years")
+# Search chạy trên grid (params là list giá trị) - constraints lọc grid trước khi chạy
+GRID_SEARCHES = ("grid", "adaptive", "halving", "walkforward", "years")
+# Option truyền vào run() thay vì constructor
+RUN_OPTIONS = {"tpe": ("budget",), "genetic": ("generations",), "grid": ("journal_top_k", "random_subset")}
+
+# RAM ước lượng của 1 worker (interpreter + pandas + state engine); data / signal cache nằm trong shared memory
+WORKER_MEMORY_MB = 300.0
+YEAR_FILE_PATTERN = "download/xauusd-m1-bid-{year}-01-01-{year}-12-31.csv"
+
+_DEFAULTS = StrategyConfig()
+_CONFIG_FIELDS = {f.name for f in fields(StrategyConfig)}
+
+
+# ----------------------------------------------------------------------
+# Constraints
+# ----------------------------------------------------------------------
+_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "<=": operator.le, ">=": operator.ge, "==": operator.eq, "!=": operator.ne, "<": operator.lt, ">": operator.gt,
+}
+_CONSTRAINT_RE = re.compile(r"^\s*([A-Za-z_]\w*)\s*(<=|>=|==|!=|<|>)\s*(.+?)\s*$")
+
+
+@dataclass(frozen=True)
+class Constraint:
+    """`<field> <op> <field | số | true | false | "chuỗi">`, vd "r_r_ratio_target > r_r_ratio_min"."""
+    left: str
+    op: str
+    right: Any
+    right_is_field: bool
+
+    @classmethod
+    def parse(cls, text: str) -> "Constraint":
+        match = _CONSTRAINT_RE.match(text)
+        if match is None:
+            raise ValueError(f"Cannot parse constraint {text!r} (expected '<field> <op> <field or value>')")
+        left, op, right = match.groups()
+        if left not in _CONFIG_FIELDS:
+            raise ValueError(f"Unknown StrategyConfig field in constraint {text!r}: {left}")
+        if right in _CONFIG_FIELDS:
+            return cls(left, op, right, True)
+        try:
+            value = json.loads(right)
+        except ValueError:
+            raise ValueError(f"Cannot parse value {right!r} in constraint {text!r}") from None
+        return cls(left, op, value, False)
+
+    def __call__(self, config: StrategyConfig) -> bool:
+        right = getattr(config, self.right) if self.right_is_field else self.right
+        return _OPS[self.op](getattr(config, self.left), right)
+
+
+# ----------------------------------------------------------------------
+# Params
+# ----------------------------------------------------------------------
+def _field_value(name: str, value: Any) -> Any:
+    """JSON / TOML không có tuple: [[9, 12], [14, 17]] -> [(9, 12), (14, 17)] cho field list-of-tuple."""
+    if isinstance(getattr(_DEFAULTS, name), list) and isinstance(value, list):
+        return [tuple(v) if isinstance(v, list) else v for v in value]
+    return value
+
+
+def grid_values(name: str, spec: Any) -> List[Any]:
+    """list => giữ nguyên; {low, high, step} => low, low + step, ... <= high; {values: [...]}."""
+    if isinstance(spec, list):
+        return [_field_value(name, v) for v in spec]
+    if isinstance(spec, dict) and "values" in spec:
+        return [_field_value(name, v) for v in spec["values"]]
+    if isinstance(spec, dict) and {"low", "high", "step"} <= spec.keys():
+        low, high, step = spec["low"], spec["high"], spec["step"]
+        if step <= 0 or high < low:
+            raise ValueError(f"Invalid range for {name}: {spec}")
+        count = int(round((high - low) / step, 9)) + 1
+        values = [low + i * step for i in range(count)]
+        if all(isinstance(v, int) for v in (low, high, step)):
+            return values
+        return [round(v, 10) for v in values]
+    raise ValueError(f"Grid param {name} must be a list, {{values}} or {{low, high, step}}, got {spec!r}")
+
+
+def space_param(name: str, spec: Any) -> Param:
+    """list => ChoiceParam; {subset} => SubsetParam; {low, high} => IntParam (field int) / FloatParam."""
+    if isinstance(spec, list):
+        return ChoiceParam(tuple(_field_value(name, v) for v in spec))
+    if isinstance(spec, dict) and "subset" in spec:
+        items = spec["subset"] if isinstance(spec["subset"], list) else getattr(_DEFAULTS, name)
+        items = _field_value(name, list(items))
+        return SubsetParam(tuple(items), min_size=spec.get("min_size", 1))
+    if isinstance(spec, dict) and {"low", "high"} <= spec.keys():
+        default = getattr(_DEFAULTS, name)
+        if isinstance(default, int) and not isinstance(default, bool):
+            return IntParam(int(spec["low"]), int(spec["high"]), int(spec.get("step", 1)))
+        return FloatParam(float(spec["low"]), float(spec["high"]), log=bool(spec.get("log", False)))
+    raise ValueError(f"Search-space param {name} must be a list, {{subset}} or {{low, high}}, got {spec!r}")
+
+
+# ----------------------------------------------------------------------
+# Spec
+# ----------------------------------------------------------------------
+@dataclass
+class OptimizationSpec:
+    search: str = "grid"
+    params: Dict[str, Any] = field(default_factory=dict)
+    base: Dict[str, Any] = field(default_factory=dict)
+    constraints: List[str] = field(default_factory=list)
+    data: Dict[str, Any] = field(default_factory=dict)
+    engine: str = "python"
+    batch_size: int = 64
+    workers: int = -1
+    memory_budget_mb: Optional[float] = None
+    objective: Union[str, List[str]] = "profit_factor"
+    max_configs: Optional[int] = None
+    seed: Optional[int] = None
+    store: Optional[str] = None
+    output_dir: str = "."
+    cache_dir: Optional[str] = None
+    abort: Dict[str, Any] = field(default_factory=dict)
+    cluster: Optional[Dict[str, Any]] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "OptimizationSpec":
+        unknown = set(raw) - {f.name for f in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown spec keys: {', '.join(sorted(unknown))}")
+        spec = cls(**raw)
+        spec.validate()
+        return spec
+
+    def validate(self) -> None:
+        if self.search not in SEARCHES:
+            raise ValueError(f"search must be one of {SEARCHES}, got {self.search!r}")
+        if self.engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}, got {self.engine!r}")
+        for name in list(self.params) + list(self.base):
+            if name not in _CONFIG_FIELDS:
+                raise ValueError(f"Unknown StrategyConfig field: {name}")
+        if not self.params:
+            raise ValueError("Spec needs at least one entry in [params]")
+        if self.constraints and self.search not in GRID_SEARCHES:
+            raise ValueError(f"constraints are only supported for grid searches {GRID_SEARCHES}")
+        if self.cluster is not None and self.search not in ("grid", "adaptive"):
+            raise ValueError("cluster is only supported for search = grid / adaptive")
+        if self.search == "years" and "years" not in self.data:
+            raise ValueError("search = years needs data.years")
+        self.parsed_objectives()
+        self.parsed_constraints()
+        self.abort_rules()
+        self.search_space() if self.search in ("tpe", "genetic") else self.param_grid()
+
+    def objectives(self) -> List[str]:
+        return [self.objective] if isinstance(self.objective, str) else list(self.objective)
+
+    def parsed_objectives(self) -> List[Tuple[str, bool]]:
+        return parse_objectives(self.objectives())
+
+    def parsed_constraints(self) -> List[Constraint]:
+        return [Constraint.parse(text) for text in self.constraints]
+
+    def abort_rules(self) -> Optional[AbortRules]:
+        return AbortRules(**self.abort) if self.abort else None
+
+    def base_config(self) -> StrategyConfig:
+        return StrategyConfig(**{name: _field_value(name, v) for name, v in self.base.items()})
+
+    def param_grid(self) -> Dict[str, List[Any]]:
+        grid = {name: [_field_value(name, v)] for name, v in self.base.items()}
+        grid.update((name, grid_values(name, spec)) for name, spec in self.params.items())
+        return grid
+
+    def search_space(self) -> Dict[str, Param]:
+        return {name: space_param(name, spec) for name, spec in self.params.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def load_spec(path: str) -> OptimizationSpec:
+    """Đọc spec theo đuôi file: .json, .toml, .yaml / .yml (cần pyyaml)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    elif ext == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            import tomli as tomllib
+        with open(path, "rb") as f:
+            raw = tomllib.load(f)
+    elif ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("YAML specs need pyyaml. Install it with: pip install pyyaml") from None
+        with open(path, "r", encoding="utf-8") as f:
+            raw = yaml.safe_load(f)
+    else:
+        raise ValueError(f"Unsupported spec format {ext!r} (use .json, .toml, .yaml)")
+    if not isinstance(raw, dict):
+        raise ValueError(f"Spec {path} must be a mapping at the top level")
+    return OptimizationSpec.from_dict(raw)
+
+
+# ----------------------------------------------------------------------
+# Data + workers
+# ----------------------------------------------------------------------
+def _load_frames(path: str, start: Any = None, end: Any = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Data file not found: {path}")
+    m1 = load_dukascopy_csv(path)
+    if start is not None or end is not None:
+        m1 = m1.loc[pd.Timestamp(start) if start else None:pd.Timestamp(end) if end else None]
+    if m1.empty:
+        raise ValueError(f"No M1 data in {path} for [{start}, {end}]")
+    return m1, resample_to_m15(m1)
+
+
+def load_datasets(data: Dict[str, Any]) -> Dict[Any, Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    data.years => {năm: (M1, M15)} (file theo data.pattern, năm thiếu file bị bỏ qua);
+    ngược lại {None: (M1, M15)} của data.path (mặc định DUKASCOPY_CSV_PATH).
+    """
+    start, end = data.get("start"), data.get("end")
+    if "years" not in data:
+        path = data.get("path") or os.environ.get("DUKASCOPY_CSV_PATH", "dukascopy_xauusd_m1.csv")
+        return {None: _load_frames(path, start, end)}
+    datasets = {}
+    for year in data["years"]:
+        path = data.get("pattern", YEAR_FILE_PATTERN).format(year=year)
+        if not os.path.exists(path):
+            print(f"[RunSpec] Skipping {year}: {path} not found")
+            continue
+        datasets[year] = _load_frames(path, start, end)
+    if not datasets:
+        raise ValueError(f"No data files found for years {data['years']}")
+    return datasets
+
+
+def plan_workers(workers: int, memory_budget_mb: Optional[float], m1: pd.DataFrame, m15: pd.DataFrame) -> int:
+    """Số worker: workers (-1 = mọi core), giảm xuống cho vừa memory_budget_mb nếu có."""
+    n = (os.cpu_count() or 1) if workers < 0 else max(1, workers)
+    if memory_budget_mb is None:
+        return n
+    # Data + signal cache (~ cỡ data) publish 1 lần vào shared memory, mỗi worker thêm WORKER_MEMORY_MB
+    shared_mb = 2 * (frame_nbytes(m1) + frame_nbytes(m15)) / 2**20
+    fit = int((memory_budget_mb - shared_mb) // WORKER_MEMORY_MB)
+    if fit < 1:
+        print(
+            f"[RunSpec] Memory budget {memory_budget_mb:.0f} MB is below shared data ({shared_mb:.0f} MB) "
+            f"+ 1 worker ({WORKER_MEMORY_MB:.0f} MB), running with 1 worker"
+        )
+        return 1
+    if fit < n:
+        print(f"[RunSpec] Memory budget {memory_budget_mb:.0f} MB: {n} -> {fit} workers")
+    return min(n, fit)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None if out.returncode == 0 else None
+
+
+# ----------------------------------------------------------------------
+# Run
+# ----------------------------------------------------------------------
+def run_spec(spec: OptimizationSpec, dry_run: bool = False) -> List[BacktestSummary]:
+    """
+    Load data, chạy search của spec, ghi kết quả + run_manifest.json vào spec.output_dir.
+    dry_run: chỉ load data, in số config / số worker rồi dừng (kiểm tra spec trước khi chạy lâu).
+    """
+    from .results_analyzer import ResultsAnalyzer
+
+    os.makedirs(spec.output_dir, exist_ok=True)
+    out = lambda name: os.path.join(spec.output_dir, name)
+    if spec.seed is not None:
+        random.seed(spec.seed)
+
+    datasets = load_datasets(spec.data)
+    if spec.search == "years":
+        m1_data = pd.concat([m1 for _, (m1, _) in sorted(datasets.items())])
+        m15_data = pd.concat([m15 for _, (_, m15) in sorted(datasets.items())])
+    elif len(datasets) == 1:
+        m1_data, m15_data = next(iter(datasets.values()))
+    else:
+        # Nhiều năm cho search khác "years": ghép thành 1 dataset liên tục
+        m1_data = pd.concat([m1 for _, (m1, _) in sorted(datasets.items())])
+        m15_data = resample_to_m15(m1_data)
+    n_jobs = 1 if spec.workers == 1 else plan_workers(spec.workers, spec.memory_budget_mb, m1_data, m15_data)
+
+    objectives = spec.objectives()
+    # Search 1 mục tiêu nhận tên metric + chiều (không có tiền tố "-" / "+")
+    objective, maximize = spec.parsed_objectives()[0]
+    common = dict(
+        engine=spec.engine, batch_size=spec.batch_size, cache_dir=spec.cache_dir, abort_rules=spec.abort_rules(),
+    )
+    ctor_options = {k: v for k, v in spec.options.items() if k not in RUN_OPTIONS.get(spec.search, ())}
+    run_options = {k: v for k, v in spec.options.items() if k in RUN_OPTIONS.get(spec.search, ())}
+    cluster = None
+    if spec.cluster is not None:
+        host, port = spec.cluster["bind"].rsplit(":", 1)
+        cluster = ClusterConfig(
+            (host, int(port)),
+            authkey=os.environ.get(spec.cluster.get("authkey_env", "OPTIMIZER_AUTHKEY"), "").encode("utf-8"),
+            expected_workers=int(spec.cluster.get("workers", 4)),
+            lease_seconds=float(spec.cluster.get("lease_seconds", ClusterConfig.lease_seconds)),
+            max_attempts=int(spec.cluster.get("max_attempts", ClusterConfig.max_attempts)),
+            heartbeat_seconds=float(spec.cluster.get("heartbeat_seconds", ClusterConfig.heartbeat_seconds)),
+        )
+
+    manifest: Dict[str, Any] = {
+        "spec": spec.to_dict(),
+        "data_fingerprint": data_fingerprint(m1_data, m15_data),
+        "bars": len(m1_data),
+        "workers": n_jobs,
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    if spec.search in GRID_SEARCHES:
+        n_points = 1
+        for values in spec.param_grid().values():
+            n_points *= len(values)
+        print(f"[RunSpec] {spec.search} over {n_points} grid points ({len(spec.constraints)} constraints), {n_jobs} workers")
+    else:
+        print(f"[RunSpec] {spec.search} over {len(spec.params)} params, {n_jobs} workers")
+    if dry_run:
+        print(json.dumps(manifest, indent=2, default=str))
+        return []
+
+    t0 = time.time()
+    results: List[BacktestSummary]
+    if spec.search == "tpe":
+        from .tpe_optimizer import TPEOptimizer
+        tpe = TPEOptimizer(
+            m1_data, m15_data, spec.search_space(), base_config=spec.base_config(), objective=objective,
+            maximize=maximize, seed=spec.seed, **common, **ctor_options,
+        )
+        results = tpe.run(
+            budget=run_options.get("budget", 100), n_jobs=n_jobs, store_path=spec.store,
+        )
+        tpe.history_frame().to_csv(out("optimization_history.csv"), index=False)
+    elif spec.search == "genetic":
+        from .genetic_optimizer import GeneticOptimizer
+        genetic = GeneticOptimizer(
+            m1_data, m15_data, spec.search_space(), base_config=spec.base_config(), objective=objective,
+            maximize=maximize, seed=spec.seed, **common, **ctor_options,
+        )
+        results = genetic.run(
+            generations=run_options.get("generations", 10), n_jobs=n_jobs, store_path=spec.store,
+        )
+        genetic.history_frame().to_csv(out("optimization_history.csv"), index=False)
+    elif spec.search == "adaptive":
+        from .adaptive_grid import AdaptiveGridOptimizer
+        adaptive = AdaptiveGridOptimizer(
+            m1_data, m15_data, spec.param_grid(), cluster=cluster, constraints=spec.parsed_constraints(),
+            objective=objective, maximize=maximize, **common, **ctor_options,
+        )
+        results = adaptive.run(n_jobs=n_jobs, store_path=spec.store)
+    elif spec.search == "halving":
+        from .halving_optimizer import SuccessiveHalvingOptimizer
+        halving = SuccessiveHalvingOptimizer(
+            m1_data, m15_data, spec.param_grid(), constraints=spec.parsed_constraints(),
+            objective=objective, maximize=maximize, **common, **ctor_options,
+        )
+        results = halving.run(n_jobs=n_jobs, max_configs=spec.max_configs)
+    elif spec.search == "walkforward":
+        from .walk_forward import WalkForwardOptimizer
+        ctor_options.setdefault("journal_dir", out("walk_forward"))
+        walk_forward = WalkForwardOptimizer(
+            m1_data, m15_data, spec.param_grid(), constraints=spec.parsed_constraints(),
+            objective=objective, maximize=maximize, **common, **ctor_options,
+        )
+        walk_forward.run(n_jobs=n_jobs)
+        walk_forward.print_report()
+        walk_forward.oos_equity().to_csv(out("walk_forward_equity.csv"))
+        # Kết quả out-of-sample của config được chọn ở từng fold
+        results = [r.test for r in walk_forward.results]
+    elif spec.search == "years":
+        from .year_matrix import CrossYearOptimizer
+        year_objective = ctor_options.pop("year_objective", "worst_year_profit_factor")
+        if year_objective not in CROSS_YEAR_OBJECTIVES:
+            raise ValueError(f"options.year_objective must be one of {CROSS_YEAR_OBJECTIVES}")
+        cross_year = CrossYearOptimizer(
+            datasets=dict(sorted(datasets.items())), param_grid=spec.param_grid(),
+            constraints=spec.parsed_constraints(), objective=year_objective, **common, **ctor_options,
+        )
+        cross_year.run(n_jobs=n_jobs, max_configs=spec.max_configs)
+        cross_year.print_top_configs(n=10)
+        cross_year.export_to_csv(out("optimization_results_by_year.csv"))
+        # Summary năm tệ nhất của từng config cho report chung bên dưới
+        results = [r.per_year[r.worst_year] for r in cross_year.results]
+    else:
+        from .optimizer import GridSearchOptimizer
+        optimizer = GridSearchOptimizer(
+            m1_data, m15_data, spec.param_grid(), cluster=cluster, constraints=spec.parsed_constraints(),
+            **common, **ctor_options,
+        )
+        # Worker chỉ trả summary; trade journal của top-K config ghi ra trade_journals/<config_key>.csv
+        results = optimizer.run(
+            n_jobs=n_jobs,
+            max_configs=spec.max_configs,
+            random_subset=run_options.get("random_subset", True),
+            journal_top_k=run_options.get("journal_top_k", 0),
+            journal_dir=out("trade_journals"),
+            store_path=spec.store,
+            objectives=None if objectives == ["profit_factor"] else objectives,
+        )
+    elapsed = time.time() - t0
+    print(f"Optimization finished in {elapsed:.1f} seconds. Total configs tested: {len(results)}")
+
+    analyzer = ResultsAnalyzer(results)
+    analyzer.print_top_configs(n=10)
+    analyzer.export_to_csv(out("optimization_results.csv"))
+    if len(objectives) > 1:
+        analyzer.print_pareto_front(objectives)
+        analyzer.export_pareto_front(out("optimization_pareto_front.csv"), objectives)
+
+    manifest.update(
+        finished_at=datetime.now().isoformat(timespec="seconds"),
+        elapsed_seconds=round(elapsed, 1),
+        results=len(results),
+    )
+    with open(out("run_manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+    print(f"[RunSpec] Wrote results + run_manifest.json to {spec.output_dir}")
+    return results
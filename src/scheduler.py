@@ -0,0 +1,216 @@
+"""
+Chia config cho pool worker theo chi phí ước lượng (dùng trong BaseOptimizer._evaluate).
+
+- CostModel: thời gian backtest / bar M1 học từ backtest_duration_seconds của các kết quả trước
+  (store, round / thế hệ trước, cùng lần chạy); config chưa gặp được ước lượng theo ảnh hưởng trung
+  bình của từng giá trị field (config nhiều lệnh hơn => state nhiều hơn => chậm hơn). Nhân số bar
+  của đoạn data nên dùng chung được giữa các window (halving, walk-forward, từng năm).
+- guided_chunks: chia config đã sort dài -> ngắn thành chunk có tổng chi phí ~ phần còn lại / (2 x worker).
+  Config dài chạy trước và đứng riêng, chunk nhỏ dần về cuối nên không còn 1 chunk dài chạy một mình
+  trong khi các core khác rảnh.
+- Task được giao dần (tối đa 2 chunk / worker đang chờ): worker xong trước lấy chunk kế tiếp.
+- ScheduleStats: thời gian bận thực tế của worker / (wall time x số worker) cho cả session.
+  CrossYear / walk-forward gọi dispatch song song từ nhiều thread trên cùng pool nên wall time là
+  hợp các khoảng có dispatch đang chạy (không cộng chồng), CostModel / ScheduleStats có lock.
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .backtest_results import BacktestSummary
+from .strategy_config import StrategyConfig
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+
+class CostModel:
+    """Ước lượng giây / bar M1 của 1 config từ thời gian chạy đã ghi nhận."""
+
+    def __init__(self) -> None:
+        self._by_value: Dict[Tuple[str, Any], List[float]] = {}   # (field, value) -> [tổng, số lần]
+        self._total = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def observations(self) -> int:
+        return self._count
+
+    def observe(self, config: StrategyConfig, seconds: float, n_bars: int) -> None:
+        if n_bars <= 0 or not seconds > 0:
+            return
+        per_bar = seconds / n_bars
+        keys = [(f.name, _hashable(getattr(config, f.name))) for f in fields(StrategyConfig)]
+        with self._lock:
+            self._total += per_bar
+            self._count += 1
+            for key in keys:
+                entry = self._by_value.setdefault(key, [0.0, 0])
+                entry[0] += per_bar
+                entry[1] += 1
+
+    def observe_summaries(self, summaries: Sequence[BacktestSummary], n_bars: int) -> None:
+        for summary in summaries:
+            if summary.config is not None:
+                self.observe(summary.config, summary.backtest_duration_seconds, n_bars)
+
+    def estimate(self, config: StrategyConfig, n_bars: int) -> float:
+        """Giây ước lượng; chưa có dữ liệu => 1 / bar (chỉ thứ tự tương đối là quan trọng)."""
+        keys = [(f.name, _hashable(getattr(config, f.name))) for f in fields(StrategyConfig)]
+        with self._lock:
+            if self._count == 0:
+                return float(n_bars)
+            mean = self._total / self._count
+            per_bar = mean
+            for key in keys:
+                entry = self._by_value.get(key)
+                if entry is not None:
+                    # Ảnh hưởng của giá trị field so với trung bình, kẹp để 1 mẫu lệch không làm hỏng ước lượng
+                    per_bar *= min(max(entry[0] / entry[1] / mean, 0.25), 4.0)
+        return per_bar * n_bars
+
+
+def guided_chunks(
+    order: Sequence[int], costs: Sequence[float], n_workers: int, max_size: int
+) -> Iterator[List[int]]:
+    """
+    Chia `order` (index đã sort chi phí giảm dần) thành chunk liên tiếp; mỗi chunk có tổng chi phí
+    tối đa ~ chi phí còn lại / (2 x n_workers) (ít nhất 1 config, nhiều nhất max_size).
+    """
+    remaining = float(sum(costs[i] for i in order))
+    pos = 0
+    while pos < len(order):
+        target = remaining / (2 * n_workers)
+        chunk = [order[pos]]
+        cost = costs[order[pos]]
+        pos += 1
+        while pos < len(order) and len(chunk) < max_size and cost + costs[order[pos]] <= target:
+            chunk.append(order[pos])
+            cost += costs[order[pos]]
+            pos += 1
+        remaining -= cost
+        yield chunk
+
+
+def timed_call(task: Tuple[Callable[[Any], Any], Any]) -> Tuple[float, Any]:
+    """Chạy fn(args) trên worker, trả thêm thời gian chạy (để tính thời gian bận của pool)."""
+    fn, args = task
+    start = time.perf_counter()
+    result = fn(args)
+    return time.perf_counter() - start, result
+
+
+@dataclass
+class ScheduleStats:
+    """
+    Cộng dồn qua các lần _evaluate của 1 session (có thể chạy song song từ nhiều thread).
+    wall_seconds: thời gian có ít nhất 1 dispatch đang chạy; tail_seconds: thời gian mọi dispatch
+    đang chạy đều đã giao hết chunk (có worker rảnh) mà chunk cuối chưa xong.
+    """
+    n_workers: int
+    tasks: int = 0
+    chunks: int = 0
+    wall_seconds: float = 0.0
+    busy_seconds: float = 0.0
+    predicted_seconds: float = 0.0      # tổng chi phí ước lượng (chỉ có nghĩa khi đã có dữ liệu)
+    tail_seconds: float = 0.0           # từ lúc worker đầu tiên hết việc tới khi chunk cuối xong
+    _active: int = field(default=0, init=False, repr=False, compare=False)
+    _drained: int = field(default=0, init=False, repr=False, compare=False)
+    _wall_start: float = field(default=0.0, init=False, repr=False, compare=False)
+    _tail_start: Optional[float] = field(default=None, init=False, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def add(self, **amounts: float) -> None:
+        """Cộng vào các counter (tasks, chunks, busy_seconds, predicted_seconds) dưới lock."""
+        with self._lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def _close_tail(self, now: float) -> None:
+        if self._tail_start is not None:
+            self.tail_seconds += now - self._tail_start
+            self._tail_start = None
+
+    def dispatch_started(self) -> None:
+        with self._lock:
+            now = time.perf_counter()
+            if self._active == 0:
+                self._wall_start = now
+            self._active += 1
+            self._close_tail(now)   # dispatch mới còn chunk để giao => worker không còn rảnh
+
+    def dispatch_drained(self) -> None:
+        with self._lock:
+            self._drained += 1
+            if self._drained == self._active and self._tail_start is None:
+                self._tail_start = time.perf_counter()
+
+    def dispatch_finished(self, drained: bool) -> None:
+        with self._lock:
+            now = time.perf_counter()
+            self._active -= 1
+            self._drained -= int(drained)
+            if self._active == 0:
+                self.wall_seconds += now - self._wall_start
+                self._close_tail(now)
+            elif self._drained == self._active and self._tail_start is None:
+                self._tail_start = now
+
+    @property
+    def utilisation(self) -> float:
+        capacity = self.wall_seconds * self.n_workers
+        return self.busy_seconds / capacity if capacity > 0 else 0.0
+
+    def report(self) -> str:
+        return (
+            f"[Scheduler] {self.tasks} configs in {self.chunks} chunks on {self.n_workers} workers: "
+            f"wall {self.wall_seconds:.1f}s, busy {self.busy_seconds:.1f}s, "
+            f"utilisation {100 * self.utilisation:.0f}%, tail {self.tail_seconds:.1f}s"
+            + (f", estimated {self.predicted_seconds:.1f}s" if self.predicted_seconds else "")
+        )
+
+
+def dispatch(
+    executor: Any,
+    worker: Callable[[Any], Any],
+    chunks: Iterator[List[int]],
+    make_args: Callable[[List[int]], Any],
+    on_chunk: Callable[[List[int], Any], None],
+    stats: ScheduleStats,
+) -> None:
+    """
+    Giao chunk cho executor (ProcessPoolExecutor / ClusterExecutor), tối đa 2 chunk / worker đang chờ,
+    gọi on_chunk(indices, kết quả) theo thứ tự xong.
+    """
+    in_flight: Dict[Any, List[int]] = {}
+    drained = False
+    exhausted = False
+    stats.dispatch_started()
+    try:
+        while True:
+            while not exhausted and len(in_flight) < 2 * stats.n_workers:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                in_flight[executor.submit(timed_call, (worker, make_args(chunk)))] = chunk
+                stats.add(chunks=1, tasks=len(chunk))
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                busy, result = future.result()
+                stats.add(busy_seconds=busy)
+                on_chunk(in_flight.pop(future), result)
+            if exhausted and not drained and len(in_flight) < stats.n_workers:
+                drained = True   # từ đây có worker không còn việc để lấy từ dispatch này
+                stats.dispatch_drained()
+    finally:
+        stats.dispatch_finished(drained)
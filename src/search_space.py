@@ -0,0 +1,160 @@
+"""
+Không gian tham số cho các optimizer không phải grid (TPE, genetic, ...).
+
+Mỗi field của StrategyConfig cần tối ưu được mô tả bằng 1 param:
+- FloatParam : khoảng liên tục [low, high] (log=True cho scale log)
+- IntParam   : số nguyên [low, high] theo bước step
+- ChoiceParam: tập giá trị rời rạc (bool, str, tuple ...)
+- SubsetParam: tập con của 1 list (vd trading_sessions), giá trị là list giữ thứ tự gốc
+
+Các param biết chuyển qua lại giữa giá trị thật và toạ độ [0, 1] để sampler làm việc
+trên 1 không gian chuẩn hoá.
+"""
+
+import itertools
+import math
+import random
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+from .strategy_config import StrategyConfig
+
+
+@dataclass(frozen=True)
+class FloatParam:
+    low: float
+    high: float
+    log: bool = False
+
+    def __post_init__(self) -> None:
+        if not self.low < self.high:
+            raise ValueError(f"FloatParam requires low < high, got [{self.low}, {self.high}]")
+        if self.log and self.low <= 0:
+            raise ValueError("FloatParam with log=True requires low > 0")
+
+    def to_unit(self, value: float) -> float:
+        if self.log:
+            return (math.log(value) - math.log(self.low)) / (math.log(self.high) - math.log(self.low))
+        return (value - self.low) / (self.high - self.low)
+
+    def from_unit(self, u: float) -> float:
+        u = min(max(u, 0.0), 1.0)
+        if self.log:
+            return math.exp(math.log(self.low) + u * (math.log(self.high) - math.log(self.low)))
+        return self.low + u * (self.high - self.low)
+
+    def sample(self, rng: random.Random) -> float:
+        return self.from_unit(rng.random())
+
+
+@dataclass(frozen=True)
+class IntParam:
+    low: int
+    high: int
+    step: int = 1
+
+    def __post_init__(self) -> None:
+        if not self.low < self.high:
+            raise ValueError(f"IntParam requires low < high, got [{self.low}, {self.high}]")
+
+    @property
+    def values(self) -> Tuple[int, ...]:
+        return tuple(range(self.low, self.high + 1, self.step))
+
+    def to_unit(self, value: int) -> float:
+        return (value - self.low) / (self.high - self.low)
+
+    def from_unit(self, u: float) -> int:
+        u = min(max(u, 0.0), 1.0)
+        raw = self.low + u * (self.high - self.low)
+        snapped = self.low + round((raw - self.low) / self.step) * self.step
+        return int(min(max(snapped, self.low), self.high))
+
+    def sample(self, rng: random.Random) -> int:
+        return rng.choice(self.values)
+
+
+@dataclass(frozen=True)
+class ChoiceParam:
+    choices: Tuple[Any, ...]
+
+    def __post_init__(self) -> None:
+        if len(self.choices) == 0:
+            raise ValueError("ChoiceParam requires at least one choice")
+
+    def sample(self, rng: random.Random) -> Any:
+        return rng.choice(self.choices)
+
+
+@dataclass(frozen=True)
+class SubsetParam:
+    """Tập con (ít nhất min_size phần tử) của `items`; TPE coi mỗi tập con là 1 lựa chọn rời rạc."""
+    items: Tuple[Any, ...]
+    min_size: int = 1
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.min_size <= len(self.items):
+            raise ValueError(f"SubsetParam min_size must be in [0, {len(self.items)}], got {self.min_size}")
+
+    @property
+    def choices(self) -> Tuple[List[Any], ...]:
+        masks = itertools.product((False, True), repeat=len(self.items))
+        subsets = (self.from_mask(m) for m in masks)
+        return tuple(s for s in subsets if len(s) >= self.min_size)
+
+    def to_mask(self, value: Sequence[Any]) -> Tuple[bool, ...]:
+        chosen = [tuple(v) if isinstance(v, list) else v for v in value]
+        return tuple(item in chosen for item in self.items)
+
+    def from_mask(self, mask: Sequence[bool]) -> List[Any]:
+        return [item for item, keep in zip(self.items, mask) if keep]
+
+    def sample(self, rng: random.Random) -> List[Any]:
+        return rng.choice(self.choices)
+
+
+# Param rời rạc không có thứ tự (sampler đếm tần suất thay vì dùng toạ độ [0, 1])
+CATEGORICAL = (ChoiceParam, SubsetParam)
+
+Param = Union[FloatParam, IntParam, ChoiceParam, SubsetParam]
+SearchSpace = Dict[str, Param]
+
+
+def validate_space(space: SearchSpace) -> None:
+    """Mọi key phải là field của StrategyConfig."""
+    known = {f.name for f in fields(StrategyConfig)}
+    unknown = [name for name in space if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown StrategyConfig fields in search space: {unknown}")
+
+
+def sample_params(space: SearchSpace, rng: random.Random) -> Dict[str, Any]:
+    return {name: param.sample(rng) for name, param in space.items()}
+
+
+def make_config(base: StrategyConfig, params: Dict[str, Any]) -> StrategyConfig:
+    return replace(base, **params)
+
+
+def discrete_values(param: Param, limit: int = 32) -> Sequence[Any]:
+    """Liệt kê giá trị của param rời rạc (để build signal cache trước); () nếu liên tục hoặc quá nhiều."""
+    if isinstance(param, CATEGORICAL):
+        values = param.choices
+    elif isinstance(param, IntParam):
+        values = param.values
+    else:
+        return ()
+    return values if len(values) <= limit else ()
+
+
+def signal_configs(space: SearchSpace, base_config: StrategyConfig) -> List[StrategyConfig]:
+    """
+    Config đại diện để build signal cache trước: mọi adx_period / trading_sessions rời rạc trong space
+    (config ngoài phạm vi cache vẫn chạy được, chỉ phải tự tính lại signal).
+    """
+    configs = [base_config]
+    for name in ("adx_period", "trading_sessions"):
+        param = space.get(name)
+        for value in discrete_values(param) if param is not None else ():
+            configs.append(make_config(base_config, {name: value}))
+    return configs
@@ -0,0 +1,172 @@
+"""
+Publish DataFrame M1/M15 qua `multiprocessing.shared_memory` cho worker của optimizer.
+
+Trước đây mỗi task gửi kèm toàn bộ DataFrame (pickle lại mỗi config). Giờ process chính copy
+data vào shared memory đúng 1 lần, worker attach read-only trong pool initializer và task chỉ
+còn mang config.
+
+Layout mỗi frame: 1 segment chứa index (int64 epoch, đơn vị của DatetimeIndex) rồi lần lượt
+từng cột (mỗi cột liền mạch, giữ nguyên dtype). Chỉ hỗ trợ DatetimeIndex + cột numeric,
+đúng dạng data_loader trả về.
+"""
+
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class SharedFrameHandle:
+    """Mô tả (picklable, vài trăm bytes) để worker dựng lại DataFrame từ shared memory."""
+    shm_name: str
+    n_rows: int
+    index_dtype: str                       # vd "datetime64[ns]"
+    index_tz: Optional[str]
+    index_name: Optional[str]
+    columns: Tuple[Tuple[str, str, int], ...]  # (tên cột, dtype, byte offset)
+
+
+def _frame_layout(df: pd.DataFrame) -> Tuple[List[Tuple[str, str, int]], int]:
+    """Offset của từng cột trong segment (index chiếm 8 bytes/row đầu tiên)."""
+    n = len(df)
+    offset = 8 * n
+    layout = []
+    for col in df.columns:
+        dtype = df[col].dtype
+        if not isinstance(dtype, np.dtype) or dtype.kind not in "biuf":
+            raise TypeError(f"Column {col!r} has unsupported dtype {dtype} for shared memory")
+        # Căn 8 bytes để view numpy luôn aligned
+        offset = (offset + 7) // 8 * 8
+        layout.append((str(col), dtype.str, offset))
+        offset += dtype.itemsize * n
+    return layout, offset
+
+
+def _publish_frame(df: pd.DataFrame) -> Tuple[SharedFrameHandle, shared_memory.SharedMemory]:
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise TypeError("Shared memory publishing requires a DatetimeIndex")
+
+    layout, size = _frame_layout(df)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    n = len(df)
+
+    index = df.index
+    tz = str(index.tz) if index.tz is not None else None
+    naive = index.tz_convert("UTC").tz_localize(None) if tz is not None else index
+    np.ndarray((n,), dtype=np.int64, buffer=shm.buf)[:] = naive.asi8
+
+    for col, dtype, offset in layout:
+        np.ndarray((n,), dtype=dtype, buffer=shm.buf, offset=offset)[:] = df[col].to_numpy()
+
+    handle = SharedFrameHandle(
+        shm_name=shm.name,
+        n_rows=n,
+        index_dtype=str(naive.dtype),
+        index_tz=tz,
+        index_name=index.name,
+        columns=tuple(layout),
+    )
+    return handle, shm
+
+
+def attach_frame(handle: SharedFrameHandle) -> Tuple[pd.DataFrame, shared_memory.SharedMemory]:
+    """
+    Dựng DataFrame read-only trỏ thẳng vào shared memory (không copy cột).
+    Caller phải giữ object SharedMemory trả về còn sống chừng nào còn dùng DataFrame.
+    """
+    shm = shared_memory.SharedMemory(name=handle.shm_name)
+    n = handle.n_rows
+
+    ticks = np.ndarray((n,), dtype=np.int64, buffer=shm.buf)
+    index = pd.DatetimeIndex(ticks.view(handle.index_dtype), name=handle.index_name)
+    if handle.index_tz is not None:
+        index = index.tz_localize("UTC").tz_convert(handle.index_tz)
+
+    data = {}
+    for col, dtype, offset in handle.columns:
+        arr = np.ndarray((n,), dtype=dtype, buffer=shm.buf, offset=offset)
+        arr.flags.writeable = False
+        data[col] = arr
+
+    df = pd.DataFrame(data, index=index, copy=False)
+    return df, shm
+
+
+@dataclass(frozen=True)
+class SharedArrayHandle:
+    """Mô tả 1 ndarray trong shared memory."""
+    shm_name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+def publish_array(arr: np.ndarray) -> Tuple[SharedArrayHandle, shared_memory.SharedMemory]:
+    """Copy ndarray vào segment shared memory mới (C-contiguous)."""
+    arr = np.ascontiguousarray(arr)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return SharedArrayHandle(shm_name=shm.name, shape=arr.shape, dtype=arr.dtype.str), shm
+
+
+def attach_array(handle: SharedArrayHandle) -> Tuple[np.ndarray, shared_memory.SharedMemory]:
+    """View read-only vào ndarray đã publish (giữ SharedMemory sống khi còn dùng array)."""
+    shm = shared_memory.SharedMemory(name=handle.shm_name)
+    arr = np.ndarray(handle.shape, dtype=handle.dtype, buffer=shm.buf)
+    arr.flags.writeable = False
+    return arr, shm
+
+
+class SharedDataset:
+    """
+    Sở hữu các segment shared memory của 1 lần optimize. Dùng như context manager để chắc chắn
+    unlink khi xong (kể cả khi worker lỗi).
+
+    Ví dụ:
+        with SharedDataset(m1=m1_data, m15=m15_data) as dataset:
+            with ProcessPoolExecutor(initializer=init_worker, initargs=(dataset.handles,)) as ex:
+                ...
+    """
+
+    def __init__(self, **frames: pd.DataFrame) -> None:
+        self.handles: Dict[str, SharedFrameHandle] = {}
+        self._segments: List[shared_memory.SharedMemory] = []
+        try:
+            for key, df in frames.items():
+                handle, shm = _publish_frame(df)
+                self.handles[key] = handle
+                self._segments.append(shm)
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shm.size for shm in self._segments)
+
+    def close(self) -> None:
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+    def __enter__(self) -> "SharedDataset":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach_dataset(
+    handles: Dict[str, SharedFrameHandle],
+) -> Tuple[Dict[str, pd.DataFrame], List[shared_memory.SharedMemory]]:
+    """Attach tất cả frames của 1 SharedDataset (dùng trong pool initializer)."""
+    frames: Dict[str, pd.DataFrame] = {}
+    segments: List[shared_memory.SharedMemory] = []
+    for key, handle in handles.items():
+        df, shm = attach_frame(handle)
+        frames[key] = df
+        segments.append(shm)
+    return frames, segments
@@ -0,0 +1,158 @@
+"""
+Signal cache: phần tính toán không (hoặc ít) phụ thuộc StrategyConfig, build 1 lần / dataset
+rồi dùng chung cho mọi config của 1 lần optimize.
+
+Các stage (xem STAGE_FIELDS):
+- m15_events   : pattern demand / supply / liquidity trên M15        -> không phụ thuộc config
+- candle_masks : nến đỏ / xanh M1 (input cho Buy/Sell Base)          -> không phụ thuộc config
+- adx          : ADX từng bar M1                                     -> chỉ phụ thuộc adx_period
+- session_mask : bar nằm trong trading_sessions                      -> enable_timerange_filter, trading_sessions
+
+Artifact chính là `numba_engine.SharedBars`; SignalCache publish các mảng của nó vào shared memory
+để worker attach read-only. Engine numba / batch dùng toàn bộ SharedBars, engine Python dùng
+series ADX (bỏ được 1 lần truy cập row M1 mỗi bar).
+"""
+
+from dataclasses import dataclass, fields
+from multiprocessing import shared_memory
+from typing import Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+from .numba_engine import SharedBars, session_key
+from .shared_data import attach_array, publish_array
+from .strategy_config import StrategyConfig
+
+
+# Stage -> các field của StrategyConfig mà output của stage phụ thuộc vào
+STAGE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "m15_events": (),
+    "candle_masks": (),
+    "adx": ("adx_period",),
+    "session_mask": ("enable_timerange_filter", "trading_sessions"),
+}
+
+# Các mảng của SharedBars được publish (index lấy lại từ M1 của worker)
+_ARRAY_FIELDS = (
+    "op", "hi", "lo", "cl", "ts_ns", "m15_avail", "events", "red", "green", "adx_table", "session_table",
+)
+
+
+def state_machine_fields() -> Tuple[str, ...]:
+    """Field chỉ ảnh hưởng state machine (chạy riêng cho từng config, không cache được)."""
+    cached = {name for names in STAGE_FIELDS.values() for name in names}
+    return tuple(f.name for f in fields(StrategyConfig) if f.name not in cached)
+
+
+def _stage_value(config: StrategyConfig, stage: str) -> Tuple:
+    if stage == "session_mask":
+        return session_key(config)
+    return tuple(getattr(config, name) for name in STAGE_FIELDS[stage])
+
+
+@dataclass(frozen=True)
+class StageUsage:
+    """Số artifact mà 1 stage cần cho 1 tập config (càng ít càng được dùng lại nhiều)."""
+    stage: str
+    fields: Tuple[str, ...]
+    artifacts: int
+    configs: int
+
+    @property
+    def reuse(self) -> float:
+        """Trung bình số config dùng chung 1 artifact."""
+        return self.configs / self.artifacts if self.artifacts else 0.0
+
+
+def stage_report(configs: Sequence[StrategyConfig]) -> List[StageUsage]:
+    usages = []
+    for stage, names in STAGE_FIELDS.items():
+        distinct = {_stage_value(c, stage) for c in configs}
+        usages.append(StageUsage(stage=stage, fields=names, artifacts=len(distinct), configs=len(configs)))
+    return usages
+
+
+def print_stage_report(configs: Sequence[StrategyConfig], param_grid_keys: Sequence[str] = ()) -> None:
+    """
+    In stage nào bị field nào ảnh hưởng và mỗi artifact được bao nhiêu config dùng lại.
+    param_grid_keys: các field đang được sweep, để đánh dấu field nào làm tăng số artifact.
+    """
+    print("\n=== SIGNAL CACHE: STAGE / CONFIG FIELDS ===")
+    print(f"{'Stage':<14} {'Artifacts':>9} {'Configs/artifact':>17}  Depends on")
+    for usage in stage_report(configs):
+        deps = ", ".join(
+            f"{name}*" if name in param_grid_keys else name for name in usage.fields
+        ) or "(none – computed once)"
+        print(f"{usage.stage:<14} {usage.artifacts:>9} {usage.reuse:>17.1f}  {deps}")
+    swept_state = [k for k in param_grid_keys if k in state_machine_fields()]
+    print(f"{'state_machine':<14} {len(configs):>9} {1.0:>17.1f}  {', '.join(swept_state) or '-'}")
+    if param_grid_keys:
+        print("(* = field đang sweep, mỗi giá trị thêm 1 artifact cho stage đó)")
+
+
+class SignalCache:
+    """
+    Build SharedBars 1 lần cho toàn bộ configs và publish vào shared memory.
+
+    Ví dụ:
+        with SignalCache.build(m1_data, m15_data, configs) as signals:
+            ... initargs=(signals.handles, ...)
+        # trong worker:
+        shared, segments = attach_signals(handles, m1_data.index)
+    """
+
+    def __init__(self, shared: SharedBars) -> None:
+        self.shared = shared
+        self.handles: Dict[str, object] = {
+            "adx_periods": list(shared.adx_periods),
+            "session_keys": list(shared.session_keys),
+        }
+        self._segments: List[shared_memory.SharedMemory] = []
+        try:
+            for name in _ARRAY_FIELDS:
+                handle, shm = publish_array(getattr(shared, name))
+                self.handles[name] = handle
+                self._segments.append(shm)
+        except Exception:
+            self.close()
+            raise
+
+    @classmethod
+    def build(
+        cls, m1_data: pd.DataFrame, m15_data: pd.DataFrame, configs: Sequence[StrategyConfig]
+    ) -> "SignalCache":
+        return cls(SharedBars.build(m1_data, m15_data, configs))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(shm.size for shm in self._segments)
+
+    def close(self) -> None:
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+    def __enter__(self) -> "SignalCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach_signals(
+    handles: Dict[str, object], index: pd.DatetimeIndex
+) -> Tuple[SharedBars, List[shared_memory.SharedMemory]]:
+    """Dựng SharedBars read-only từ handles của SignalCache (dùng trong pool initializer)."""
+    arrays = {}
+    segments = []
+    for name in _ARRAY_FIELDS:
+        arrays[name], shm = attach_array(handles[name])
+        segments.append(shm)
+    shared = SharedBars(
+        index=index,
+        adx_periods=list(handles["adx_periods"]),
+        session_keys=list(handles["session_keys"]),
+        **arrays,
+    )
+    return shared, segments
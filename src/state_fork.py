@@ -0,0 +1,232 @@
+"""
+Chạy nhiều config trên engine Python với phần đầu chung: config chỉ khác nhau ở vài field chạy giống
+hệt nhau tới bar đầu tiên mà field đó làm engine quyết định khác (vd paper_* chỉ khác khi chuỗi thua
+chạm ngưỡng, adx_max_entry chỉ khác khi ADX nằm giữa 2 giá trị), nên chỉ cần chạy đoạn đầu 1 lần rồi
+fork state (PineScriptStrategy.snapshot / restore) cho từng config.
+
+Với 1 nhóm config (config đầu tiên làm base):
+1. Chạy base với ConfigReadTracker tới khi mọi config trong nhóm đã rẽ nhánh. Field khác base được trả
+   về dưới dạng _ValueProbe: mỗi phép so sánh / số học / bool / iterate trên nó tính cả với giá trị của
+   từng config khác, kết quả đầu tiên khác kết quả của base => bar rẽ nhánh của config đó. Vd
+   paper_trigger_consecutive_losses = 3 và 4 chỉ rẽ nhánh khi chuỗi thua đạt 3, không phải lần đầu
+   field được đọc. Field đọc trong __init__ tính là bar -1.
+2. Điểm fork của config c = bar rẽ nhánh; không bao giờ rẽ nhánh => c cho kết quả giống hệt base (fork
+   ở cuối data). Config có điểm fork <= 0 (vd khác adx_period, zone_touch_buffer) không dùng chung được,
+   sang nhóm sau.
+3. Chạy lại base, snapshot ở từng điểm fork, mỗi config restore snapshot rồi chạy tiếp tới hết data.
+
+Kết quả giống hệt chạy từng config riêng (mọi chỗ engine đọc config đều qua self.config và chỉ dùng
+giá trị trong biểu thức). Phép số học trên field là rẽ nhánh ngay khi kết quả khác (giá trị có thể được
+lưu vào state), nên field như r_r_ratio_target / trailing_sl_* rẽ nhánh ở lệnh đầu tiên dùng tới chúng;
+field chỉ dùng để so sánh (paper_*, adx_max_entry, timeout, enable_*) chia sẻ được nhiều nhất.
+Bước 1 tốn thêm tối đa 1 lần chạy base.
+"""
+
+import operator
+import time
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .pinescript_port import PineScriptStrategy
+from .strategy_config import StrategyConfig
+
+
+def _same(a: Any, b: Any) -> bool:
+    try:
+        return type(a) is type(b) and (bool(a == b) or (a != a and b != b))   # NaN == NaN
+    except Exception:
+        return False
+
+
+class ConfigReadTracker:
+    """
+    Bọc StrategyConfig của base, ghi lại bar đầu tiên mỗi config khác trong nhóm rẽ nhánh khỏi base
+    (bar do người gọi cập nhật). Field giống nhau trong cả nhóm trả về giá trị thật.
+    """
+
+    def __init__(self, config: StrategyConfig, others: Sequence[StrategyConfig] = ()) -> None:
+        self._config = config
+        self.bar = -1
+        self.first_read: Dict[str, int] = {}
+        self.diverged: Dict[int, int] = {}      # index trong others -> bar rẽ nhánh
+        self._alternatives: Dict[str, List[Tuple[int, Any]]] = {}
+        for j, other in enumerate(others):
+            for name in _diff_fields(config, other):
+                self._alternatives.setdefault(name, []).append((j, getattr(other, name)))
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._config, name)
+        self.first_read.setdefault(name, self.bar)
+        if name not in self._alternatives:
+            return value
+        if self.bar < 0:
+            # Đọc trong __init__: giá trị có thể đã vào state (vd độ dài cửa sổ) => rẽ nhánh từ đầu
+            self.diverge(name, self.bar)
+            return value
+        return _ValueProbe(self, name, value)
+
+    def diverge(self, name: str, bar: int) -> None:
+        for j, _ in self._alternatives[name]:
+            self.diverged.setdefault(j, bar)
+
+    def compare(self, name: str, fn: Callable[[Any], Any], result: Any) -> None:
+        """fn(value) đã cho `result` với giá trị của base; config cho kết quả khác => rẽ nhánh ở bar này."""
+        for j, value in self._alternatives[name]:
+            if j in self.diverged:
+                continue
+            try:
+                same = _same(fn(value), result)
+            except Exception:
+                same = False
+            if not same:
+                self.diverged[j] = self.bar
+
+
+class _ValueProbe:
+    """
+    Giá trị field của base trong lượt dò điểm fork. Mỗi phép toán trả về kết quả thật của base
+    (engine chạy y hệt base) và báo tracker config nào cho kết quả khác.
+    """
+
+    __slots__ = ("_tracker", "_name", "_value")
+    __array_ufunc__ = None   # np.float64 < probe => gọi probe.__gt__ thay vì float(probe)
+
+    def __init__(self, tracker: ConfigReadTracker, name: str, value: Any) -> None:
+        self._tracker = tracker
+        self._name = name
+        self._value = value
+
+    def _check(self, fn: Callable[[Any], Any]) -> Any:
+        result = fn(self._value)
+        self._tracker.compare(self._name, fn, result)
+        return result
+
+    def __getattr__(self, attr: str) -> Any:
+        # Dùng kiểu khác (method của str / list...): không so được => coi như rẽ nhánh
+        self._tracker.diverge(self._name, self._tracker.bar)
+        return getattr(self._value, attr)
+
+    def __iter__(self):
+        return iter(self._check(list))
+
+    def __format__(self, spec: str) -> str:
+        return self._check(lambda v: format(v, spec))
+
+    def __round__(self, ndigits: Optional[int] = None) -> Any:
+        return self._check(lambda v: round(v, ndigits))
+
+    def __hash__(self) -> int:
+        return self._check(hash)
+
+
+def _probe_unary(op: Callable[[Any], Any]) -> Callable[[_ValueProbe], Any]:
+    return lambda self: self._check(op)
+
+
+def _probe_binary(op: Callable[[Any, Any], Any], reflected: bool = False) -> Callable[[_ValueProbe, Any], Any]:
+    if reflected:
+        return lambda self, other: self._check(lambda v: op(other, v))
+    return lambda self, other: self._check(lambda v: op(v, other))
+
+
+for _name, _op in (
+    ("bool", bool), ("int", int), ("float", float), ("index", operator.index), ("str", str),
+    ("neg", operator.neg), ("pos", operator.pos), ("abs", abs), ("len", len),
+):
+    setattr(_ValueProbe, f"__{_name}__", _probe_unary(_op))
+for _name, _op in (
+    ("eq", operator.eq), ("ne", operator.ne), ("lt", operator.lt), ("le", operator.le),
+    ("gt", operator.gt), ("ge", operator.ge), ("getitem", operator.getitem),
+    ("contains", operator.contains),
+):
+    setattr(_ValueProbe, f"__{_name}__", _probe_binary(_op))
+for _name, _op in (
+    ("add", operator.add), ("sub", operator.sub), ("mul", operator.mul), ("truediv", operator.truediv),
+    ("floordiv", operator.floordiv), ("mod", operator.mod), ("pow", operator.pow),
+):
+    setattr(_ValueProbe, f"__{_name}__", _probe_binary(_op))
+    setattr(_ValueProbe, f"__r{_name}__", _probe_binary(_op, reflected=True))
+
+
+@dataclass
+class ForkedRun:
+    """Strategy đã chạy xong của 1 config + bar bắt đầu chạy riêng (0 = không dùng chung đoạn đầu)."""
+    strategy: PineScriptStrategy
+    fork_bar: int
+    duration_seconds: float
+
+
+def _diff_fields(a: StrategyConfig, b: StrategyConfig) -> Set[str]:
+    return {f.name for f in fields(StrategyConfig) if getattr(a, f.name) != getattr(b, f.name)}
+
+
+class ForkRunner:
+    """
+    Ví dụ:
+        runner = ForkRunner(lambda cfg: PineScriptStrategy(m1, m15, config=cfg))
+        runs = runner.run(configs)      # cùng thứ tự configs
+        runs[i].strategy.trades
+    """
+
+    def __init__(self, make_strategy: Callable[[Any], PineScriptStrategy]) -> None:
+        """make_strategy(config) -> PineScriptStrategy chưa chạy (config có thể là ConfigReadTracker)."""
+        self.make_strategy = make_strategy
+        self.bars_run = 0           # tổng số bar thực sự đã chạy
+        self.bars_requested = 0     # tổng số bar nếu chạy từng config riêng
+
+    def run(self, configs: Sequence[StrategyConfig]) -> List[ForkedRun]:
+        out: List[Optional[ForkedRun]] = [None] * len(configs)
+        remaining = list(range(len(configs)))
+        while remaining:
+            remaining = self._run_group([(i, configs[i]) for i in remaining], out)
+        if self.bars_requested:
+            print(
+                f"[ForkRunner] {len(configs)} configs: ran {self.bars_run:,} of {self.bars_requested:,} bars "
+                f"({100.0 * (1 - self.bars_run / self.bars_requested):.1f}% shared)"
+            )
+        return out
+
+    def _fork_bars(self, base: StrategyConfig, others: Sequence[StrategyConfig]) -> List[int]:
+        """Bước 1: điểm fork (bar rẽ nhánh đầu tiên) của từng config trong others so với base."""
+        tracker = ConfigReadTracker(base, others)
+        strategy = self.make_strategy(tracker)
+        n_bars = len(strategy.m1)
+        for bar in range(n_bars):
+            if len(tracker.diverged) == len(others):
+                break
+            tracker.bar = bar
+            self.bars_run += 1
+            if not strategy.advance(bar + 1):
+                break
+        return [tracker.diverged.get(j, n_bars) for j in range(len(others))]
+
+    def _run_group(self, group: List[Any], out: List[Optional[ForkedRun]]) -> List[int]:
+        """Chạy config đầu tiên của group + các config fork được từ nó; trả về index chưa chạy."""
+        (base_index, base), others = group[0], group[1:]
+        fork_bars = self._fork_bars(base, [c for _, c in others]) if others else []
+        forks: Dict[int, List[Any]] = {}
+        later: List[int] = []
+        for (i, config), bar in zip(others, fork_bars):
+            if bar > 0:
+                forks.setdefault(bar, []).append((i, config))
+            else:
+                later.append(i)
+
+        start = time.time()
+        strategy = self.make_strategy(base)
+        n_bars = len(strategy.m1)
+        for bar in sorted(forks):
+            strategy.advance(bar)
+            snapshot = strategy.snapshot()
+            for i, config in forks[bar]:
+                fork_start = time.time()
+                forked = self.make_strategy(config)
+                forked.restore(snapshot)
+                forked.advance(n_bars)
+                self.bars_run += forked.next_bar - snapshot.next_bar
+                out[i] = ForkedRun(forked, bar, time.time() - fork_start)
+        strategy.advance(n_bars)
+        self.bars_run += strategy.next_bar
+        self.bars_requested += n_bars * (1 + len(others) - len(later))
+        out[base_index] = ForkedRun(strategy, 0, time.time() - start)
+        return later
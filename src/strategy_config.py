@@ -1,5 +1,10 @@
-from dataclasses import dataclass, field
-from typing import List, Tuple
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field, fields, replace
+from typing import List, Optional, Tuple
+
+
+TRADE_SIDES = ("both", "long", "short")
 
 
 @dataclass
@@ -43,6 +48,11 @@ class StrategyConfig:
         ]
     )
 
+    # Side execution: "both" | "long" | "short"
+    # "long"/"short" tắt toàn bộ pipeline tìm base + entry của side còn lại,
+    # chỉ giữ zone/liquidity đối diện cần cho TP và early exit.
+    trade_side: str = "both"
+
     # Exit features toggles (match current Pine behaviour – mọi thứ đều bật)
     enable_early_exit_opposing_zone: bool = True
     enable_base_breakdown_exit: bool = True
@@ -59,3 +69,57 @@ class StrategyConfig:
     paper_recovery_require_positive_pnl: bool = True    # Yêu cầu Paper PnL > 0
     paper_max_duration_minutes: int = 1440              # Max time in paper mode (24h = 1440 min)
 
+
+    def __post_init__(self) -> None:
+        if self.trade_side not in TRADE_SIDES:
+            raise ValueError(
+                f"trade_side must be one of {TRADE_SIDES}, got {self.trade_side!r}"
+            )
+
+
+def _canonical(value):
+    """Số -> float (25 và 25.0 cùng key), tuple/list -> list."""
+    if isinstance(value, bool) or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def config_key(config: StrategyConfig) -> str:
+    """
+    Key ổn định (16 hex) cho 1 config: hash JSON các field đã sort, nên giống nhau
+    giữa các process / lần chạy và không phụ thuộc thứ tự khai báo param_grid.
+    """
+    fields = {name: _canonical(value) for name, value in asdict(config).items()}
+    payload = json.dumps(fields, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+_PAPER_FIELDS = tuple(f.name for f in fields(StrategyConfig) if f.name.startswith("paper_"))
+
+
+def invalid_reason(config: StrategyConfig) -> Optional[str]:
+    """Lý do config vô nghĩa (optimizer bỏ, không chạy), None nếu hợp lệ."""
+    if config.trailing_sl_level >= config.trailing_sl_trigger:
+        # SL dời tới mức >= mức kích hoạt trailing: SL nằm trên giá hiện tại ngay khi kích hoạt
+        return "trailing_sl_level >= trailing_sl_trigger"
+    return None
+
+
+def canonical_config(config: StrategyConfig) -> StrategyConfig:
+    """
+    Dạng chuẩn của config: field không ảnh hưởng tới trades được đưa về giá trị mặc định, nên các
+    config chạy ra cùng kết quả có cùng canonical_config (và config_key).
+    - enable_paper_mode=False       => mọi paper_* không được dùng
+    - enable_timerange_filter=False => trading_sessions không được dùng
+    """
+    defaults = StrategyConfig()
+    changes = {}
+    if not config.enable_paper_mode:
+        changes.update({name: getattr(defaults, name) for name in _PAPER_FIELDS})
+    if not config.enable_timerange_filter:
+        changes["trading_sessions"] = defaults.trading_sessions
+    return replace(config, **changes) if changes else config
@@ -0,0 +1,319 @@
+"""
+Tree-structured Parzen Estimator (TPE) optimizer cho StrategyConfig.
+
+Thay vì duyệt hết itertools.product như GridSearchOptimizer, TPE chạy với 1 budget cố định:
+- vài round đầu sample ngẫu nhiên trong search space (n_startup)
+- sau đó chia các config đã chạy thành nhóm tốt (top gamma theo objective) và nhóm còn lại,
+  fit 1 Parzen estimator cho mỗi nhóm (từng param độc lập) và chọn candidate có l(x) / g(x) lớn nhất
+- mỗi round đề xuất đủ config cho tất cả worker cùng lúc; trong round dùng "constant liar"
+  (candidate vừa chọn coi như config tệ) để các đề xuất không trùng nhau
+
+Chỉ dùng numpy / random, không cần thư viện tối ưu ngoài.
+"""
+
+import math
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .abort_rules import AbortRules
+from .backtest_results import BacktestSummary
+from .optimizer import BaseOptimizer, _BestSoFar
+from .result_store import ResultStore
+from .search_space import (
+    CATEGORICAL,
+    SearchSpace,
+    make_config,
+    sample_params,
+    signal_configs,
+    validate_space,
+)
+from .strategy_config import StrategyConfig, config_key
+
+
+@dataclass(frozen=True)
+class ConvergencePoint:
+    """Trạng thái sau mỗi round."""
+    round: int
+    evaluations: int
+    round_best: float
+    best_so_far: float
+    best_config_key: str
+
+
+def _numeric_estimator(points: Sequence[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Parzen estimator 1 chiều trên [0, 1]: Gaussian tại mỗi điểm + 1 prior rộng ở giữa."""
+    n = len(points)
+    mus = np.sort(np.asarray(points, dtype=np.float64))
+    # Bandwidth mỗi điểm = khoảng cách tới điểm kề xa hơn (biên 0 / 1 coi như điểm kề)
+    left = np.diff(np.concatenate(([0.0], mus)))
+    right = np.diff(np.concatenate((mus, [1.0])))
+    sigmas = np.clip(np.maximum(left, right), 1.0 / min(100.0, n + 1.0), 1.0)
+
+    mus = np.append(mus, 0.5)
+    sigmas = np.append(sigmas, 1.0)
+    weights = np.full(n + 1, 1.0 / (n + 1))
+    return mus, sigmas, weights
+
+
+def _numeric_logpdf(x: float, est: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> float:
+    mus, sigmas, weights = est
+    z = (x - mus) / sigmas
+    pdf = np.sum(weights * np.exp(-0.5 * z * z) / (sigmas * math.sqrt(2 * math.pi)))
+    return math.log(max(pdf, 1e-300))
+
+
+def _numeric_sample(est: Tuple[np.ndarray, np.ndarray, np.ndarray], rng: random.Random) -> float:
+    mus, sigmas, weights = est
+    k = rng.choices(range(len(mus)), weights=weights)[0]
+    for _ in range(16):
+        x = rng.gauss(mus[k], sigmas[k])
+        if 0.0 <= x <= 1.0:
+            return x
+    return min(max(x, 0.0), 1.0)
+
+
+def _choice_probs(param: Any, values: Sequence[Any]) -> List[float]:
+    counts = [1.0] * len(param.choices)  # prior: +1 mỗi lựa chọn
+    for v in values:
+        counts[param.choices.index(v)] += 1.0
+    total = sum(counts)
+    return [c / total for c in counts]
+
+
+class TPEOptimizer(BaseOptimizer):
+    """
+    Ví dụ:
+        space = {
+            "adx_max_entry": FloatParam(15.0, 40.0),
+            "trailing_sl_trigger": FloatParam(1.0, 3.0),
+            "adx_period": IntParam(7, 21),
+            "max_entry_timeout_minutes": IntParam(15, 120, step=15),
+            "trade_side": ChoiceParam(("both", "long")),
+        }
+        tpe = TPEOptimizer(m1_data, m15_data, space, seed=42)
+        results = tpe.run(budget=200)
+        tpe.history_frame()
+    """
+
+    def __init__(
+        self,
+        m1_data: pd.DataFrame,
+        m15_data: pd.DataFrame,
+        space: SearchSpace,
+        engine: str = "python",
+        batch_size: int = 64,
+        cache_dir: Optional[str] = None,
+        share_signals: bool = True,
+        abort_rules: Optional[AbortRules] = None,
+        base_config: Optional[StrategyConfig] = None,
+        objective: str = "profit_factor",
+        maximize: bool = True,
+        gamma: float = 0.25,
+        n_startup: Optional[int] = None,
+        n_candidates: int = 64,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            space: field StrategyConfig -> FloatParam / IntParam / ChoiceParam / SubsetParam
+            base_config: giá trị cho các field không nằm trong space
+            objective: tên metric của BacktestSummary cần tối ưu
+            maximize: False => objective càng nhỏ càng tốt (vd max_drawdown); score được đổi dấu
+            gamma: tỉ lệ config được coi là "tốt" khi fit estimator
+            n_startup: số config sample ngẫu nhiên trước khi dùng TPE (mặc định max(10, 1 round))
+            n_candidates: số candidate sample từ l(x) cho mỗi đề xuất
+        """
+        super().__init__(
+            m1_data, m15_data, engine=engine, batch_size=batch_size,
+            cache_dir=cache_dir, share_signals=share_signals, abort_rules=abort_rules,
+        )
+        validate_space(space)
+        if objective not in BacktestSummary.__dataclass_fields__:
+            raise ValueError(f"Unknown objective metric: {objective!r}")
+        self.space = space
+        self.base_config = base_config or StrategyConfig()
+        self.objective = objective
+        self.maximize = maximize
+        self.gamma = gamma
+        self.n_startup = n_startup
+        self.n_candidates = n_candidates
+        self.rng = random.Random(seed)
+
+        self.history: List[ConvergencePoint] = []
+        self._observations: List[Tuple[Dict[str, Any], float]] = []
+
+    def _score(self, summary: BacktestSummary) -> float:
+        """Config bị dừng sớm (abort rules) coi như tệ nhất."""
+        value = float(getattr(summary, self.objective))
+        if math.isnan(value) or summary.pruned:
+            return -math.inf
+        return value if self.maximize else -value
+
+    def _params_of(self, config: StrategyConfig) -> Dict[str, Any]:
+        return {name: getattr(config, name) for name in self.space}
+
+    def _in_space(self, config: StrategyConfig) -> bool:
+        """Config (vd lấy từ store) có khớp base_config ở mọi field ngoài space không."""
+        return make_config(self.base_config, self._params_of(config)) == config
+
+    # ------------------------------------------------------------------
+    # Proposal
+    # ------------------------------------------------------------------
+    def _propose(self, k: int, seen: set) -> List[Dict[str, Any]]:
+        n_startup = self.n_startup if self.n_startup is not None else max(10, k)
+        proposals: List[Dict[str, Any]] = []
+
+        def accept(params: Dict[str, Any]) -> bool:
+            key = config_key(make_config(self.base_config, params))
+            if key in seen:
+                return False
+            seen.add(key)
+            proposals.append(params)
+            return True
+
+        if len(self._observations) < n_startup:
+            attempts = 0
+            while len(proposals) < k and attempts < k * 50:
+                accept(sample_params(self.space, self.rng))
+                attempts += 1
+            return proposals
+
+        ranked = sorted(self._observations, key=lambda o: o[1], reverse=True)
+        n_good = max(1, int(math.ceil(self.gamma * len(ranked))))
+        good = [p for p, _ in ranked[:n_good]]
+        bad = [p for p, _ in ranked[n_good:]]
+
+        for _ in range(k):
+            l_est, g_est = self._fit(good), self._fit(bad)
+            best_params, best_score = None, -math.inf
+            for _ in range(self.n_candidates):
+                params = self._sample_from(l_est)
+                score = self._log_ratio(params, l_est, g_est)
+                if score > best_score and config_key(make_config(self.base_config, params)) not in seen:
+                    best_params, best_score = params, score
+            if best_params is None:
+                best_params = sample_params(self.space, self.rng)
+            if accept(best_params):
+                bad.append(best_params)  # constant liar: đề xuất tiếp theo sẽ tránh vùng này
+        return proposals
+
+    def _fit(self, group: List[Dict[str, Any]]) -> Dict[str, Any]:
+        est: Dict[str, Any] = {}
+        for name, param in self.space.items():
+            values = [p[name] for p in group]
+            if isinstance(param, CATEGORICAL):
+                est[name] = _choice_probs(param, values)
+            else:
+                est[name] = _numeric_estimator([param.to_unit(v) for v in values])
+        return est
+
+    def _sample_from(self, est: Dict[str, Any]) -> Dict[str, Any]:
+        params: Dict[str, Any] = {}
+        for name, param in self.space.items():
+            if isinstance(param, CATEGORICAL):
+                params[name] = self.rng.choices(param.choices, weights=est[name])[0]
+            else:
+                params[name] = param.from_unit(_numeric_sample(est[name], self.rng))
+        return params
+
+    def _log_ratio(self, params: Dict[str, Any], l_est: Dict[str, Any], g_est: Dict[str, Any]) -> float:
+        total = 0.0
+        for name, param in self.space.items():
+            if isinstance(param, CATEGORICAL):
+                i = param.choices.index(params[name])
+                total += math.log(l_est[name][i]) - math.log(g_est[name][i])
+            else:
+                u = param.to_unit(params[name])
+                total += _numeric_logpdf(u, l_est[name]) - _numeric_logpdf(u, g_est[name])
+        return total
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+    def run(
+        self,
+        budget: int,
+        n_jobs: int = -1,
+        round_size: Optional[int] = None,
+        store_path: Optional[str] = None,
+    ) -> List[BacktestSummary]:
+        """
+        Chạy tối đa `budget` config mới, trả về toàn bộ summary đã chạy (sort theo objective giảm dần).
+
+        - round_size: số config đề xuất mỗi round (mặc định = số worker, hoặc batch_size với engine batch)
+        - store_path: ResultStore CSV; config đã có trong store (cùng base_config) được dùng làm
+              observation ban đầu và không tính vào budget
+        """
+        results: List[BacktestSummary] = []
+        seen: set = set()
+        store = ResultStore(store_path) if store_path else None
+        if store is not None:
+            for summary in store.results():
+                if summary.config is not None and self._in_space(summary.config):
+                    results.append(summary)
+                    seen.add(summary.config_key)
+                    self._observations.append((self._params_of(summary.config), self._score(summary)))
+            if results:
+                print(f"[TPE] Warm start: {len(results)} configs from {store_path}")
+
+        progress = _BestSoFar(total=budget + len(results), done=len(results))
+        for r in results:
+            progress.offer(r)
+
+        def on_result(summary: BacktestSummary) -> None:
+            if store is not None:
+                store.append(summary)
+            progress.update(summary)
+
+        evaluated = 0
+        try:
+            with self._session(n_jobs, signal_configs(self.space, self.base_config)) as session:
+                if round_size is None:
+                    round_size = self.batch_size if self.engine == "batch" else session.n_workers
+                while evaluated < budget:
+                    k = min(round_size, budget - evaluated)
+                    proposals = self._propose(k, seen)
+                    if not proposals:
+                        print("[TPE] Search space exhausted")
+                        break
+                    configs = [make_config(self.base_config, p) for p in proposals]
+                    summaries = self._evaluate(configs, [None] * len(configs), session, on_result)
+                    evaluated += len(summaries)
+                    results.extend(summaries)
+                    for params, summary in zip(proposals, summaries):
+                        self._observations.append((params, self._score(summary)))
+                    self._record_round(summaries, evaluated)
+        finally:
+            if store is not None:
+                store.close()
+            if self.cache is not None:
+                self.cache.evict()
+
+        results.sort(key=self._score, reverse=True)
+        return results
+
+    def _record_round(self, summaries: List[BacktestSummary], evaluated: int) -> None:
+        round_best = max(summaries, key=self._score)
+        best_score, best_params = max(
+            ((score, params) for params, score in self._observations), key=lambda t: t[0]
+        )
+        point = ConvergencePoint(
+            round=len(self.history) + 1,
+            evaluations=evaluated,
+            round_best=self._score(round_best),
+            best_so_far=best_score,
+            best_config_key=config_key(make_config(self.base_config, best_params)),
+        )
+        self.history.append(point)
+        print(
+            f"[TPE] round {point.round}: {point.evaluations} evals, "
+            f"round best {self.objective}={point.round_best:.4f}, best so far={point.best_so_far:.4f}"
+        )
+
+    def history_frame(self) -> pd.DataFrame:
+        """Lịch sử hội tụ (1 dòng / round) để vẽ / export."""
+        return pd.DataFrame([vars(p) for p in self.history])
@@ -0,0 +1,240 @@
+"""
+Walk-forward optimization: tối ưu trên cửa sổ train, kiểm tra config được chọn trên cửa sổ test ngay sau.
+
+    |--- train 0 ---|-- test 0 --|
+          |--- train 1 ---|-- test 1 --|
+                |--- train 2 ---|-- test 2 --|
+
+- Mỗi fold chạy grid (param_grid) trên train, chọn config tốt nhất theo objective rồi chạy config đó
+  trên test. Các fold được submit song song vào cùng 1 pool worker (M1/M15 publish 1 lần vào
+  shared memory, worker cắt view theo cửa sổ, không copy data).
+- Cửa sổ train được backtest từ trước điểm bắt đầu 1 đoạn warm-up (ADX, zone M15 ...); trade vào lệnh
+  trong đoạn warm-up bị bỏ khỏi kết quả. Strategy có state dài hạn (zone chưa bị phá, vị thế đang mở,
+  paper mode) nên warm-up ngắn chỉ xấp xỉ; cửa sổ test mặc định chạy lại từ đầu data (exact_oos) để
+  trade out-of-sample khớp đúng 1 lần chạy liên tục của config đó.
+- Trade out-of-sample của các fold được nối lại thành 1 equity curve (oos_equity).
+"""
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from .abort_rules import AbortRules
+from .backtest_results import BacktestSummary
+from .optimizer import DataWindow, EvalSession, GridSearchOptimizer
+from .signal_cache import print_stage_report
+from .strategy_config import StrategyConfig
+
+
+@dataclass(frozen=True)
+class Fold:
+    index: int
+    train_start: pd.Timestamp
+    train_end: pd.Timestamp
+    test_start: pd.Timestamp
+    test_end: pd.Timestamp
+
+
+@dataclass
+class FoldResult:
+    fold: Fold
+    train: BacktestSummary           # metrics của config được chọn trên train
+    test: BacktestSummary            # metrics của config đó trên test
+    test_trades: pd.DataFrame        # trade journal out-of-sample (đọc lại từ journal_path)
+
+
+def make_folds(
+    index: pd.DatetimeIndex,
+    train_days: int,
+    test_days: int,
+    step_days: Optional[int] = None,
+    anchored: bool = False,
+) -> List[Fold]:
+    """
+    Chia index M1 thành các fold train/test liên tiếp (mốc cắt ở đầu ngày).
+    - step_days: khoảng dịch giữa 2 fold (mặc định = test_days, các cửa sổ test nối liền nhau)
+    - anchored=True: train luôn bắt đầu từ đầu data (cửa sổ mở rộng) thay vì cuộn
+    """
+    step = pd.Timedelta(days=step_days or test_days)
+    first = index[0].normalize()
+    end_of_data = index[-1] + pd.Timedelta(minutes=1)
+
+    folds: List[Fold] = []
+    while True:
+        shift = step * len(folds)
+        train_end = first + pd.Timedelta(days=train_days) + shift
+        if train_end >= end_of_data:
+            break
+        folds.append(
+            Fold(
+                index=len(folds),
+                train_start=first if anchored else first + shift,
+                train_end=train_end,
+                test_start=train_end,
+                test_end=min(train_end + pd.Timedelta(days=test_days), end_of_data),
+            )
+        )
+    return folds
+
+
+class WalkForwardOptimizer(GridSearchOptimizer):
+    """
+    Ví dụ:
+        wf = WalkForwardOptimizer(m1_data, m15_data, param_grid, train_days=180, test_days=30)
+        folds = wf.run()
+        wf.print_report()
+        wf.oos_equity()     # equity out-of-sample nối các fold
+    """
+
+    def __init__(
+        self,
+        m1_data: pd.DataFrame,
+        m15_data: pd.DataFrame,
+        param_grid: Dict[str, Iterable],
+        engine: str = "python",
+        batch_size: int = 64,
+        cache_dir: Optional[str] = None,
+        share_signals: bool = True,
+        abort_rules: Optional[AbortRules] = None,
+        constraints: Sequence[Callable[[StrategyConfig], bool]] = (),
+        train_days: int = 180,
+        test_days: int = 30,
+        step_days: Optional[int] = None,
+        anchored: bool = False,
+        warmup_days: float = 2.0,
+        exact_oos: bool = True,
+        objective: str = "profit_factor",
+        maximize: bool = True,
+        journal_dir: str = "walk_forward",
+    ) -> None:
+        """
+        Args:
+            warmup_days: số ngày data chạy trước mỗi cửa sổ để indicator / zone ổn định
+                (tự tăng nếu adx_period lớn cần nhiều bar hơn, xem warmup())
+            exact_oos: cửa sổ test dùng toàn bộ data trước nó làm warm-up (1 config / fold nên rẻ)
+            objective: metric của BacktestSummary dùng để chọn config trên train
+            maximize: False => objective càng nhỏ càng tốt (vd max_drawdown); score được đổi dấu
+            journal_dir: nơi ghi trade journal out-of-sample của từng fold
+        """
+        super().__init__(
+            m1_data, m15_data, param_grid, engine=engine, batch_size=batch_size,
+            cache_dir=cache_dir, share_signals=share_signals, abort_rules=abort_rules, constraints=constraints,
+        )
+        if objective not in BacktestSummary.__dataclass_fields__:
+            raise ValueError(f"Unknown objective metric: {objective!r}")
+        self.folds = make_folds(m1_data.index, train_days, test_days, step_days, anchored)
+        if not self.folds:
+            raise ValueError(
+                f"Not enough data for a {train_days}d train + {test_days}d test walk-forward "
+                f"({m1_data.index[0]} .. {m1_data.index[-1]})"
+            )
+        self.warmup_days = warmup_days
+        self.exact_oos = exact_oos
+        self.objective = objective
+        self.maximize = maximize
+        self.journal_dir = journal_dir
+        self.results: List[FoldResult] = []
+
+    def warmup(self, configs: List[StrategyConfig]) -> pd.Timedelta:
+        """Warm-up trước mỗi cửa sổ: max(warmup_days, ~10 * adx_period bar M1 để ADX Wilder hội tụ)."""
+        longest_adx = max(c.adx_period for c in configs)
+        return max(pd.Timedelta(days=self.warmup_days), pd.Timedelta(minutes=10 * longest_adx))
+
+    def _window(self, start: pd.Timestamp, end: pd.Timestamp, warmup: Optional[pd.Timedelta]) -> DataWindow:
+        """warmup=None => chạy từ bar đầu tiên (prefix, dùng lại được signal cache)."""
+        data_start = start - warmup if warmup is not None else None
+        if data_start is not None and data_start <= self.m1_data.index[0]:
+            data_start = None  # cửa sổ đầu tiên: không có data trước đó, chạy từ bar đầu tiên
+        return DataWindow(end=end, start=start, data_start=data_start)
+
+    def _score(self, summary: BacktestSummary):
+        value = float(getattr(summary, self.objective))
+        if not self.maximize:
+            value = -value
+        return (not summary.pruned, -math.inf if math.isnan(value) else value, summary.total_pnl)
+
+    def _run_fold(
+        self, fold: Fold, configs: List[StrategyConfig], warmup: pd.Timedelta, session: EvalSession
+    ) -> FoldResult:
+        train = self._evaluate(
+            configs, [None] * len(configs), session,
+            window=self._window(fold.train_start, fold.train_end, warmup),
+        )
+        best = max(train, key=self._score)
+        journal = os.path.join(self.journal_dir, f"fold_{fold.index:02d}_{best.config_key}.csv")
+        test = self._evaluate(
+            [best.config], [journal], session,
+            window=self._window(fold.test_start, fold.test_end, None if self.exact_oos else warmup),
+        )[0]
+        trades = pd.read_csv(journal, parse_dates=["entry_time", "exit_time"], dtype={"pnl": float})
+        print(
+            f"[WalkForward] fold {fold.index}: train {fold.train_start.date()}..{fold.train_end.date()} "
+            f"{self.objective}={float(getattr(best, self.objective)):.2f} -> "
+            f"test {fold.test_start.date()}..{fold.test_end.date()} "
+            f"PF={test.profit_factor:.2f}, trades={test.total_trades}, PnL={test.total_pnl:,.0f} ({best.config_key})"
+        )
+        return FoldResult(fold=fold, train=best, test=test, test_trades=trades)
+
+    def run(self, n_jobs: int = -1) -> List[FoldResult]:
+        """
+        Chạy tất cả fold, trả về FoldResult theo thứ tự thời gian.
+        Với n_jobs != 1, các fold được đẩy vào pool cùng lúc (mỗi fold 1 thread điều phối trong
+        process chính) nên worker không phải chờ fold trước xong mới có việc.
+        """
+        configs = self._generate_configs(dedupe=True)
+        warmup = self.warmup(configs)
+        print(
+            f"[WalkForward] {len(self.folds)} folds x {len(configs)} configs, "
+            f"warm-up {warmup} before each window"
+        )
+        if self.share_signals and len(configs) > 1:
+            print_stage_report(configs, list(self.param_grid.keys()))
+
+        try:
+            with self._session(n_jobs, configs) as session:
+                if session.executor is None:
+                    self.results = [self._run_fold(f, configs, warmup, session) for f in self.folds]
+                else:
+                    with ThreadPoolExecutor(max_workers=len(self.folds)) as drivers:
+                        futures = [
+                            drivers.submit(self._run_fold, f, configs, warmup, session) for f in self.folds
+                        ]
+                        self.results = [f.result() for f in futures]
+        finally:
+            if self.cache is not None:
+                self.cache.evict()
+        return self.results
+
+    def oos_trades(self) -> pd.DataFrame:
+        """Tất cả trade out-of-sample (cột `fold` = fold index), theo thứ tự exit_time."""
+        frames = [r.test_trades.assign(fold=r.fold.index) for r in self.results]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True).sort_values("exit_time", kind="stable")
+
+    def oos_equity(self, initial_capital: float = 1000.0) -> pd.Series:
+        """Equity out-of-sample nối các fold: initial_capital + PnL cộng dồn, index = exit_time."""
+        trades = self.oos_trades()
+        if trades.empty:
+            return pd.Series([initial_capital], dtype=float)
+        equity = initial_capital + trades["pnl"].astype(float).cumsum()
+        return pd.Series(equity.to_numpy(), index=pd.DatetimeIndex(trades["exit_time"]), name="equity")
+
+    def print_report(self) -> None:
+        print("\n=== WALK-FORWARD (OUT-OF-SAMPLE) ===")
+        print(f"{'Fold':<5} {'Test window':<25} {'Config':<17} {'Train ' + self.objective:>20} "
+              f"{'Test PF':>8} {'Trades':>7} {'Test PnL':>10}")
+        for r in self.results:
+            window = f"{r.fold.test_start.date()}..{r.fold.test_end.date()}"
+            print(
+                f"{r.fold.index:<5} {window:<25} {r.test.config_key:<17} "
+                f"{float(getattr(r.train, self.objective)):>20.2f} {r.test.profit_factor:>8.2f} "
+                f"{r.test.total_trades:>7} {r.test.total_pnl:>10,.0f}"
+            )
+        equity = self.oos_equity()
+        total = sum(r.test.total_pnl for r in self.results)
+        print(f"Stitched OOS PnL: {total:,.0f} | final equity {equity.iloc[-1]:,.0f}")
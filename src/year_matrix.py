@@ -0,0 +1,229 @@
+"""
+Optimizer chạy ma trận config × năm và xếp hạng config theo objective "bền" qua các năm.
+
+Mỗi cặp (config, năm) là 1 task độc lập: backtest riêng trên data của năm đó (bắt đầu với vốn
+ban đầu, giống `main.py --year`). Data các năm được ghép thành 1 dataset, publish vào shared memory
+1 lần; worker cắt view theo năm (DataWindow). Tất cả các năm được submit vào pool cùng lúc.
+
+Objective tổng hợp cho từng config (xem CrossYearSummary):
+- worst_year_profit_factor: profit factor của năm tệ nhất (config không sập năm nào, vd 2020)
+- median_return_pct       : % lợi nhuận trung vị qua các năm
+- pnl_consistency         : mean / std % lợi nhuận theo năm (cao = đều qua các năm)
+"""
+
+import math
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .abort_rules import AbortRules
+from .backtest_results import BacktestSummary
+from .optimizer import DataWindow, EvalSession, GridSearchOptimizer
+from .signal_cache import print_stage_report
+from .strategy_config import StrategyConfig, config_key
+
+
+CROSS_YEAR_OBJECTIVES = ("worst_year_profit_factor", "median_return_pct", "pnl_consistency")
+
+
+@dataclass
+class CrossYearSummary:
+    """Kết quả 1 config trên tất cả các năm."""
+    config_key: str
+    config: StrategyConfig
+    per_year: Dict[Any, BacktestSummary] = field(default_factory=dict)
+    initial_capital: float = 1000.0
+
+    def returns_pct(self) -> Dict[Any, float]:
+        return {year: s.total_pnl / self.initial_capital * 100 for year, s in self.per_year.items()}
+
+    @property
+    def worst_year(self) -> Any:
+        return min(self.per_year, key=lambda y: self.per_year[y].profit_factor)
+
+    @property
+    def worst_year_profit_factor(self) -> float:
+        return self.per_year[self.worst_year].profit_factor
+
+    @property
+    def median_return_pct(self) -> float:
+        return statistics.median(self.returns_pct().values())
+
+    @property
+    def pnl_consistency(self) -> float:
+        """Mean / std của % lợi nhuận theo năm (0 nếu chỉ có 1 năm hoặc std = 0)."""
+        returns = list(self.returns_pct().values())
+        if len(returns) < 2:
+            return 0.0
+        std = statistics.stdev(returns)
+        return statistics.mean(returns) / std if std > 0 else 0.0
+
+    @property
+    def pruned(self) -> bool:
+        """Bị dừng sớm (abort rules) ở ít nhất 1 năm."""
+        return any(s.pruned for s in self.per_year.values())
+
+    @property
+    def profitable_years(self) -> int:
+        return sum(1 for s in self.per_year.values() if s.total_pnl > 0)
+
+    @property
+    def total_pnl(self) -> float:
+        return sum(s.total_pnl for s in self.per_year.values())
+
+
+def year_windows(years: List[Any], frames: List[pd.DataFrame]) -> Dict[Any, DataWindow]:
+    """Cửa sổ của từng năm trong dataset ghép (năm đầu tiên là prefix => dùng lại được signal cache)."""
+    windows: Dict[Any, DataWindow] = {}
+    for i, (year, m1) in enumerate(zip(years, frames)):
+        data_start = m1.index[0] if i > 0 else None
+        end = frames[i + 1].index[0] if i + 1 < len(frames) else None
+        windows[year] = DataWindow(end=end, data_start=data_start)
+    return windows
+
+
+class CrossYearOptimizer(GridSearchOptimizer):
+    """
+    Ví dụ:
+        datasets = {year: (m1, resample_to_m15(m1)) for year, m1 in ...}
+        opt = CrossYearOptimizer(datasets, param_grid)
+        results = opt.run()                      # sort theo worst_year_profit_factor
+        opt.matrix("total_pnl")                  # DataFrame config_key × năm
+    """
+
+    def __init__(
+        self,
+        datasets: Dict[Any, Tuple[pd.DataFrame, pd.DataFrame]],
+        param_grid: Dict[str, Iterable],
+        engine: str = "python",
+        batch_size: int = 64,
+        cache_dir: Optional[str] = None,
+        share_signals: bool = True,
+        abort_rules: Optional[AbortRules] = None,
+        objective: str = "worst_year_profit_factor",
+        constraints: Sequence[Callable[[StrategyConfig], bool]] = (),
+    ) -> None:
+        """
+        Args:
+            datasets: năm -> (M1, M15) của năm đó; các năm không được chồng lên nhau
+            objective: 1 trong CROSS_YEAR_OBJECTIVES
+        """
+        if not datasets:
+            raise ValueError("CrossYearOptimizer needs at least one dataset")
+        if objective not in CROSS_YEAR_OBJECTIVES:
+            raise ValueError(f"objective must be one of {CROSS_YEAR_OBJECTIVES}, got {objective!r}")
+
+        ordered = sorted(datasets.items(), key=lambda item: item[1][0].index[0])
+        self.years = [year for year, _ in ordered]
+        m1_frames = [m1 for _, (m1, _) in ordered]
+        for prev, cur in zip(m1_frames, m1_frames[1:]):
+            if cur.index[0] <= prev.index[-1]:
+                raise ValueError("Datasets overlap in time, cannot build a config x year matrix")
+
+        super().__init__(
+            pd.concat(m1_frames),
+            pd.concat([m15 for _, (_, m15) in ordered]),
+            param_grid,
+            engine=engine,
+            batch_size=batch_size,
+            cache_dir=cache_dir,
+            share_signals=share_signals,
+            abort_rules=abort_rules,
+            constraints=constraints,
+        )
+        self.windows = year_windows(self.years, m1_frames)
+        self.objective = objective
+        self.results: List[CrossYearSummary] = []
+
+    def _score(self, summary: CrossYearSummary) -> Tuple[bool, float, float]:
+        value = float(getattr(summary, self.objective))
+        return (not summary.pruned, -math.inf if math.isnan(value) else value, summary.total_pnl)
+
+    def _run_year(self, year: Any, configs: List[StrategyConfig], session: EvalSession) -> List[BacktestSummary]:
+        summaries = self._evaluate(configs, [None] * len(configs), session, window=self.windows[year])
+        best = max(summaries, key=lambda s: s.profit_factor)
+        print(
+            f"[CrossYear] {year}: {len(summaries)} configs done, best PF={best.profit_factor:.2f} "
+            f"({best.config_key})"
+        )
+        return summaries
+
+    def run(self, n_jobs: int = -1, max_configs: Optional[int] = None) -> List[CrossYearSummary]:
+        """
+        Chạy mọi cặp (config, năm), trả về CrossYearSummary sort theo objective giảm dần.
+        Với n_jobs != 1 các năm được submit cùng lúc (1 thread điều phối / năm) nên worker
+        luôn có task, kể cả khi 1 năm chạy lâu hơn các năm khác.
+        """
+        configs = self._generate_configs(dedupe=True)
+        if max_configs is not None and max_configs < len(configs):
+            configs = configs[:max_configs]
+        if not configs:
+            print("[CrossYear] No configs to run (constraints / max_configs removed every grid point)")
+            self.results = []
+            return self.results
+        print(f"[CrossYear] {len(configs)} configs x {len(self.years)} years = {len(configs) * len(self.years)} tasks")
+        if self.share_signals and len(configs) > 1:
+            print_stage_report(configs, list(self.param_grid.keys()))
+
+        try:
+            with self._session(n_jobs, configs) as session:
+                if session.executor is None:
+                    per_year = [self._run_year(y, configs, session) for y in self.years]
+                else:
+                    with ThreadPoolExecutor(max_workers=len(self.years)) as drivers:
+                        futures = [drivers.submit(self._run_year, y, configs, session) for y in self.years]
+                        per_year = [f.result() for f in futures]
+        finally:
+            if self.cache is not None:
+                self.cache.evict()
+
+        self.results = [
+            CrossYearSummary(
+                config_key=config_key(cfg),
+                config=cfg,
+                per_year={year: summaries[i] for year, summaries in zip(self.years, per_year)},
+            )
+            for i, cfg in enumerate(configs)
+        ]
+        self.results.sort(key=self._score, reverse=True)
+        return self.results
+
+    def matrix(self, metric: str = "total_pnl") -> pd.DataFrame:
+        """Bảng config_key × năm của 1 metric BacktestSummary."""
+        return pd.DataFrame(
+            {r.config_key: {year: getattr(s, metric) for year, s in r.per_year.items()} for r in self.results}
+        ).T.reindex(columns=self.years)
+
+    def print_top_configs(self, n: int = 10) -> None:
+        print(f"\n=== TOP {n} CONFIGURATIONS ACROSS {len(self.years)} YEARS (by {self.objective}) ===")
+        for i, r in enumerate(self.results[:n], 1):
+            print(
+                f"Rank {i}: worst-year PF={r.worst_year_profit_factor:.2f} ({r.worst_year}), "
+                f"median return={r.median_return_pct:.1f}%, consistency={r.pnl_consistency:.2f}, "
+                f"profitable years={r.profitable_years}/{len(r.per_year)} ({r.config_key})"
+            )
+            yearly = ", ".join(f"{y}: {s.total_pnl:,.0f}" for y, s in r.per_year.items())
+            print(f"  - PnL by year: {yearly}")
+
+    def export_to_csv(self, path: str) -> None:
+        rows = []
+        for r in self.results:
+            row = {
+                "config_key": r.config_key,
+                "worst_year_profit_factor": r.worst_year_profit_factor,
+                "worst_year": r.worst_year,
+                "median_return_pct": r.median_return_pct,
+                "pnl_consistency": r.pnl_consistency,
+                "profitable_years": r.profitable_years,
+                "total_pnl": r.total_pnl,
+            }
+            for year, s in r.per_year.items():
+                row[f"pnl_{year}"] = s.total_pnl
+                row[f"pf_{year}"] = s.profit_factor
+                row[f"trades_{year}"] = s.total_trades
+            rows.append(row)
+        pd.DataFrame(rows).to_csv(path, index=False)
+        print(f"Exported cross-year results to {path}")
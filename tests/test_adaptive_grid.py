@@ -0,0 +1,77 @@
+"""AdaptiveGridOptimizer: lưới chia nhỏ (kẹp biên, trục int / float, dedupe) và bước giảm 1/2 mỗi round."""
+
+import numpy as np
+import pytest
+
+from src.adaptive_grid import AdaptiveGridOptimizer
+from src.data_loader import generate_dummy_data, resample_to_m15
+from src.strategy_config import StrategyConfig, canonical_config, config_key
+
+
+@pytest.fixture(scope="module")
+def data():
+    np.random.seed(3)
+    m1 = generate_dummy_data(days=1)
+    return m1, resample_to_m15(m1)
+
+
+def _axis(configs, name):
+    return sorted({getattr(c, name) for c in configs})
+
+
+def test_refine_clamps_and_keeps_axis_types(data):
+    grid = {"r_r_ratio_target": [1.5, 2.5, 3.5], "adx_period": [10, 14, 22], "trade_side": ["both", "long"]}
+    opt = AdaptiveGridOptimizer(*data, grid)
+    assert opt.initial_steps == {"r_r_ratio_target": 1.0, "adx_period": 4}
+    assert opt.min_steps == {"adx_period": 1}
+
+    top = StrategyConfig(r_r_ratio_target=3.5, adx_period=10, trade_side="long")
+    configs, groups = opt._refine([top], {"r_r_ratio_target": 0.5, "adx_period": 2})
+    assert _axis(configs, "r_r_ratio_target") == [3.0, 3.5]
+    assert _axis(configs, "adx_period") == [10, 12]
+    assert all(isinstance(c.adx_period, int) and c.trade_side == "long" for c in configs)
+    assert len(configs) == len(groups) == 4
+
+    # Float: làm tròn 10 chữ số, không sinh 2.7499999...; int: bước lẻ vẫn ra số nguyên
+    top = StrategyConfig(r_r_ratio_target=2.5, adx_period=14)
+    configs, _ = opt._refine([top], {"r_r_ratio_target": 0.25, "adx_period": 1.5})
+    assert _axis(configs, "r_r_ratio_target") == [2.25, 2.5, 2.75]
+    assert all(isinstance(v, int) for v in _axis(configs, "adx_period"))
+
+
+def test_refine_drops_invalid_and_merges_duplicates(data):
+    grid = {"trailing_sl_trigger": [1.0, 2.0], "trailing_sl_level": [0.5, 1.0]}
+    opt = AdaptiveGridOptimizer(*data, grid)
+    configs, _ = opt._refine(
+        [StrategyConfig(trailing_sl_trigger=1.5, trailing_sl_level=1.0)],
+        {"trailing_sl_trigger": 0.5, "trailing_sl_level": 0.5},
+    )
+    assert len(configs) == 5
+    assert all(c.trailing_sl_level < c.trailing_sl_trigger for c in configs)
+
+    # Paper mode tắt => paper_* không ảnh hưởng trades: 3 điểm gộp về 1 config chuẩn
+    grid = {"paper_trigger_consecutive_losses": [2, 4], "enable_paper_mode": [False]}
+    opt = AdaptiveGridOptimizer(*data, grid)
+    configs, groups = opt._refine(
+        [StrategyConfig(enable_paper_mode=False, paper_trigger_consecutive_losses=3)],
+        {"paper_trigger_consecutive_losses": 1},
+    )
+    assert configs == [canonical_config(StrategyConfig(enable_paper_mode=False))]
+    assert [c.paper_trigger_consecutive_losses for c in groups[config_key(configs[0])]] == [2, 3, 4]
+
+
+def test_steps_halve_until_min_step(data):
+    grid = {"r_r_ratio_target": [1.5, 2.5], "adx_period": [10, 14]}
+    opt = AdaptiveGridOptimizer(*data, grid, rounds=3, top_k=1)
+    results = opt.run(n_jobs=1)
+
+    assert [r.steps for r in opt.rounds_report] == [
+        {"r_r_ratio_target": 1.0, "adx_period": 4},
+        {"r_r_ratio_target": 0.5, "adx_period": 2},
+        {"r_r_ratio_target": 0.25, "adx_period": 1},
+        {"r_r_ratio_target": 0.125},       # adx_period dừng ở min_step 1
+    ]
+    assert len({s.config_key for s in results}) == len(results) == sum(r.new_configs for r in opt.rounds_report)
+    assert all(1.5 <= s.config.r_r_ratio_target <= 2.5 and 10 <= s.config.adx_period <= 14 for s in results)
+    assert all(isinstance(s.config.adx_period, int) for s in results)
+    assert set(opt.groups) >= {s.config_key for s in results}
@@ -0,0 +1,42 @@
+"""canonical_config / dedupe_configs: config cùng hành vi chạy 1 lần, config vô nghĩa bị bỏ."""
+
+from src.optimizer import dedupe_configs
+from src.strategy_config import StrategyConfig, canonical_config, config_key, invalid_reason
+
+
+def test_unused_fields_reset_to_defaults():
+    defaults = StrategyConfig()
+    config = StrategyConfig(
+        enable_paper_mode=False, paper_trigger_consecutive_losses=7,
+        enable_timerange_filter=False, trading_sessions=[(0, 30)], r_r_ratio_target=3.0,
+    )
+    canonical = canonical_config(config)
+    assert canonical.paper_trigger_consecutive_losses == defaults.paper_trigger_consecutive_losses
+    assert canonical.trading_sessions == defaults.trading_sessions
+    assert canonical.r_r_ratio_target == 3.0
+
+
+def test_used_fields_are_kept():
+    config = StrategyConfig(
+        enable_paper_mode=True, paper_trigger_consecutive_losses=7,
+        enable_timerange_filter=True, trading_sessions=[(0, 30)],
+    )
+    assert canonical_config(config) == config
+
+
+def test_dedupe_groups_duplicates_and_drops_invalid():
+    configs = [
+        StrategyConfig(enable_paper_mode=False, paper_trigger_consecutive_losses=k) for k in (2, 3, 4)
+    ] + [
+        StrategyConfig(enable_paper_mode=True, paper_trigger_consecutive_losses=2),
+        StrategyConfig(trailing_sl_trigger=1.0, trailing_sl_level=1.0),
+    ]
+    assert invalid_reason(configs[-1]) is not None
+
+    unique, groups = dedupe_configs(configs)
+
+    assert len(unique) == 2
+    assert unique[0] == canonical_config(configs[0])
+    assert groups[config_key(unique[0])] == configs[:3]
+    assert groups[config_key(unique[1])] == [configs[3]]
+    assert all(configs[-1] not in originals for originals in groups.values())
@@ -0,0 +1,107 @@
+"""Cluster: heartbeat gia hạn lease, task của worker chết được giao lại, kết quả nhiều worker về đúng thứ tự."""
+
+import socket
+import threading
+import time
+from multiprocessing.connection import Client
+
+import numpy as np
+import pytest
+
+from src.data_loader import generate_dummy_data, resample_to_m15
+from src.distributed import ClusterConfig, ClusterExecutor, run_worker
+from src.optimizer import BaseOptimizer
+from src.result_cache import data_fingerprint
+from src.strategy_config import StrategyConfig
+
+
+def _slow_square(x):
+    time.sleep(1.0)
+    return x * x
+
+
+def _data():
+    np.random.seed(3)
+    m1 = generate_dummy_data(days=1)
+    return m1, resample_to_m15(m1)
+
+
+def _start_worker(address, m1, m15, idle_timeout=1.0):
+    worker = threading.Thread(
+        target=run_worker, args=(address, b"test", m1, m15), kwargs={"idle_timeout": idle_timeout}, daemon=True,
+    )
+    worker.start()
+    return worker
+
+
+def test_heartbeat_renews_lease():
+    m1, m15 = _data()
+    cluster = ClusterConfig(
+        ("127.0.0.1", 0), authkey=b"test", lease_seconds=0.4, max_attempts=1, heartbeat_seconds=0.1
+    )
+    hello = {"data_fingerprint": data_fingerprint(m1, m15), "cache_fingerprint": None, "signal_configs": []}
+
+    executor = ClusterExecutor(cluster, hello)
+    worker = _start_worker(executor._listener.address, m1, m15)
+    try:
+        # 1 s / task > lease 0.4 s, max_attempts=1: không có heartbeat thì task fail ngay lần đầu
+        assert executor.submit(_slow_square, 7).result(timeout=30) == 49
+    finally:
+        executor.shutdown()
+    worker.join(timeout=10)
+
+
+def test_dead_worker_task_is_reassigned():
+    m1, m15 = _data()
+    cluster = ClusterConfig(("127.0.0.1", 0), authkey=b"test", lease_seconds=5.0, max_attempts=2, heartbeat_seconds=1.0)
+    hello = {"data_fingerprint": data_fingerprint(m1, m15), "cache_fingerprint": None, "signal_configs": []}
+
+    executor = ClusterExecutor(cluster, hello)
+    try:
+        future = executor.submit(_slow_square, 6)
+        # Worker giả: handshake, nhận task rồi chết (đóng kết nối) giữa chừng
+        dead = Client(executor._listener.address, authkey=b"test")
+        dead.recv()
+        dead.send(("ready", "doomed"))
+        assert dead.recv()[0] == "task"
+        dead.close()
+
+        worker = _start_worker(executor._listener.address, m1, m15)
+        assert future.result(timeout=30) == 36
+    finally:
+        executor.shutdown()
+    worker.join(timeout=10)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_results_from_several_workers_keep_config_order():
+    m1, m15 = _data()
+    configs = [StrategyConfig(r_r_ratio_target=r, trade_side=side) for r in (1.5, 2.0, 3.0) for side in ("both", "long")]
+
+    local = BaseOptimizer(m1, m15)
+    with local._session(1, configs) as session:
+        expected = local._evaluate(configs, [None] * len(configs), session)
+
+    cluster = ClusterConfig(("127.0.0.1", _free_port()), authkey=b"test", expected_workers=3)
+    workers = [_start_worker(cluster.address, m1, m15, idle_timeout=2.0) for _ in range(3)]
+    remote = BaseOptimizer(m1, m15, cluster=cluster)
+    with remote._session(-1, configs) as session:
+        got = remote._evaluate(configs, [None] * len(configs), session)
+        assert session.stats.chunks > 1
+    for worker in workers:
+        worker.join(timeout=15)
+
+    assert [s.config for s in got] == configs
+    assert [(s.config_key, s.total_trades, s.total_pnl) for s in got] == [
+        (s.config_key, s.total_trades, s.total_pnl) for s in expected
+    ]
+
+
+def test_lease_must_cover_heartbeats():
+    with pytest.raises(ValueError):
+        ClusterConfig(("127.0.0.1", 0), authkey=b"x", lease_seconds=10, heartbeat_seconds=30)
@@ -0,0 +1,45 @@
+"""GeneticOptimizer: memo theo config chuẩn, cá thể vô nghĩa không chạy, toán tử gen giữ biên / min_size."""
+
+import random
+
+import numpy as np
+
+from src.data_loader import generate_dummy_data, resample_to_m15
+from src.genetic_optimizer import GeneticOptimizer, _cross_gene, _mutate_gene
+from src.search_space import ChoiceParam, FloatParam, IntParam, SubsetParam
+from src.strategy_config import StrategyConfig, invalid_reason
+
+
+def test_duplicates_reuse_memo_and_invalid_are_not_run():
+    np.random.seed(3)
+    m1 = generate_dummy_data(days=1)
+    space = {
+        "r_r_ratio_target": ChoiceParam((2.0, 3.0)),
+        "trailing_sl_level": ChoiceParam((1.0, 2.0)),        # 2.0 >= trailing_sl_trigger 1.5: vô nghĩa
+        "trading_sessions": SubsetParam(tuple(StrategyConfig().trading_sessions)),
+    }
+    # Timerange filter tắt => trading_sessions không ảnh hưởng trades, mọi tập con gộp về 1 config chuẩn
+    ga = GeneticOptimizer(
+        m1, resample_to_m15(m1), space, base_config=StrategyConfig(enable_timerange_filter=False),
+        population_size=8, elite=1, seed=7,
+    )
+    results = ga.run(generations=3, n_jobs=1)
+
+    assert sum(r.evaluated for r in ga.history) == len(ga.memo) == len(results) <= 2
+    assert all(invalid_reason(s.config) is None for s in results)
+    assert sum(r.invalid for r in ga.history) > 0
+    assert all(r.evaluated + r.reused + r.invalid == 8 for r in ga.history)
+
+
+def test_gene_operators_respect_bounds_and_min_size():
+    rng = random.Random(0)
+    subset = SubsetParam(("a", "b", "c", "d"), min_size=2)
+    floats, ints = FloatParam(1.0, 2.0), IntParam(10, 20, step=2)
+    choice = ChoiceParam((True, False))
+    for _ in range(500):
+        assert len(_mutate_gene(subset, ["a", "c"], rng, 0.5)) >= 2
+        assert len(_cross_gene(subset, ["a", "b"], ["c", "d"], rng)) >= 2
+        assert 1.0 <= _mutate_gene(floats, rng.choice([1.0, 2.0]), rng, 1.0) <= 2.0
+        value = _mutate_gene(ints, rng.choice([10, 20]), rng, 1.0)
+        assert isinstance(value, int) and 10 <= value <= 20 and value % 2 == 0
+        assert _mutate_gene(choice, True, rng, 0.5) is False
@@ -0,0 +1,70 @@
+"""pareto: xếp hạng front khớp định nghĩa, config bị dừng sớm xếp sau, tiến độ theo objective đầu tiên."""
+
+import numpy as np
+import pytest
+
+from src.backtest_results import BacktestSummary
+from src.optimizer import _BestSoFar
+from src.pareto import parse_objectives, pareto_ranks, pareto_sort
+
+
+def _reference_ranks(values):
+    """Bóc front trực tiếp theo định nghĩa dominate (O(n^3), chỉ cho n nhỏ)."""
+    n = len(values)
+    ranks = np.full(n, -1)
+    remaining = set(range(n))
+    rank = 0
+    while remaining:
+        front = [
+            j for j in remaining
+            if not any((values[i] >= values[j]).all() and (values[i] > values[j]).any() for i in remaining)
+        ]
+        ranks[front] = rank
+        remaining -= set(front)
+        rank += 1
+    return ranks
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ranks_match_definition_for_any_block_size(seed):
+    values = np.random.default_rng(seed).integers(0, 4, size=(50, 3)).astype(float)
+    expected = _reference_ranks(values)
+    for block in (1, 7, 1024):
+        assert (pareto_ranks(values, block=block) == expected).all()
+
+
+def test_invalid_rows_rank_after_valid():
+    values = np.array([[1.0, 1.0], [5.0, 5.0], [0.0, 0.0]])
+    ranks = pareto_ranks(values, valid=np.array([True, False, True]))
+    assert list(ranks) == [0, 2, 1]
+
+
+def _summary(key, pnl, dd, pf=1.0, pruned=None):
+    return BacktestSummary(
+        config_key=key, total_pnl=pnl, total_trades=10, winning_trades=5, losing_trades=5, win_rate=50.0,
+        profit_factor=pf, avg_win=1.0, avg_loss=-1.0, max_drawdown=dd, sharpe_ratio=0.0,
+        backtest_duration_seconds=1.0, pruned_reason=pruned,
+    )
+
+
+def test_pareto_sort_front_then_primary_objective():
+    results = [
+        _summary("dominated", 50.0, 20.0),
+        _summary("safe", 80.0, 5.0),
+        _summary("rich", 120.0, 15.0),
+        _summary("pruned", 500.0, 1.0, pruned="max_drawdown"),
+    ]
+    ordered = [r.config_key for r in pareto_sort(results, ["total_pnl", "max_drawdown"])]
+    assert ordered == ["rich", "safe", "dominated", "pruned"]
+
+
+def test_best_so_far_uses_objective():
+    progress = _BestSoFar(total=3, objective=parse_objectives(["max_drawdown"])[0])
+    progress.offer(_summary("a", 100.0, 10.0, pf=3.0))
+    progress.offer(_summary("b", 10.0, 2.0, pf=1.1))
+    assert progress.best.config_key == "b"
+
+    default = _BestSoFar(total=3)
+    default.offer(_summary("a", 100.0, 10.0, pf=3.0))
+    default.offer(_summary("b", 10.0, 2.0, pf=1.1))
+    assert default.best.config_key == "a"
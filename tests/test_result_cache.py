@@ -0,0 +1,51 @@
+"""ResultCache: entry không đọc được là miss, key phụ thuộc mọi module engine import, cache hit in đủ thống kê."""
+
+import pickle
+
+import numpy as np
+
+from src.backtest_results import BacktestResult
+from src.data_loader import generate_dummy_data, resample_to_m15
+from src.metrics import print_statistics
+from src.pinescript_port import PineScriptStrategy
+from src.result_cache import CachedRun, ResultCache, engine_modules
+from src.strategy_config import StrategyConfig
+
+
+def test_engine_modules_follow_imports():
+    python = engine_modules("python")
+    assert {"pinescript_port.py", "abort_rules.py", "metrics.py", "models.py"} <= set(python)
+    assert "state_fork.py" in engine_modules("fork")
+    assert "batch_engine.py" in engine_modules("batch")
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key("fp", StrategyConfig(), "python")
+
+    # Pickle tham chiếu module không còn tồn tại => ModuleNotFoundError lúc load
+    payload = pickle.dumps(StrategyConfig()).replace(b"src.strategy_config", b"src.strategy_gone__")
+    (tmp_path / f"{key}.pkl").write_bytes(payload)
+    assert cache.get(key) is None
+
+    (tmp_path / f"{key}.pkl").write_bytes(b"\x80\x05garbage")
+    assert cache.get(key) is None
+    assert cache.misses == 2 and cache.hits == 0
+
+
+def test_cache_hit_prints_same_statistics(capsys):
+    np.random.seed(3)
+    m1 = generate_dummy_data(days=5)
+    strat = PineScriptStrategy(m1_data=m1, m15_data=resample_to_m15(m1), config=StrategyConfig())
+    trades = strat.run()
+    live = capsys.readouterr().out
+    assert trades and "=== BACKTEST STATISTICS ===" in live
+    block = live[live.index("=" * 60 + "\n=== BACKTEST STATISTICS ==="):]
+
+    # Entry từ batch engine không có equity_curve: dựng lại từ PnL các lệnh đóng như main.py
+    result = BacktestResult.from_trades(StrategyConfig(), trades, strat.initial_capital, strat.equity_curve, 0.0)
+    hit = CachedRun(result=result, initial_capital=strat.initial_capital)
+    closed = [t.pnl for t in hit.trades if t.exit_time is not None]
+    equity = list(np.concatenate([[hit.initial_capital], hit.initial_capital + np.cumsum(closed)]))
+    print_statistics(hit.trades, equity, hit.initial_capital, start=m1.index[0], end=m1.index[-1])
+    assert capsys.readouterr().out.lstrip("\n") == block
@@ -0,0 +1,49 @@
+"""ResultStore: chạy lại cùng file thì resume, dòng cuối ghi dở bị cắt bỏ."""
+
+from src.backtest_results import BacktestSummary
+from src.result_store import ResultStore
+from src.strategy_config import StrategyConfig, config_key
+
+
+def _summary(config, pnl, pruned=None):
+    return BacktestSummary(
+        config_key=config_key(config), total_pnl=pnl, total_trades=4, winning_trades=3, losing_trades=1,
+        win_rate=75.0, profit_factor=2.5, avg_win=10.0, avg_loss=-5.0, max_drawdown=12.0, sharpe_ratio=0.8,
+        backtest_duration_seconds=1.5, config=config, pruned_reason=pruned,
+    )
+
+
+def test_resume_round_trips_summaries(tmp_path):
+    path = str(tmp_path / "store.csv")
+    first = _summary(StrategyConfig(r_r_ratio_target=2.5, trading_sessions=[(60, 120)]), 100.0)
+    second = _summary(StrategyConfig(r_r_ratio_target=3.0), -20.0, pruned="max_drawdown")
+    with ResultStore(path) as store:
+        store.append(first)
+        store.append(second)
+        store.append(first)   # trùng key => bỏ qua
+
+    store = ResultStore(path)
+    assert store.completed_keys() == {first.config_key, second.config_key}
+    assert store.get(first.config_key) == first
+    assert store.get(second.config_key).pruned_reason == "max_drawdown"
+    assert store.get(first.config_key).config.trading_sessions == [(60, 120)]
+    with open(path) as fh:
+        assert len(fh.readlines()) == 3
+
+
+def test_partial_last_line_is_truncated(tmp_path):
+    path = tmp_path / "store.csv"
+    done = _summary(StrategyConfig(r_r_ratio_target=2.5), 100.0)
+    with ResultStore(str(path)) as store:
+        store.append(done)
+    intact = path.read_bytes()
+    path.write_bytes(intact + b"deadbeef,12.5,3")   # process bị kill giữa lúc ghi
+
+    store = ResultStore(str(path))
+    assert store.completed_keys() == {done.config_key}
+    assert path.read_bytes() == intact
+
+    more = _summary(StrategyConfig(r_r_ratio_target=3.5), 5.0)
+    store.append(more)
+    store.close()
+    assert ResultStore(str(path)).completed_keys() == {done.config_key, more.config_key}
@@ -0,0 +1,96 @@
+"""run_spec: parse / validate spec, grid và search space, constraints, chiều của objective."""
+
+import numpy as np
+import pytest
+
+from src.backtest_results import BacktestSummary
+from src.data_loader import generate_dummy_data, resample_to_m15
+from src.run_spec import Constraint, OptimizationSpec, grid_values, space_param
+from src.search_space import ChoiceParam, FloatParam, IntParam, SubsetParam
+from src.strategy_config import StrategyConfig
+from src.tpe_optimizer import TPEOptimizer
+
+
+def test_from_dict_validates_and_builds_grid():
+    spec = OptimizationSpec.from_dict({
+        "search": "grid",
+        "params": {"r_r_ratio_target": {"low": 2.0, "high": 3.0, "step": 0.5}},
+        "base": {"trade_side": "long", "trading_sessions": [[60, 120]]},
+        "constraints": ["r_r_ratio_target > r_r_ratio_min"],
+        "objective": ["total_pnl", "-max_drawdown"],
+    })
+    assert spec.param_grid() == {
+        "trade_side": ["long"], "trading_sessions": [[(60, 120)]], "r_r_ratio_target": [2.0, 2.5, 3.0],
+    }
+    assert spec.parsed_objectives() == [("total_pnl", True), ("max_drawdown", False)]
+    assert spec.base_config().trading_sessions == [(60, 120)]
+
+
+@pytest.mark.parametrize("raw, message", [
+    ({"search": "grid", "params": {"r_r_ratio_min": [1]}, "typo": 1}, "Unknown spec keys"),
+    ({"search": "grid", "params": {"not_a_field": [1]}}, "Unknown StrategyConfig field"),
+    ({"search": "grid", "params": {}}, "at least one"),
+    ({"search": "tpe", "params": {"r_r_ratio_min": {"low": 1, "high": 2}}, "constraints": ["r_r_ratio_min > 1"]},
+     "constraints"),
+    ({"search": "grid", "params": {"r_r_ratio_min": [1]}, "objective": "bogus"}, "Unknown objective"),
+    ({"search": "years", "params": {"r_r_ratio_min": [1]}}, "data.years"),
+])
+def test_from_dict_rejects_bad_specs(raw, message):
+    with pytest.raises(ValueError, match=message):
+        OptimizationSpec.from_dict(raw)
+
+
+def test_grid_values():
+    assert grid_values("r_r_ratio_min", [1.0, 2.0]) == [1.0, 2.0]
+    assert grid_values("r_r_ratio_min", {"values": [3.0]}) == [3.0]
+    assert grid_values("r_r_ratio_min", {"low": 0.1, "high": 0.3, "step": 0.1}) == [0.1, 0.2, 0.3]
+    assert grid_values("adx_period", {"low": 10, "high": 20, "step": 5}) == [10, 15, 20]
+    assert grid_values("trading_sessions", [[[0, 60]]]) == [[(0, 60)]]
+    with pytest.raises(ValueError):
+        grid_values("r_r_ratio_min", {"low": 2.0, "high": 1.0, "step": 0.5})
+    with pytest.raises(ValueError):
+        grid_values("r_r_ratio_min", 1.5)
+
+
+def test_space_param():
+    assert space_param("trade_side", ["long", "short"]) == ChoiceParam(("long", "short"))
+    assert isinstance(space_param("adx_period", {"low": 10, "high": 20}), IntParam)
+    assert space_param("r_r_ratio_min", {"low": 1, "high": 2, "log": True}) == FloatParam(1.0, 2.0, log=True)
+    subset = space_param("trading_sessions", {"subset": True, "min_size": 2})
+    assert isinstance(subset, SubsetParam) and subset.min_size == 2
+    assert list(subset.items) == list(StrategyConfig().trading_sessions)
+    with pytest.raises(ValueError):
+        space_param("r_r_ratio_min", {"low": 1})
+
+
+def test_constraint_parse():
+    field_cmp = Constraint.parse("r_r_ratio_target > r_r_ratio_min")
+    assert field_cmp.right_is_field
+    assert field_cmp(StrategyConfig(r_r_ratio_min=1.5, r_r_ratio_target=2.0))
+    assert not field_cmp(StrategyConfig(r_r_ratio_min=2.0, r_r_ratio_target=2.0))
+
+    assert Constraint.parse("enable_paper_mode == true")(StrategyConfig(enable_paper_mode=True))
+    assert Constraint.parse('trade_side != "short"')(StrategyConfig(trade_side="long"))
+    assert not Constraint.parse("adx_period <= 10")(StrategyConfig(adx_period=14))
+    for bad in ("r_r_ratio_min", "nope > 1", "r_r_ratio_min > [1"):
+        with pytest.raises(ValueError):
+            Constraint.parse(bad)
+
+
+def _summary(dd):
+    return BacktestSummary(
+        config_key=str(dd), total_pnl=1.0, total_trades=1, winning_trades=1, losing_trades=0, win_rate=100.0,
+        profit_factor=1.0, avg_win=1.0, avg_loss=0.0, max_drawdown=dd, sharpe_ratio=0.0,
+        backtest_duration_seconds=1.0,
+    )
+
+
+def test_minimize_objective_reaches_single_objective_search():
+    spec = OptimizationSpec.from_dict(
+        {"search": "tpe", "params": {"r_r_ratio_min": {"low": 1, "high": 2}}, "objective": "-max_drawdown"}
+    )
+    name, maximize = spec.parsed_objectives()[0]
+    np.random.seed(0)
+    m1 = generate_dummy_data(days=1)
+    tpe = TPEOptimizer(m1, resample_to_m15(m1), spec.search_space(), objective=name, maximize=maximize)
+    assert tpe._score(_summary(5.0)) > tpe._score(_summary(20.0))
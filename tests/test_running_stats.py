@@ -0,0 +1,72 @@
+"""RunningStats: số liệu cập nhật O(1) khớp với tính lại từ đầu trên list pnl."""
+
+import math
+
+import numpy as np
+import pytest
+
+from src.metrics import RunningStats
+
+
+PNLS = [50.0, -20.0, -30.0, 0.0, 80.0, -10.0, -15.0, -5.0, 40.0, -60.0, 25.0, 30.0]
+
+
+def _replay(pnls, window=4, capital=1000.0):
+    stats = RunningStats(capital, window=window)
+    for pnl in pnls:
+        stats.update(pnl)
+    return stats
+
+
+def test_totals_and_profit_factor():
+    stats = _replay(PNLS)
+    wins = [p for p in PNLS if p > 0]
+    losses = [p for p in PNLS if p < 0]
+    assert stats.n_trades == len(PNLS)
+    assert stats.wins == len(wins) and stats.losses == len(losses)
+    assert stats.total_pnl == pytest.approx(sum(PNLS))
+    assert stats.win_rate == pytest.approx(len(wins) / len(PNLS) * 100)
+    assert stats.profit_factor == pytest.approx(sum(wins) / -sum(losses))
+
+
+def test_drawdown_matches_equity_curve():
+    stats = _replay(PNLS)
+    equity = 1000.0 + np.cumsum([0.0] + PNLS)
+    peak = np.maximum.accumulate(equity)
+    assert stats.max_drawdown == pytest.approx((peak - equity).max())
+    assert stats.max_drawdown_pct == pytest.approx(((peak - equity) / peak * 100).max())
+    assert stats.drawdown == pytest.approx(peak[-1] - equity[-1])
+
+
+def test_welford_matches_numpy_returns():
+    stats = _replay(PNLS)
+    equity = 1000.0 + np.cumsum([0.0] + PNLS)
+    returns = np.concatenate([[0.0], np.diff(equity) / equity[:-1]])
+    assert stats.n_returns == len(returns)
+    assert stats.return_mean == pytest.approx(returns.mean())
+    assert stats.return_std == pytest.approx(returns.std(ddof=1))
+
+
+@pytest.mark.parametrize("n", range(1, len(PNLS) + 1))
+def test_window_and_streaks(n):
+    pnls = PNLS[:n]
+    stats = _replay(pnls, window=4)
+    recent = pnls[-4:]
+    assert list(stats.window) == recent
+    assert stats.window_full == (len(recent) == 4)
+    assert stats.window_win_rate == pytest.approx(sum(p > 0 for p in recent) / len(recent))
+
+    streak = 0
+    for pnl in reversed(pnls):
+        if pnl > 0:
+            break
+        streak += 1
+    assert stats.consecutive_losses == streak
+    assert stats.consecutive_losses_since(n - 1) == min(streak, 1)
+
+
+def test_empty_stats():
+    stats = RunningStats(1000.0)
+    assert stats.win_rate == 0.0 and stats.profit_factor == 0.0 and stats.sharpe_ratio == 0.0
+    stats.update(10.0)
+    assert math.isinf(stats.profit_factor)
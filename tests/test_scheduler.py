@@ -0,0 +1,69 @@
+"""scheduler: chia chunk theo chi phí, thống kê pool khi nhiều dispatch chạy song song."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.scheduler import CostModel, ScheduleStats, dispatch, guided_chunks
+from src.strategy_config import StrategyConfig
+
+
+def test_guided_chunks_cover_order_and_shrink():
+    costs = [float(c) for c in range(40, 0, -1)]
+    order = list(range(len(costs)))
+    chunks = list(guided_chunks(order, costs, n_workers=2, max_size=8))
+
+    assert [i for chunk in chunks for i in chunk] == order
+    assert all(1 <= len(chunk) <= 8 for chunk in chunks)
+    # Chunk đầu gần 1/4 tổng chi phí (2 x 2 worker), chunk sau không lớn hơn phần còn lại / 4
+    remaining = sum(costs)
+    for chunk in chunks:
+        cost = sum(costs[i] for i in chunk)
+        assert len(chunk) == 1 or cost <= remaining / 4
+        remaining -= cost
+
+
+def test_guided_chunks_expensive_config_stands_alone():
+    costs = [100.0, 1.0, 1.0, 1.0, 1.0]
+    chunks = list(guided_chunks([0, 1, 2, 3, 4], costs, n_workers=4, max_size=10))
+    assert chunks[0] == [0]
+
+
+def test_cost_model_orders_by_observed_speed():
+    model = CostModel()
+    assert model.estimate(StrategyConfig(), 100) == 100.0
+    model.observe(StrategyConfig(trade_side="long"), 1.0, 1000)
+    model.observe(StrategyConfig(trade_side="both"), 3.0, 1000)
+    assert model.estimate(StrategyConfig(trade_side="both"), 1000) > model.estimate(StrategyConfig(trade_side="long"), 1000)
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def test_concurrent_dispatches_do_not_double_count_wall_time():
+    stats = ScheduleStats(n_workers=4)
+    seen = []
+    lock = threading.Lock()
+
+    def on_chunk(chunk, result):
+        with lock:
+            seen.extend(chunk)
+
+    def run_one(offset):
+        dispatch(pool, _sleep, iter([[offset], [offset + 1]]), lambda chunk: 0.2, on_chunk, stats)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=4) as pool, ThreadPoolExecutor(max_workers=2) as drivers:
+        list(drivers.map(run_one, [0, 10]))
+    elapsed = time.perf_counter() - start
+
+    assert sorted(seen) == [0, 1, 10, 11]
+    assert stats.tasks == 4 and stats.chunks == 4
+    assert stats.wall_seconds <= elapsed
+    assert stats.busy_seconds == pytest.approx(0.8, abs=0.1)
+    assert stats.tail_seconds <= stats.wall_seconds
+    assert 0.5 < stats.utilisation <= 1.0
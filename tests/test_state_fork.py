@@ -0,0 +1,58 @@
+"""state_fork: điểm fork là bar quyết định khác base đầu tiên, kết quả giống chạy từng config riêng."""
+
+import contextlib
+import io
+
+import numpy as np
+
+from src.data_loader import generate_dummy_data, resample_to_m15
+from src.pinescript_port import PineScriptStrategy
+from src.state_fork import ConfigReadTracker, ForkRunner
+from src.strategy_config import StrategyConfig
+
+
+def test_tracker_diverges_on_different_decision_not_first_read():
+    tracker = ConfigReadTracker(
+        StrategyConfig(paper_trigger_consecutive_losses=3),
+        [StrategyConfig(paper_trigger_consecutive_losses=4), StrategyConfig(adx_max_entry=40.0)],
+    )
+    tracker.bar = 5
+    assert not (2 >= tracker.paper_trigger_consecutive_losses)   # 2 >= 3 và 2 >= 4 cùng False
+    assert tracker.diverged == {}
+    assert 3 >= tracker.paper_trigger_consecutive_losses          # 3 >= 3 nhưng 3 < 4
+    assert tracker.diverged == {0: 5}
+
+    tracker.bar = 8
+    assert np.float64(20.0) < tracker.adx_max_entry
+    assert tracker.diverged == {0: 5}
+    assert tracker.adx_max_entry * 2 == tracker._config.adx_max_entry * 2
+    assert tracker.diverged == {0: 5, 1: 8}                       # số học: giá trị khác => rẽ nhánh
+
+
+def test_init_read_diverges_at_start():
+    tracker = ConfigReadTracker(StrategyConfig(), [StrategyConfig(adx_period=20)])
+    assert tracker.adx_period == StrategyConfig().adx_period
+    assert tracker.diverged == {0: -1}
+
+
+def _trades(strategy):
+    return [(t.entry_time, t.exit_time, t.entry_price, t.exit_price, t.pnl) for t in strategy.trades]
+
+
+def test_fork_runner_matches_individual_runs():
+    np.random.seed(11)
+    m1 = generate_dummy_data(days=4)
+    m15 = resample_to_m15(m1)
+    configs = [
+        StrategyConfig(paper_trigger_consecutive_losses=2),
+        StrategyConfig(paper_trigger_consecutive_losses=3),
+        StrategyConfig(adx_max_entry=35.0),
+    ]
+    with contextlib.redirect_stdout(io.StringIO()):
+        runs = ForkRunner(lambda cfg: PineScriptStrategy(m1, m15, config=cfg)).run(configs)
+        for config, run in zip(configs, runs):
+            alone = PineScriptStrategy(m1, m15, config=config)
+            alone.run()
+            assert _trades(run.strategy) == _trades(alone)
+            assert run.strategy.current_equity == alone.current_equity
+            assert run.strategy.equity_curve == alone.equity_curve
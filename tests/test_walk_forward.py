@@ -0,0 +1,38 @@
+"""make_folds: cửa sổ train/test liên tiếp, cắt ở đầu ngày, không vượt quá data."""
+
+import pandas as pd
+
+from src.walk_forward import make_folds
+
+
+INDEX = pd.date_range("2024-01-01 00:00", "2024-03-31 23:59", freq="1min")
+DAY = pd.Timedelta(days=1)
+
+
+def test_rolling_folds_tile_the_test_period():
+    folds = make_folds(INDEX, train_days=30, test_days=10)
+
+    assert [f.index for f in folds] == list(range(len(folds)))
+    assert folds[0].train_start == pd.Timestamp("2024-01-01")
+    for fold in folds:
+        assert fold.train_end - fold.train_start == 30 * DAY
+        assert fold.test_start == fold.train_end
+        assert fold.test_end <= INDEX[-1] + pd.Timedelta(minutes=1)
+    for prev, nxt in zip(folds, folds[1:]):
+        assert nxt.test_start == prev.test_end
+    # 91 ngày data, train 30 => test 61 ngày: 6 fold đủ 10 ngày + 1 fold cuối 1 ngày
+    assert len(folds) == 7
+    assert folds[-1].test_end - folds[-1].test_start == DAY
+
+
+def test_anchored_and_step():
+    anchored = make_folds(INDEX, train_days=30, test_days=10, anchored=True)
+    assert all(f.train_start == pd.Timestamp("2024-01-01") for f in anchored)
+    assert anchored[-1].train_end - anchored[-1].train_start == (30 + 10 * (len(anchored) - 1)) * DAY
+
+    stepped = make_folds(INDEX, train_days=30, test_days=10, step_days=20)
+    assert stepped[1].train_start - stepped[0].train_start == 20 * DAY
+
+
+def test_no_fold_when_train_covers_data():
+    assert make_folds(INDEX, train_days=91, test_days=10) == []
@@ -0,0 +1,29 @@
+"""CrossYearOptimizer: grid rỗng sau constraints / max_configs trả về [] thay vì lỗi."""
+
+import numpy as np
+import pytest
+
+from src.data_loader import generate_dummy_data, resample_to_m15
+from src.year_matrix import CrossYearOptimizer
+
+
+@pytest.fixture(scope="module")
+def datasets():
+    np.random.seed(3)
+    m1 = generate_dummy_data(days=4)
+    halves = [m1.iloc[:2 * 1440], m1.iloc[2 * 1440:]]
+    return {year: (part, resample_to_m15(part)) for year, part in zip((2023, 2024), halves)}
+
+
+def test_constraints_leaving_no_configs(datasets, capsys):
+    opt = CrossYearOptimizer(
+        datasets, {"r_r_ratio_target": [2.0, 3.0]}, constraints=[lambda cfg: cfg.r_r_ratio_target > 5]
+    )
+    assert opt.run(n_jobs=1) == [] and opt.results == []
+    assert "No configs to run" in capsys.readouterr().out
+    assert opt.matrix().empty
+
+
+def test_max_configs_zero(datasets):
+    opt = CrossYearOptimizer(datasets, {"r_r_ratio_target": [2.0, 3.0]})
+    assert opt.run(n_jobs=1, max_configs=0) == []
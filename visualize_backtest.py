@@ -1,6 +1,7 @@
 """
 Vẽ chart phân tích kết quả backtest
 """
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
@@ -17,6 +18,7 @@ if hasattr(sys.stdout, 'buffer'):
 from src.pinescript_port import PineScriptStrategy
 from src.strategy_config import StrategyConfig
 from src.data_loader import load_dukascopy_csv
+from src.metrics import TradeArrays, compute_metrics, drawdown
 
 def create_visualization(trades, equity_curve, initial_capital):
     """Tạo các chart phân tích"""
@@ -26,16 +28,16 @@ def create_visualization(trades, equity_curve, initial_capital):
     
     # 1. Equity Curve
     ax1 = plt.subplot(3, 2, 1)
-    times = [t.entry_time for t in trades]
-    equities = equity_curve[:len(trades)+1]
+    arrays = TradeArrays.from_trades(trades)
+    equities = np.asarray(equity_curve[:len(trades)+1], dtype=float)
     
     ax1.plot(equities, linewidth=2, color='#2E86AB')
     ax1.axhline(y=initial_capital, color='gray', linestyle='--', alpha=0.5, label='Initial Capital')
     ax1.fill_between(range(len(equities)), initial_capital, equities, 
-                      where=[e >= initial_capital for e in equities], 
+                      where=equities >= initial_capital, 
                       alpha=0.3, color='green', label='Profit')
     ax1.fill_between(range(len(equities)), initial_capital, equities, 
-                      where=[e < initial_capital for e in equities], 
+                      where=equities < initial_capital, 
                       alpha=0.3, color='red', label='Loss')
     ax1.set_title('Equity Curve', fontsize=14, fontweight='bold')
     ax1.set_xlabel('Trade Number')
@@ -45,13 +47,7 @@ def create_visualization(trades, equity_curve, initial_capital):
     
     # 2. Drawdown Chart
     ax2 = plt.subplot(3, 2, 2)
-    peak = initial_capital
-    drawdowns = []
-    for eq in equities:
-        if eq > peak:
-            peak = eq
-        dd = ((eq - peak) / peak) * 100
-        drawdowns.append(dd)
+    drawdowns = -drawdown(equities, initial_capital)[1]
     
     ax2.fill_between(range(len(drawdowns)), 0, drawdowns, alpha=0.5, color='red')
     ax2.plot(drawdowns, linewidth=2, color='darkred')
@@ -63,8 +59,8 @@ def create_visualization(trades, equity_curve, initial_capital):
     
     # 3. PnL Distribution
     ax3 = plt.subplot(3, 2, 3)
-    pnls = [t.pnl for t in trades]
-    colors = ['green' if p > 0 else 'red' for p in pnls]
+    pnls = arrays.pnl
+    colors = np.where(pnls > 0, 'green', 'red')
     ax3.bar(range(len(pnls)), pnls, color=colors, alpha=0.7)
     ax3.axhline(y=0, color='black', linestyle='-', linewidth=1)
     ax3.set_title('PnL per Trade', fontsize=14, fontweight='bold')
@@ -74,8 +70,8 @@ def create_visualization(trades, equity_curve, initial_capital):
     
     # 4. Win/Loss Analysis
     ax4 = plt.subplot(3, 2, 4)
-    wins = [t.pnl for t in trades if t.pnl > 0]
-    losses = [abs(t.pnl) for t in trades if t.pnl < 0]
+    wins = pnls[pnls > 0]
+    losses = -pnls[pnls < 0]
     
     data_to_plot = [wins, losses]
     labels = [f'Wins ({len(wins)})', f'Losses ({len(losses)})']
@@ -92,19 +88,15 @@ def create_visualization(trades, equity_curve, initial_capital):
     
     # 5. Cumulative PnL
     ax5 = plt.subplot(3, 2, 5)
-    cumulative_pnl = []
-    cum = 0
-    for t in trades:
-        cum += t.pnl
-        cumulative_pnl.append(cum)
+    cumulative_pnl = np.cumsum(pnls)
     
     ax5.plot(cumulative_pnl, linewidth=2, color='#A23B72')
     ax5.axhline(y=0, color='gray', linestyle='--', alpha=0.5)
     ax5.fill_between(range(len(cumulative_pnl)), 0, cumulative_pnl,
-                      where=[c >= 0 for c in cumulative_pnl],
+                      where=cumulative_pnl >= 0,
                       alpha=0.3, color='green')
     ax5.fill_between(range(len(cumulative_pnl)), 0, cumulative_pnl,
-                      where=[c < 0 for c in cumulative_pnl],
+                      where=cumulative_pnl < 0,
                       alpha=0.3, color='red')
     ax5.set_title('Cumulative PnL', fontsize=14, fontweight='bold')
     ax5.set_xlabel('Trade Number')
@@ -115,23 +107,9 @@ def create_visualization(trades, equity_curve, initial_capital):
     ax6 = plt.subplot(3, 2, 6)
     ax6.axis('off')
     
-    total_trades = len(trades)
-    winning_trades = len([t for t in trades if t.pnl > 0])
-    losing_trades = len([t for t in trades if t.pnl < 0])
-    win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-    
-    total_profit = sum([t.pnl for t in trades if t.pnl > 0])
-    total_loss = sum([t.pnl for t in trades if t.pnl < 0])
-    profit_factor = abs(total_profit / total_loss) if total_loss != 0 else 0
-    
-    avg_win = sum(wins) / len(wins) if wins else 0
-    avg_loss = sum(losses) / len(losses) if losses else 0
-    
-    final_equity = equities[-1]
-    total_pnl = final_equity - initial_capital
-    total_return = (total_pnl / initial_capital) * 100
-    
-    max_dd = min(drawdowns)
+    m = compute_metrics(arrays, equities, initial_capital)
+    avg_loss = abs(m.avg_loss)
+    win_loss_ratio = m.avg_win / avg_loss if avg_loss > 0 else 0.0
     
     stats_text = f"""
 STATISTICS SUMMARY
@@ -139,27 +117,32 @@ STATISTICS SUMMARY
 
 OVERVIEW:
   Initial Capital:    ${initial_capital:,.0f}
-  Final Equity:       ${final_equity:,.0f}
-  Total PnL:          ${total_pnl:+,.0f} ({total_return:+.2f}%)
+  Final Equity:       ${m.final_equity:,.0f}
+  Total PnL:          ${m.total_pnl:+,.0f} ({m.total_return_pct:+.2f}%)
+  CAGR:               {m.cagr_pct:+.2f}%
 
 TRADES:
-  Total Trades:       {total_trades}
-  Winning Trades:     {winning_trades}
-  Losing Trades:      {losing_trades}
-  Win Rate:           {win_rate:.2f}%
+  Total Trades:       {m.total_trades}
+  Winning Trades:     {m.winning_trades}
+  Losing Trades:      {m.losing_trades}
+  Win Rate:           {m.win_rate:.2f}%
+  Exposure:           {m.exposure_pct:.2f}%
+  Avg Duration:       {m.avg_trade_minutes:,.0f} min
 
 PROFIT/LOSS:
-  Total Profit:       ${total_profit:+,.0f}
-  Total Loss:         ${total_loss:,.0f}
-  Profit Factor:      {profit_factor:.2f}
-  Avg Win:            ${avg_win:+,.0f}
+  Total Profit:       ${m.gross_profit:+,.0f}
+  Total Loss:         ${m.gross_loss:,.0f}
+  Profit Factor:      {m.profit_factor:.2f}
+  Avg Win:            ${m.avg_win:+,.0f}
   Avg Loss:           ${avg_loss:,.0f}
-  Avg Win/Loss:       {abs(avg_win/avg_loss):.2f}x
+  Avg Win/Loss:       {win_loss_ratio:.2f}x
 
 RISK:
-  Max Drawdown:       {max_dd:.2f}%
-  Largest Win:        ${max(pnls):+,.0f}
-  Largest Loss:       ${min(pnls):,.0f}
+  Max Drawdown:       {-m.max_drawdown_pct:.2f}%
+  Sharpe / Sortino:   {m.sharpe_ratio:.2f} / {m.sortino_ratio:.2f}
+  Calmar:             {m.calmar_ratio:.2f}
+  Largest Win:        ${m.largest_win:+,.0f}
+  Largest Loss:       ${m.largest_loss:,.0f}
     """
     
     ax6.text(0.1, 0.5, stats_text, fontsize=10, family='monospace',